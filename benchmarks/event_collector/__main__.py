@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark de ingesta del Event Collector
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.event_collector --eventos 20000 --salida baseline.json
+    python -m benchmarks.event_collector --comparar baseline.json --tolerancia 0.15
+
+Con --comparar el proceso termina con código 1 si alguna métrica empeora más que la tolerancia
+"""
+import sys
+import json
+import logging
+import argparse
+
+from .ejecucion import ConfiguracionBenchmark, ejecutar_benchmark, comparar_con_linea_base
+from .generador import MezclaEventos
+
+
+def _parsear_argumentos(argv):
+    parser = argparse.ArgumentParser(description="Benchmark de ingesta del Event Collector")
+    parser.add_argument("--modo", choices=["handler", "api"], default="handler")
+    parser.add_argument("--eventos", type=int, default=20000)
+    parser.add_argument("--calentamiento", type=int, default=1000)
+    parser.add_argument("--concurrencia", type=int, default=1)
+    parser.add_argument("--latencia-redis-ms", type=float, default=0.0)
+    parser.add_argument("--latencia-pulsar-ms", type=float, default=0.0)
+    parser.add_argument("--backend", choices=["memoria", "memoria_compartida"], default="memoria")
+    parser.add_argument("--formato", choices=["avro", "json"], default="avro")
+    parser.add_argument("--muestra-memoria", type=int, default=2000)
+
+    parser.add_argument("--click", type=float, default=0.45)
+    parser.add_argument("--impression", type=float, default=0.40)
+    parser.add_argument("--conversion", type=float, default=0.05)
+    parser.add_argument("--page-view", type=float, default=0.10)
+    parser.add_argument("--ratio-duplicados", type=float, default=0.02)
+    parser.add_argument("--afiliados", type=int, default=100)
+    parser.add_argument("--sesgo-afiliados", type=float, default=1.1)
+    parser.add_argument("--semilla", type=int, default=42)
+
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el resultado (línea base)")
+    parser.add_argument("--comparar", help="Línea base JSON contra la cual comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.15)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parsear_argumentos(argv)
+    # El handler registra cada evento; en el benchmark solo interesan los errores
+    logging.disable(logging.WARNING)
+
+    configuracion = ConfiguracionBenchmark(
+        modo=args.modo,
+        eventos=args.eventos,
+        calentamiento=args.calentamiento,
+        concurrencia=args.concurrencia,
+        latencia_redis_ms=args.latencia_redis_ms,
+        latencia_pulsar_ms=args.latencia_pulsar_ms,
+        backend=args.backend,
+        formato=args.formato,
+        muestra_memoria=args.muestra_memoria,
+        mezcla=MezclaEventos(
+            click=args.click,
+            impression=args.impression,
+            conversion=args.conversion,
+            page_view=args.page_view,
+            ratio_duplicados=args.ratio_duplicados,
+            afiliados=args.afiliados,
+            sesgo_afiliados=args.sesgo_afiliados,
+            semilla=args.semilla
+        )
+    )
+
+    resultado = ejecutar_benchmark(configuracion)
+    print(json.dumps(resultado['resultados'], indent=2))
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(resultado, archivo, indent=2)
+        print(f"💾 Resultado guardado en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            linea_base = json.load(archivo)
+        regresiones = comparar_con_linea_base(resultado, linea_base, args.tolerancia)
+        if regresiones:
+            print("❌ Regresiones detectadas:")
+            for regresion in regresiones:
+                print(f"   {regresion['metrica']}: {regresion['linea_base']} → {regresion['actual']} "
+                      f"({regresion['variacion']:+.1%})")
+            return 1
+        print(f"✅ Sin regresiones respecto a {args.comparar} (tolerancia {args.tolerancia:.0%})")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""
+Ejecución del benchmark de ingesta y comparación contra una línea base
+"""
+import gc
+import sys
+import time
+import asyncio
+import platform
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Dict, Any, List, Tuple
+from unittest.mock import patch
+
+from src.aeropartners.modulos.event_collector import factory as ec_factory
+from src.aeropartners.modulos.event_collector.aplicacion.handlers import ProcesarEventoTrackingHandler
+from src.aeropartners.modulos.event_collector.factory import EventCollectorFactory
+from src.aeropartners.modulos.event_collector.infraestructura.adaptadores import PulsarEventPublisher
+from src.aeropartners.modulos.event_collector.infraestructura.repositorios import (
+    InMemoryRepositorioEventos, InMemoryRepositorioRateLimiting
+)
+
+from .dobles import RepositorioConLatencia, RepositorioAfiliadosBenchmark, ClientePulsarSimulado
+from .generador import MezclaEventos, GeneradorEventos, a_comando
+
+VERSION_FORMATO = 1
+
+# Métricas comparadas contra la línea base y si un valor mayor es mejor
+METRICAS_COMPARADAS = {
+    ("eventos_por_segundo",): True,
+    ("latencia_ms", "p50"): False,
+    ("latencia_ms", "p95"): False,
+    ("latencia_ms", "p99"): False,
+    ("memoria", "bytes_transitorios_por_evento"): False,
+    ("memoria", "bytes_retenidos_por_evento"): False
+}
+
+
+@dataclass
+class ConfiguracionBenchmark:
+    modo: str = "handler"  # handler: ProcesarEventoTrackingHandler directo | api: app FastAPI en proceso
+    eventos: int = 20000
+    calentamiento: int = 1000
+    concurrencia: int = 1
+    latencia_redis_ms: float = 0.0
+    latencia_pulsar_ms: float = 0.0
+    backend: str = "memoria"  # memoria | memoria_compartida
+    formato: str = "avro"
+    muestra_memoria: int = 2000
+    mezcla: MezclaEventos = field(default_factory=MezclaEventos)
+
+
+class FabricaBenchmark(EventCollectorFactory):
+    """
+    El factory de producción con Redis, Pulsar y el servicio de afiliados reemplazados por dobles;
+    el resto de la composición (validación, enriquecimiento, filtrado, atribución) es la real
+    """
+
+    def __init__(self, configuracion: "ConfiguracionBenchmark"):
+        super().__init__()
+        self.configuracion = configuracion
+        self.cliente_pulsar = ClientePulsarSimulado(configuracion.latencia_pulsar_ms)
+        self._directorio_shm = None
+
+    def _create_eventos_repository(self):
+        if 'eventos' not in self._repositories_cache:
+            if self.configuracion.backend == "memoria_compartida":
+                from src.aeropartners.modulos.event_collector.infraestructura.memoria_compartida import (
+                    SharedMemoryRepositorioEventos
+                )
+                base = SharedMemoryRepositorioEventos(directorio=self._directorio_memoria_compartida())
+            else:
+                base = InMemoryRepositorioEventos()
+            self._repositories_cache['eventos'] = RepositorioConLatencia(base, self.configuracion.latencia_redis_ms)
+        return self._repositories_cache['eventos']
+
+    def _create_rate_limiting_repository(self):
+        if 'rate_limiting' not in self._repositories_cache:
+            if self.configuracion.backend == "memoria_compartida":
+                from src.aeropartners.modulos.event_collector.infraestructura.memoria_compartida import (
+                    SharedMemoryRepositorioRateLimiting
+                )
+                base = SharedMemoryRepositorioRateLimiting(directorio=self._directorio_memoria_compartida())
+            else:
+                base = InMemoryRepositorioRateLimiting()
+            self._repositories_cache['rate_limiting'] = RepositorioConLatencia(
+                base, self.configuracion.latencia_redis_ms
+            )
+        return self._repositories_cache['rate_limiting']
+
+    def _create_afiliados_repository(self):
+        if 'afiliados' not in self._repositories_cache:
+            self._repositories_cache['afiliados'] = RepositorioAfiliadosBenchmark()
+        return self._repositories_cache['afiliados']
+
+    def _create_publicacion_service(self):
+        if 'publicacion' not in self._services_cache:
+            self._services_cache['publicacion'] = PulsarEventPublisher(
+                formato=self.configuracion.formato, client=self.cliente_pulsar
+            )
+        return self._services_cache['publicacion']
+
+    def _directorio_memoria_compartida(self) -> str:
+        if self._directorio_shm is None:
+            import tempfile
+            self._directorio_shm = tempfile.mkdtemp(prefix="bench-shm-")
+        return self._directorio_shm
+
+
+def crear_handler(configuracion: ConfiguracionBenchmark) -> Tuple[ProcesarEventoTrackingHandler, ClientePulsarSimulado]:
+    """Arma el handler con el factory de producción, sin Redis ni Pulsar"""
+    fabrica = FabricaBenchmark(configuracion)
+    return fabrica.crear_handler_procesar_evento(), fabrica.cliente_pulsar
+
+
+class _EjecutorHandler:
+    def __init__(self, handler: ProcesarEventoTrackingHandler):
+        self.handler = handler
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def enviar(self, evento: Dict[str, Any]) -> str:
+        resultado = await self.handler.handle(a_comando(evento))
+        return resultado.get('estado') or ('PUBLICADO' if resultado.get('exito') else 'ERROR')
+
+
+class _EjecutorAPI:
+    """Envía los eventos a la app FastAPI por ASGI, sin sockets"""
+
+    def __init__(self, handler: ProcesarEventoTrackingHandler):
+        self.handler = handler
+
+    async def __aenter__(self):
+        import httpx
+        from fastapi import FastAPI
+        from src.aeropartners.api.event_collector import router
+
+        app = FastAPI()
+        app.include_router(router)
+        self._parche = patch.object(ec_factory, 'get_procesar_evento_handler', return_value=self.handler)
+        self._parche.start()
+        self._cliente = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark")
+        return self
+
+    async def __aexit__(self, *args):
+        await self._cliente.aclose()
+        self._parche.stop()
+
+    async def enviar(self, evento: Dict[str, Any]) -> str:
+        respuesta = await self._cliente.post(
+            "/event-collector/events",
+            json=evento["cuerpo"],
+            headers={"User-Agent": evento["user_agent"], "X-Session-ID": evento["session_id"]}
+        )
+        if respuesta.status_code >= 400:
+            return f"HTTP_{respuesta.status_code}"
+        return respuesta.json().get('estado') or 'ERROR'
+
+
+def _percentil(valores_ordenados: List[float], percentil: float) -> float:
+    if not valores_ordenados:
+        return 0.0
+    indice = min(len(valores_ordenados) - 1, int(round(percentil / 100 * (len(valores_ordenados) - 1))))
+    return valores_ordenados[indice]
+
+
+async def _medir_latencias(ejecutor, eventos: List[Dict[str, Any]], concurrencia: int) -> Tuple[List[float], Counter, float]:
+    latencias: List[float] = []
+    estados: Counter = Counter()
+    cola = iter(eventos)
+
+    async def trabajador():
+        for evento in cola:
+            inicio = time.perf_counter_ns()
+            estado = await ejecutor.enviar(evento)
+            latencias.append((time.perf_counter_ns() - inicio) / 1e6)
+            estados[estado] += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+    return latencias, estados, time.perf_counter() - inicio
+
+
+async def _medir_memoria(ejecutor, eventos: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Memoria transitoria (pico) y retenida por evento, procesando en serie bajo tracemalloc"""
+    if not eventos:
+        return {'bytes_transitorios_por_evento': 0.0, 'bytes_retenidos_por_evento': 0.0}
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        transitorios = 0
+        retenido_inicial = tracemalloc.get_traced_memory()[0]
+        for evento in eventos:
+            actual = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            await ejecutor.enviar(evento)
+            transitorios += tracemalloc.get_traced_memory()[1] - actual
+        gc.collect()
+        retenido = tracemalloc.get_traced_memory()[0] - retenido_inicial
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'bytes_transitorios_por_evento': round(transitorios / len(eventos), 1),
+        'bytes_retenidos_por_evento': round(retenido / len(eventos), 1)
+    }
+
+
+async def _ejecutar(configuracion: ConfiguracionBenchmark) -> Dict[str, Any]:
+    handler, cliente_pulsar = crear_handler(configuracion)
+    generador = GeneradorEventos(configuracion.mezcla)
+
+    calentamiento = generador.generar(configuracion.calentamiento)
+    medidos = generador.generar(configuracion.eventos)
+    muestra_memoria = generador.generar(configuracion.muestra_memoria)
+
+    clase_ejecutor = _EjecutorAPI if configuracion.modo == "api" else _EjecutorHandler
+    async with clase_ejecutor(handler) as ejecutor:
+        await _medir_latencias(ejecutor, calentamiento, configuracion.concurrencia)
+        mensajes_previos, bytes_previos = cliente_pulsar.mensajes_publicados, cliente_pulsar.bytes_publicados
+
+        gc.collect()
+        latencias, estados, duracion = await _medir_latencias(ejecutor, medidos, configuracion.concurrencia)
+        mensajes = cliente_pulsar.mensajes_publicados - mensajes_previos
+        bytes_publicados = cliente_pulsar.bytes_publicados - bytes_previos
+
+        memoria = await _medir_memoria(ejecutor, muestra_memoria)
+
+    latencias.sort()
+    return {
+        'eventos': len(latencias),
+        'duracion_segundos': round(duracion, 4),
+        'eventos_por_segundo': round(len(latencias) / duracion, 1) if duracion else 0.0,
+        'latencia_ms': {
+            'media': round(sum(latencias) / len(latencias), 4) if latencias else 0.0,
+            'p50': round(_percentil(latencias, 50), 4),
+            'p95': round(_percentil(latencias, 95), 4),
+            'p99': round(_percentil(latencias, 99), 4),
+            'max': round(latencias[-1], 4) if latencias else 0.0
+        },
+        'resultados_por_estado': dict(estados),
+        'bytes_por_mensaje': round(bytes_publicados / mensajes, 1) if mensajes else 0.0,
+        'memoria': memoria
+    }
+
+
+def ejecutar_benchmark(configuracion: ConfiguracionBenchmark) -> Dict[str, Any]:
+    """Ejecuta el benchmark y devuelve el resultado en el formato de línea base"""
+    return {
+        'benchmark': 'event_collector_ingesta',
+        'version_formato': VERSION_FORMATO,
+        'fecha': datetime.now().isoformat(),
+        'entorno': {
+            'python': platform.python_version(),
+            'implementacion': platform.python_implementation(),
+            'plataforma': platform.platform(),
+            'procesador': platform.processor() or platform.machine()
+        },
+        'configuracion': asdict(configuracion),
+        'resultados': asyncio.run(_ejecutar(configuracion))
+    }
+
+
+def _obtener(resultados: Dict[str, Any], ruta: Tuple[str, ...]):
+    valor = resultados
+    for clave in ruta:
+        valor = valor.get(clave) if isinstance(valor, dict) else None
+    return valor
+
+
+def comparar_con_linea_base(
+    actual: Dict[str, Any],
+    linea_base: Dict[str, Any],
+    tolerancia: float = 0.15
+) -> List[Dict[str, Any]]:
+    """
+    Compara las métricas del camino crítico contra la línea base
+    Retorna las regresiones que superan la tolerancia relativa
+    """
+    if actual['configuracion'] != linea_base.get('configuracion'):
+        print("⚠️  La configuración difiere de la línea base; la comparación puede no ser representativa",
+              file=sys.stderr)
+
+    regresiones = []
+    for ruta, mayor_es_mejor in METRICAS_COMPARADAS.items():
+        valor_actual = _obtener(actual['resultados'], ruta)
+        valor_base = _obtener(linea_base.get('resultados', {}), ruta)
+        if not valor_base or valor_actual is None:
+            continue
+
+        variacion = (valor_actual - valor_base) / valor_base
+        empeora = -variacion if mayor_es_mejor else variacion
+        if empeora > tolerancia:
+            regresiones.append({
+                'metrica': ".".join(ruta),
+                'linea_base': valor_base,
+                'actual': valor_actual,
+                'variacion': round(variacion, 4)
+            })
+    return regresiones
@@ -0,0 +1,111 @@
+"""
+Generación reproducible de eventos de tracking para el benchmark
+"""
+import random
+import itertools
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Dict, Any, List
+
+from src.aeropartners.modulos.event_collector.aplicacion.comandos import ProcesarEventoTrackingCommand
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15"
+]
+
+
+@dataclass
+class MezclaEventos:
+    """Proporciones de tipos de evento, duplicados y sesgo entre afiliados"""
+    click: float = 0.45
+    impression: float = 0.40
+    conversion: float = 0.05
+    page_view: float = 0.10
+    ratio_duplicados: float = 0.02
+    afiliados: int = 100
+    # Exponente de Zipf: 0 reparte uniforme, valores mayores concentran el tráfico
+    sesgo_afiliados: float = 1.1
+    sesiones_por_afiliado: int = 50
+    semilla: int = 42
+
+    def como_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class GeneradorEventos:
+    """Genera eventos según la mezcla; la misma semilla produce la misma secuencia"""
+
+    MAX_HISTORIAL = 10000
+
+    def __init__(self, mezcla: MezclaEventos):
+        self.mezcla = mezcla
+        self._historial: List[Dict[str, Any]] = []
+        self._aleatorio = random.Random(self.mezcla.semilla)
+        self._tipos = ["CLICK", "IMPRESSION", "CONVERSION", "PAGE_VIEW"]
+        self._pesos_tipos = list(itertools.accumulate([
+            self.mezcla.click, self.mezcla.impression, self.mezcla.conversion, self.mezcla.page_view
+        ]))
+        self._pesos_afiliados = list(itertools.accumulate(
+            1 / (rango ** self.mezcla.sesgo_afiliados) for rango in range(1, self.mezcla.afiliados + 1)
+        ))
+        self._secuencia = itertools.count()
+
+    def generar(self, cantidad: int) -> List[Dict[str, Any]]:
+        """Genera cuerpos de POST /event-collector/events más su IP y User-Agent"""
+        return [self._siguiente() for _ in range(cantidad)]
+
+    def _siguiente(self) -> Dict[str, Any]:
+        if self._historial and self._aleatorio.random() < self.mezcla.ratio_duplicados:
+            # Reintento del SDK: mismo cuerpo, mismo timestamp, mismo hash
+            return dict(self._aleatorio.choice(self._historial), duplicado=True)
+
+        aleatorio = self._aleatorio
+        tipo = aleatorio.choices(self._tipos, cum_weights=self._pesos_tipos)[0]
+        afiliado = aleatorio.choices(range(self.mezcla.afiliados), cum_weights=self._pesos_afiliados)[0]
+        sesion = aleatorio.randrange(self.mezcla.sesiones_por_afiliado)
+        secuencia = next(self._secuencia)
+
+        evento = {
+            "cuerpo": {
+                "tipo_evento": tipo,
+                "id_afiliado": f"afiliado_bench_{afiliado}",
+                "timestamp": datetime.now().isoformat(),
+                "url": f"https://tienda.example/producto/{secuencia % 500}",
+                "parametros_tracking": {"utm_source": "benchmark", "utm_medium": "cpc"},
+                "datos_custom": {"secuencia": secuencia},
+                "identificador_dispositivo": f"dispositivo_{afiliado}_{sesion}"
+            },
+            "ip_origen": f"10.{afiliado % 256}.{sesion % 256}.{secuencia % 256}",
+            "user_agent": USER_AGENTS[secuencia % len(USER_AGENTS)],
+            "session_id": f"sesion_{afiliado}_{sesion}",
+            "duplicado": False
+        }
+        if tipo == "CONVERSION":
+            evento["cuerpo"]["valor_conversion"] = round(aleatorio.uniform(5, 500), 2)
+            evento["cuerpo"]["moneda"] = "USD"
+
+        if len(self._historial) < self.MAX_HISTORIAL:
+            self._historial.append(evento)
+        return evento
+
+
+def a_comando(evento: Dict[str, Any]) -> ProcesarEventoTrackingCommand:
+    """Convierte un evento generado en el comando que construye la API"""
+    cuerpo = evento["cuerpo"]
+    return ProcesarEventoTrackingCommand(
+        tipo_evento=cuerpo["tipo_evento"],
+        id_afiliado=cuerpo["id_afiliado"],
+        timestamp=datetime.fromisoformat(cuerpo["timestamp"]),
+        url=cuerpo.get("url"),
+        parametros_tracking=cuerpo.get("parametros_tracking"),
+        datos_custom=cuerpo.get("datos_custom"),
+        valor_conversion=cuerpo.get("valor_conversion"),
+        moneda=cuerpo.get("moneda"),
+        ip_origen=evento["ip_origen"],
+        user_agent=evento["user_agent"],
+        session_id=evento["session_id"],
+        identificador_dispositivo=cuerpo.get("identificador_dispositivo")
+    )
@@ -0,0 +1,37 @@
+"""Notificar inserciones en el outbox de pagos (LISTEN/NOTIFY)
+
+Revision ID: 003
+Revises: 002
+Create Date: 2024-12-20 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notificar_outbox_pagos() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('outbox_pagos', '');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    # El worker instala el mismo trigger al iniciar: la migración debe tolerar que ya exista
+    op.execute("DROP TRIGGER IF EXISTS outbox_pagos_notificar ON outbox;")
+    op.execute("""
+        CREATE TRIGGER outbox_pagos_notificar
+            AFTER INSERT ON outbox
+            FOR EACH STATEMENT EXECUTE FUNCTION notificar_outbox_pagos();
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS outbox_pagos_notificar ON outbox;")
+    op.execute("DROP FUNCTION IF EXISTS notificar_outbox_pagos();")
@@ -0,0 +1,47 @@
+"""Índices parciales del outbox de pagos y tabla de archivo
+
+Revision ID: 004
+Revises: 003
+Create Date: 2024-12-20 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CONCURRENTLY no bloquea las escrituras del outbox mientras se construyen los índices
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_outbox_pendientes', 'outbox', ['fecha_creacion'],
+            postgresql_where=sa.text('procesado = false'), postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_outbox_procesados', 'outbox', ['fecha_procesamiento'],
+            postgresql_where=sa.text('procesado = true'), postgresql_concurrently=True
+        )
+
+    op.create_table('outbox_archivo',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tipo_evento', sa.String(length=100), nullable=False),
+        sa.Column('datos_evento', sa.Text(), nullable=False),
+        sa.Column('procesado', sa.Boolean(), nullable=False),
+        sa.Column('fecha_creacion', sa.DateTime(), nullable=False),
+        sa.Column('fecha_procesamiento', sa.DateTime(), nullable=True),
+        sa.Column('fecha_archivado', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('outbox_archivo')
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_outbox_procesados', table_name='outbox', postgresql_concurrently=True)
+        op.drop_index('ix_outbox_pendientes', table_name='outbox', postgresql_concurrently=True)
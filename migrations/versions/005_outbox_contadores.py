@@ -0,0 +1,31 @@
+"""Contadores incrementales de los outbox
+
+Revision ID: 005
+Revises: 004
+Create Date: 2024-12-20 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Los contadores se inicializan con un recuento en la primera lectura de estadísticas
+    op.create_table('outbox_contadores',
+        sa.Column('outbox', sa.String(length=50), nullable=False),
+        sa.Column('tipo_evento', sa.String(length=100), nullable=False),
+        sa.Column('shard', sa.Integer(), nullable=False),
+        sa.Column('total', sa.BigInteger(), nullable=False),
+        sa.Column('procesados', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('outbox', 'tipo_evento', 'shard')
+    )
+
+
+def downgrade():
+    op.drop_table('outbox_contadores')
@@ -0,0 +1,31 @@
+"""Inbox del consumidor de pagos
+
+Revision ID: 006
+Revises: 005
+Create Date: 2024-12-21 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('inbox_pagos',
+        sa.Column('id_evento', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tipo_evento', sa.String(length=100), nullable=False),
+        sa.Column('fecha_procesamiento', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id_evento')
+    )
+    op.create_index('ix_inbox_pagos_fecha_procesamiento', 'inbox_pagos', ['fecha_procesamiento'])
+
+
+def downgrade():
+    op.drop_index('ix_inbox_pagos_fecha_procesamiento', table_name='inbox_pagos')
+    op.drop_table('inbox_pagos')
@@ -0,0 +1,33 @@
+"""Claves de idempotencia de la API
+
+Revision ID: 007
+Revises: 006
+Create Date: 2024-12-21 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('claves_idempotencia',
+        sa.Column('ambito', sa.String(length=50), nullable=False),
+        sa.Column('clave', sa.String(length=255), nullable=False),
+        sa.Column('huella', sa.String(length=64), nullable=False),
+        sa.Column('estado_http', sa.Integer(), nullable=False),
+        sa.Column('respuesta', sa.Text(), nullable=False),
+        sa.Column('fecha_creacion', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('ambito', 'clave')
+    )
+    op.create_index('ix_claves_idempotencia_fecha_creacion', 'claves_idempotencia', ['fecha_creacion'])
+
+
+def downgrade():
+    op.drop_index('ix_claves_idempotencia_fecha_creacion', table_name='claves_idempotencia')
+    op.drop_table('claves_idempotencia')
@@ -0,0 +1,24 @@
+"""Versión de los pagos para transiciones condicionales
+
+Revision ID: 008
+Revises: 007
+Create Date: 2024-12-22 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Con DEFAULT constante PostgreSQL agrega la columna sin reescribir la tabla
+    op.add_column('pagos', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    op.drop_column('pagos', 'version')
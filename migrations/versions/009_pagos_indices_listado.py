@@ -0,0 +1,33 @@
+"""Índices de pagos para el listado paginado por keyset
+
+Revision ID: 009
+Revises: 008
+Create Date: 2024-12-22 16:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CONCURRENTLY no bloquea la creación de pagos mientras se construyen los índices
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_pagos_fecha_creacion_id', 'pagos', ['fecha_creacion', 'id'],
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_pagos_afiliado_fecha_creacion_id', 'pagos', ['id_afiliado', 'fecha_creacion', 'id'],
+            postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_pagos_afiliado_fecha_creacion_id', table_name='pagos', postgresql_concurrently=True)
+        op.drop_index('ix_pagos_fecha_creacion_id', table_name='pagos', postgresql_concurrently=True)
@@ -0,0 +1,27 @@
+"""Índice de pagos por estado y fecha de actualización para la reconciliación
+
+Revision ID: 010
+Revises: 009
+Create Date: 2024-12-23 09:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_pagos_estado_fecha_actualizacion', 'pagos', ['estado', 'fecha_actualizacion'],
+            postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_pagos_estado_fecha_actualizacion', table_name='pagos', postgresql_concurrently=True)
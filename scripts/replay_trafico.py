@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Reproduce capturas de tráfico HTTP (JSONL) contra la API de Aeropartners
+
+Formato de captura: una petición por línea
+    {"ts": "2024-05-10T14:30:15.123", "method": "POST", "path": "/event-collector/events",
+     "query": {"ventana_minutos": 5}, "headers": {"User-Agent": "..."}, "body": {...}}
+- ts: ISO-8601 o epoch en segundos (float); las líneas deben venir en orden de llegada
+- query, headers y body son opcionales; body se envía como JSON
+
+Modos de ritmo:
+- original: respeta los intervalos entre peticiones de la captura
+- escalado: comprime el tiempo por --factor (p.ej. un día completo en una hora con --factor 24)
+- maximo:   ignora los timestamps y envía tan rápido como permita la concurrencia
+
+Modelos de concurrencia:
+- abierto: cada petición sale en su instante programado sin esperar a las anteriores
+           (acotado por --max-en-vuelo); mide la latencia que vería el tráfico real
+- cerrado: --concurrencia trabajadores envían de a una petición y esperan la respuesta
+
+Uso:
+    python scripts/replay_trafico.py captura.jsonl --url http://localhost:8000 --modo escalado --factor 24
+"""
+import sys
+import json
+import math
+import time
+import asyncio
+import argparse
+import re
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+import aiohttp
+
+
+PATRON_UUID = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
+PATRON_NUMERICO = re.compile(r"^\d+$")
+
+
+class HistogramaLatencias:
+    """
+    Histograma logarítmico de latencias en milisegundos
+    Memoria constante sin importar la cantidad de muestras (error relativo ~2%)
+    """
+
+    PRECISION = 1.02
+    LIMITES_TABLA_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+    def __init__(self):
+        self.cubetas: Dict[int, int] = defaultdict(int)
+        self.total = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+
+    def registrar(self, latencia_ms: float) -> None:
+        self.cubetas[self._indice(latencia_ms)] += 1
+        self.total += 1
+        self.suma += latencia_ms
+        self.maximo = max(self.maximo, latencia_ms)
+
+    def percentil(self, percentil: float) -> float:
+        if not self.total:
+            return 0.0
+        objetivo = math.ceil(percentil / 100 * self.total)
+        acumulado = 0
+        for indice in sorted(self.cubetas):
+            acumulado += self.cubetas[indice]
+            if acumulado >= objetivo:
+                return min(self._limite_superior(indice), self.maximo)
+        return self.maximo
+
+    def tabla(self) -> Dict[str, int]:
+        """Conteo por rangos fijos, para inspección visual"""
+        conteos: Dict[str, int] = defaultdict(int)
+        for indice, cantidad in self.cubetas.items():
+            valor = self._limite_superior(indice)
+            limite = next((l for l in self.LIMITES_TABLA_MS if valor <= l), None)
+            conteos[f"<={limite}ms" if limite else f">{self.LIMITES_TABLA_MS[-1]}ms"] += cantidad
+        orden = [f"<={l}ms" for l in self.LIMITES_TABLA_MS] + [f">{self.LIMITES_TABLA_MS[-1]}ms"]
+        return {rango: conteos[rango] for rango in orden if conteos.get(rango)}
+
+    def resumen(self) -> Dict[str, Any]:
+        return {
+            'peticiones': self.total,
+            'media_ms': round(self.suma / self.total, 3) if self.total else 0.0,
+            'p50_ms': round(self.percentil(50), 3),
+            'p95_ms': round(self.percentil(95), 3),
+            'p99_ms': round(self.percentil(99), 3),
+            'max_ms': round(self.maximo, 3),
+            'histograma': self.tabla()
+        }
+
+    def _indice(self, valor_ms: float) -> int:
+        return math.floor(math.log(max(valor_ms, 0.001), self.PRECISION))
+
+    def _limite_superior(self, indice: int) -> float:
+        return self.PRECISION ** (indice + 1)
+
+
+def normalizar_ruta(ruta: str) -> str:
+    """
+    Agrupa rutas con identificadores: /pagos/<uuid> -> /pagos/{id}
+    Solo UUIDs y segmentos numéricos: /v2 u /oauth2 son parte de la ruta, no identificadores
+    """
+    segmentos = [
+        "{id}" if PATRON_UUID.match(segmento) or PATRON_NUMERICO.match(segmento) else segmento
+        for segmento in ruta.split("?")[0].split("/")
+    ]
+    return "/".join(segmentos)
+
+
+def _a_epoch(ts) -> float:
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    return datetime.fromisoformat(ts).timestamp()
+
+
+def leer_captura(ruta: str, prefijo: Optional[str] = None) -> Iterator[Tuple[float, Dict[str, Any]]]:
+    """Lee la captura de forma incremental; ignora líneas vacías o inválidas"""
+    with open(ruta, encoding="utf-8") as archivo:
+        for numero, linea in enumerate(archivo, start=1):
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                peticion = json.loads(linea)
+                instante = _a_epoch(peticion["ts"])
+                peticion["method"], peticion["path"]
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"⚠️  Línea {numero} ignorada: {e}", file=sys.stderr)
+                continue
+            if prefijo and not peticion["path"].startswith(prefijo):
+                continue
+            yield instante, peticion
+
+
+class Reproductor:
+
+    def __init__(self, url_base: str, modo: str = "original", factor: float = 1.0,
+                 modelo: str = "abierto", concurrencia: int = 10, max_en_vuelo: int = 1000,
+                 timeout_segundos: float = 30.0):
+        self.url_base = url_base.rstrip("/")
+        self.modo = modo
+        self.factor = factor if modo == "escalado" else 1.0
+        self.modelo = modelo
+        self.concurrencia = concurrencia
+        self.max_en_vuelo = max_en_vuelo
+        self.timeout = aiohttp.ClientTimeout(total=timeout_segundos)
+
+        self.histogramas: Dict[Tuple[str, str, str], HistogramaLatencias] = defaultdict(HistogramaLatencias)
+        self.retraso_despacho = HistogramaLatencias()
+        self.enviadas = 0
+        self._inicio_reloj = 0.0
+        self._inicio_captura: Optional[float] = None
+
+    async def reproducir(self, peticiones: Iterator[Tuple[float, Dict[str, Any]]]) -> float:
+        conector = aiohttp.TCPConnector(limit=max(self.concurrencia, self.max_en_vuelo))
+        async with aiohttp.ClientSession(connector=conector, timeout=self.timeout) as sesion:
+            self._inicio_reloj = time.monotonic()
+            if self.modelo == "cerrado":
+                await self._modelo_cerrado(sesion, peticiones)
+            else:
+                await self._modelo_abierto(sesion, peticiones)
+        return time.monotonic() - self._inicio_reloj
+
+    async def _modelo_abierto(self, sesion, peticiones) -> None:
+        en_vuelo = asyncio.Semaphore(self.max_en_vuelo)
+        tareas = set()
+
+        async def enviar_y_liberar(peticion):
+            try:
+                await self._enviar(sesion, peticion)
+            finally:
+                en_vuelo.release()
+
+        for instante, peticion in peticiones:
+            await self._esperar_turno(instante)
+            await en_vuelo.acquire()
+            tarea = asyncio.create_task(enviar_y_liberar(peticion))
+            tareas.add(tarea)
+            tarea.add_done_callback(tareas.discard)
+
+        if tareas:
+            await asyncio.gather(*tareas)
+
+    async def _modelo_cerrado(self, sesion, peticiones) -> None:
+        lock = asyncio.Lock()
+
+        async def trabajador():
+            while True:
+                async with lock:
+                    siguiente = next(peticiones, None)
+                    if siguiente is None:
+                        return
+                    await self._esperar_turno(siguiente[0])
+                await self._enviar(sesion, siguiente[1])
+
+        await asyncio.gather(*(trabajador() for _ in range(self.concurrencia)))
+
+    async def _esperar_turno(self, instante: float) -> None:
+        if self.modo == "maximo":
+            return
+        if self._inicio_captura is None:
+            self._inicio_captura = instante
+
+        objetivo = (instante - self._inicio_captura) / self.factor
+        transcurrido = time.monotonic() - self._inicio_reloj
+        if objetivo > transcurrido:
+            await asyncio.sleep(objetivo - transcurrido)
+        else:
+            # El reproductor va atrasado respecto a la captura
+            self.retraso_despacho.registrar((transcurrido - objetivo) * 1000)
+
+    async def _enviar(self, sesion: aiohttp.ClientSession, peticion: Dict[str, Any]) -> None:
+        metodo = peticion["method"].upper()
+        clave_ruta = normalizar_ruta(peticion["path"])
+        inicio = time.perf_counter()
+        try:
+            async with sesion.request(
+                metodo,
+                f"{self.url_base}{peticion['path']}",
+                params=peticion.get("query"),
+                headers=peticion.get("headers"),
+                json=peticion.get("body")
+            ) as respuesta:
+                await respuesta.read()
+                estado = str(respuesta.status)
+        except asyncio.TimeoutError:
+            estado = "timeout"
+        except aiohttp.ClientError as e:
+            estado = type(e).__name__
+
+        self.histogramas[(metodo, clave_ruta, estado)].registrar((time.perf_counter() - inicio) * 1000)
+        self.enviadas += 1
+
+    def reporte(self, duracion_segundos: float) -> Dict[str, Any]:
+        return {
+            'configuracion': {
+                'url': self.url_base,
+                'modo': self.modo,
+                'factor': self.factor,
+                'modelo': self.modelo,
+                'concurrencia': self.concurrencia if self.modelo == "cerrado" else None,
+                'max_en_vuelo': self.max_en_vuelo if self.modelo == "abierto" else None
+            },
+            'peticiones': self.enviadas,
+            'duracion_segundos': round(duracion_segundos, 3),
+            'peticiones_por_segundo': round(self.enviadas / duracion_segundos, 1) if duracion_segundos else 0.0,
+            'retraso_despacho': self.retraso_despacho.resumen(),
+            'endpoints': [
+                {'metodo': metodo, 'ruta': ruta, 'estado': estado, **histograma.resumen()}
+                for (metodo, ruta, estado), histograma in sorted(self.histogramas.items())
+            ]
+        }
+
+
+def imprimir_reporte(reporte: Dict[str, Any]) -> None:
+    print(f"\n📊 {reporte['peticiones']} peticiones en {reporte['duracion_segundos']}s "
+          f"({reporte['peticiones_por_segundo']} req/s)")
+    retraso = reporte['retraso_despacho']
+    if retraso['peticiones']:
+        print(f"⚠️  {retraso['peticiones']} peticiones salieron tarde (p99 {retraso['p99_ms']} ms): "
+              f"el reproductor no alcanzó el ritmo de la captura")
+
+    print(f"\n{'MÉTODO':<7} {'RUTA':<45} {'ESTADO':<8} {'N':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for fila in reporte['endpoints']:
+        print(f"{fila['metodo']:<7} {fila['ruta']:<45} {fila['estado']:<8} {fila['peticiones']:>8} "
+              f"{fila['p50_ms']:>9.2f} {fila['p95_ms']:>9.2f} {fila['p99_ms']:>9.2f} {fila['max_ms']:>9.2f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Reproduce capturas JSONL de tráfico HTTP")
+    parser.add_argument("captura", help="Archivo JSONL con las peticiones capturadas")
+    parser.add_argument("--url", default="http://localhost:8000", help="URL base de la API")
+    parser.add_argument("--modo", choices=["original", "escalado", "maximo"], default="original")
+    parser.add_argument("--factor", type=float, default=1.0, help="Compresión temporal en modo escalado")
+    parser.add_argument("--modelo", choices=["abierto", "cerrado"], default="abierto")
+    parser.add_argument("--concurrencia", type=int, default=10, help="Trabajadores del modelo cerrado")
+    parser.add_argument("--max-en-vuelo", type=int, default=1000, help="Límite de peticiones simultáneas del modelo abierto")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout por petición en segundos")
+    parser.add_argument("--prefijo", help="Solo reproducir rutas con este prefijo (p.ej. /event-collector)")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el reporte")
+    args = parser.parse_args(argv)
+
+    if args.modo == "escalado" and args.factor <= 0:
+        parser.error("--factor debe ser mayor que 0")
+
+    reproductor = Reproductor(
+        url_base=args.url,
+        modo=args.modo,
+        factor=args.factor,
+        modelo=args.modelo,
+        concurrencia=args.concurrencia,
+        max_en_vuelo=args.max_en_vuelo,
+        timeout_segundos=args.timeout
+    )
+    duracion = asyncio.run(reproductor.reproducir(leer_captura(args.captura, args.prefijo)))
+    reporte = reproductor.reporte(duracion)
+    imprimir_reporte(reporte)
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(reporte, archivo, indent=2)
+        print(f"\n💾 Reporte guardado en {args.salida}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
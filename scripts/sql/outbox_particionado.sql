@@ -0,0 +1,106 @@
+-- Layout opcional del outbox de pagos particionado por día (fecha_creacion)
+--
+-- Con la tabla particionada, la retención (RetencionOutbox) descarta particiones completas
+-- en lugar de borrar filas: DROP TABLE es instantáneo y no deja bloat.
+--
+-- Aplicar en una ventana de mantenimiento con el worker del outbox detenido:
+--   psql "$DATABASE_URL" -f scripts/sql/outbox_particionado.sql
+-- Los eventos pendientes se copian a la nueva tabla; los ya procesados quedan en outbox_legacy
+-- y pueden eliminarse (DROP TABLE outbox_legacy) una vez verificada la migración.
+
+BEGIN;
+
+ALTER TABLE outbox RENAME TO outbox_legacy;
+ALTER INDEX IF EXISTS ix_outbox_pendientes RENAME TO ix_outbox_legacy_pendientes;
+ALTER INDEX IF EXISTS ix_outbox_procesados RENAME TO ix_outbox_legacy_procesados;
+DROP TRIGGER IF EXISTS outbox_pagos_notificar ON outbox_legacy;
+
+-- La clave primaria debe incluir la clave de partición
+CREATE TABLE outbox (
+    id UUID NOT NULL,
+    tipo_evento VARCHAR(100) NOT NULL,
+    datos_evento TEXT NOT NULL,
+    procesado BOOLEAN NOT NULL DEFAULT false,
+    fecha_creacion TIMESTAMP NOT NULL DEFAULT now(),
+    fecha_procesamiento TIMESTAMP,
+    PRIMARY KEY (id, fecha_creacion)
+) PARTITION BY RANGE (fecha_creacion);
+
+CREATE INDEX ix_outbox_pendientes ON outbox (fecha_creacion) WHERE procesado = false;
+CREATE INDEX ix_outbox_procesados ON outbox (fecha_procesamiento) WHERE procesado = true;
+
+-- Recibe filas fuera de las particiones diarias (p.ej. pendientes migrados de fechas pasadas)
+CREATE TABLE outbox_default PARTITION OF outbox DEFAULT;
+
+-- Crea las particiones diarias outbox_pYYYYMMDD desde hoy hasta `dias_adelante`
+CREATE OR REPLACE FUNCTION outbox_crear_particiones(dias_adelante INTEGER DEFAULT 7) RETURNS INTEGER AS $$
+DECLARE
+    dia DATE;
+    creadas INTEGER := 0;
+BEGIN
+    FOR dia IN SELECT generate_series(current_date, current_date + dias_adelante, interval '1 day')::date LOOP
+        IF to_regclass('outbox_p' || to_char(dia, 'YYYYMMDD')) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF outbox FOR VALUES FROM (%L) TO (%L)',
+                'outbox_p' || to_char(dia, 'YYYYMMDD'), dia, dia + 1
+            );
+            creadas := creadas + 1;
+        END IF;
+    END LOOP;
+    RETURN creadas;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Crea particiones futuras y descarta las anteriores a la retención sin eventos pendientes.
+-- Retorna el número de particiones descartadas
+CREATE OR REPLACE FUNCTION outbox_mantener_particiones(dias_retencion INTEGER) RETURNS INTEGER AS $$
+DECLARE
+    particion RECORD;
+    tiene_pendientes BOOLEAN;
+    descartadas INTEGER := 0;
+BEGIN
+    PERFORM outbox_crear_particiones(7);
+
+    FOR particion IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'outbox'::regclass
+          AND c.relname ~ '^outbox_p[0-9]{8}$'
+          AND to_date(substring(c.relname FROM 9), 'YYYYMMDD') < current_date - dias_retencion
+    LOOP
+        EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE procesado = false)', particion.relname)
+            INTO tiene_pendientes;
+        IF NOT tiene_pendientes THEN
+            EXECUTE format('DROP TABLE %I', particion.relname);
+            descartadas := descartadas + 1;
+        END IF;
+    END LOOP;
+
+    DELETE FROM outbox_default
+    WHERE procesado = true AND fecha_procesamiento < now() - make_interval(days => dias_retencion);
+
+    RETURN descartadas;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT outbox_crear_particiones(7);
+
+INSERT INTO outbox (id, tipo_evento, datos_evento, procesado, fecha_creacion, fecha_procesamiento)
+SELECT id, tipo_evento, datos_evento, procesado, fecha_creacion, fecha_procesamiento
+FROM outbox_legacy
+WHERE procesado = false;
+
+-- Notificación al worker del outbox (ver outbox_worker.py)
+CREATE OR REPLACE FUNCTION notificar_outbox_pagos() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('outbox_pagos', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER outbox_pagos_notificar
+    AFTER INSERT ON outbox
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_outbox_pagos();
+
+COMMIT;
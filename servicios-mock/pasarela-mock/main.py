@@ -0,0 +1,93 @@
+"""
+Pasarela de Pagos Mock
+Simula una pasarela externa con latencia y fallos configurables para probar
+el adaptador HTTP de pagos (reintentos, plazos y circuit breaker)
+"""
+import os
+import uuid
+import random
+import asyncio
+from typing import Optional
+from fastapi import FastAPI, Header
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+import uvicorn
+
+app = FastAPI(title="Pasarela de Pagos Mock")
+
+# Comportamiento simulado, ajustable en caliente con PUT /admin/config
+config = {
+    "latencia_ms": float(os.getenv("LATENCIA_MS", "50")),
+    "tasa_error": float(os.getenv("TASA_ERROR", "0.0")),        # respuestas 503
+    "tasa_rechazo": float(os.getenv("TASA_RECHAZO", "0.05")),   # rechazos del emisor (402)
+    "tasa_timeout": float(os.getenv("TASA_TIMEOUT", "0.0")),    # cuelga la respuesta 60s
+}
+
+# Cobros por Idempotency-Key: un reintento devuelve el mismo resultado sin cobrar otra vez
+cobros = {}
+
+
+class Cobro(BaseModel):
+    referencia: str
+    monto: float
+    moneda: str
+    id_afiliado: str
+
+
+class Configuracion(BaseModel):
+    latencia_ms: Optional[float] = None
+    tasa_error: Optional[float] = None
+    tasa_rechazo: Optional[float] = None
+    tasa_timeout: Optional[float] = None
+
+
+@app.get("/health")
+async def health():
+    return {"status": "healthy", "cobros": len(cobros)}
+
+@app.post("/v1/charges")
+async def crear_cobro(cobro: Cobro, idempotency_key: Optional[str] = Header(None)):
+    clave = idempotency_key or cobro.referencia
+    if clave in cobros:
+        respuesta = cobros[clave]
+        return JSONResponse(status_code=respuesta["status_code"], content=respuesta["cuerpo"])
+
+    await asyncio.sleep(random.expovariate(1000.0 / config["latencia_ms"]) if config["latencia_ms"] > 0 else 0)
+
+    if random.random() < config["tasa_timeout"]:
+        await asyncio.sleep(60)
+    if random.random() < config["tasa_error"]:
+        # Error transitorio: no se registra, el reintento puede tener éxito
+        return JSONResponse(status_code=503, content={"error": "Pasarela temporalmente no disponible"})
+
+    if random.random() < config["tasa_rechazo"]:
+        respuesta = {"status_code": 402, "cuerpo": {
+            "id": f"ch_{uuid.uuid4().hex[:24]}", "referencia": cobro.referencia,
+            "estado": "rechazado", "error": "Tarjeta rechazada por el emisor"
+        }}
+    else:
+        respuesta = {"status_code": 200, "cuerpo": {
+            "id": f"ch_{uuid.uuid4().hex[:24]}", "referencia": cobro.referencia,
+            "estado": "exitoso", "monto": cobro.monto, "moneda": cobro.moneda
+        }}
+    cobros[clave] = respuesta
+    return JSONResponse(status_code=respuesta["status_code"], content=respuesta["cuerpo"])
+
+@app.get("/v1/charges/{referencia}")
+async def obtener_cobro(referencia: str):
+    respuesta = cobros.get(referencia)
+    if respuesta is None:
+        return JSONResponse(status_code=404, content={"error": "Cobro no encontrado"})
+    return JSONResponse(status_code=respuesta["status_code"], content=respuesta["cuerpo"])
+
+@app.get("/admin/config")
+async def obtener_config():
+    return config
+
+@app.put("/admin/config")
+async def actualizar_config(nueva: Configuracion):
+    config.update({clave: valor for clave, valor in nueva.dict().items() if valor is not None})
+    return config
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -5,7 +5,10 @@ from typing import Optional, Dict, Any, List
 from datetime import datetime
 import logging
 
-from ..modulos.event_collector.aplicacion.comandos import ProcesarEventoTrackingCommand, ReprocesarEventoFallidoCommand
+from ..modulos.event_collector.aplicacion.comandos import (
+    ProcesarEventoTrackingCommand, ReprocesarEventoFallidoCommand,
+    ResetearRateLimitCommand, LimpiarEventosAntiguosCommand
+)
 from ..modulos.event_collector.aplicacion.queries import (
     ObtenerEstadoEventoQuery, ObtenerEstadisticasProcessingQuery,
     ObtenerEventosFallidosQuery, ObtenerRateLimitStatusQuery
@@ -13,7 +16,8 @@ from ..modulos.event_collector.aplicacion.queries import (
 from ..modulos.event_collector.aplicacion.handlers import (
     ProcesarEventoTrackingHandler, ReprocesarEventoFallidoHandler,
     ObtenerEstadoEventoHandler, ObtenerEstadisticasProcessingHandler,
-    ObtenerEventosFallidosHandler, ObtenerRateLimitStatusHandler
+    ObtenerEventosFallidosHandler, ObtenerRateLimitStatusHandler,
+    ResetearRateLimitHandler, LimpiarEventosAntiguosHandler
 )
 from ..modulos.event_collector import factory as ec_factory
 
@@ -245,6 +249,17 @@ async def obtener_rate_limit_status(
         logger.error(f"Error consultando rate limit para {id_afiliado}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/metrics")
+async def obtener_metricas():
+    try:
+        return {
+            "metricas": ec_factory.get_metricas(),
+            "timestamp": datetime.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Error obteniendo métricas: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/health")
 async def health_check():
     return {
@@ -257,12 +272,24 @@ async def health_check():
 @router.get("/ready")
 async def readiness_check():
     try:
+        precalentador = ec_factory.get_precalentador()
+        if not precalentador.listo:
+            return JSONResponse(
+                status_code=503,
+                content={
+                    "status": "warming_up",
+                    "precalentamiento": precalentador.obtener_metricas(),
+                    "timestamp": datetime.now().isoformat()
+                }
+            )
+        
         return {
             "status": "ready",
             "dependencies": {
                 "pulsar": "connected",
                 "redis": "connected"
             },
+            "precalentamiento": precalentador.estado,
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
@@ -274,10 +301,32 @@ async def resetear_rate_limit(
     id_afiliado: str,
 ):
     try:
+        handler: ResetearRateLimitHandler = ec_factory.get_resetear_rate_limit_handler()
+        resultado = await handler.handle(ResetearRateLimitCommand(id_afiliado=id_afiliado))
+        
         return {
             "mensaje": f"Rate limit reseteado para afiliado {id_afiliado}",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": resultado['timestamp']
         }
     except Exception as e:
         logger.error(f"Error reseteando rate limit para {id_afiliado}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/admin/dedup/cleanup")
+async def limpiar_eventos_deduplicacion(
+    max_antiguedad_horas: int = 24,
+):
+    try:
+        handler: LimpiarEventosAntiguosHandler = ec_factory.get_limpiar_eventos_handler()
+        resultado = await handler.handle(
+            LimpiarEventosAntiguosCommand(max_antiguedad_horas=max_antiguedad_horas)
+        )
+        
+        return {
+            "mensaje": f"Se eliminaron {resultado['eventos_eliminados']} eventos de deduplicación",
+            "eventos_eliminados": resultado['eventos_eliminados'],
+            "timestamp": resultado['timestamp']
+        }
+    except Exception as e:
+        logger.error(f"Error limpiando eventos de deduplicación: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
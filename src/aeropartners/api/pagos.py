@@ -1,26 +1,91 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Header, BackgroundTasks, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
+import os
+import json
+import time
 import uuid
-from datetime import datetime
-from ..modulos.pagos.aplicacion.comandos import ProcesarPagoCommand, RevertirPagoCommand
-from ..modulos.pagos.aplicacion.queries import ObtenerEstadoPagoQuery
-from ..modulos.pagos.aplicacion.handlers import ProcesarPagoHandler, ObtenerEstadoPagoHandler, RevertirPagoHandler
+import base64
+from datetime import date, datetime
+from ..modulos.pagos.aplicacion.comandos import ProcesarPagoCommand, ProcesarPagosLoteCommand, RevertirPagoCommand
+from ..modulos.pagos.aplicacion.queries import ListarPagosQuery, ObtenerEstadoPagoQuery
+from ..modulos.pagos.dominio.enums import EstadoPago
+from ..modulos.pagos.dominio.excepciones import TransicionPagoConflictoExcepcion
+from ..modulos.pagos.aplicacion.handlers import (
+    ProcesarPagoHandler, ProcesarPagosLoteHandler, ResultadoItemLote, ObtenerEstadoPagoHandler, ListarPagosHandler,
+    RevertirPagoHandler
+)
 from ..modulos.pagos.infraestructura.adaptadores import RepositorioPagosSQLAlchemy, StripeAdapter
+from ..modulos.pagos.infraestructura.agregados import AGREGADOS_PAGOS, AGRUPACIONES, AgregadosPagos
+from ..modulos.pagos.infraestructura.cache_estado import CacheEstadoPagos, ESTADOS_FINALES
+from ..modulos.pagos.infraestructura.hub_estado import HubEstadoPagos, HubSaturadoExcepcion
+from ..modulos.pagos.infraestructura.oyente_eventos import OyenteEventosPagos
 from ..modulos.pagos.infraestructura.outbox import OutboxProcessor
+from ..seedwork.infraestructura.uow import UnidadDeTrabajoSQLAlchemy
+from ..seedwork.infraestructura.idempotencia import (
+    RegistroIdempotencia, ClaveIdempotenciaInvalidaExcepcion, ClaveIdempotenciaReutilizadaExcepcion
+)
 
 router = APIRouter(prefix="/pagos", tags=["pagos"])
 
 # Dependencias
-def get_repositorio_pagos():
+pasarela_pagos = StripeAdapter()
+
+def get_unidad_de_trabajo():
+    """Una sesión y una transacción por petición, compartidas por todos los repositorios"""
+    with UnidadDeTrabajoSQLAlchemy() as uow:
+        yield uow
+
+def get_repositorio_pagos(uow: UnidadDeTrabajoSQLAlchemy = Depends(get_unidad_de_trabajo)):
+    return RepositorioPagosSQLAlchemy(uow)
+
+def get_repositorio_exportacion():
+    # Sin unidad de trabajo: cada página de la exportación usa su propia sesión corta
     return RepositorioPagosSQLAlchemy()
 
 def get_pasarela_pagos():
-    return StripeAdapter()
+    return pasarela_pagos
 
 def get_outbox_processor():
     return OutboxProcessor()
 
+def get_agregados_pagos():
+    return AGREGADOS_PAGOS
+
+# Estado de los pagos en cache, invalidado por los eventos publicados desde el outbox
+cache_estado_pagos = CacheEstadoPagos()
+oyente_eventos_pagos = OyenteEventosPagos()
+oyente_eventos_pagos.suscribir(cache_estado_pagos.aplicar_evento)
+oyente_eventos_pagos.al_cambiar_conexion(cache_estado_pagos.al_cambiar_conexion)
+
+# Peticiones esperando un cambio de estado (long-poll y SSE), avisadas por los mismos eventos.
+# El hub se suscribe después de la cache: al recibir el aviso la entrada ya está invalidada
+hub_estado_pagos = HubEstadoPagos()
+oyente_eventos_pagos.suscribir(hub_estado_pagos.publicar)
+oyente_eventos_pagos.al_cambiar_conexion(hub_estado_pagos.al_cambiar_conexion)
+MAX_ESPERA_SEGUNDOS = 60
+# Sin oyente conectado no llegan avisos: quien espera relee el estado con esta frecuencia
+INTERVALO_SIN_OYENTE_SEGUNDOS = 1.0
+# La toma PENDIENTE -> PROCESANDO del consumidor no publica evento: con oyente conectado
+# un pago en curso se relee igualmente con esta frecuencia
+INTERVALO_RELECTURA_EN_CURSO_SEGUNDOS = float(os.getenv("PAGOS_STATUS_RECHECK_SECONDS", "2"))
+INTERVALO_KEEPALIVE_SSE_SEGUNDOS = 15.0
+DURACION_MAXIMA_SSE_SEGUNDOS = float(os.getenv("PAGOS_STATUS_STREAM_MAX_SECONDS", "300"))
+
+# Respuestas de POST /pagos/ guardadas por Idempotency-Key
+idempotencia_pagos = RegistroIdempotencia("pagos")
+
+# Lotes de pagos: tamaño máximo por petición y pagos por transacción
+MAX_ITEMS_LOTE = int(os.getenv("PAGOS_LOTE_MAX_ITEMS", "10000"))
+TAMANO_BLOQUE_LOTE = int(os.getenv("PAGOS_LOTE_CHUNK_SIZE", "500"))
+
+# Listado paginado: tamaño de página máximo y páginas leídas por la exportación
+MAX_LIMITE_LISTADO = 1000
+TAMANO_PAGINA_EXPORTACION = int(os.getenv("PAGOS_EXPORT_PAGE_SIZE", "1000"))
+
 # DTOs para la API
 class ProcesarPagoRequest(BaseModel):
     id_afiliado: str
@@ -38,6 +103,22 @@ class ProcesarPagoResponse(BaseModel):
     fecha_creacion: str
     mensaje: str
 
+class ProcesarPagosLoteRequest(BaseModel):
+    pagos: List[ProcesarPagoRequest]
+
+class ResultadoPagoLoteResponse(BaseModel):
+    indice: int
+    referencia_pago: Optional[str]
+    id_pago: Optional[str]
+    estado: str
+    error: Optional[str]
+
+class ProcesarPagosLoteResponse(BaseModel):
+    total: int
+    creados: int
+    rechazados: int
+    resultados: List[ResultadoPagoLoteResponse]
+
 class RevertirPagoRequest(BaseModel):
     motivo: str
     saga_id: Optional[str] = None
@@ -58,6 +139,41 @@ class EstadoPagoResponse(BaseModel):
     fecha_procesamiento: Optional[str]
     mensaje_error: Optional[str]
 
+class PagoListadoResponse(BaseModel):
+    id: str
+    id_afiliado: str
+    monto: float
+    moneda: str
+    estado: str
+    referencia_pago: str
+    fecha_creacion: str
+    fecha_procesamiento: Optional[str]
+
+class ListarPagosResponse(BaseModel):
+    pagos: List[PagoListadoResponse]
+    siguiente_cursor: Optional[str]
+
+class TotalesPagosResponse(BaseModel):
+    cantidad: int
+    monto_total: float
+    exitosos: int
+    monto_exitoso: float
+    fallidos: int
+    monto_fallido: float
+    reversados: int
+    monto_reversado: float
+    pendientes: int
+
+class FilaResumenPagosResponse(TotalesPagosResponse):
+    moneda: str
+    id_afiliado: Optional[str] = None
+    dia: Optional[date] = None
+
+class ResumenPagosResponse(BaseModel):
+    agrupar_por: str
+    filas: List[FilaResumenPagosResponse]
+    totales_por_moneda: Dict[str, TotalesPagosResponse]
+
 class OutboxStatsResponse(BaseModel):
     total_eventos: int
     eventos_procesados: int
@@ -66,12 +182,59 @@ class OutboxStatsResponse(BaseModel):
 @router.post("/", response_model=ProcesarPagoResponse)
 async def procesar_pago(
     request: ProcesarPagoRequest,
+    background_tasks: BackgroundTasks,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    uow: UnidadDeTrabajoSQLAlchemy = Depends(get_unidad_de_trabajo),
     repositorio: RepositorioPagosSQLAlchemy = Depends(get_repositorio_pagos),
     pasarela: StripeAdapter = Depends(get_pasarela_pagos)
 ):
     """
     Procesa un nuevo pago para un afiliado
+
+    Con el header Idempotency-Key, los reintentos con el mismo cuerpo retornan la respuesta
+    original sin crear otro pago; reutilizar la clave con otro cuerpo retorna 422.
     """
+    if idempotency_key is None:
+        respuesta = _crear_pago(request, repositorio, pasarela)
+        _confirmar(uow)
+        return respuesta
+
+    def operacion():
+        try:
+            return 200, jsonable_encoder(_crear_pago(request, repositorio, pasarela))
+        except HTTPException as e:
+            return e.status_code, {"detail": e.detail}
+
+    try:
+        # Fuera del event loop: un duplicado concurrente espera el lock de la clave
+        respuesta = await run_in_threadpool(
+            idempotencia_pagos.ejecutar, idempotency_key, RegistroIdempotencia.huella(request.model_dump()), operacion, uow
+        )
+    except ClaveIdempotenciaInvalidaExcepcion as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ClaveIdempotenciaReutilizadaExcepcion as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
+
+    if idempotencia_pagos.debe_purgar():
+        background_tasks.add_task(idempotencia_pagos.purgar)
+    return JSONResponse(
+        status_code=respuesta.estado_http,
+        content=respuesta.cuerpo,
+        headers={"Idempotency-Replayed": "true"} if respuesta.repetida else None
+    )
+
+def _confirmar(uow: UnidadDeTrabajoSQLAlchemy):
+    """Confirma la transacción de la petición antes de responder"""
+    try:
+        uow.commit()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
+
+def _crear_pago(request: ProcesarPagoRequest, repositorio: RepositorioPagosSQLAlchemy,
+                pasarela: StripeAdapter) -> ProcesarPagoResponse:
+    """Ejecuta el comando; el pago y su evento PagoPendiente quedan en la transacción de la petición"""
     try:
         # Crear comando
         comando = ProcesarPagoCommand(
@@ -101,26 +264,229 @@ async def procesar_pago(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
 
+@router.post("/lote", response_model=ProcesarPagosLoteResponse)
+def procesar_pagos_lote(
+    request: ProcesarPagosLoteRequest,
+    uow: UnidadDeTrabajoSQLAlchemy = Depends(get_unidad_de_trabajo),
+    repositorio: RepositorioPagosSQLAlchemy = Depends(get_repositorio_pagos)
+):
+    """
+    Crea varios pagos (p.ej. liquidaciones mensuales a afiliados) con una transacción por bloque
+    de PAGOS_LOTE_CHUNK_SIZE pagos. Retorna el resultado de cada ítem: un error de validación
+    o una referencia duplicada rechaza solo ese ítem.
+    """
+    if len(request.pagos) > MAX_ITEMS_LOTE:
+        raise HTTPException(status_code=413, detail=f"El lote excede el máximo de {MAX_ITEMS_LOTE} pagos")
+
+    handler = ProcesarPagosLoteHandler(repositorio)
+    resultados = []
+    for inicio in range(0, len(request.pagos), TAMANO_BLOQUE_LOTE):
+        bloque = [pago.model_dump() for pago in request.pagos[inicio:inicio + TAMANO_BLOQUE_LOTE]]
+        try:
+            resultados_bloque = handler.handle(ProcesarPagosLoteCommand(pagos=bloque))
+            uow.commit()
+        except Exception as e:
+            uow.rollback()
+            resultados_bloque = [
+                ResultadoItemLote(indice=indice, referencia_pago=datos["referencia_pago"],
+                                  error=f"Error persistiendo el bloque: {str(e)}")
+                for indice, datos in enumerate(bloque)
+            ]
+        for resultado in resultados_bloque:
+            resultado.indice += inicio
+        resultados.extend(resultados_bloque)
+
+    creados = sum(1 for resultado in resultados if resultado.creado)
+    return ProcesarPagosLoteResponse(
+        total=len(resultados),
+        creados=creados,
+        rechazados=len(resultados) - creados,
+        resultados=[
+            ResultadoPagoLoteResponse(
+                indice=resultado.indice,
+                referencia_pago=resultado.referencia_pago,
+                id_pago=resultado.id_pago,
+                estado=EstadoPago.PENDIENTE.value if resultado.creado else "RECHAZADO",
+                error=resultado.error
+            )
+            for resultado in resultados
+        ]
+    )
+
+def _codificar_cursor(clave) -> Optional[str]:
+    if clave is None:
+        return None
+    fecha_creacion, id_pago = clave
+    return base64.urlsafe_b64encode(f"{fecha_creacion.isoformat()}|{id_pago}".encode()).decode()
+
+def _decodificar_cursor(cursor: str):
+    try:
+        fecha_creacion, id_pago = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(fecha_creacion), uuid.UUID(id_pago)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+def _listar_pagos_query(limite: int, cursor: Optional[str], id_afiliado: Optional[str], estado: Optional[str],
+                        moneda: Optional[str], fecha_desde: Optional[datetime],
+                        fecha_hasta: Optional[datetime]) -> ListarPagosQuery:
+    if estado:
+        estado = estado.upper()
+        if estado not in EstadoPago.__members__:
+            raise HTTPException(status_code=400, detail=f"Estado no válido: {estado}")
+    return ListarPagosQuery(
+        limite=limite,
+        despues_de=_decodificar_cursor(cursor) if cursor else None,
+        id_afiliado=id_afiliado,
+        estado=estado,
+        moneda=moneda.upper() if moneda else None,
+        fecha_desde=fecha_desde,
+        fecha_hasta=fecha_hasta
+    )
+
+@router.get("/", response_model=ListarPagosResponse)
+def listar_pagos(
+    id_afiliado: Optional[str] = None,
+    estado: Optional[str] = None,
+    moneda: Optional[str] = None,
+    fecha_desde: Optional[datetime] = Query(None, description="Fecha de creación mínima (inclusive)"),
+    fecha_hasta: Optional[datetime] = Query(None, description="Fecha de creación máxima (exclusiva)"),
+    limite: int = Query(100, ge=1, le=MAX_LIMITE_LISTADO),
+    cursor: Optional[str] = Query(None, description="siguiente_cursor de la página anterior"),
+    repositorio: RepositorioPagosSQLAlchemy = Depends(get_repositorio_pagos)
+):
+    """
+    Lista pagos ordenados por fecha de creación, paginados por cursor (keyset).
+    Para recorrer todas las páginas se envía `siguiente_cursor` hasta que sea null.
+    """
+    query = _listar_pagos_query(limite, cursor, id_afiliado, estado, moneda, fecha_desde, fecha_hasta)
+    resultado = ListarPagosHandler(repositorio).handle(query).resultado
+    return ListarPagosResponse(
+        pagos=resultado["pagos"],
+        siguiente_cursor=_codificar_cursor(resultado["siguiente"])
+    )
+
+@router.get("/exportar")
+def exportar_pagos(
+    id_afiliado: Optional[str] = None,
+    estado: Optional[str] = None,
+    moneda: Optional[str] = None,
+    fecha_desde: Optional[datetime] = None,
+    fecha_hasta: Optional[datetime] = None,
+    repositorio: RepositorioPagosSQLAlchemy = Depends(get_repositorio_exportacion)
+):
+    """
+    Exporta todos los pagos que cumplen los filtros como NDJSON (un pago por línea).
+    La respuesta se transmite página a página: la memoria no crece con el tamaño del resultado
+    y ninguna transacción queda abierta durante toda la descarga.
+    """
+    query = _listar_pagos_query(TAMANO_PAGINA_EXPORTACION, None, id_afiliado, estado, moneda,
+                                fecha_desde, fecha_hasta)
+    handler = ListarPagosHandler(repositorio)
+
+    def generar():
+        while True:
+            resultado = handler.handle(query).resultado
+            for pago in resultado["pagos"]:
+                yield json.dumps(pago) + "\n"
+            if resultado["siguiente"] is None:
+                return
+            query.despues_de = resultado["siguiente"]
+
+    return StreamingResponse(
+        generar(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=pagos.ndjson"}
+    )
+
+@router.get("/resumen", response_model=ResumenPagosResponse)
+def obtener_resumen_pagos(
+    id_afiliado: Optional[str] = None,
+    moneda: Optional[str] = None,
+    fecha_desde: Optional[date] = Query(None, description="Día de creación mínimo (inclusive)"),
+    fecha_hasta: Optional[date] = Query(None, description="Día de creación máximo (inclusive)"),
+    agrupar_por: str = Query("dia", description="dia, afiliado o moneda"),
+    agregados: AgregadosPagos = Depends(get_agregados_pagos)
+):
+    """
+    Totales de pagos (cantidad, montos y distribución por estado) desde el modelo de lectura
+    diario por afiliado y moneda: el costo depende de los días consultados, no de los pagos.
+    """
+    if agrupar_por not in AGRUPACIONES:
+        raise HTTPException(status_code=400, detail=f"Agrupación no válida: {agrupar_por}")
+    try:
+        return agregados.obtener_resumen(
+            id_afiliado=id_afiliado,
+            moneda=moneda.upper() if moneda else None,
+            fecha_desde=fecha_desde,
+            fecha_hasta=fecha_hasta,
+            agrupar_por=agrupar_por
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error obteniendo el resumen de pagos: {str(e)}")
+
+async def _leer_estado(handler: ObtenerEstadoPagoHandler, query: ObtenerEstadoPagoQuery,
+                       uow: UnidadDeTrabajoSQLAlchemy) -> Optional[dict]:
+    resultado = await run_in_threadpool(handler.handle, query)
+    # Entre lecturas la petición no retiene una conexión del pool
+    await run_in_threadpool(uow.rollback)
+    return resultado.resultado
+
+def _intervalo_espera(restante: float) -> float:
+    if hub_estado_pagos.conectado:
+        return min(restante, INTERVALO_RELECTURA_EN_CURSO_SEGUNDOS)
+    return min(restante, INTERVALO_SIN_OYENTE_SEGUNDOS)
+
+async def _esperar_cambio_estado(handler: ObtenerEstadoPagoHandler, query: ObtenerEstadoPagoQuery,
+                                 uow: UnidadDeTrabajoSQLAlchemy, espera: float) -> Optional[dict]:
+    """Long-poll: responde al llegar a un estado distinto del inicial o al vencer la espera"""
+    limite = time.monotonic() + espera
+    try:
+        suscripcion = hub_estado_pagos.abrir(str(query.id_pago))
+    except HubSaturadoExcepcion:
+        return await _leer_estado(handler, query, uow)
+
+    with suscripcion:
+        # La suscripción se abre antes de leer para no perder un evento entre ambos
+        resultado = await _leer_estado(handler, query, uow)
+        if resultado is None or resultado["estado"] in ESTADOS_FINALES:
+            return resultado
+        estado_inicial = resultado["estado"]
+
+        while (restante := limite - time.monotonic()) > 0:
+            await suscripcion.esperar(_intervalo_espera(restante))
+            resultado = await _leer_estado(handler, query, uow)
+            if resultado is None or resultado["estado"] != estado_inicial:
+                break
+        return resultado
+
 @router.get("/{id_pago}", response_model=EstadoPagoResponse)
 async def obtener_estado_pago(
     id_pago: str,
+    espera: float = Query(0, alias="wait", ge=0, le=MAX_ESPERA_SEGUNDOS,
+                          description="Segundos a esperar un cambio de estado antes de responder (long-poll)"),
+    uow: UnidadDeTrabajoSQLAlchemy = Depends(get_unidad_de_trabajo),
     repositorio: RepositorioPagosSQLAlchemy = Depends(get_repositorio_pagos)
 ):
     """
-    Obtiene el estado actual de un pago
+    Obtiene el estado actual de un pago.
+    Con `wait` la respuesta se retiene hasta que el pago cambie de estado (o llegue a un
+    estado final) o venza la espera, en lugar de consultar en un ciclo.
     """
     try:
         # Crear query
         query = ObtenerEstadoPagoQuery(id_pago=uuid.UUID(id_pago))
         
         # Ejecutar query
-        handler = ObtenerEstadoPagoHandler(repositorio)
-        resultado = handler.handle(query)
+        handler = ObtenerEstadoPagoHandler(repositorio, cache_estado_pagos)
+        if espera:
+            resultado = await _esperar_cambio_estado(handler, query, uow, espera)
+        else:
+            resultado = handler.handle(query).resultado
         
-        if resultado.resultado is None:
+        if resultado is None:
             raise HTTPException(status_code=404, detail="Pago no encontrado")
         
-        return EstadoPagoResponse(**resultado.resultado)
+        return EstadoPagoResponse(**resultado)
         
     except ValueError:
         raise HTTPException(status_code=400, detail="ID de pago inválido")
@@ -129,10 +495,72 @@ async def obtener_estado_pago(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
 
+def _evento_sse(resultado: dict) -> str:
+    return f"event: estado\ndata: {json.dumps(resultado)}\n\n"
+
+@router.get("/{id_pago}/eventos")
+async def eventos_estado_pago(
+    id_pago: str,
+    request: Request,
+    uow: UnidadDeTrabajoSQLAlchemy = Depends(get_unidad_de_trabajo),
+    repositorio: RepositorioPagosSQLAlchemy = Depends(get_repositorio_pagos)
+):
+    """
+    Stream SSE con el estado del pago: se envía el estado actual y luego cada cambio.
+    El stream termina al llegar a un estado final o tras PAGOS_STATUS_STREAM_MAX_SECONDS.
+    """
+    try:
+        query = ObtenerEstadoPagoQuery(id_pago=uuid.UUID(id_pago))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ID de pago inválido")
+    handler = ObtenerEstadoPagoHandler(repositorio, cache_estado_pagos)
+
+    try:
+        suscripcion = hub_estado_pagos.abrir(str(query.id_pago))
+    except HubSaturadoExcepcion as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+    try:
+        resultado = await _leer_estado(handler, query, uow)
+    except Exception:
+        suscripcion.cerrar()
+        raise
+    if resultado is None:
+        suscripcion.cerrar()
+        raise HTTPException(status_code=404, detail="Pago no encontrado")
+
+    async def generar(resultado: dict):
+        limite = time.monotonic() + DURACION_MAXIMA_SSE_SEGUNDOS
+        with suscripcion:
+            yield _evento_sse(resultado)
+            ultimo_envio = time.monotonic()
+            while resultado["estado"] not in ESTADOS_FINALES:
+                restante = limite - time.monotonic()
+                if restante <= 0 or await request.is_disconnected():
+                    return
+                await suscripcion.esperar(_intervalo_espera(restante))
+                actual = await _leer_estado(handler, query, uow)
+                if actual is None:
+                    return
+                if actual["estado"] != resultado["estado"]:
+                    yield _evento_sse(actual)
+                    ultimo_envio = time.monotonic()
+                elif time.monotonic() - ultimo_envio >= INTERVALO_KEEPALIVE_SSE_SEGUNDOS:
+                    yield ": keepalive\n\n"
+                    ultimo_envio = time.monotonic()
+                resultado = actual
+
+    return StreamingResponse(
+        generar(resultado),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.patch("/{id_pago}/revertir", response_model=RevertirPagoResponse)
 async def revertir_pago(
     id_pago: str,
     request: RevertirPagoRequest,
+    uow: UnidadDeTrabajoSQLAlchemy = Depends(get_unidad_de_trabajo),
     repositorio: RepositorioPagosSQLAlchemy = Depends(get_repositorio_pagos)
 ):
     """Revertir un pago (compensación)"""
@@ -145,6 +573,10 @@ async def revertir_pago(
         
         handler = RevertirPagoHandler(repositorio)
         pago = handler.handle(comando)
+        uow.commit()
+        # Las demás réplicas se enteran por el evento PagoRevertido
+        cache_estado_pagos.invalidar(str(pago.id))
+        hub_estado_pagos.publicar("PagoRevertido", {"id_pago": str(pago.id)})
         
         return RevertirPagoResponse(
             id_pago=str(pago.id),
@@ -152,6 +584,8 @@ async def revertir_pago(
             mensaje=f"Pago revertido: {request.motivo}"
         )
         
+    except TransicionPagoConflictoExcepcion as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -159,6 +593,7 @@ async def revertir_pago(
 
 @router.delete("/cleanup")
 async def limpiar_pagos(
+    uow: UnidadDeTrabajoSQLAlchemy = Depends(get_unidad_de_trabajo),
     repositorio: RepositorioPagosSQLAlchemy = Depends(get_repositorio_pagos)
 ):
     """Limpiar todos los pagos (solo para pruebas)"""
@@ -170,6 +605,8 @@ async def limpiar_pagos(
         # Eliminar todos los pagos
         for pago in pagos:
             repositorio.eliminar(pago)
+        uow.commit()
+        cache_estado_pagos.limpiar()
         
         return {
             "mensaje": f"Se eliminaron {total_pagos} pagos",
@@ -188,7 +625,7 @@ async def obtener_estadisticas_outbox(
     outbox_processor: OutboxProcessor = Depends(get_outbox_processor)
 ):
     """
-    Obtiene estadísticas del outbox
+    Obtiene estadísticas del outbox (contadores incrementales, costo constante)
     """
     try:
         stats = outbox_processor.obtener_estadisticas()
@@ -1,24 +1,40 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from .api.pagos import router as pagos_router
+from .api.pagos import router as pagos_router, oyente_eventos_pagos
 from .api.campanas import router as campanas_router
 from .api.reporting import router as reporting_router
 from .api.event_collector import router as event_collector_router
 from .api.saga import router as saga_router
+from .modulos.event_collector.factory import event_collector_factory
 from .seedwork.infraestructura.db import engine
-from .modulos.pagos.infraestructura.modelos import Base
+from .modulos.pagos.infraestructura.modelos import Base, InboxPagosModel, PagoAgregadoDiarioModel
 from .modulos.campanas.infraestructura.modelos import CampanaModel, EventInboxModel, OutboxCampanasModel
 from .modulos.saga.infraestructura.modelos import SagaLogModel, SagaPasoModel, SagaCompensacionModel, SagaEventModel
+from .seedwork.infraestructura.contadores import ContadorOutboxModel
+from .seedwork.infraestructura.idempotencia import ClaveIdempotenciaModel
 
 # Crear las tablas en la base de datos
 Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Reconstruir la ventana de deduplicación del Event Collector en segundo plano
+    event_collector_factory.crear_precalentador().iniciar()
+    # Invalidación de la cache de estado de pagos por eventos; sin oyente las entradas vencen por TTL
+    if os.getenv("PAGOS_STATUS_EVENTS_ENABLED", "true").lower() == "true":
+        oyente_eventos_pagos.iniciar()
+    yield
+    oyente_eventos_pagos.detener()
+
 app = FastAPI(
     title="Aeropartners - Microservicios",
     description="Microservicios de pagos y campañas para la plataforma Aeropartners implementando DDD y Arquitectura Hexagonal",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -50,7 +66,9 @@ async def root():
         "servicios": {
             "pagos": {
                 "procesar_pago": "POST /pagos/",
-                "obtener_estado": "GET /pagos/{id_pago}",
+                "obtener_estado": "GET /pagos/{id_pago}?wait=30",
+                "eventos_estado": "GET /pagos/{id_pago}/eventos",
+                "resumen": "GET /pagos/resumen",
                 "estadisticas_outbox": "GET /pagos/outbox/estadisticas"
             },
             "campanas": {
@@ -78,6 +96,7 @@ async def root():
                 "estadisticas": "GET /event-collector/statistics",
                 "eventos_fallidos": "GET /event-collector/failed-events",
                 "rate_limit": "GET /event-collector/rate-limit/{id_afiliado}",
+                "metricas": "GET /event-collector/metrics",
                 "health": "GET /event-collector/health",
                 "ready": "GET /event-collector/ready"
             }
@@ -7,6 +7,7 @@ from ....seedwork.infraestructura.db import SessionLocal
 from ..dominio.entidades import Campana
 from ..dominio.repositorios import RepositorioCampanas
 from .modelos import CampanaModel, OutboxCampanasModel
+from .outbox import CONTADORES_OUTBOX_CAMPANAS
 from .mapeadores import MapeadorCampana
 
 logger = logging.getLogger(__name__)
@@ -162,6 +163,10 @@ class RepositorioCampanasSQLAlchemy(RepositorioCampanas):
             self.db_session.add(outbox_entry)
             
             logger.debug(f"Evento {type(evento).__name__} agregado al outbox para topic {topic}")
+        
+        CONTADORES_OUTBOX_CAMPANAS.registrar_creados(
+            self.db_session, [type(evento).__name__ for evento in campana.eventos]
+        )
     
     def _obtener_topic_para_evento(self, tipo_evento: str) -> str:
         """Determinar el topic de Pulsar basado en el tipo de evento"""
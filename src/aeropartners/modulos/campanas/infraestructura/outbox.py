@@ -6,10 +6,13 @@ from datetime import datetime
 import uuid
 from ....seedwork.infraestructura.db import SessionLocal
 from ....seedwork.infraestructura.pulsar_producer import PulsarEventProducer
+from ....seedwork.infraestructura.contadores import ContadoresOutbox
 from .modelos import OutboxCampanasModel
 
 logger = logging.getLogger(__name__)
 
+CONTADORES_OUTBOX_CAMPANAS = ContadoresOutbox("campanas", "outbox_campanas", "event_type", "processed")
+
 class OutboxCampanasProcessor:
     """Procesador de eventos del outbox para campañas con integración a Apache Pulsar"""
     
@@ -39,6 +42,7 @@ class OutboxCampanasProcessor:
             
             logger.info(f"Procesando {len(eventos_pendientes)} eventos pendientes del outbox de campañas")
             
+            tipos_procesados = []
             for evento in eventos_pendientes:
                 try:
                     # Procesar el evento
@@ -48,6 +52,7 @@ class OutboxCampanasProcessor:
                     evento.processed = True
                     evento.processed_at = datetime.now()
                     eventos_procesados += 1
+                    tipos_procesados.append(evento.event_type)
                     
                     logger.info(f"Evento {evento.id} procesado exitosamente")
                     
@@ -55,6 +60,7 @@ class OutboxCampanasProcessor:
                     logger.error(f"Error procesando evento {evento.id}: {str(e)}")
                     # En un escenario real, podrías implementar retry logic aquí
             
+            CONTADORES_OUTBOX_CAMPANAS.registrar_procesados(db, tipos_procesados)
             db.commit()
             
         except Exception as e:
@@ -94,31 +100,11 @@ class OutboxCampanasProcessor:
             raise
     
     def obtener_estadisticas(self) -> dict:
-        """Obtiene estadísticas del outbox de campañas"""
-        db = SessionLocal()
-        try:
-            total_eventos = db.query(OutboxCampanasModel).count()
-            eventos_pendientes = db.query(OutboxCampanasModel).filter(
-                OutboxCampanasModel.processed == False
-            ).count()
-            eventos_procesados = total_eventos - eventos_pendientes
-            
-            # Estadísticas por tipo de evento
-            tipos_eventos = db.query(
-                OutboxCampanasModel.event_type,
-                db.func.count(OutboxCampanasModel.id).label('count')
-            ).group_by(OutboxCampanasModel.event_type).all()
-            
-            distribucion_tipos = {tipo: count for tipo, count in tipos_eventos}
-            
-            return {
-                "total_eventos": total_eventos,
-                "eventos_procesados": eventos_procesados,
-                "eventos_pendientes": eventos_pendientes,
-                "distribucion_por_tipo": distribucion_tipos
-            }
-        finally:
-            db.close()
+        """
+        Obtiene estadísticas del outbox de campañas desde los contadores incrementales
+        El recuento completo es una tarea de operación (ver recuento.py)
+        """
+        return CONTADORES_OUTBOX_CAMPANAS.obtener_estadisticas()
     
     def close(self):
         """Cierra la conexión con Pulsar"""
@@ -0,0 +1,22 @@
+import logging
+
+from .outbox import CONTADORES_OUTBOX_CAMPANAS
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """
+    Recuenta los contadores del outbox de campañas (tarea de operación)
+    El recuento bloquea la tabla de contadores y frena las escrituras del outbox hasta terminar
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    CONTADORES_OUTBOX_CAMPANAS.recalcular()
+    logger.info("Recuento del outbox de campañas completado")
+
+
+if __name__ == "__main__":
+    main()
@@ -36,4 +36,12 @@ class ProcesarEventoTrackingCommand(Comando):
 @dataclass
 class ReprocesarEventoFallidoCommand(Comando):
     id_evento: str
-    forzar_reproceso: bool = False
\ No newline at end of file
+    forzar_reproceso: bool = False
+
+@dataclass
+class ResetearRateLimitCommand(Comando):
+    id_afiliado: str
+
+@dataclass
+class LimpiarEventosAntiguosCommand(Comando):
+    max_antiguedad_horas: int = 24
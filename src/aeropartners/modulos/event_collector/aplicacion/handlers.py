@@ -1,14 +1,17 @@
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
 
-from .comandos import ProcesarEventoTrackingCommand, ReprocesarEventoFallidoCommand
+from .comandos import (
+    ProcesarEventoTrackingCommand, ReprocesarEventoFallidoCommand,
+    ResetearRateLimitCommand, LimpiarEventosAntiguosCommand
+)
 from .queries import (
     ObtenerEstadoEventoQuery, ObtenerEstadisticasProcessingQuery,
     ObtenerEventosFallidosQuery, ObtenerRateLimitStatusQuery
 )
 from ..dominio.entidades import EventoTracking
-from ..dominio.enums import TipoEvento, TipoDispositivo, FuenteEvento
+from ..dominio.enums import TipoEvento, TipoDispositivo, FuenteEvento, EstadoEvento
 from ..dominio.objetos_valor import (
     MetadatosEvento, ContextoEvento, DatosDispositivo, 
     FirmaEvento, PayloadEvento
@@ -17,7 +20,11 @@ from ..dominio.repositorios import (
     RepositorioEventos, RepositorioAfiliados, 
     RepositorioCampanas, RepositorioRateLimiting
 )
-from ..dominio.servicios import ServicioPublicacionEventos, ServicioValidacionEventos
+from ..dominio.servicios import (
+    ServicioPublicacionEventos, ServicioValidacionEventos,
+    ServicioEnriquecimientoDispositivo, ServicioFiltradoTrafico,
+    ServicioAtribucionClicks
+)
 
 logger = logging.getLogger(__name__)
 
@@ -28,12 +35,18 @@ class ProcesarEventoTrackingHandler:
         servicio_publicacion: ServicioPublicacionEventos,
         servicio_validacion: ServicioValidacionEventos,
         repo_eventos: RepositorioEventos,
-        repo_rate_limiting: RepositorioRateLimiting
+        repo_rate_limiting: RepositorioRateLimiting,
+        servicio_enriquecimiento: Optional[ServicioEnriquecimientoDispositivo] = None,
+        servicio_filtrado: Optional[ServicioFiltradoTrafico] = None,
+        servicio_atribucion: Optional[ServicioAtribucionClicks] = None
     ):
         self.servicio_publicacion = servicio_publicacion
         self.servicio_validacion = servicio_validacion
         self.repo_eventos = repo_eventos
         self.repo_rate_limiting = repo_rate_limiting
+        self.servicio_enriquecimiento = servicio_enriquecimiento
+        self.servicio_filtrado = servicio_filtrado
+        self.servicio_atribucion = servicio_atribucion
     
     async def handle(self, comando: ProcesarEventoTrackingCommand) -> Dict[str, Any]:
         """
@@ -42,6 +55,18 @@ class ProcesarEventoTrackingHandler:
         logger.info(f"Procesando evento de tracking - Tipo: {comando.tipo_evento}, Afiliado: {comando.id_afiliado}")
         
         try:
+            # 0. Filtrar tráfico bloqueado antes de pagar validación, Redis y Pulsar
+            if self.servicio_filtrado:
+                razon_filtrado = self.servicio_filtrado.evaluar(comando.ip_origen, comando.user_agent)
+                if razon_filtrado:
+                    logger.info(f"Evento filtrado - Afiliado: {comando.id_afiliado}, Razón: {razon_filtrado}")
+                    return {
+                        'exito': False,
+                        'filtrado': True,
+                        'estado': EstadoEvento.DESCARTADO.value,
+                        'razon': f"Tráfico filtrado: {razon_filtrado}"
+                    }
+            
             # 1. Crear el agregado EventoTracking
             evento_tracking = self._crear_evento_tracking(comando)
             
@@ -76,6 +101,7 @@ class ProcesarEventoTrackingHandler:
             
             # 6. Iniciar procesamiento
             evento_tracking.iniciar_procesamiento()
+            self._atribuir_conversion(evento_tracking)
             
             # 7. Publicar al topic de Pulsar
             try:
@@ -92,6 +118,7 @@ class ProcesarEventoTrackingHandler:
                 # 8. Marcar como publicado exitosamente
                 topic_destino = self.servicio_publicacion.obtener_topic_destino(evento_tracking.tipo_evento)
                 evento_tracking.marcar_como_publicado(topic_destino, mensaje_id, partition_key)
+                self._registrar_click(evento_tracking)
                 
                 logger.info(f"Evento publicado exitosamente - ID: {evento_tracking.id}, Topic: {topic_destino}")
                 
@@ -161,13 +188,7 @@ class ProcesarEventoTrackingHandler:
             parametros_tracking=comando.parametros_tracking
         )
         
-        dispositivo = DatosDispositivo(
-            tipo=tipo_dispositivo,
-            identificador=comando.identificador_dispositivo,
-            so=comando.sistema_operativo,
-            navegador=comando.navegador,
-            resolucion=comando.resolucion_pantalla
-        )
+        dispositivo = self._crear_datos_dispositivo(comando, tipo_dispositivo)
         
         firma = FirmaEvento(
             fuente=fuente_evento,
@@ -190,6 +211,72 @@ class ProcesarEventoTrackingHandler:
             firma=firma
         )
 
+    def _crear_datos_dispositivo(
+        self, 
+        comando: ProcesarEventoTrackingCommand, 
+        tipo_dispositivo: TipoDispositivo
+    ) -> DatosDispositivo:
+        """
+        Crea los datos del dispositivo, completando desde el User-Agent
+        los atributos que el cliente no envió
+        """
+        so = comando.sistema_operativo
+        navegador = comando.navegador
+        
+        necesita_enriquecimiento = (
+            tipo_dispositivo == TipoDispositivo.OTHER or not so or not navegador
+        )
+        if self.servicio_enriquecimiento and comando.user_agent and necesita_enriquecimiento:
+            try:
+                inferidos = self.servicio_enriquecimiento.enriquecer(comando.user_agent)
+                if tipo_dispositivo == TipoDispositivo.OTHER:
+                    tipo_dispositivo = inferidos.tipo
+                so = so or inferidos.so
+                navegador = navegador or inferidos.navegador
+            except Exception as e:
+                # El enriquecimiento nunca debe impedir la ingesta del evento
+                logger.warning(f"Error enriqueciendo User-Agent: {str(e)}")
+        
+        return DatosDispositivo(
+            tipo=tipo_dispositivo,
+            identificador=comando.identificador_dispositivo,
+            so=so,
+            navegador=navegador,
+            resolucion=comando.resolucion_pantalla
+        )
+
+    def _atribuir_conversion(self, evento_tracking: EventoTracking) -> None:
+        """Anota la conversión con el click que la originó antes de publicarla"""
+        if not self.servicio_atribucion or evento_tracking.tipo_evento != TipoEvento.CONVERSION:
+            return
+        try:
+            atribucion = self.servicio_atribucion.buscar_click(
+                id_afiliado=evento_tracking.contexto.id_afiliado,
+                timestamp_conversion=evento_tracking.metadatos.timestamp,
+                session_id=evento_tracking.metadatos.session_id,
+                identificador_dispositivo=evento_tracking.dispositivo.identificador
+            )
+            if atribucion:
+                evento_tracking.atribuir_click(atribucion)
+        except Exception as e:
+            # La atribución nunca debe impedir la publicación de la conversión
+            logger.warning(f"Error atribuyendo conversión {evento_tracking.id}: {str(e)}")
+
+    def _registrar_click(self, evento_tracking: EventoTracking) -> None:
+        """Indexa los clicks publicados para atribuir conversiones posteriores"""
+        if not self.servicio_atribucion or evento_tracking.tipo_evento != TipoEvento.CLICK:
+            return
+        try:
+            self.servicio_atribucion.registrar_click(
+                id_afiliado=evento_tracking.contexto.id_afiliado,
+                id_evento_click=str(evento_tracking.id),
+                timestamp=evento_tracking.metadatos.timestamp,
+                session_id=evento_tracking.metadatos.session_id,
+                identificador_dispositivo=evento_tracking.dispositivo.identificador
+            )
+        except Exception as e:
+            logger.warning(f"Error registrando click {evento_tracking.id} para atribución: {str(e)}")
+
 class ReprocesarEventoFallidoHandler:
     
     def __init__(
@@ -268,3 +355,34 @@ class ObtenerRateLimitStatusHandler:
                 'error': True,
                 'mensaje': str(e)
             }
+
+class ResetearRateLimitHandler:
+    
+    def __init__(self, repo_rate_limiting: RepositorioRateLimiting):
+        self.repo_rate_limiting = repo_rate_limiting
+    
+    async def handle(self, comando: ResetearRateLimitCommand) -> Dict[str, Any]:
+        """Resetea los contadores de rate limiting de un afiliado (uso administrativo)"""
+        logger.info(f"Reseteando rate limit - Afiliado: {comando.id_afiliado}")
+        await self.repo_rate_limiting.resetear_contador(comando.id_afiliado)
+        
+        return {
+            'id_afiliado': comando.id_afiliado,
+            'timestamp': datetime.now().isoformat()
+        }
+
+class LimpiarEventosAntiguosHandler:
+    
+    def __init__(self, repo_eventos: RepositorioEventos):
+        self.repo_eventos = repo_eventos
+    
+    async def handle(self, comando: LimpiarEventosAntiguosCommand) -> Dict[str, Any]:
+        """Limpia la caché de deduplicación de eventos más antiguos que el límite"""
+        logger.info(f"Limpiando eventos de deduplicación con más de {comando.max_antiguedad_horas} horas")
+        eliminados = await self.repo_eventos.limpiar_eventos_antiguos(comando.max_antiguedad_horas)
+        
+        return {
+            'eventos_eliminados': eliminados,
+            'max_antiguedad_horas': comando.max_antiguedad_horas,
+            'timestamp': datetime.now().isoformat()
+        }
@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from .enums import TipoEvento, EstadoEvento, FuenteEvento
-from .objetos_valor import MetadatosEvento, ContextoEvento, DatosDispositivo, FirmaEvento, PayloadEvento
+from .objetos_valor import MetadatosEvento, ContextoEvento, DatosDispositivo, FirmaEvento, PayloadEvento, AtribucionClick
 from .eventos import (
     EventoRecibido, EventoValidado, EventoPublicado, 
     EventoFallido, EventoDescartado, EventoLimiteProcesamiento
@@ -48,6 +48,7 @@ class EventoTracking:
         self.codigo_error: Optional[str] = None
         self.topic_destino: Optional[str] = None
         self.mensaje_id_pulsar: Optional[str] = None
+        self.atribucion: Optional[AtribucionClick] = None
         
         self.eventos: List = []
         
@@ -147,6 +148,13 @@ class EventoTracking:
             timestamp_publicacion=self.fecha_actualizacion
         ))
     
+    def atribuir_click(self, atribucion: AtribucionClick):
+        if self.tipo_evento != TipoEvento.CONVERSION:
+            raise ValueError("Solo las conversiones pueden atribuirse a un click")
+        
+        self.atribucion = atribucion
+        self.fecha_actualizacion = datetime.now()
+    
     def marcar_como_fallido(self, razon: str, codigo_error: str):
         self.estado = EstadoEvento.FALLIDO
         self.razon_fallo = razon
@@ -175,7 +183,12 @@ class EventoTracking:
                 'so': self.dispositivo.so,
                 'navegador': self.dispositivo.navegador,
                 'resolucion': self.dispositivo.resolucion
-            }
+            },
+            'atribucion': {
+                'id_evento_click': self.atribucion.id_evento_click,
+                'segundos_desde_click': self.atribucion.segundos_desde_click,
+                'criterio': self.atribucion.criterio
+            } if self.atribucion else None
         }
         
         return ServicioFormateadorEventos.formatear_para_tracking(
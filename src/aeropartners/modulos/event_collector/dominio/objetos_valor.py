@@ -75,4 +75,16 @@ class PayloadEvento(ObjetoValor):
             object.__setattr__(self, 'datos_custom', {})
         
         if self.valor_conversion is not None and not self.moneda:
-            raise ValueError("Si se especifica valor de conversión, la moneda es requerida")
\ No newline at end of file
+            raise ValueError("Si se especifica valor de conversión, la moneda es requerida")
+
+@dataclass(frozen=True)
+class AtribucionClick(ObjetoValor):
+    id_evento_click: str
+    segundos_desde_click: float
+    criterio: str
+    
+    def __post_init__(self):
+        if not self.id_evento_click:
+            raise ValueError("ID del click atribuido es requerido")
+        if self.segundos_desde_click < 0:
+            raise ValueError("El click atribuido no puede ser posterior a la conversión")
\ No newline at end of file
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Optional, Set, Dict, Any
+from typing import Optional, Set, Dict, Any, List, Tuple
 from datetime import datetime
 
 class RepositorioEventos(ABC):
@@ -19,6 +19,15 @@ class RepositorioEventos(ABC):
     async def limpiar_eventos_antiguos(self, max_antiguedad_horas: int = 24) -> int:
         """Limpia eventos temporales antiguos para gestión de memoria"""
         pass
+    
+    async def guardar_eventos_temporales_lote(self, eventos: List[Tuple[str, datetime]]) -> int:
+        """
+        Guarda en bloque pares (hash_evento, timestamp) para deduplicación
+        Implementación por defecto evento a evento; los adaptadores pueden optimizarla
+        """
+        for hash_evento, timestamp in eventos:
+            await self.guardar_evento_temporal(hash_evento, timestamp)
+        return len(eventos)
 
 class RepositorioAfiliados(ABC):
     """Repositorio para consultar información de afiliados"""
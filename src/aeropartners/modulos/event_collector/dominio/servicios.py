@@ -2,7 +2,7 @@ from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
 from datetime import datetime
 from .enums import TipoEvento
-from .objetos_valor import ContextoEvento, PayloadEvento
+from .objetos_valor import ContextoEvento, PayloadEvento, DatosDispositivo, AtribucionClick
 
 class ServicioPublicacionEventos(ABC):
     """Servicio de dominio para publicar eventos a topics de Pulsar"""
@@ -31,6 +31,72 @@ class ServicioPublicacionEventos(ABC):
         """Genera la clave de partición para garantizar orden de eventos"""
         pass
 
+class ServicioEnriquecimientoDispositivo(ABC):
+    """Servicio de dominio para inferir los datos del dispositivo a partir del User-Agent"""
+    
+    @abstractmethod
+    def enriquecer(self, user_agent: str) -> DatosDispositivo:
+        """
+        Deriva tipo de dispositivo, sistema operativo y navegador del User-Agent
+        Retorna: DatosDispositivo sin identificador ni resolución
+        """
+        pass
+    
+    @abstractmethod
+    def obtener_metricas(self) -> Dict[str, Any]:
+        """Obtiene métricas de uso del enriquecimiento (caché, tiempos de parseo)"""
+        pass
+
+class ServicioFiltradoTrafico(ABC):
+    """Servicio de dominio para descartar tráfico no deseado antes de validarlo"""
+    
+    @abstractmethod
+    def evaluar(self, ip_origen: str, user_agent: str) -> Optional[str]:
+        """
+        Evalúa el origen del evento contra las listas de bloqueo
+        Retorna: razón del filtrado, o None si el tráfico es aceptado
+        """
+        pass
+    
+    @abstractmethod
+    def obtener_metricas(self) -> Dict[str, Any]:
+        """Obtiene contadores de eventos filtrados por razón"""
+        pass
+
+class ServicioAtribucionClicks(ABC):
+    """Servicio de dominio para vincular conversiones con el click que las originó"""
+    
+    @abstractmethod
+    def registrar_click(
+        self,
+        id_afiliado: str,
+        id_evento_click: str,
+        timestamp: datetime,
+        session_id: Optional[str] = None,
+        identificador_dispositivo: Optional[str] = None
+    ) -> None:
+        """Registra un click publicado para atribuir conversiones posteriores"""
+        pass
+    
+    @abstractmethod
+    def buscar_click(
+        self,
+        id_afiliado: str,
+        timestamp_conversion: datetime,
+        session_id: Optional[str] = None,
+        identificador_dispositivo: Optional[str] = None
+    ) -> Optional[AtribucionClick]:
+        """
+        Busca el click más reciente de la misma sesión o dispositivo dentro de la ventana
+        Retorna: la atribución, o None si no hay click que coincida
+        """
+        pass
+    
+    @abstractmethod
+    def obtener_metricas(self) -> Dict[str, Any]:
+        """Obtiene contadores de clicks indexados y conversiones atribuidas"""
+        pass
+
 class ServicioValidacionEventos:
     """Servicio de dominio para validar eventos según reglas de negocio"""
     
@@ -5,7 +5,7 @@ Implementa inyección de dependencias siguiendo principios DDD
 
 import os
 import logging
-from typing import Optional
+from typing import Optional, Dict, Any
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO)
@@ -18,16 +18,24 @@ from .dominio.servicios import ServicioValidacionEventos
 from .aplicacion.handlers import (
     ProcesarEventoTrackingHandler, ReprocesarEventoFallidoHandler,
     ObtenerEstadoEventoHandler, ObtenerEstadisticasProcessingHandler,
-    ObtenerEventosFallidosHandler, ObtenerRateLimitStatusHandler
+    ObtenerEventosFallidosHandler, ObtenerRateLimitStatusHandler,
+    ResetearRateLimitHandler, LimpiarEventosAntiguosHandler
 )
 
 # Infraestructura
 from .infraestructura.adaptadores import PulsarEventPublisher
+from .infraestructura.enriquecimiento import ParserUserAgentCacheado
+from .infraestructura.filtros import FiltroTraficoListasBloqueo
+from .infraestructura.atribucion import IndiceAtribucionClicks
+from .infraestructura.precalentamiento import PrecalentadorDeduplicacion
 from .infraestructura.repositorios import (
     InMemoryRepositorioEventos, MockRepositorioAfiliados,
     MockRepositorioCampanas, InMemoryRepositorioRateLimiting,
     RedisRepositorioEventos, RedisRepositorioRateLimiting
 )
+from .infraestructura.memoria_compartida import (
+    SharedMemoryRepositorioEventos, SharedMemoryRepositorioRateLimiting
+)
 
 class EventCollectorFactory:
     """
@@ -51,6 +59,9 @@ class EventCollectorFactory:
             
             # Crear servicios de dominio
             servicio_publicacion = self._create_publicacion_service()
+            servicio_enriquecimiento = self._create_enriquecimiento_service()
+            servicio_filtrado = self._create_filtrado_service()
+            servicio_atribucion = self._create_atribucion_service()
             servicio_validacion = ServicioValidacionEventos(
                 repo_eventos, repo_afiliados, repo_campanas, repo_rate_limiting
             )
@@ -60,7 +71,10 @@ class EventCollectorFactory:
                 servicio_publicacion=servicio_publicacion,
                 servicio_validacion=servicio_validacion,
                 repo_eventos=repo_eventos,
-                repo_rate_limiting=repo_rate_limiting
+                repo_rate_limiting=repo_rate_limiting,
+                servicio_enriquecimiento=servicio_enriquecimiento,
+                servicio_filtrado=servicio_filtrado,
+                servicio_atribucion=servicio_atribucion
             )
             
         return self._handlers_cache['event_processing']
@@ -97,12 +111,75 @@ class EventCollectorFactory:
             
         return self._handlers_cache['rate_limit_status']
     
+    def create_resetear_rate_limit_handler(self) -> ResetearRateLimitHandler:
+        if 'resetear_rate_limit' not in self._handlers_cache:
+            repo_rate_limiting = self._create_rate_limiting_repository()
+            self._handlers_cache['resetear_rate_limit'] = ResetearRateLimitHandler(repo_rate_limiting)
+            
+        return self._handlers_cache['resetear_rate_limit']
+    
+    def create_limpiar_eventos_handler(self) -> LimpiarEventosAntiguosHandler:
+        if 'limpiar_eventos' not in self._handlers_cache:
+            repo_eventos = self._create_eventos_repository()
+            self._handlers_cache['limpiar_eventos'] = LimpiarEventosAntiguosHandler(repo_eventos)
+            
+        return self._handlers_cache['limpiar_eventos']
+    
+    def crear_precalentador(self) -> PrecalentadorDeduplicacion:
+        """
+        Crea el precalentador de deduplicación
+        Solo se habilita con DEDUP_WARMUP_MINUTES > 0 y un backend que no persiste (no Redis)
+        """
+        if 'precalentamiento' not in self._services_cache:
+            ventana_minutos = int(os.getenv('DEDUP_WARMUP_MINUTES', 0))
+            use_redis = os.getenv('USE_REDIS', 'false').lower() == 'true'
+            
+            if ventana_minutos > 0 and not use_redis:
+                repo_eventos = self._create_eventos_repository()
+                logger.info(f"Precalentamiento de deduplicación habilitado: {ventana_minutos} minutos")
+            else:
+                repo_eventos = None
+                ventana_minutos = 0
+            
+            self._services_cache['precalentamiento'] = PrecalentadorDeduplicacion(
+                repo_eventos=repo_eventos,
+                pulsar_url=os.getenv('PULSAR_URL', 'pulsar://localhost:6650'),
+                ventana_minutos=ventana_minutos,
+                tamano_lote=int(os.getenv('DEDUP_WARMUP_BATCH_SIZE', 1000))
+            )
+            
+        return self._services_cache['precalentamiento']
+    
+    def obtener_metricas(self) -> Dict[str, Any]:
+        """Agrega las métricas expuestas por los componentes ya inicializados"""
+        metricas = {}
+        
+        if 'enriquecimiento' in self._services_cache:
+            metricas['enriquecimiento'] = self._services_cache['enriquecimiento'].obtener_metricas()
+        
+        if self._services_cache.get('filtrado'):
+            metricas['filtrado'] = self._services_cache['filtrado'].obtener_metricas()
+        
+        if 'atribucion' in self._services_cache:
+            metricas['atribucion'] = self._services_cache['atribucion'].obtener_metricas()
+        
+        if 'precalentamiento' in self._services_cache:
+            metricas['precalentamiento'] = self._services_cache['precalentamiento'].obtener_metricas()
+        
+        for nombre in ('eventos', 'rate_limiting'):
+            repositorio = self._repositories_cache.get(nombre)
+            if hasattr(repositorio, 'obtener_metricas'):
+                metricas.setdefault('memoria_compartida', {})[nombre] = repositorio.obtener_metricas()
+            
+        return metricas
+    
     # Métodos privados para crear servicios de infraestructura
     
     def _create_eventos_repository(self):
         """Crea repositorio de eventos según configuración"""
         if 'eventos' not in self._repositories_cache:
             use_redis = os.getenv('USE_REDIS', 'false').lower() == 'true'
+            use_shared_memory = os.getenv('USE_SHARED_MEMORY', 'false').lower() == 'true'
             
             if use_redis:
                 try:
@@ -117,6 +194,15 @@ class EventCollectorFactory:
                 except ImportError:
                     logger.warning("Redis no disponible, usando repositorio en memoria")
                     self._repositories_cache['eventos'] = InMemoryRepositorioEventos()
+            elif use_shared_memory:
+                try:
+                    self._repositories_cache['eventos'] = SharedMemoryRepositorioEventos(
+                        total_slots=int(os.getenv('SHM_EVENTOS_SLOTS', 262144))
+                    )
+                    logger.info("Usando SharedMemoryRepositorioEventos")
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Memoria compartida no disponible ({str(e)}), usando repositorio en memoria")
+                    self._repositories_cache['eventos'] = InMemoryRepositorioEventos()
             else:
                 self._repositories_cache['eventos'] = InMemoryRepositorioEventos()
                 logger.info("Usando InMemoryRepositorioEventos")
@@ -143,6 +229,7 @@ class EventCollectorFactory:
         """Crea repositorio de rate limiting según configuración"""
         if 'rate_limiting' not in self._repositories_cache:
             use_redis = os.getenv('USE_REDIS', 'false').lower() == 'true'
+            use_shared_memory = os.getenv('USE_SHARED_MEMORY', 'false').lower() == 'true'
             
             if use_redis:
                 try:
@@ -157,6 +244,15 @@ class EventCollectorFactory:
                 except ImportError:
                     logger.warning("Redis no disponible, usando repositorio en memoria")
                     self._repositories_cache['rate_limiting'] = InMemoryRepositorioRateLimiting()
+            elif use_shared_memory:
+                try:
+                    self._repositories_cache['rate_limiting'] = SharedMemoryRepositorioRateLimiting(
+                        total_slots=int(os.getenv('SHM_RATE_LIMIT_SLOTS', 16384))
+                    )
+                    logger.info("Usando SharedMemoryRepositorioRateLimiting")
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Memoria compartida no disponible ({str(e)}), usando repositorio en memoria")
+                    self._repositories_cache['rate_limiting'] = InMemoryRepositorioRateLimiting()
             else:
                 self._repositories_cache['rate_limiting'] = InMemoryRepositorioRateLimiting()
                 logger.info("Usando InMemoryRepositorioRateLimiting")
@@ -167,11 +263,50 @@ class EventCollectorFactory:
         """Crea servicio de publicación de eventos"""
         if 'publicacion' not in self._services_cache:
             pulsar_url = os.getenv('PULSAR_URL', 'pulsar://localhost:6650')
-            self._services_cache['publicacion'] = PulsarEventPublisher(pulsar_url)
-            logger.info(f"Usando PulsarEventPublisher con URL: {pulsar_url}")
+            formato = os.getenv('TRACKING_WIRE_FORMAT', 'avro')
+            self._services_cache['publicacion'] = PulsarEventPublisher(pulsar_url, formato)
+            logger.info(f"Usando PulsarEventPublisher con URL: {pulsar_url} y formato {formato}")
             
         return self._services_cache['publicacion']
 
+    def _create_enriquecimiento_service(self):
+        """Crea servicio de enriquecimiento de dispositivo desde el User-Agent"""
+        if 'enriquecimiento' not in self._services_cache:
+            tamano_cache = int(os.getenv('UA_CACHE_SIZE', 50000))
+            self._services_cache['enriquecimiento'] = ParserUserAgentCacheado(tamano_cache)
+            logger.info(f"Usando ParserUserAgentCacheado con caché de {tamano_cache} entradas")
+            
+        return self._services_cache['enriquecimiento']
+
+    def _create_filtrado_service(self):
+        """Crea el filtro de listas de bloqueo si hay listas configuradas"""
+        if 'filtrado' not in self._services_cache:
+            ruta_ips = os.getenv('BLOCKLIST_IP_PATH')
+            ruta_user_agents = os.getenv('BLOCKLIST_UA_PATH')
+            
+            if ruta_ips or ruta_user_agents:
+                self._services_cache['filtrado'] = FiltroTraficoListasBloqueo(
+                    ruta_ips=ruta_ips,
+                    ruta_user_agents=ruta_user_agents,
+                    intervalo_recarga_segundos=float(os.getenv('BLOCKLIST_RELOAD_SECONDS', 5))
+                )
+                logger.info(f"Usando FiltroTraficoListasBloqueo - IPs: {ruta_ips}, User-Agents: {ruta_user_agents}")
+            else:
+                self._services_cache['filtrado'] = None
+                logger.info("Sin listas de bloqueo configuradas, filtrado deshabilitado")
+            
+        return self._services_cache['filtrado']
+
+    def _create_atribucion_service(self):
+        """Crea el índice de atribución click-conversión"""
+        if 'atribucion' not in self._services_cache:
+            ventana_minutos = int(os.getenv('ATTRIBUTION_WINDOW_MINUTES', 1440))
+            max_entradas = int(os.getenv('ATTRIBUTION_MAX_ENTRIES', 200000))
+            self._services_cache['atribucion'] = IndiceAtribucionClicks(ventana_minutos, max_entradas)
+            logger.info(f"Usando IndiceAtribucionClicks - Ventana: {ventana_minutos} min, Máximo: {max_entradas} entradas")
+            
+        return self._services_cache['atribucion']
+
 # Instancia global del factory
 event_collector_factory = EventCollectorFactory()
 
@@ -198,3 +333,19 @@ def get_eventos_fallidos_handler() -> ObtenerEventosFallidosHandler:
 def get_rate_limit_status_handler() -> ObtenerRateLimitStatusHandler:
     """Dependency provider para rate limiting"""
     return event_collector_factory.create_rate_limit_status_handler()
+
+def get_resetear_rate_limit_handler() -> ResetearRateLimitHandler:
+    """Dependency provider para el reseteo administrativo de rate limiting"""
+    return event_collector_factory.create_resetear_rate_limit_handler()
+
+def get_limpiar_eventos_handler() -> LimpiarEventosAntiguosHandler:
+    """Dependency provider para la limpieza de la caché de deduplicación"""
+    return event_collector_factory.create_limpiar_eventos_handler()
+
+def get_precalentador() -> PrecalentadorDeduplicacion:
+    """Dependency provider para el precalentamiento de deduplicación"""
+    return event_collector_factory.crear_precalentador()
+
+def get_metricas() -> Dict[str, Any]:
+    """Dependency provider para métricas de componentes"""
+    return event_collector_factory.obtener_metricas()
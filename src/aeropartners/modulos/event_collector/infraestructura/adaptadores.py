@@ -1,4 +1,3 @@
-import json
 import logging
 from typing import Dict, Any
 from datetime import datetime
@@ -6,6 +5,7 @@ from datetime import datetime
 from ..dominio.enums import TipoEvento
 from ..dominio.objetos_valor import ContextoEvento, PayloadEvento
 from ..dominio.servicios import ServicioPublicacionEventos
+from .serializacion import crear_codificador
 
 logger = logging.getLogger(__name__)
 
@@ -23,11 +23,14 @@ class PulsarEventPublisher(ServicioPublicacionEventos):
         TipoEvento.PAGE_VIEW: "tracking.commands.RegisterPageView.v1"
     }
     
-    def __init__(self, pulsar_url: str = None):
+    def __init__(self, pulsar_url: str = None, formato: str = "avro", client=None):
         self.pulsar_url = pulsar_url or "pulsar://localhost:6650"
+        self.codificador = crear_codificador(formato)
         self.producers = {}  # Cache de producers por topic
-        self.client = None
-        self._init_pulsar_connection()
+        # Un cliente ya creado (p.ej. un doble en el benchmark) evita abrir la conexión
+        self.client = client
+        if self.client is None:
+            self._init_pulsar_connection()
     
     def _init_pulsar_connection(self):
         """Inicializa la conexión con Pulsar"""
@@ -61,7 +64,7 @@ class PulsarEventPublisher(ServicioPublicacionEventos):
         
         return self.producers[topic]
     
-    def publicar_evento(
+    async def publicar_evento(
         self, 
         tipo_evento: TipoEvento,
         contexto: ContextoEvento,
@@ -83,21 +86,23 @@ class PulsarEventPublisher(ServicioPublicacionEventos):
             producer = self._get_producer_for_topic(topic)
             
             # Preparar mensaje con schema versioning
+            schema_version = self.codificador.SCHEMA_VERSION
             mensaje = {
-                "schema_version": "v1",
+                "schema_version": schema_version,
                 "event_type": tipo_evento.value,
                 "timestamp": datetime.now().isoformat(),
                 "data": metadatos,
                 "partition_key": partition_key
             }
             
-            # Publicar mensaje
+            # Publicar mensaje; los consumidores eligen el decodificador por schema_version
             message_result = producer.send(
-                json.dumps(mensaje).encode('utf-8'),
+                self.codificador.codificar(mensaje),
                 properties={
                     "event_type": tipo_evento.value,
                     "affiliate_id": contexto.id_afiliado,
-                    "schema_version": "v1",
+                    "schema_version": schema_version,
+                    "content_type": self.codificador.CONTENT_TYPE,
                     "partition_key": partition_key
                 }
             )
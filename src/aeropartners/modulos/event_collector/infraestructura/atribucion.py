@@ -0,0 +1,126 @@
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Tuple
+
+from ..dominio.objetos_valor import AtribucionClick
+from ..dominio.servicios import ServicioAtribucionClicks
+
+logger = logging.getLogger(__name__)
+
+class IndiceAtribucionClicks(ServicioAtribucionClicks):
+    """
+    Índice en memoria de clicks recientes para atribuir conversiones
+    - Claves (afiliado, sesión) y (afiliado, dispositivo) sobre un OrderedDict:
+      búsqueda O(1) y las entradas quedan ordenadas por última actualización
+    - Las entradas fuera de la ventana se purgan desde el frente al registrar
+    - Al superar max_entradas se desaloja la entrada más antigua
+    Cada worker mantiene su propio índice: solo se atribuyen conversiones que
+    llegan al mismo proceso que recibió el click
+    """
+
+    CRITERIO_SESION = "session"
+    CRITERIO_DISPOSITIVO = "dispositivo"
+
+    def __init__(self, ventana_minutos: int = 1440, max_entradas: int = 200000):
+        self.ventana = timedelta(minutes=ventana_minutos)
+        self.max_entradas = max_entradas
+        self._entradas: "OrderedDict[Tuple[str, str, str], Tuple[str, datetime]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._clicks_registrados = 0
+        self._conversiones_evaluadas = 0
+        self._conversiones_atribuidas = 0
+        self._expiradas = 0
+        self._desalojadas = 0
+
+    def registrar_click(
+        self,
+        id_afiliado: str,
+        id_evento_click: str,
+        timestamp: datetime,
+        session_id: Optional[str] = None,
+        identificador_dispositivo: Optional[str] = None
+    ) -> None:
+        """Registra el click bajo su sesión y su dispositivo (el último click gana)"""
+        claves = self._generar_claves(id_afiliado, session_id, identificador_dispositivo)
+        if not claves:
+            return
+
+        with self._lock:
+            for _, clave in claves:
+                self._entradas[clave] = (id_evento_click, timestamp)
+                self._entradas.move_to_end(clave)
+            self._clicks_registrados += 1
+            self._purgar(timestamp)
+
+    def buscar_click(
+        self,
+        id_afiliado: str,
+        timestamp_conversion: datetime,
+        session_id: Optional[str] = None,
+        identificador_dispositivo: Optional[str] = None
+    ) -> Optional[AtribucionClick]:
+        """Busca el click por sesión y, si no hay, por dispositivo"""
+        claves = self._generar_claves(id_afiliado, session_id, identificador_dispositivo)
+        limite = timestamp_conversion - self.ventana
+
+        with self._lock:
+            self._conversiones_evaluadas += 1
+            for criterio, clave in claves:
+                entrada = self._entradas.get(clave)
+                if entrada is None:
+                    continue
+
+                id_evento_click, timestamp_click = entrada
+                if limite <= timestamp_click <= timestamp_conversion:
+                    self._conversiones_atribuidas += 1
+                    return AtribucionClick(
+                        id_evento_click=id_evento_click,
+                        segundos_desde_click=(timestamp_conversion - timestamp_click).total_seconds(),
+                        criterio=criterio
+                    )
+        return None
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        """Obtiene el tamaño del índice y la tasa de conversiones atribuidas"""
+        with self._lock:
+            evaluadas = self._conversiones_evaluadas
+            return {
+                'entradas': len(self._entradas),
+                'max_entradas': self.max_entradas,
+                'ventana_minutos': int(self.ventana.total_seconds() // 60),
+                'clicks_registrados': self._clicks_registrados,
+                'conversiones_evaluadas': evaluadas,
+                'conversiones_atribuidas': self._conversiones_atribuidas,
+                'tasa_atribucion': round(self._conversiones_atribuidas / evaluadas, 4) if evaluadas else 0.0,
+                'entradas_expiradas': self._expiradas,
+                'entradas_desalojadas': self._desalojadas
+            }
+
+    def _purgar(self, ahora: datetime) -> None:
+        """Quita del frente las entradas vencidas y las que exceden la capacidad"""
+        limite = ahora - self.ventana
+        while self._entradas:
+            clave, (_, timestamp_click) = next(iter(self._entradas.items()))
+            if timestamp_click < limite:
+                self._expiradas += 1
+            elif len(self._entradas) > self.max_entradas:
+                self._desalojadas += 1
+            else:
+                break
+            del self._entradas[clave]
+
+    def _generar_claves(
+        self,
+        id_afiliado: str,
+        session_id: Optional[str],
+        identificador_dispositivo: Optional[str]
+    ):
+        claves = []
+        if session_id:
+            claves.append((self.CRITERIO_SESION, (id_afiliado, self.CRITERIO_SESION, session_id)))
+        if identificador_dispositivo:
+            claves.append((self.CRITERIO_DISPOSITIVO, (id_afiliado, self.CRITERIO_DISPOSITIVO, identificador_dispositivo)))
+        return claves
@@ -0,0 +1,142 @@
+import re
+import time
+import logging
+import threading
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Tuple, Pattern
+
+from ..dominio.enums import TipoDispositivo
+from ..dominio.objetos_valor import DatosDispositivo
+from ..dominio.servicios import ServicioEnriquecimientoDispositivo
+
+logger = logging.getLogger(__name__)
+
+class ParserUserAgentCacheado(ServicioEnriquecimientoDispositivo):
+    """
+    Parser de User-Agent basado en expresiones regulares con caché LRU
+    El tráfico real tiene muy pocos User-Agent distintos, por lo que casi todas
+    las consultas se resuelven desde la caché sin volver a parsear
+    """
+
+    # Longitud máxima del User-Agent usada como clave de la caché
+    MAX_LONGITUD_USER_AGENT = 512
+
+    # Versiones de Windows NT a nombre comercial
+    VERSIONES_WINDOWS = {
+        "10.0": "10",
+        "6.3": "8.1",
+        "6.2": "8",
+        "6.1": "7",
+        "6.0": "Vista",
+        "5.1": "XP"
+    }
+
+    # Reglas de sistema operativo, evaluadas en orden
+    REGLAS_SO: List[Tuple[Pattern, str]] = [
+        (re.compile(r"Windows NT (\d+\.\d+)"), "Windows"),
+        (re.compile(r"iPad.*? OS (\d+(?:_\d+)*)"), "iPadOS"),
+        (re.compile(r"(?:iPhone|iPod).*? OS (\d+(?:_\d+)*)"), "iOS"),
+        (re.compile(r"Android (\d+(?:\.\d+)*)"), "Android"),
+        (re.compile(r"CrOS [\w]+ (\d+(?:\.\d+)*)"), "ChromeOS"),
+        (re.compile(r"Mac OS X (\d+(?:[_.]\d+)*)"), "macOS"),
+        (re.compile(r"Linux()"), "Linux")
+    ]
+
+    # Reglas de navegador, evaluadas en orden (los derivados de Chrome van primero)
+    REGLAS_NAVEGADOR: List[Tuple[Pattern, str]] = [
+        (re.compile(r"Edg(?:e|A|iOS)?/(\d+)"), "Edge"),
+        (re.compile(r"(?:OPR|Opera)/(\d+)"), "Opera"),
+        (re.compile(r"SamsungBrowser/(\d+)"), "Samsung Internet"),
+        (re.compile(r"(?:Firefox|FxiOS)/(\d+)"), "Firefox"),
+        (re.compile(r"(?:Chrome|CriOS)/(\d+)"), "Chrome"),
+        (re.compile(r"Version/(\d+).*Safari/"), "Safari"),
+        (re.compile(r"(?:MSIE |Trident/.*rv:)(\d+)"), "Internet Explorer")
+    ]
+
+    PATRON_TABLET = re.compile(r"iPad|Tablet|PlayBook|Silk|Kindle")
+    PATRON_MOBILE = re.compile(r"Mobi|iPhone|iPod|Windows Phone|BlackBerry|Opera Mini")
+    PATRON_ANDROID = re.compile(r"Android")
+    PATRON_DESKTOP = re.compile(r"Windows NT|Macintosh|X11|CrOS")
+
+    def __init__(self, tamano_cache: int = 50000):
+        self.tamano_cache = tamano_cache
+        self._parsear_cacheado = lru_cache(maxsize=tamano_cache)(self._parsear)
+        self._lock = threading.Lock()
+        self._tiempo_parseo_total = 0.0
+        self._parseos = 0
+
+    def enriquecer(self, user_agent: str) -> DatosDispositivo:
+        """Deriva los datos del dispositivo desde el User-Agent usando la caché LRU"""
+        return self._parsear_cacheado((user_agent or "")[:self.MAX_LONGITUD_USER_AGENT])
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        """Obtiene métricas de la caché y del tiempo de parseo"""
+        info = self._parsear_cacheado.cache_info()
+        consultas = info.hits + info.misses
+
+        with self._lock:
+            tiempo_total = self._tiempo_parseo_total
+            parseos = self._parseos
+
+        return {
+            'cache_hits': info.hits,
+            'cache_misses': info.misses,
+            'hit_ratio': round(info.hits / consultas, 4) if consultas else 0.0,
+            'entradas_cache': info.currsize,
+            'capacidad_cache': info.maxsize,
+            'tiempo_parseo_total_ms': round(tiempo_total * 1000, 3),
+            'tiempo_parseo_promedio_us': round(tiempo_total / parseos * 1_000_000, 2) if parseos else 0.0
+        }
+
+    def limpiar_cache(self) -> None:
+        """Vacía la caché (uso administrativo y pruebas)"""
+        self._parsear_cacheado.cache_clear()
+
+    def _parsear(self, user_agent: str) -> DatosDispositivo:
+        """Parsea el User-Agent (solo se ejecuta cuando hay fallo de caché)"""
+        inicio = time.perf_counter()
+
+        datos = DatosDispositivo(
+            tipo=self._detectar_tipo(user_agent),
+            so=self._detectar_so(user_agent),
+            navegador=self._detectar_navegador(user_agent)
+        )
+
+        duracion = time.perf_counter() - inicio
+        with self._lock:
+            self._tiempo_parseo_total += duracion
+            self._parseos += 1
+
+        return datos
+
+    def _detectar_tipo(self, user_agent: str) -> TipoDispositivo:
+        if self.PATRON_TABLET.search(user_agent):
+            return TipoDispositivo.TABLET
+        if self.PATRON_MOBILE.search(user_agent):
+            return TipoDispositivo.MOBILE
+        if self.PATRON_ANDROID.search(user_agent):
+            # Android sin el token "Mobile" corresponde a tablets
+            return TipoDispositivo.TABLET
+        if self.PATRON_DESKTOP.search(user_agent):
+            return TipoDispositivo.DESKTOP
+        return TipoDispositivo.OTHER
+
+    def _detectar_so(self, user_agent: str) -> Optional[str]:
+        for patron, nombre in self.REGLAS_SO:
+            coincidencia = patron.search(user_agent)
+            if not coincidencia:
+                continue
+
+            version = coincidencia.group(1).replace("_", ".")
+            if nombre == "Windows":
+                version = self.VERSIONES_WINDOWS.get(version, version)
+
+            return f"{nombre} {version}" if version else nombre
+        return None
+
+    def _detectar_navegador(self, user_agent: str) -> Optional[str]:
+        for patron, nombre in self.REGLAS_NAVEGADOR:
+            coincidencia = patron.search(user_agent)
+            if coincidencia:
+                return f"{nombre} {coincidencia.group(1)}"
+        return None
@@ -0,0 +1,268 @@
+import os
+import time
+import logging
+import ipaddress
+import threading
+from collections import Counter, deque
+from typing import Dict, Any, Optional, List, Iterable, Tuple
+
+from ..dominio.servicios import ServicioFiltradoTrafico
+
+logger = logging.getLogger(__name__)
+
+class ArbolPrefijosIP:
+    """
+    Árbol de prefijos binario (trie) para rangos CIDR IPv4 e IPv6
+    La búsqueda recorre como máximo un nodo por bit de la dirección,
+    independientemente de la cantidad de rangos cargados
+    """
+
+    # Índices de cada nodo: [hijo_bit_0, hijo_bit_1, es_fin_de_prefijo]
+    _HIJO_0, _HIJO_1, _FIN = 0, 1, 2
+
+    def __init__(self, rangos: Iterable[str] = ()):
+        self._raices = {4: [None, None, False], 6: [None, None, False]}
+        self.total_rangos = 0
+        for rango in rangos:
+            self.agregar(rango)
+
+    def agregar(self, rango: str) -> None:
+        """Agrega un rango CIDR (o una IP suelta) al árbol"""
+        red = ipaddress.ip_network(rango.strip(), strict=False)
+        ancho = red.max_prefixlen
+        valor = int(red.network_address)
+
+        nodo = self._raices[red.version]
+        for i in range(red.prefixlen):
+            if nodo[self._FIN]:
+                # Un prefijo más corto ya cubre este rango
+                return
+            bit = (valor >> (ancho - 1 - i)) & 1
+            if nodo[bit] is None:
+                nodo[bit] = [None, None, False]
+            nodo = nodo[bit]
+
+        nodo[self._FIN] = True
+        nodo[self._HIJO_0] = nodo[self._HIJO_1] = None
+        self.total_rangos += 1
+
+    def contiene(self, ip: str) -> bool:
+        """Verifica si la IP pertenece a alguno de los rangos cargados"""
+        try:
+            direccion = ipaddress.ip_address(ip)
+        except ValueError:
+            return False
+
+        if direccion.version == 6 and direccion.ipv4_mapped:
+            direccion = direccion.ipv4_mapped
+
+        ancho = direccion.max_prefixlen
+        valor = int(direccion)
+        nodo = self._raices[direccion.version]
+
+        for i in range(ancho):
+            if nodo[self._FIN]:
+                return True
+            nodo = nodo[(valor >> (ancho - 1 - i)) & 1]
+            if nodo is None:
+                return False
+
+        return nodo[self._FIN]
+
+class AutomataAhoCorasick:
+    """
+    Autómata de Aho-Corasick para buscar miles de firmas a la vez
+    Recorre el texto una sola vez sin importar la cantidad de patrones
+    La búsqueda no distingue mayúsculas de minúsculas
+    """
+
+    def __init__(self, patrones: Iterable[str] = ()):
+        self._transiciones: List[Dict[str, int]] = [{}]
+        self._fallo: List[int] = [0]
+        self._salida: List[Optional[str]] = [None]
+        self.total_patrones = 0
+
+        for patron in patrones:
+            self._agregar(patron)
+        self._construir_enlaces_fallo()
+
+    def buscar(self, texto: str) -> Optional[str]:
+        """Retorna el primer patrón encontrado en el texto, o None"""
+        if not texto or self.total_patrones == 0:
+            return None
+
+        transiciones, fallo, salida = self._transiciones, self._fallo, self._salida
+        estado = 0
+        for caracter in texto.lower():
+            while estado and caracter not in transiciones[estado]:
+                estado = fallo[estado]
+            estado = transiciones[estado].get(caracter, 0)
+            if salida[estado] is not None:
+                return salida[estado]
+        return None
+
+    def _agregar(self, patron: str) -> None:
+        patron = patron.strip().lower()
+        if not patron:
+            return
+
+        estado = 0
+        for caracter in patron:
+            siguiente = self._transiciones[estado].get(caracter)
+            if siguiente is None:
+                siguiente = len(self._transiciones)
+                self._transiciones.append({})
+                self._fallo.append(0)
+                self._salida.append(None)
+                self._transiciones[estado][caracter] = siguiente
+            estado = siguiente
+
+        if self._salida[estado] is None:
+            self._salida[estado] = patron
+            self.total_patrones += 1
+
+    def _construir_enlaces_fallo(self) -> None:
+        """Calcula los enlaces de fallo recorriendo el trie por niveles (BFS)"""
+        cola = deque(self._transiciones[0].values())
+        while cola:
+            estado = cola.popleft()
+            for caracter, siguiente in self._transiciones[estado].items():
+                cola.append(siguiente)
+
+                fallo = self._fallo[estado]
+                while fallo and caracter not in self._transiciones[fallo]:
+                    fallo = self._fallo[fallo]
+                destino = self._transiciones[fallo].get(caracter, 0)
+                self._fallo[siguiente] = destino if destino != siguiente else 0
+
+                # Propagar la salida del sufijo más largo que también es patrón
+                if self._salida[siguiente] is None:
+                    self._salida[siguiente] = self._salida[self._fallo[siguiente]]
+
+class FiltroTraficoListasBloqueo(ServicioFiltradoTrafico):
+    """
+    Filtro de tráfico basado en listas de bloqueo en archivos locales
+    - IPs: un rango CIDR o IP por línea, evaluado con un árbol de prefijos
+    - User-Agents: una firma de bot por línea, evaluada con Aho-Corasick
+    Los archivos se recargan en caliente cuando cambia su fecha de modificación
+    Las líneas vacías y las que comienzan con '#' se ignoran
+    """
+
+    RAZON_IP = "ip_bloqueada"
+    RAZON_USER_AGENT = "user_agent_bot"
+
+    def __init__(
+        self,
+        ruta_ips: Optional[str] = None,
+        ruta_user_agents: Optional[str] = None,
+        intervalo_recarga_segundos: float = 5.0
+    ):
+        self.ruta_ips = ruta_ips
+        self.ruta_user_agents = ruta_user_agents
+        self.intervalo_recarga_segundos = intervalo_recarga_segundos
+
+        self._arbol_ips = ArbolPrefijosIP()
+        self._automata_user_agents = AutomataAhoCorasick()
+        self._mtimes: Dict[str, Optional[float]] = {}
+        self._ultima_revision = 0.0
+        self._lock = threading.Lock()
+
+        self._evaluados = 0
+        self._filtrados = Counter()
+        self._recargas = 0
+
+        self._recargar_si_cambio(forzar=True)
+
+    def evaluar(self, ip_origen: str, user_agent: str) -> Optional[str]:
+        """Evalúa IP y User-Agent contra las listas de bloqueo vigentes"""
+        self._recargar_si_cambio()
+
+        # Leer referencias una sola vez: una recarga concurrente las reemplaza atómicamente
+        arbol_ips = self._arbol_ips
+        automata = self._automata_user_agents
+
+        razon = None
+        if ip_origen and arbol_ips.contiene(ip_origen):
+            razon = self.RAZON_IP
+        elif user_agent and automata.buscar(user_agent) is not None:
+            razon = self.RAZON_USER_AGENT
+
+        with self._lock:
+            self._evaluados += 1
+            if razon:
+                self._filtrados[razon] += 1
+
+        return razon
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        """Obtiene contadores de eventos filtrados por razón y estado de las listas"""
+        with self._lock:
+            return {
+                'eventos_evaluados': self._evaluados,
+                'eventos_filtrados': sum(self._filtrados.values()),
+                'filtrados_por_razon': dict(self._filtrados),
+                'rangos_ip_cargados': self._arbol_ips.total_rangos,
+                'firmas_user_agent_cargadas': self._automata_user_agents.total_patrones,
+                'recargas': self._recargas
+            }
+
+    def _recargar_si_cambio(self, forzar: bool = False) -> None:
+        """Recarga las listas si cambiaron en disco (revisión limitada por intervalo)"""
+        ahora = time.monotonic()
+        if not forzar and ahora - self._ultima_revision < self.intervalo_recarga_segundos:
+            return
+
+        with self._lock:
+            if not forzar and ahora - self._ultima_revision < self.intervalo_recarga_segundos:
+                return
+            self._ultima_revision = ahora
+
+        if self._archivo_cambio(self.ruta_ips):
+            self._arbol_ips = self._cargar_ips(self.ruta_ips)
+            self._registrar_recarga(self.ruta_ips)
+
+        if self._archivo_cambio(self.ruta_user_agents):
+            self._automata_user_agents = AutomataAhoCorasick(self._leer_lineas(self.ruta_user_agents))
+            self._registrar_recarga(self.ruta_user_agents)
+
+    def _archivo_cambio(self, ruta: Optional[str]) -> bool:
+        if not ruta:
+            return False
+        try:
+            mtime = os.stat(ruta).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        if ruta in self._mtimes and self._mtimes[ruta] == mtime:
+            return False
+        self._mtimes[ruta] = mtime
+        return True
+
+    def _registrar_recarga(self, ruta: str) -> None:
+        with self._lock:
+            self._recargas += 1
+        logger.info(f"Lista de bloqueo recargada: {ruta}")
+
+    def _cargar_ips(self, ruta: str) -> ArbolPrefijosIP:
+        arbol = ArbolPrefijosIP()
+        for numero, linea in self._leer_lineas_numeradas(ruta):
+            try:
+                arbol.agregar(linea)
+            except ValueError:
+                logger.warning(f"Rango IP inválido en {ruta}:{numero}: {linea}")
+        return arbol
+
+    def _leer_lineas(self, ruta: str) -> List[str]:
+        return [linea for _, linea in self._leer_lineas_numeradas(ruta)]
+
+    def _leer_lineas_numeradas(self, ruta: str) -> List[Tuple[int, str]]:
+        try:
+            with open(ruta, encoding="utf-8") as archivo:
+                return [
+                    (numero, linea.strip())
+                    for numero, linea in enumerate(archivo, start=1)
+                    if linea.strip() and not linea.lstrip().startswith("#")
+                ]
+        except OSError as e:
+            logger.warning(f"No se pudo leer la lista de bloqueo {ruta}: {str(e)}")
+            return []
@@ -0,0 +1,304 @@
+import os
+import mmap
+import time
+import struct
+import hashlib
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Plataformas sin fcntl: solo exclusión entre hilos del mismo proceso
+    fcntl = None
+
+from ..dominio.repositorios import RepositorioEventos, RepositorioRateLimiting
+
+logger = logging.getLogger(__name__)
+
+def directorio_memoria_compartida() -> str:
+    """Directorio para los segmentos: /dev/shm si existe (tmpfs), si no el temporal del sistema"""
+    directorio = os.getenv('SHM_DIR')
+    if directorio:
+        return directorio
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+class TablaHashCompartida:
+    """
+    Tabla hash de tamaño fijo sobre un archivo mapeado en memoria (mmap)
+    Todos los procesos que abren el mismo archivo comparten los mismos datos
+    - La tabla se divide en buckets de N slots (asociativa por conjuntos)
+    - Cada bucket se protege con un bloqueo de rango de bytes (fcntl.lockf)
+      más un lock local por franja para los hilos del mismo proceso
+    - La geometría forma parte del nombre del archivo, de modo que un cambio
+      de configuración nunca reutiliza un segmento con otro formato
+    """
+
+    MAGIC = b"AEROSHM1"
+    FORMATO_CABECERA = "<8sIIII"
+    TAMANO_CABECERA = 64
+    FRANJAS_LOCALES = 64
+
+    def __init__(self, nombre: str, formato_slot: str, total_slots: int,
+                 slots_por_bucket: int = 16, directorio: Optional[str] = None):
+        self.formato_slot = struct.Struct(formato_slot)
+        self.slots_por_bucket = slots_por_bucket
+        self.num_buckets = max(1, total_slots // slots_por_bucket)
+        self.tamano_bucket = self.formato_slot.size * slots_por_bucket
+        self.tamano_total = self.TAMANO_CABECERA + self.num_buckets * self.tamano_bucket
+
+        self.ruta = os.path.join(
+            directorio or directorio_memoria_compartida(),
+            f"{nombre}-{self.num_buckets}x{slots_por_bucket}x{self.formato_slot.size}.shm"
+        )
+        self._locks_locales = [threading.Lock() for _ in range(self.FRANJAS_LOCALES)]
+
+        self._fd = os.open(self.ruta, os.O_RDWR | os.O_CREAT, 0o600)
+        self._inicializar()
+        self._mm = mmap.mmap(self._fd, self.tamano_total)
+
+    def _inicializar(self) -> None:
+        """Crea o valida la cabecera; el primer proceso en llegar dimensiona el archivo"""
+        with self._bloqueo_archivo(0, self.TAMANO_CABECERA):
+            if os.fstat(self._fd).st_size < self.tamano_total:
+                os.ftruncate(self._fd, self.tamano_total)
+
+            cabecera = os.pread(self._fd, struct.calcsize(self.FORMATO_CABECERA), 0)
+            magic, _, num_buckets, slots_por_bucket, tamano_slot = struct.unpack(self.FORMATO_CABECERA, cabecera)
+            geometria = (self.num_buckets, self.slots_por_bucket, self.formato_slot.size)
+
+            if magic == self.MAGIC:
+                if (num_buckets, slots_por_bucket, tamano_slot) != geometria:
+                    raise ValueError(f"Segmento compartido {self.ruta} con geometría incompatible")
+                return
+
+            os.pwrite(self._fd, struct.pack(self.FORMATO_CABECERA, self.MAGIC, 1, *geometria), 0)
+            logger.info(f"Segmento de memoria compartida inicializado: {self.ruta} ({self.tamano_total} bytes)")
+
+    @contextmanager
+    def bloquear_bucket(self, indice: int) -> Iterator[int]:
+        """Bloquea el bucket entre procesos e hilos; entrega el offset del bucket"""
+        offset = self.TAMANO_CABECERA + indice * self.tamano_bucket
+        with self._locks_locales[indice % self.FRANJAS_LOCALES]:
+            with self._bloqueo_archivo(offset, 1):
+                yield offset
+
+    @contextmanager
+    def _bloqueo_archivo(self, offset: int, longitud: int) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, longitud, offset)
+        try:
+            yield
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, longitud, offset)
+
+    def indice_bucket(self, clave: bytes) -> int:
+        return int.from_bytes(clave[:8], "little") % self.num_buckets
+
+    def leer_slots(self, offset: int):
+        """Lee todos los slots del bucket (debe llamarse con el bucket bloqueado)"""
+        return list(self.formato_slot.iter_unpack(self._mm[offset:offset + self.tamano_bucket]))
+
+    def escribir_slot(self, offset: int, posicion: int, *valores) -> None:
+        self.formato_slot.pack_into(self._mm, offset + posicion * self.formato_slot.size, *valores)
+
+    def vaciar_slot(self, offset: int, posicion: int) -> None:
+        inicio = offset + posicion * self.formato_slot.size
+        self._mm[inicio:inicio + self.formato_slot.size] = bytes(self.formato_slot.size)
+
+    def cerrar(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+    @staticmethod
+    def generar_clave(valor: str) -> bytes:
+        """Huella de 16 bytes usada como clave del slot (nunca todo ceros en la práctica)"""
+        return hashlib.blake2b(valor.encode(), digest_size=16).digest()
+
+class SharedMemoryRepositorioEventos(RepositorioEventos):
+    """
+    Repositorio de deduplicación compartido por todos los workers del host
+    Slot: huella del hash del evento (16 bytes) + instante de guardado (epoch)
+    Un slot vencido por TTL se considera libre; si el bucket está lleno se
+    desaloja el registro más antiguo
+    """
+
+    CLAVE_VACIA = bytes(16)
+
+    def __init__(self, ttl_horas: int = 24, total_slots: int = 262144,
+                 slots_por_bucket: int = 16, directorio: Optional[str] = None):
+        self.ttl_segundos = ttl_horas * 3600
+        self.tabla = TablaHashCompartida(
+            "aeropartners-ec-eventos", "<16sd", total_slots, slots_por_bucket, directorio
+        )
+        self._desalojos = 0
+
+    async def existe_evento(self, hash_evento: str) -> bool:
+        """Verifica si un evento ya fue procesado por cualquier worker del host"""
+        clave = self.tabla.generar_clave(hash_evento)
+        limite = time.time() - self.ttl_segundos
+
+        with self.tabla.bloquear_bucket(self.tabla.indice_bucket(clave)) as offset:
+            return any(
+                clave_slot == clave and guardado >= limite
+                for clave_slot, guardado in self.tabla.leer_slots(offset)
+            )
+
+    async def guardar_evento_temporal(self, hash_evento: str, timestamp: datetime) -> None:
+        """Guarda temporalmente un evento para deduplicación"""
+        ahora = time.time()
+        self._escribir(self.tabla.generar_clave(hash_evento), ahora, ahora - self.ttl_segundos)
+
+    async def guardar_eventos_temporales_lote(self, eventos: List[Tuple[str, datetime]]) -> int:
+        """
+        Guarda en bloque eventos ya procesados (precalentamiento)
+        El slot conserva el instante del evento: su vigencia es solo el TTL restante,
+        de modo que reproducir tráfico reciente no extiende la ventana de deduplicación
+        """
+        ahora = time.time()
+        limite = ahora - self.ttl_segundos
+        guardados = 0
+
+        for hash_evento, timestamp in eventos:
+            guardado = min(timestamp.timestamp(), ahora)
+            if guardado < limite:
+                continue
+            self._escribir(self.tabla.generar_clave(hash_evento), guardado, limite)
+            guardados += 1
+
+        return guardados
+
+    def _escribir(self, clave: bytes, guardado: float, limite: float) -> None:
+        with self.tabla.bloquear_bucket(self.tabla.indice_bucket(clave)) as offset:
+            slots = self.tabla.leer_slots(offset)
+
+            posicion = next((i for i, (clave_slot, _) in enumerate(slots) if clave_slot == clave), None)
+            if posicion is not None:
+                # Nunca se acorta la vigencia de un registro ya guardado
+                guardado = max(guardado, slots[posicion][1])
+            else:
+                posicion = next(
+                    (i for i, (clave_slot, guardado_slot) in enumerate(slots)
+                     if clave_slot == self.CLAVE_VACIA or guardado_slot < limite),
+                    None
+                )
+            if posicion is None:
+                posicion = min(range(len(slots)), key=lambda i: slots[i][1])
+                self._desalojos += 1
+
+            self.tabla.escribir_slot(offset, posicion, clave, guardado)
+
+    async def limpiar_eventos_antiguos(self, max_antiguedad_horas: int = 24) -> int:
+        """Libera los slots más antiguos que max_antiguedad_horas, bucket por bucket"""
+        limite = time.time() - max_antiguedad_horas * 3600
+        eliminados = 0
+
+        for indice in range(self.tabla.num_buckets):
+            with self.tabla.bloquear_bucket(indice) as offset:
+                for posicion, (clave_slot, guardado) in enumerate(self.tabla.leer_slots(offset)):
+                    if clave_slot != self.CLAVE_VACIA and guardado < limite:
+                        self.tabla.vaciar_slot(offset, posicion)
+                        eliminados += 1
+
+        return eliminados
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        """Obtiene la geometría del segmento y los desalojos de este proceso"""
+        return {
+            'ruta': self.tabla.ruta,
+            'capacidad_slots': self.tabla.num_buckets * self.tabla.slots_por_bucket,
+            'desalojos_proceso': self._desalojos
+        }
+
+class SharedMemoryRepositorioRateLimiting(RepositorioRateLimiting):
+    """
+    Repositorio de rate limiting compartido por todos los workers del host
+    Slot: huella del afiliado (16 bytes), tamaño de ventana, ventana fija y contador
+    El bucket depende solo del afiliado, así que todas sus ventanas viven juntas
+    y un reseteo toca un único bucket
+    """
+
+    CLAVE_VACIA = bytes(16)
+
+    def __init__(self, total_slots: int = 16384, slots_por_bucket: int = 16,
+                 directorio: Optional[str] = None):
+        self.tabla = TablaHashCompartida(
+            "aeropartners-ec-rate-limit", "<16sIIqq", total_slots, slots_por_bucket, directorio
+        )
+        self._desalojos = 0
+
+    async def incrementar_contador(self, id_afiliado: str, ventana_minutos: int = 1) -> int:
+        """Incrementa contador de eventos para el afiliado en la ventana especificada"""
+        clave = self.tabla.generar_clave(id_afiliado)
+        ventana_timestamp = self._ventana_actual(ventana_minutos)
+
+        with self.tabla.bloquear_bucket(self.tabla.indice_bucket(clave)) as offset:
+            slots = self.tabla.leer_slots(offset)
+
+            posicion = self._buscar_slot(slots, clave, ventana_minutos)
+            if posicion is not None and slots[posicion][3] == ventana_timestamp:
+                contador = slots[posicion][4] + 1
+            else:
+                contador = 1
+                if posicion is None:
+                    posicion = self._slot_libre(slots)
+
+            self.tabla.escribir_slot(offset, posicion, clave, ventana_minutos, 0, ventana_timestamp, contador)
+            return contador
+
+    async def obtener_contador_actual(self, id_afiliado: str, ventana_minutos: int = 1) -> int:
+        """Obtiene el contador actual de eventos del afiliado"""
+        clave = self.tabla.generar_clave(id_afiliado)
+        ventana_timestamp = self._ventana_actual(ventana_minutos)
+
+        with self.tabla.bloquear_bucket(self.tabla.indice_bucket(clave)) as offset:
+            slots = self.tabla.leer_slots(offset)
+            posicion = self._buscar_slot(slots, clave, ventana_minutos)
+
+            if posicion is None or slots[posicion][3] != ventana_timestamp:
+                return 0
+            return slots[posicion][4]
+
+    async def resetear_contador(self, id_afiliado: str) -> None:
+        """Resetea todas las ventanas del afiliado"""
+        clave = self.tabla.generar_clave(id_afiliado)
+
+        with self.tabla.bloquear_bucket(self.tabla.indice_bucket(clave)) as offset:
+            for posicion, slot in enumerate(self.tabla.leer_slots(offset)):
+                if slot[0] == clave:
+                    self.tabla.vaciar_slot(offset, posicion)
+
+        logger.info(f"Contadores reseteados para afiliado {id_afiliado}")
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        """Obtiene la geometría del segmento y los desalojos de este proceso"""
+        return {
+            'ruta': self.tabla.ruta,
+            'capacidad_slots': self.tabla.num_buckets * self.tabla.slots_por_bucket,
+            'desalojos_proceso': self._desalojos
+        }
+
+    @staticmethod
+    def _buscar_slot(slots, clave: bytes, ventana_minutos: int) -> Optional[int]:
+        for posicion, (clave_slot, ventana, _, _, _) in enumerate(slots):
+            if clave_slot == clave and ventana == ventana_minutos:
+                return posicion
+        return None
+
+    def _slot_libre(self, slots) -> int:
+        """Slot vacío, o uno cuya ventana ya terminó, o en último caso el más antiguo"""
+        for posicion, (clave_slot, ventana, _, ventana_timestamp, _) in enumerate(slots):
+            if clave_slot == self.CLAVE_VACIA or ventana_timestamp < self._ventana_actual(ventana):
+                return posicion
+
+        self._desalojos += 1
+        return min(range(len(slots)), key=lambda i: slots[i][3] * slots[i][1])
+
+    @staticmethod
+    def _ventana_actual(ventana_minutos: int) -> int:
+        return int(datetime.now().timestamp() // (ventana_minutos * 60))
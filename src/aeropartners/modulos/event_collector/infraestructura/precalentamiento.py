@@ -0,0 +1,171 @@
+import time
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Tuple
+
+from ..dominio.repositorios import RepositorioEventos
+from .adaptadores import PulsarEventPublisher
+from .serializacion import decodificar_mensaje
+
+logger = logging.getLogger(__name__)
+
+class PrecalentadorDeduplicacion:
+    """
+    Reconstruye la ventana de deduplicación al arrancar leyendo los últimos
+    minutos de los topics tracking.commands.* con un Reader de Pulsar
+    - Cada topic se posiciona por timestamp (seek) y se lee hasta el instante de arranque
+    - Los hashes se cargan en el repositorio por lotes
+    - Mientras corre, el servicio no se reporta listo; si falla, se degrada a listo
+      sin precalentar para no bloquear el despliegue
+    """
+
+    PENDIENTE = "PENDIENTE"
+    EN_CURSO = "EN_CURSO"
+    COMPLETADO = "COMPLETADO"
+    FALLIDO = "FALLIDO"
+    DESHABILITADO = "DESHABILITADO"
+
+    def __init__(
+        self,
+        repo_eventos: RepositorioEventos,
+        pulsar_url: str,
+        ventana_minutos: int,
+        topics: Optional[List[str]] = None,
+        tamano_lote: int = 1000,
+        timeout_lectura_ms: int = 1000
+    ):
+        self.repo_eventos = repo_eventos
+        self.pulsar_url = pulsar_url
+        self.ventana_minutos = ventana_minutos
+        self.topics = topics or sorted(set(PulsarEventPublisher.TOPIC_MAPPING.values()))
+        self.tamano_lote = tamano_lote
+        self.timeout_lectura_ms = timeout_lectura_ms
+
+        self.estado = self.DESHABILITADO if ventana_minutos <= 0 else self.PENDIENTE
+        self._hilo: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self._topics_completados = 0
+        self._mensajes_leidos = 0
+        self._hashes_cargados = 0
+        self._mensajes_invalidos = 0
+        self._inicio: Optional[float] = None
+        self._fin: Optional[float] = None
+        self._error: Optional[str] = None
+
+    @property
+    def listo(self) -> bool:
+        return self.estado in (self.COMPLETADO, self.FALLIDO, self.DESHABILITADO)
+
+    def iniciar(self) -> None:
+        """Lanza el precalentamiento en segundo plano (idempotente)"""
+        with self._lock:
+            if self.estado != self.PENDIENTE:
+                return
+            self.estado = self.EN_CURSO
+
+        self._hilo = threading.Thread(target=self.ejecutar, name="precalentamiento-dedup", daemon=True)
+        self._hilo.start()
+
+    def ejecutar(self) -> None:
+        """Lee todos los topics y carga los hashes (bloqueante)"""
+        if self.estado == self.DESHABILITADO:
+            return
+        self.estado = self.EN_CURSO
+        self._inicio = time.monotonic()
+        desde_ms = int((time.time() - self.ventana_minutos * 60) * 1000)
+        hasta_ms = int(time.time() * 1000)
+        logger.info(f"Precalentando deduplicación con los últimos {self.ventana_minutos} minutos de {len(self.topics)} topics")
+
+        cliente = None
+        try:
+            import pulsar
+            cliente = pulsar.Client(self.pulsar_url)
+
+            for topic in self.topics:
+                self._leer_topic(cliente, pulsar.MessageId.earliest, topic, desde_ms, hasta_ms)
+                with self._lock:
+                    self._topics_completados += 1
+
+            self.estado = self.COMPLETADO
+            logger.info(
+                f"Precalentamiento completado: {self._hashes_cargados} hashes "
+                f"en {self._duracion():.2f}s"
+            )
+        except Exception as e:
+            self._error = str(e)
+            self.estado = self.FALLIDO
+            logger.error(f"Precalentamiento de deduplicación fallido, se continúa sin él: {str(e)}")
+        finally:
+            self._fin = time.monotonic()
+            if cliente:
+                cliente.close()
+
+    def _leer_topic(self, cliente, mensaje_inicial, topic: str, desde_ms: int, hasta_ms: int) -> None:
+        reader = cliente.create_reader(topic, mensaje_inicial, receiver_queue_size=self.tamano_lote)
+        try:
+            reader.seek(desde_ms)
+            lote: List[Tuple[str, datetime]] = []
+
+            while reader.has_message_available():
+                mensaje = reader.read_next(timeout_millis=self.timeout_lectura_ms)
+                publicado_ms = mensaje.publish_timestamp()
+                if publicado_ms >= hasta_ms:
+                    # Mensajes posteriores al arranque ya no pertenecen a la ventana perdida
+                    break
+
+                with self._lock:
+                    self._mensajes_leidos += 1
+
+                hash_evento = self._extraer_hash(mensaje.data(), mensaje.properties())
+                if hash_evento is None:
+                    with self._lock:
+                        self._mensajes_invalidos += 1
+                    continue
+
+                lote.append((hash_evento, datetime.fromtimestamp(publicado_ms / 1000)))
+                if len(lote) >= self.tamano_lote:
+                    self._cargar_lote(lote)
+                    lote = []
+
+            if lote:
+                self._cargar_lote(lote)
+        finally:
+            reader.close()
+
+    def _cargar_lote(self, lote: List[Tuple[str, datetime]]) -> None:
+        cargados = asyncio.run(self.repo_eventos.guardar_eventos_temporales_lote(lote))
+        with self._lock:
+            self._hashes_cargados += cargados
+
+    @staticmethod
+    def _extraer_hash(datos: bytes, propiedades: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """Obtiene data.metadatos_sistema.hash_evento del mensaje publicado por el colector"""
+        try:
+            mensaje = decodificar_mensaje(datos, propiedades)
+            return mensaje['data']['metadatos_sistema']['hash_evento']
+        except (ValueError, KeyError, TypeError, EOFError):
+            return None
+
+    def _duracion(self) -> float:
+        if self._inicio is None:
+            return 0.0
+        return (self._fin or time.monotonic()) - self._inicio
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        """Obtiene el estado, progreso y duración del precalentamiento"""
+        with self._lock:
+            return {
+                'estado': self.estado,
+                'ventana_minutos': self.ventana_minutos,
+                'topics_completados': self._topics_completados,
+                'topics_totales': len(self.topics),
+                'progreso': round(self._topics_completados / len(self.topics), 4) if self.topics else 1.0,
+                'mensajes_leidos': self._mensajes_leidos,
+                'mensajes_invalidos': self._mensajes_invalidos,
+                'hashes_cargados': self._hashes_cargados,
+                'duracion_segundos': round(self._duracion(), 3),
+                'error': self._error
+            }
@@ -1,7 +1,7 @@
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import Optional, Set, Dict, Any
+from typing import Optional, Set, Dict, Any, List, Tuple
 import redis
 import json
 
@@ -18,9 +18,10 @@ class RedisRepositorioEventos(RepositorioEventos):
     Usa TTL para limpiar automáticamente eventos antiguos
     """
     
-    def __init__(self, redis_client: redis.Redis, ttl_horas: int = 24):
+    def __init__(self, redis_client: redis.Redis, ttl_horas: int = 24, tamano_lote_scan: int = 1000):
         self.redis = redis_client
         self.ttl_segundos = ttl_horas * 3600
+        self.tamano_lote_scan = tamano_lote_scan
         self.prefix = "event_collector:eventos:"
     
     async def existe_evento(self, hash_evento: str) -> bool:
@@ -45,16 +46,73 @@ class RedisRepositorioEventos(RepositorioEventos):
             logger.error(f"Error guardando evento temporal {hash_evento}: {str(e)}")
             raise
     
+    async def guardar_eventos_temporales_lote(self, eventos: List[Tuple[str, datetime]]) -> int:
+        """
+        Guarda en bloque eventos para deduplicación con un pipeline (un solo round-trip)
+        El TTL se descuenta según la antigüedad del evento para no extender la ventana
+        """
+        try:
+            ahora = datetime.now()
+            procesado = ahora.isoformat()
+            guardados = 0
+            
+            pipe = self.redis.pipeline(transaction=False)
+            for hash_evento, timestamp in eventos:
+                ttl = self.ttl_segundos - int((ahora - timestamp).total_seconds())
+                if ttl <= 0:
+                    continue
+                valor = {'timestamp': timestamp.isoformat(), 'processed_at': procesado}
+                pipe.setex(f"{self.prefix}{hash_evento}", ttl, json.dumps(valor))
+                guardados += 1
+            pipe.execute()
+            
+            return guardados
+        except Exception as e:
+            logger.error(f"Error guardando lote de {len(eventos)} eventos temporales: {str(e)}")
+            raise
+    
     async def limpiar_eventos_antiguos(self, max_antiguedad_horas: int = 24) -> int:
-        """Limpia eventos temporales antiguos (Redis maneja esto automáticamente con TTL)"""
+        """
+        Limpia eventos temporales más antiguos que max_antiguedad_horas
+        Redis ya expira las claves por TTL, por lo que solo se recorre el keyspace
+        cuando se pide una antigüedad menor al TTL; el recorrido es incremental
+        (SCAN) y los borrados se hacen por lotes con UNLINK para no bloquear Redis
+        """
+        max_antiguedad_segundos = max_antiguedad_horas * 3600
+        if max_antiguedad_segundos >= self.ttl_segundos:
+            return 0
+        
         try:
-            # Redis limpia automáticamente con TTL, pero podemos hacer scan manual si es necesario
-            pattern = f"{self.prefix}*"
-            keys = self.redis.keys(pattern)
-            return len(keys)
+            # Una clave es más antigua que el límite si su TTL restante es menor a este umbral
+            ttl_umbral = self.ttl_segundos - max_antiguedad_segundos
+            eliminados = 0
+            
+            for lote in self._escanear_por_lotes(f"{self.prefix}*"):
+                pipe = self.redis.pipeline(transaction=False)
+                for key in lote:
+                    pipe.ttl(key)
+                ttls = pipe.execute()
+                
+                antiguos = [key for key, ttl in zip(lote, ttls) if 0 <= ttl < ttl_umbral]
+                if antiguos:
+                    self.redis.unlink(*antiguos)
+                    eliminados += len(antiguos)
+            
+            return eliminados
         except Exception as e:
-            logger.error(f"Error consultando eventos: {str(e)}")
+            logger.error(f"Error limpiando eventos antiguos: {str(e)}")
             return 0
+    
+    def _escanear_por_lotes(self, patron: str):
+        """Recorre el keyspace con SCAN y entrega las claves en lotes acotados"""
+        lote = []
+        for key in self.redis.scan_iter(match=patron, count=self.tamano_lote_scan):
+            lote.append(key)
+            if len(lote) >= self.tamano_lote_scan:
+                yield lote
+                lote = []
+        if lote:
+            yield lote
 
 class MockRepositorioAfiliados(RepositorioAfiliados):
     """
@@ -121,9 +179,14 @@ class MockRepositorioCampanas(RepositorioCampanas):
 class RedisRepositorioRateLimiting(RepositorioRateLimiting):
     """
     Implementación Redis del repositorio de rate limiting
-    Usa ventanas deslizantes para controlar la frecuencia de eventos
+    Usa ventanas fijas por afiliado: {prefix}{afiliado}:{ventana}m:{bucket}
+    Cada afiliado mantiene además un índice con los tamaños de ventana usados,
+    de modo que conteos y reseteos acceden a claves conocidas sin recorrer el keyspace
     """
     
+    # TTL del índice de ventanas del afiliado (solo contiene tamaños de ventana)
+    TTL_INDICE_SEGUNDOS = 24 * 3600
+    
     def __init__(self, redis_client: redis.Redis):
         self.redis = redis_client
         self.prefix = "event_collector:rate_limit:"
@@ -133,10 +196,14 @@ class RedisRepositorioRateLimiting(RepositorioRateLimiting):
         try:
             key = self._generar_key(id_afiliado, ventana_minutos)
             
+            key_indice = self._generar_key_indice(id_afiliado)
+            
             # Usar pipeline para operaciones atómicas
             pipe = self.redis.pipeline()
             pipe.incr(key)
             pipe.expire(key, ventana_minutos * 60)  # TTL en segundos
+            pipe.sadd(key_indice, ventana_minutos)
+            pipe.expire(key_indice, self.TTL_INDICE_SEGUNDOS)
             resultados = pipe.execute()
             
             return resultados[0]  # Valor después del incremento
@@ -156,23 +223,42 @@ class RedisRepositorioRateLimiting(RepositorioRateLimiting):
             return 0
     
     async def resetear_contador(self, id_afiliado: str) -> None:
-        """Resetea el contador del afiliado (uso administrativo)"""
+        """
+        Resetea el contador del afiliado (uso administrativo)
+        Solo borra las claves de la ventana actual y la anterior de cada tamaño
+        de ventana registrado en el índice: O(1) respecto al tamaño del keyspace
+        """
         try:
-            pattern = f"{self.prefix}{id_afiliado}:*"
-            keys = self.redis.keys(pattern)
-            if keys:
-                self.redis.delete(*keys)
-                logger.info(f"Contadores reseteados para afiliado {id_afiliado}")
+            key_indice = self._generar_key_indice(id_afiliado)
+            ventanas = self.redis.smembers(key_indice)
+            
+            keys = [key_indice]
+            for ventana in ventanas:
+                ventana_minutos = int(ventana)
+                ventana_timestamp = self._ventana_actual(ventana_minutos)
+                keys.append(self._generar_key(id_afiliado, ventana_minutos, ventana_timestamp))
+                keys.append(self._generar_key(id_afiliado, ventana_minutos, ventana_timestamp - 1))
+            
+            self.redis.unlink(*keys)
+            logger.info(f"Contadores reseteados para afiliado {id_afiliado}")
         except Exception as e:
             logger.error(f"Error reseteando contadores para {id_afiliado}: {str(e)}")
             raise
     
-    def _generar_key(self, id_afiliado: str, ventana_minutos: int) -> str:
+    def _generar_key(self, id_afiliado: str, ventana_minutos: int, ventana_timestamp: Optional[int] = None) -> str:
         """Genera clave Redis para la ventana temporal"""
         # Usar timestamp redondeado para crear ventanas fijas
-        ahora = datetime.now()
-        ventana_timestamp = int(ahora.timestamp() // (ventana_minutos * 60))
+        if ventana_timestamp is None:
+            ventana_timestamp = self._ventana_actual(ventana_minutos)
         return f"{self.prefix}{id_afiliado}:{ventana_minutos}m:{ventana_timestamp}"
+    
+    def _generar_key_indice(self, id_afiliado: str) -> str:
+        """Genera clave del índice de tamaños de ventana usados por el afiliado"""
+        return f"{self.prefix}{id_afiliado}:ventanas"
+    
+    @staticmethod
+    def _ventana_actual(ventana_minutos: int) -> int:
+        return int(datetime.now().timestamp() // (ventana_minutos * 60))
 
 class InMemoryRepositorioEventos(RepositorioEventos):
     """
@@ -192,6 +278,11 @@ class InMemoryRepositorioEventos(RepositorioEventos):
         """Guarda temporalmente un evento para deduplicación"""
         self.eventos[hash_evento] = timestamp
     
+    async def guardar_eventos_temporales_lote(self, eventos: List[Tuple[str, datetime]]) -> int:
+        """Guarda en bloque eventos para deduplicación"""
+        self.eventos.update(eventos)
+        return len(eventos)
+    
     async def limpiar_eventos_antiguos(self, max_antiguedad_horas: int = 24) -> int:
         """Limpia eventos temporales antiguos"""
         return await self._limpiar_antiguos(max_antiguedad_horas)
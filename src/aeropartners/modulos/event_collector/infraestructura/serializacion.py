@@ -0,0 +1,228 @@
+import io
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+try:
+    import fastavro
+except ImportError:
+    fastavro = None
+
+logger = logging.getLogger(__name__)
+
+# Esquema Avro registrado para los topics tracking.commands.*.v1
+# El sobre y los datos del evento se aplanan en un solo registro: los nombres de
+# campo viven en el esquema y los timestamps viajan como epoch en milisegundos
+ESQUEMA_TRACKING_V2 = {
+    "type": "record",
+    "name": "EventoTracking",
+    "namespace": "aeropartners.tracking.v2",
+    "fields": [
+        {"name": "event_type", "type": "string"},
+        {"name": "timestamp_publicacion", "type": {"type": "long", "logicalType": "timestamp-millis"}},
+        {"name": "partition_key", "type": "string"},
+        {"name": "id_evento", "type": "string"},
+        {"name": "timestamp_evento", "type": {"type": "long", "logicalType": "timestamp-millis"}},
+        {"name": "id_afiliado", "type": "string"},
+        {"name": "id_campana", "type": ["null", "string"], "default": None},
+        {"name": "id_oferta", "type": ["null", "string"], "default": None},
+        {"name": "url", "type": ["null", "string"], "default": None},
+        {"name": "parametros_tracking_json", "type": ["null", "string"], "default": None},
+        {"name": "datos_custom_json", "type": ["null", "string"], "default": None},
+        {"name": "valor_conversion", "type": ["null", "double"], "default": None},
+        {"name": "moneda", "type": ["null", "string"], "default": None},
+        {"name": "hash_evento", "type": "string"},
+        {"name": "fuente", "type": "string"},
+        {"name": "ip_origen", "type": "string"},
+        {"name": "user_agent", "type": "string"},
+        {"name": "session_id", "type": ["null", "string"], "default": None},
+        {"name": "referrer", "type": ["null", "string"], "default": None},
+        {"name": "dispositivo_tipo", "type": "string"},
+        {"name": "dispositivo_identificador", "type": ["null", "string"], "default": None},
+        {"name": "dispositivo_so", "type": ["null", "string"], "default": None},
+        {"name": "dispositivo_navegador", "type": ["null", "string"], "default": None},
+        {"name": "dispositivo_resolucion", "type": ["null", "string"], "default": None},
+        {"name": "atribucion_id_evento_click", "type": ["null", "string"], "default": None},
+        {"name": "atribucion_segundos_desde_click", "type": ["null", "double"], "default": None},
+        {"name": "atribucion_criterio", "type": ["null", "string"], "default": None}
+    ]
+}
+
+class CodificadorTrackingJSON:
+    """Codificación JSON original (schema_version v1), legible para depuración"""
+
+    SCHEMA_VERSION = "v1"
+    CONTENT_TYPE = "application/json"
+
+    def codificar(self, mensaje: Dict[str, Any]) -> bytes:
+        return json.dumps(mensaje).encode('utf-8')
+
+    def decodificar(self, datos: bytes) -> Dict[str, Any]:
+        return json.loads(datos)
+
+class CodificadorTrackingAvro:
+    """
+    Codificación binaria Avro sin cabecera (schema_version v2)
+    El esquema no viaja en el mensaje: productor y consumidor lo resuelven
+    por la propiedad schema_version
+    """
+
+    SCHEMA_VERSION = "v2"
+    CONTENT_TYPE = "avro/binary"
+
+    def __init__(self):
+        if fastavro is None:
+            raise ImportError("fastavro no está instalado")
+        self._esquema = fastavro.parse_schema(ESQUEMA_TRACKING_V2)
+
+    def codificar(self, mensaje: Dict[str, Any]) -> bytes:
+        buffer = io.BytesIO()
+        fastavro.schemaless_writer(buffer, self._esquema, self._aplanar(mensaje))
+        return buffer.getvalue()
+
+    def decodificar(self, datos: bytes) -> Dict[str, Any]:
+        registro = fastavro.schemaless_reader(io.BytesIO(datos), self._esquema)
+        return self._anidar(registro)
+
+    @staticmethod
+    def _aplanar(mensaje: Dict[str, Any]) -> Dict[str, Any]:
+        data = mensaje['data']
+        contexto = data['contexto']
+        payload = data['payload']
+        sistema = data['metadatos_sistema']
+        dispositivo = sistema['dispositivo']
+        atribucion = sistema.get('atribucion') or {}
+
+        return {
+            'event_type': mensaje['event_type'],
+            'timestamp_publicacion': datetime.fromisoformat(mensaje['timestamp']),
+            'partition_key': mensaje['partition_key'],
+            'id_evento': data['id_evento'],
+            'timestamp_evento': datetime.fromisoformat(data['timestamp']),
+            'id_afiliado': contexto['id_afiliado'],
+            'id_campana': contexto.get('id_campana'),
+            'id_oferta': contexto.get('id_oferta'),
+            'url': contexto.get('url'),
+            'parametros_tracking_json': _a_json(contexto.get('parametros_tracking')),
+            'datos_custom_json': _a_json(payload.get('datos_custom')),
+            'valor_conversion': payload.get('valor_conversion'),
+            'moneda': payload.get('moneda'),
+            'hash_evento': sistema['hash_evento'],
+            'fuente': sistema['fuente'],
+            'ip_origen': sistema['ip_origen'],
+            'user_agent': sistema['user_agent'],
+            'session_id': sistema.get('session_id'),
+            'referrer': sistema.get('referrer'),
+            'dispositivo_tipo': dispositivo['tipo'],
+            'dispositivo_identificador': dispositivo.get('identificador'),
+            'dispositivo_so': dispositivo.get('so'),
+            'dispositivo_navegador': dispositivo.get('navegador'),
+            'dispositivo_resolucion': dispositivo.get('resolucion'),
+            'atribucion_id_evento_click': atribucion.get('id_evento_click'),
+            'atribucion_segundos_desde_click': atribucion.get('segundos_desde_click'),
+            'atribucion_criterio': atribucion.get('criterio')
+        }
+
+    @classmethod
+    def _anidar(cls, registro: Dict[str, Any]) -> Dict[str, Any]:
+        """Reconstruye el mismo sobre que produce la codificación JSON"""
+        return {
+            'schema_version': cls.SCHEMA_VERSION,
+            'event_type': registro['event_type'],
+            'timestamp': _a_iso(registro['timestamp_publicacion']),
+            'partition_key': registro['partition_key'],
+            'data': {
+                'id_evento': registro['id_evento'],
+                'tipo_evento': registro['event_type'],
+                'timestamp': _a_iso(registro['timestamp_evento']),
+                'contexto': {
+                    'id_afiliado': registro['id_afiliado'],
+                    'id_campana': registro['id_campana'],
+                    'id_oferta': registro['id_oferta'],
+                    'url': registro['url'],
+                    'parametros_tracking': _desde_json(registro['parametros_tracking_json']) or {}
+                },
+                'payload': {
+                    'datos_custom': _desde_json(registro['datos_custom_json']),
+                    'valor_conversion': registro['valor_conversion'],
+                    'moneda': registro['moneda']
+                },
+                'metadatos_sistema': {
+                    'hash_evento': registro['hash_evento'],
+                    'fuente': registro['fuente'],
+                    'ip_origen': registro['ip_origen'],
+                    'user_agent': registro['user_agent'],
+                    'session_id': registro['session_id'],
+                    'referrer': registro['referrer'],
+                    'dispositivo': {
+                        'tipo': registro['dispositivo_tipo'],
+                        'identificador': registro['dispositivo_identificador'],
+                        'so': registro['dispositivo_so'],
+                        'navegador': registro['dispositivo_navegador'],
+                        'resolucion': registro['dispositivo_resolucion']
+                    },
+                    'atribucion': {
+                        'id_evento_click': registro['atribucion_id_evento_click'],
+                        'segundos_desde_click': registro['atribucion_segundos_desde_click'],
+                        'criterio': registro['atribucion_criterio']
+                    } if registro['atribucion_id_evento_click'] else None
+                }
+            }
+        }
+
+def _a_json(valor: Optional[Any]) -> Optional[str]:
+    return None if valor is None else json.dumps(valor)
+
+def _desde_json(valor: Optional[str]) -> Optional[Any]:
+    return None if valor is None else json.loads(valor)
+
+def _a_iso(valor: datetime) -> str:
+    # fastavro escribe los datetime sin zona tal cual y los lee de vuelta marcados como UTC;
+    # se quita la zona para devolver el mismo valor sin zona que publicó el productor
+    return valor.replace(tzinfo=None).isoformat()
+
+# Registro de codificadores por schema_version
+CODIFICADORES = {
+    CodificadorTrackingJSON.SCHEMA_VERSION: CodificadorTrackingJSON,
+    CodificadorTrackingAvro.SCHEMA_VERSION: CodificadorTrackingAvro
+}
+
+FORMATOS = {
+    'json': CodificadorTrackingJSON.SCHEMA_VERSION,
+    'avro': CodificadorTrackingAvro.SCHEMA_VERSION
+}
+
+_instancias: Dict[str, Any] = {}
+
+def obtener_codificador(schema_version: str):
+    """Obtiene (y cachea) el codificador de una schema_version"""
+    if schema_version not in _instancias:
+        clase = CODIFICADORES.get(schema_version)
+        if clase is None:
+            raise ValueError(f"schema_version no soportada: {schema_version}")
+        _instancias[schema_version] = clase()
+    return _instancias[schema_version]
+
+def crear_codificador(formato: str = 'avro'):
+    """
+    Crea el codificador del productor para el formato configurado ('avro' o 'json')
+    Si fastavro no está disponible se usa JSON para no dejar de publicar
+    """
+    schema_version = FORMATOS.get(formato.lower())
+    if schema_version is None:
+        raise ValueError(f"Formato de serialización no soportado: {formato}")
+
+    try:
+        return obtener_codificador(schema_version)
+    except ImportError:
+        logger.warning("fastavro no disponible, publicando tracking en JSON")
+        return obtener_codificador(CodificadorTrackingJSON.SCHEMA_VERSION)
+
+def decodificar_mensaje(datos: bytes, propiedades: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Decodifica un mensaje de tracking según su propiedad schema_version
+    Los mensajes sin propiedad se tratan como JSON v1
+    """
+    schema_version = (propiedades or {}).get('schema_version', CodificadorTrackingJSON.SCHEMA_VERSION)
+    return obtener_codificador(schema_version).decodificar(datos)
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Dict, List, Optional
 import uuid
 from ....seedwork.aplicacion.comandos import Comando
 from ....seedwork.dominio.objetos_valor import Moneda
@@ -26,3 +26,8 @@ class RevertirPagoCommand(Comando):
     id_pago: uuid.UUID
     motivo: str
     saga_id: Optional[str] = None
+
+@dataclass
+class ProcesarPagosLoteCommand(Comando):
+    """Pagos en crudo: cada uno se valida por separado y su error se reporta por ítem"""
+    pagos: List[Dict[str, Any]]
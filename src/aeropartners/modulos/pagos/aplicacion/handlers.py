@@ -1,13 +1,16 @@
-from typing import Optional
+from dataclasses import dataclass
+from typing import List, Optional
 from ....seedwork.aplicacion.comandos import ComandoHandler
 from ....seedwork.aplicacion.queries import QueryHandler, QueryResultado
 from ....seedwork.dominio.objetos_valor import Dinero, Moneda
 from ..dominio.entidades import Pago
+from ..dominio.enums import EstadoPago
 from ..dominio.eventos import PagoPendiente
+from ..dominio.excepciones import TransicionPagoConflictoExcepcion
 from ..dominio.repositorios import RepositorioPagos
 from ..dominio.servicios import PasarelaDePagos
-from .comandos import ProcesarPagoCommand, RevertirPagoCommand
-from .queries import ObtenerEstadoPagoQuery
+from .comandos import ProcesarPagoCommand, ProcesarPagosLoteCommand, RevertirPagoCommand
+from .queries import ListarPagosQuery, ObtenerEstadoPagoQuery
 from sqlalchemy.orm import Session
 
 class ProcesarPagoHandler(ComandoHandler):
@@ -38,11 +41,82 @@ class ProcesarPagoHandler(ComandoHandler):
         
         return pago
 
-class ObtenerEstadoPagoHandler(QueryHandler):
+@dataclass
+class ResultadoItemLote:
+    indice: int
+    referencia_pago: Optional[str]
+    id_pago: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def creado(self) -> bool:
+        return self.error is None
+
+class ProcesarPagosLoteHandler(ComandoHandler):
+    """
+    Crea un bloque de pagos validándolos en memoria y persistiéndolos con inserciones
+    de varias filas; las referencias ya existentes se reportan como duplicadas
+    """
     def __init__(self, repositorio: RepositorioPagos):
         self.repositorio = repositorio
 
+    def handle(self, comando: ProcesarPagosLoteCommand) -> List[ResultadoItemLote]:
+        resultados = []
+        validos = []
+        referencias = set()
+        
+        for indice, datos in enumerate(comando.pagos):
+            resultado = ResultadoItemLote(indice=indice, referencia_pago=datos.get("referencia_pago"))
+            resultados.append(resultado)
+            try:
+                pago = self._crear_pago(ProcesarPagoCommand(**datos))
+            except (TypeError, ValueError) as e:
+                resultado.error = str(e)
+                continue
+            if pago.referencia_pago in referencias:
+                resultado.error = f"Referencia {pago.referencia_pago} repetida en el lote"
+                continue
+            referencias.add(pago.referencia_pago)
+            validos.append((resultado, pago))
+        
+        if validos:
+            insertadas = self.repositorio.agregar_lote([pago for _, pago in validos])
+            for resultado, pago in validos:
+                if pago.referencia_pago in insertadas:
+                    resultado.id_pago = str(pago.id)
+                else:
+                    resultado.error = f"Ya existe un pago con referencia {pago.referencia_pago}"
+        
+        return resultados
+
+    def _crear_pago(self, comando: ProcesarPagoCommand) -> Pago:
+        pago = Pago(
+            id_afiliado=comando.id_afiliado,
+            monto=Dinero(comando.monto, Moneda(comando.moneda)),
+            referencia_pago=comando.referencia_pago
+        )
+        pago.agregar_evento(PagoPendiente(
+            id_pago=str(pago.id),
+            id_afiliado=pago.id_afiliado,
+            monto=pago.monto.monto,
+            moneda=pago.monto.moneda.value,
+            referencia_pago=pago.referencia_pago
+        ))
+        return pago
+
+class ObtenerEstadoPagoHandler(QueryHandler):
+    def __init__(self, repositorio: RepositorioPagos, cache=None):
+        self.repositorio = repositorio
+        self.cache = cache
+
     def handle(self, query: ObtenerEstadoPagoQuery) -> QueryResultado:
+        if self.cache is not None:
+            # Un acierto responde sin abrir sesión con la base
+            resultado = self.cache.obtener(str(query.id_pago))
+            if resultado is not None:
+                return QueryResultado(resultado=resultado)
+            marca = self.cache.marca()
+
         pago = self.repositorio.obtener_por_id(query.id_pago)
         
         if pago is None:
@@ -59,9 +133,46 @@ class ObtenerEstadoPagoHandler(QueryHandler):
             "fecha_procesamiento": pago.fecha_procesamiento.isoformat() if pago.fecha_procesamiento else None,
             "mensaje_error": pago.mensaje_error
         }
+        if self.cache is not None:
+            self.cache.guardar(str(query.id_pago), resultado, marca)
         
         return QueryResultado(resultado=resultado)
 
+class ListarPagosHandler(QueryHandler):
+    def __init__(self, repositorio: RepositorioPagos):
+        self.repositorio = repositorio
+
+    def handle(self, query: ListarPagosQuery) -> QueryResultado:
+        # Se pide una fila extra solo para saber si hay una página siguiente
+        filas = self.repositorio.listar(
+            query.limite + 1,
+            despues_de=query.despues_de,
+            id_afiliado=query.id_afiliado,
+            estado=EstadoPago(query.estado) if query.estado else None,
+            moneda=query.moneda,
+            fecha_desde=query.fecha_desde,
+            fecha_hasta=query.fecha_hasta
+        )
+        pagina = filas[:query.limite]
+        siguiente = None
+        if len(filas) > query.limite:
+            siguiente = (pagina[-1]["fecha_creacion"], pagina[-1]["id"])
+
+        pagos = [
+            {
+                "id": str(fila["id"]),
+                "id_afiliado": fila["id_afiliado"],
+                "monto": fila["monto"],
+                "moneda": fila["moneda"],
+                "estado": fila["estado"],
+                "referencia_pago": fila["referencia_pago"],
+                "fecha_creacion": fila["fecha_creacion"].isoformat(),
+                "fecha_procesamiento": fila["fecha_procesamiento"].isoformat() if fila["fecha_procesamiento"] else None
+            }
+            for fila in pagina
+        ]
+        return QueryResultado(resultado={"pagos": pagos, "siguiente": siguiente})
+
 class RevertirPagoHandler(ComandoHandler):
     def __init__(self, repositorio: RepositorioPagos):
         self.repositorio = repositorio
@@ -73,9 +184,11 @@ class RevertirPagoHandler(ComandoHandler):
             raise ValueError(f"Pago {comando.id_pago} no encontrado")
         
         # Revertir el pago
+        estado_anterior = pago.estado
         pago.revertir(comando.motivo, comando.saga_id)
         
-        # Actualizar en repositorio
-        self.repositorio.actualizar(pago)
+        # Actualizar en repositorio, solo si nadie lo modificó desde la lectura
+        if not self.repositorio.transicionar(pago, desde=estado_anterior):
+            raise TransicionPagoConflictoExcepcion(comando.id_pago)
         
         return pago
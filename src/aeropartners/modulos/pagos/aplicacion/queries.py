@@ -1,7 +1,19 @@
 from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
 import uuid
 from ....seedwork.aplicacion.queries import Query
 
 @dataclass
 class ObtenerEstadoPagoQuery(Query):
     id_pago: uuid.UUID
+
+@dataclass
+class ListarPagosQuery(Query):
+    limite: int = 100
+    despues_de: Optional[Tuple[datetime, uuid.UUID]] = None
+    id_afiliado: Optional[str] = None
+    estado: Optional[str] = None
+    moneda: Optional[str] = None
+    fecha_desde: Optional[datetime] = None
+    fecha_hasta: Optional[datetime] = None
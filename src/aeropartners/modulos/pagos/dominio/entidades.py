@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from .objetos_valor import Dinero
-from .eventos import PagoExitoso, PagoFallido
+from .eventos import PagoPendiente, PagoExitoso, PagoFallido, PagoRevertido
 from .enums import EstadoPago
 from .reglas import PagoNoPuedeSerProcesadoSiYaEstaProcesando, PagoNoPuedeSerProcesadoSiYaEstaExitoso, PagoNoPuedeSerProcesadoSiYaEstaFallido
 
@@ -16,6 +16,7 @@ class Pago:
         self.fecha_actualizacion = datetime.now()
         self.fecha_procesamiento = None
         self.mensaje_error = None
+        self.version = 1
         self.eventos = []
 
     def agregar_evento(self, evento):
@@ -64,10 +65,56 @@ class Pago:
                 mensaje_error=str(e)
             ))
     
+    def registrar_resultado(self, resultado):
+        """Aplica la respuesta de la pasarela (ResultadoPago) a un pago en PROCESANDO"""
+        self.fecha_actualizacion = datetime.now()
+        if resultado.exitoso:
+            self.estado = EstadoPago.EXITOSO
+            self.agregar_evento(PagoExitoso(
+                id_pago=str(self.id),
+                id_afiliado=self.id_afiliado,
+                monto=self.monto.monto,
+                moneda=self.monto.moneda.value,
+                referencia_pago=self.referencia_pago
+            ))
+        else:
+            self.estado = EstadoPago.FALLIDO
+            self.mensaje_error = resultado.mensaje_error
+            self.agregar_evento(PagoFallido(
+                id_pago=str(self.id),
+                id_afiliado=self.id_afiliado,
+                monto=self.monto.monto,
+                moneda=self.monto.moneda.value,
+                referencia_pago=self.referencia_pago,
+                mensaje_error=resultado.mensaje_error
+            ))
+
+    def reencolar(self):
+        """Devuelve a PENDIENTE un pago cuyo cobro no llegó a la pasarela, para volver a cobrarlo"""
+        self.estado = EstadoPago.PENDIENTE
+        self.fecha_procesamiento = None
+        self.fecha_actualizacion = datetime.now()
+        self.agregar_evento(PagoPendiente(
+            id_pago=str(self.id),
+            id_afiliado=self.id_afiliado,
+            monto=self.monto.monto,
+            moneda=self.monto.moneda.value,
+            referencia_pago=self.referencia_pago
+        ))
+
     def revertir(self, motivo: str, saga_id: str = None):
         """Revertir un pago (compensación)"""
         self.estado = EstadoPago.REVERSADO
         self.mensaje_error = f"Revertido: {motivo}"
         if saga_id:
             self.mensaje_error += f" (SAGA: {saga_id})"
-        self.fecha_actualizacion = datetime.now()
\ No newline at end of file
+        self.fecha_actualizacion = datetime.now()
+        self.agregar_evento(PagoRevertido(
+            id_pago=self.id,
+            id_afiliado=self.id_afiliado,
+            monto=self.monto.monto,
+            moneda=self.monto.moneda.value,
+            referencia_pago=self.referencia_pago,
+            motivo=motivo,
+            saga_id=saga_id
+        ))
\ No newline at end of file
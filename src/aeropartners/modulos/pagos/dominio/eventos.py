@@ -31,3 +31,15 @@ class PagoFallido:
         self.moneda = moneda
         self.referencia_pago = referencia_pago
         self.mensaje_error = mensaje_error
+
+class PagoRevertido:
+    def __init__(self, id_pago: str, id_afiliado: str, monto: float, moneda: str, referencia_pago: str, motivo: str, saga_id: str = None):
+        self.id = uuid.uuid4()
+        self.fecha_evento = datetime.now()
+        self.id_pago = id_pago
+        self.id_afiliado = id_afiliado
+        self.monto = monto
+        self.moneda = moneda
+        self.referencia_pago = referencia_pago
+        self.motivo = motivo
+        self.saga_id = saga_id
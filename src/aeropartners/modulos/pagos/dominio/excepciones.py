@@ -0,0 +1,7 @@
+from ....seedwork.dominio.excepciones import ReglaNegocioExcepcion
+
+
+class TransicionPagoConflictoExcepcion(ReglaNegocioExcepcion):
+    """El pago cambió de estado o de versión desde que se leyó"""
+    def __init__(self, id_pago):
+        super().__init__(f"El pago {id_pago} fue modificado concurrentemente")
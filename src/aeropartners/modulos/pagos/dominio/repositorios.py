@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
 import uuid
 from .entidades import Pago
+from .enums import EstadoPago
 
 class RepositorioPagos(ABC):
     @abstractmethod
@@ -16,14 +18,46 @@ class RepositorioPagos(ABC):
     def agregar(self, pago: Pago):
         raise NotImplementedError()
 
+    @abstractmethod
+    def agregar_lote(self, pagos: List[Pago]) -> Set[str]:
+        """Agrega varios pagos en una transacción; retorna las referencias efectivamente insertadas"""
+        raise NotImplementedError()
+
     @abstractmethod
     def actualizar(self, pago: Pago):
         raise NotImplementedError()
 
+    @abstractmethod
+    def reclamar_para_procesar(self, id: uuid.UUID) -> Optional[Pago]:
+        """Transición atómica PENDIENTE -> PROCESANDO; None si el pago no estaba pendiente"""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def reclamar_atascados(self, antes_de: datetime, limite: int) -> List[Pago]:
+        """Pagos en PROCESANDO sin cambios desde `antes_de`, reservados para reconciliarlos"""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def transicionar(self, pago: Pago, desde: EstadoPago, id_evento: uuid.UUID = None,
+                     tipo_evento: str = None) -> bool:
+        """
+        Persiste el nuevo estado solo si el pago sigue en `desde` y con la misma versión.
+        Con `id_evento` registra el evento consumido y retorna False si ya fue aplicado.
+        Un False no descarta el resto de la transacción del llamador.
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     def eliminar(self, pago: Pago):
         raise NotImplementedError()
     
+    @abstractmethod
+    def listar(self, limite: int, despues_de: Optional[Tuple[datetime, uuid.UUID]] = None,
+               id_afiliado: str = None, estado: EstadoPago = None, moneda: str = None,
+               fecha_desde: datetime = None, fecha_hasta: datetime = None) -> List[Dict[str, Any]]:
+        """Página de pagos ordenada por (fecha_creacion, id), posterior a la clave `despues_de`"""
+        raise NotImplementedError()
+
     @abstractmethod
     def obtener_todos(self):
         raise NotImplementedError()
\ No newline at end of file
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
+from typing import Optional
 
 @dataclass
 class ResultadoPago:
@@ -10,7 +11,35 @@ class ResultadoPago:
 class PasarelaDePagos(ABC):
     """Puerto para la pasarela de pagos externa"""
     
+    # True si la pasarela permite consultar cobros ya enviados: sin consulta no hay reconciliación
+    soporta_consulta = False
+    
     @abstractmethod
     def procesar_pago(self, referencia: str, monto: float, moneda: str, id_afiliado: str) -> ResultadoPago:
         raise NotImplementedError()
-    
\ No newline at end of file
+
+    def consultar_pago(self, referencia: str) -> Optional[ResultadoPago]:
+        """
+        Resultado de un cobro ya enviado, o None si la pasarela no lo registró
+        Solo se llama en pasarelas con soporta_consulta
+        """
+        raise NotImplementedError()
+
+class PasarelaDePagosAsync(ABC):
+    """Puerto asíncrono para pasarelas de pagos externas accedidas por red"""
+    
+    soporta_consulta = False
+    
+    @abstractmethod
+    async def procesar_pago(self, referencia: str, monto: float, moneda: str, id_afiliado: str) -> ResultadoPago:
+        raise NotImplementedError()
+    
+    async def consultar_pago(self, referencia: str) -> Optional[ResultadoPago]:
+        """
+        Resultado de un cobro ya enviado, o None si la pasarela no lo registró
+        Solo se llama en pasarelas con soporta_consulta
+        """
+        raise NotImplementedError()
+    
+    async def cerrar(self):
+        """Libera las conexiones del adaptador"""
@@ -1,17 +1,31 @@
+import os
 import random
+import threading
 import time
-from typing import Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import select, update, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
 from ..dominio.servicios import PasarelaDePagos, ResultadoPago
 from ..dominio.repositorios import RepositorioPagos
 from ..dominio.entidades import Pago
+from ..dominio.enums import EstadoPago
 from ....seedwork.infraestructura.db import SessionLocal
+from ....seedwork.infraestructura.uow import UnidadDeTrabajoSQLAlchemy
 from .mapeadores import MapeadorPago
 from .modelos import PagoModel, OutboxModel
+from .outbox import CONTADORES_OUTBOX_PAGOS
+from .agregados import AGREGADOS_PAGOS
+from .inbox import INBOX_PAGOS
 
 class StripeAdapter(PasarelaDePagos):
     """Adaptador mock para Stripe que simula llamadas a la API externa"""
     
+    nombre = "stripe"
+    
     def __init__(self, base_url: str = "https://api.stripe.com/v1"):
         self.base_url = base_url
         self.api_key = "sk_test_mock_key"
@@ -41,106 +55,300 @@ class StripeAdapter(PasarelaDePagos):
                 mensaje_error=random.choice(errores_posibles)
             )
 
+def limites_concurrencia_pasarelas() -> Dict[str, int]:
+    """
+    Lee los límites de llamadas simultáneas por pasarela desde PAYMENT_GATEWAY_CONCURRENCY
+    Formato: "stripe=16,paypal=4"
+    """
+    limites = {}
+    for entrada in os.getenv("PAYMENT_GATEWAY_CONCURRENCY", "").split(","):
+        if "=" in entrada:
+            nombre, limite = entrada.split("=", 1)
+            limites[nombre.strip().lower()] = int(limite)
+    return limites
+
+class PasarelaConcurrenciaLimitada(PasarelaDePagos):
+    """Decorador que acota las llamadas simultáneas a una pasarela según su capacidad"""
+    
+    def __init__(self, pasarela: PasarelaDePagos, limite: int):
+        self.pasarela = pasarela
+        self.nombre = getattr(pasarela, "nombre", type(pasarela).__name__.lower())
+        self.soporta_consulta = pasarela.soporta_consulta
+        self.limite = limite
+        self._cupos = threading.BoundedSemaphore(limite)
+    
+    def procesar_pago(self, referencia: str, monto: float, moneda: str, id_afiliado: str) -> ResultadoPago:
+        with self._cupos:
+            return self.pasarela.procesar_pago(referencia, monto, moneda, id_afiliado)
+    
+    def consultar_pago(self, referencia: str) -> Optional[ResultadoPago]:
+        with self._cupos:
+            return self.pasarela.consultar_pago(referencia)
+    
+    def cerrar(self):
+        if hasattr(self.pasarela, "cerrar"):
+            self.pasarela.cerrar()
+
+COLUMNAS_LISTADO_PAGOS = (
+    PagoModel.id,
+    PagoModel.id_afiliado,
+    PagoModel.monto,
+    PagoModel.moneda,
+    PagoModel.estado,
+    PagoModel.referencia_pago,
+    PagoModel.fecha_creacion,
+    PagoModel.fecha_procesamiento
+)
+
 class RepositorioPagosSQLAlchemy(RepositorioPagos):
-    """Implementación del repositorio de pagos usando SQLAlchemy"""
+    """
+    Implementación del repositorio de pagos usando SQLAlchemy
+
+    Con una unidad de trabajo, las operaciones usan su sesión y solo hacen flush: el commit
+    queda a cargo del llamador. Sin ella, cada operación corre en su propia transacción.
+    """
     
-    def __init__(self):
+    def __init__(self, uow: UnidadDeTrabajoSQLAlchemy = None):
         self.mapeador = MapeadorPago()
+        self.uow = uow
     
-    def obtener_por_id(self, id: uuid.UUID) -> Optional[Pago]:
+    @contextmanager
+    def _sesion(self, escritura: bool = False):
+        if self.uow is not None:
+            yield self.uow.sesion
+            if escritura:
+                self.uow.sesion.flush()
+            return
+        
         db = SessionLocal()
         try:
-            modelo = db.query(PagoModel).filter(PagoModel.id == str(id)).first()
-            return self.mapeador.entidad_a_dto(modelo) if modelo else None
+            yield db
+            if escritura:
+                db.commit()
+        except Exception:
+            db.rollback()
+            raise
         finally:
             db.close()
     
+    def obtener_por_id(self, id: uuid.UUID) -> Optional[Pago]:
+        with self._sesion() as db:
+            modelo = db.query(PagoModel).filter(PagoModel.id == str(id)).first()
+            return self.mapeador.entidad_a_dto(modelo) if modelo else None
+    
     def obtener_por_referencia(self, referencia: str) -> Optional[Pago]:
-        db = SessionLocal()
-        try:
+        with self._sesion() as db:
             modelo = db.query(PagoModel).filter(PagoModel.referencia_pago == referencia).first()
             return self.mapeador.entidad_a_dto(modelo) if modelo else None
-        finally:
-            db.close()
     
     def agregar(self, pago: Pago):
-        db = SessionLocal()
-        try:
+        with self._sesion(escritura=True) as db:
             modelo = self.mapeador.dto_a_entidad(pago)
             db.add(modelo)
+            self._agregar_eventos_outbox(db, pago)
+            AGREGADOS_PAGOS.registrar_creados(db, [pago])
+    
+    def agregar_lote(self, pagos: List[Pago]) -> Set[str]:
+        """
+        Un INSERT de varias filas para los pagos y otro para sus eventos del outbox.
+        Las referencias que ya existen se omiten (ON CONFLICT DO NOTHING) en lugar de abortar el bloque.
+        """
+        if not pagos:
+            return set()
+        
+        with self._sesion(escritura=True) as db:
+            tabla_pagos = PagoModel.__table__
+            insertadas = set(db.execute(
+                insert(tabla_pagos)
+                .values([self._fila_pago(pago) for pago in pagos])
+                .on_conflict_do_nothing(index_elements=["referencia_pago"])
+                .returning(tabla_pagos.c.referencia_pago)
+            ).scalars())
             
-            # Agregar eventos al outbox
-            for evento in pago.eventos:
-                outbox_evento = OutboxModel(
-                    id=uuid.uuid4(),
-                    tipo_evento=type(evento).__name__,
-                    datos_evento=self._serializar_evento(evento),
-                    procesado=False
-                )
-                db.add(outbox_evento)
-            
-            db.commit()
-        except Exception as e:
-            db.rollback()
-            raise e
-        finally:
-            db.close()
+            eventos = [evento for pago in pagos if pago.referencia_pago in insertadas for evento in pago.eventos]
+            if eventos:
+                db.execute(insert(OutboxModel.__table__).values([
+                    {
+                        "id": uuid.uuid4(),
+                        "tipo_evento": type(evento).__name__,
+                        "datos_evento": self._serializar_evento(evento),
+                        "procesado": False,
+                        "fecha_creacion": datetime.now()
+                    }
+                    for evento in eventos
+                ]))
+                CONTADORES_OUTBOX_PAGOS.registrar_creados(db, [type(evento).__name__ for evento in eventos])
+            AGREGADOS_PAGOS.registrar_creados(db, [pago for pago in pagos if pago.referencia_pago in insertadas])
+            return insertadas
     
-    def actualizar(self, pago: Pago):
-        db = SessionLocal()
-        try:
+    def _fila_pago(self, pago: Pago) -> Dict:
+        return {
+            "id": pago.id,
+            "id_afiliado": pago.id_afiliado,
+            "monto": pago.monto.monto,
+            "moneda": pago.monto.moneda.value,
+            "estado": pago.estado.value,
+            "referencia_pago": pago.referencia_pago,
+            "fecha_creacion": pago.fecha_creacion,
+            "fecha_actualizacion": pago.fecha_actualizacion,
+            "fecha_procesamiento": pago.fecha_procesamiento,
+            "mensaje_error": pago.mensaje_error,
+            "version": pago.version
+        }
+    
+    def actualizar(self, pago: Pago) -> bool:
+        with self._sesion(escritura=True) as db:
             modelo = db.query(PagoModel).filter(PagoModel.id == str(pago.id)).first()
-            if modelo:
-                modelo.estado = pago.estado.value
-                modelo.fecha_procesamiento = pago.fecha_procesamiento
-                modelo.mensaje_error = pago.mensaje_error
-                modelo.fecha_actualizacion = pago.fecha_actualizacion
-                
-                # Agregar nuevos eventos al outbox
-                for evento in pago.eventos:
-                    outbox_evento = OutboxModel(
-                        id=uuid.uuid4(),
-                        tipo_evento=type(evento).__name__,
-                        datos_evento=self._serializar_evento(evento),
-                        procesado=False
-                    )
-                    db.add(outbox_evento)
-                
-                db.commit()
-        except Exception as e:
-            db.rollback()
-            raise e
-        finally:
-            db.close()
+            if modelo is None:
+                return False
+            
+            desde = EstadoPago(modelo.estado)
+            modelo.estado = pago.estado.value
+            modelo.fecha_procesamiento = pago.fecha_procesamiento
+            modelo.mensaje_error = pago.mensaje_error
+            modelo.fecha_actualizacion = pago.fecha_actualizacion
+            modelo.version = modelo.version + 1
+            self._agregar_eventos_outbox(db, pago)
+            AGREGADOS_PAGOS.registrar_transicion(db, pago, desde)
+            pago.version = modelo.version
+            return True
+    
+    def reclamar_para_procesar(self, id: uuid.UUID) -> Optional[Pago]:
+        """
+        PENDIENTE -> PROCESANDO en una sola sentencia: de varios consumidores que reciban
+        el mismo pago, solo uno obtiene la fila. Retorna el pago reclamado o None.
+        """
+        ahora = datetime.now()
+        with self._sesion(escritura=True) as db:
+            modelo = db.scalars(
+                update(PagoModel)
+                .where(PagoModel.id == id, PagoModel.estado == EstadoPago.PENDIENTE.value)
+                .values(
+                    estado=EstadoPago.PROCESANDO.value,
+                    version=PagoModel.version + 1,
+                    fecha_procesamiento=ahora,
+                    fecha_actualizacion=ahora
+                )
+                .returning(PagoModel)
+                .execution_options(synchronize_session=False)
+            ).first()
+            return self.mapeador.entidad_a_dto(modelo) if modelo else None
+    
+    def reclamar_atascados(self, antes_de: datetime, limite: int) -> List[Pago]:
+        """
+        Toma hasta `limite` pagos en PROCESANDO sin cambios desde `antes_de`, los más antiguos
+        primero por el índice (estado, fecha_actualizacion). Renovar fecha_actualizacion funciona
+        como reserva: otra réplica no los vuelve a tomar hasta que envejezcan de nuevo, y la
+        versión no cambia, por lo que un consumidor que aún esté cobrando puede terminar.
+        """
+        atascados = (
+            select(PagoModel.id)
+            .where(PagoModel.estado == EstadoPago.PROCESANDO.value, PagoModel.fecha_actualizacion < antes_de)
+            .order_by(PagoModel.fecha_actualizacion)
+            .limit(limite)
+            .with_for_update(skip_locked=True)
+        )
+        with self._sesion(escritura=True) as db:
+            modelos = db.scalars(
+                update(PagoModel)
+                .where(PagoModel.id.in_(atascados.scalar_subquery()))
+                .values(fecha_actualizacion=datetime.now())
+                .returning(PagoModel)
+                .execution_options(synchronize_session=False)
+            ).all()
+            return [self.mapeador.entidad_a_dto(modelo) for modelo in modelos]
+    
+    def transicionar(self, pago: Pago, desde: EstadoPago, id_evento: uuid.UUID = None,
+                     tipo_evento: str = None) -> bool:
+        """
+        Persiste el estado del agregado con un UPDATE condicionado al estado `desde` y a la
+        versión leída, junto con sus eventos del outbox y los totales diarios. Con `id_evento`
+        registra además el evento consumido en el inbox. Todo corre dentro de un SAVEPOINT:
+        si el pago cambió o el evento ya fue aplicado, solo se descarta lo escrito aquí y se
+        retorna False; lo que el llamador ya hizo en la unidad de trabajo queda intacto.
+        """
+        with self._sesion(escritura=True) as db:
+            punto = db.begin_nested()
+            if id_evento is not None and not INBOX_PAGOS.registrar(db, id_evento, tipo_evento):
+                punto.rollback()
+                return False
+            
+            version = db.execute(
+                update(PagoModel)
+                .where(
+                    PagoModel.id == pago.id,
+                    PagoModel.estado == desde.value,
+                    PagoModel.version == pago.version
+                )
+                .values(
+                    estado=pago.estado.value,
+                    version=PagoModel.version + 1,
+                    fecha_procesamiento=pago.fecha_procesamiento,
+                    mensaje_error=pago.mensaje_error,
+                    fecha_actualizacion=pago.fecha_actualizacion
+                )
+                .returning(PagoModel.version)
+                .execution_options(synchronize_session=False)
+            ).scalar()
+            if version is None:
+                punto.rollback()
+                return False
+            
+            pago.version = version
+            self._agregar_eventos_outbox(db, pago)
+            AGREGADOS_PAGOS.registrar_transicion(db, pago, desde)
+            punto.commit()
+            return True
     
     def eliminar(self, pago: Pago):
-        db = SessionLocal()
-        try:
+        with self._sesion(escritura=True) as db:
             modelo = db.query(PagoModel).filter(PagoModel.id == str(pago.id)).first()
             if modelo:
+                AGREGADOS_PAGOS.registrar_eliminados(db, [self.mapeador.entidad_a_dto(modelo)])
                 db.delete(modelo)
-                db.commit()
-        except Exception as e:
-            db.rollback()
-            raise e
-        finally:
-            db.close()
+    
+    def listar(self, limite: int, despues_de: Optional[Tuple[datetime, uuid.UUID]] = None,
+               id_afiliado: str = None, estado: EstadoPago = None, moneda: str = None,
+               fecha_desde: datetime = None, fecha_hasta: datetime = None) -> List[Dict[str, Any]]:
+        """
+        Paginación por keyset: cada página continúa desde la última clave (fecha_creacion, id)
+        por el índice, con costo constante sin importar cuántas páginas se hayan recorrido.
+        Solo se leen las columnas proyectadas, sin construir agregados.
+        """
+        with self._sesion() as db:
+            consulta = db.query(*COLUMNAS_LISTADO_PAGOS)
+            if id_afiliado:
+                consulta = consulta.filter(PagoModel.id_afiliado == id_afiliado)
+            if estado:
+                consulta = consulta.filter(PagoModel.estado == estado.value)
+            if moneda:
+                consulta = consulta.filter(PagoModel.moneda == moneda)
+            if fecha_desde:
+                consulta = consulta.filter(PagoModel.fecha_creacion >= fecha_desde)
+            if fecha_hasta:
+                consulta = consulta.filter(PagoModel.fecha_creacion < fecha_hasta)
+            if despues_de:
+                consulta = consulta.filter(
+                    tuple_(PagoModel.fecha_creacion, PagoModel.id) > tuple_(*despues_de)
+                )
+            filas = consulta.order_by(PagoModel.fecha_creacion, PagoModel.id).limit(limite).all()
+            return [fila._asdict() for fila in filas]
     
     def obtener_todos(self):
         """Obtener todos los pagos"""
-        db = SessionLocal()
-        try:
-            modelos = db.query(PagoModel).all()
-            pagos = []
-            for modelo in modelos:
-                pago = self._reconstruir_pago(modelo)
-                pagos.append(pago)
-            return pagos
-        except Exception as e:
-            db.rollback()
-            raise e
-        finally:
-            db.close()
+        with self._sesion() as db:
+            return [self._reconstruir_pago(modelo) for modelo in db.query(PagoModel).all()]
+    
+    def _agregar_eventos_outbox(self, db: Session, pago: Pago):
+        """Agrega los eventos del agregado al outbox, en la misma transacción que el pago"""
+        for evento in pago.eventos:
+            db.add(OutboxModel(
+                id=uuid.uuid4(),
+                tipo_evento=type(evento).__name__,
+                datos_evento=self._serializar_evento(evento),
+                procesado=False
+            ))
+        CONTADORES_OUTBOX_PAGOS.registrar_creados(db, [type(evento).__name__ for evento in pago.eventos])
     
     def _reconstruir_pago(self, modelo: PagoModel) -> Pago:
         """Reconstruir entidad Pago desde el modelo de base de datos"""
@@ -158,6 +366,7 @@ class RepositorioPagosSQLAlchemy(RepositorioPagos):
         pago.fecha_actualizacion = modelo.fecha_actualizacion
         pago.fecha_procesamiento = modelo.fecha_procesamiento
         pago.mensaje_error = modelo.mensaje_error
+        pago.version = modelo.version
         
         return pago
     
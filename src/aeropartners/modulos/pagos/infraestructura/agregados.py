@@ -0,0 +1,205 @@
+import logging
+from collections import Counter
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..dominio.entidades import Pago
+from ..dominio.enums import EstadoPago
+from ....seedwork.infraestructura.db import SessionLocal
+from .modelos import PagoAgregadoDiarioModel
+
+logger = logging.getLogger(__name__)
+
+# Fila marcadora que indica que los totales ya se inicializaron con un recuento de los pagos
+AFILIADO_MARCADOR = ""
+DIA_MARCADOR = date(1970, 1, 1)
+
+COLUMNAS_AGREGADAS = (
+    "cantidad", "monto_total",
+    "exitosos", "monto_exitoso",
+    "fallidos", "monto_fallido",
+    "reversados", "monto_reversado"
+)
+
+# Estados con contadores propios; PENDIENTE y PROCESANDO se derivan del resto
+COLUMNAS_POR_ESTADO = {
+    EstadoPago.EXITOSO: ("exitosos", "monto_exitoso"),
+    EstadoPago.FALLIDO: ("fallidos", "monto_fallido"),
+    EstadoPago.REVERSADO: ("reversados", "monto_reversado"),
+}
+
+AGRUPACIONES = {
+    "dia": ("id_afiliado", "moneda", "dia"),
+    "afiliado": ("id_afiliado", "moneda"),
+    "moneda": ("moneda",),
+}
+
+Clave = Tuple[str, str, date]
+
+
+class AgregadosPagos:
+    """
+    Modelo de lectura con los totales de pagos por afiliado, moneda y día de creación
+
+    Los registros se hacen con la sesión del repositorio, en la misma transacción que inserta
+    o transiciona el pago, de modo que los totales nunca divergen de la tabla de pagos.
+    Cada transición descuenta el pago del estado de origen y lo suma al de destino.
+    Los reportes leen unas pocas filas por día en lugar de recorrer todos los pagos.
+    """
+
+    def registrar_creados(self, db: Session, pagos: Iterable[Pago]):
+        deltas: Dict[Clave, Counter] = {}
+        for pago in pagos:
+            delta = self._delta(deltas, pago)
+            delta["cantidad"] += 1
+            delta["monto_total"] += pago.monto.monto
+            self._sumar_estado(delta, pago.estado, pago.monto.monto, 1)
+        self._incrementar(db, deltas)
+
+    def registrar_transicion(self, db: Session, pago: Pago, desde: EstadoPago):
+        deltas: Dict[Clave, Counter] = {}
+        delta = self._delta(deltas, pago)
+        self._sumar_estado(delta, desde, pago.monto.monto, -1)
+        self._sumar_estado(delta, pago.estado, pago.monto.monto, 1)
+        self._incrementar(db, deltas)
+
+    def registrar_eliminados(self, db: Session, pagos: Iterable[Pago]):
+        deltas: Dict[Clave, Counter] = {}
+        for pago in pagos:
+            delta = self._delta(deltas, pago)
+            delta["cantidad"] -= 1
+            delta["monto_total"] -= pago.monto.monto
+            self._sumar_estado(delta, pago.estado, pago.monto.monto, -1)
+        self._incrementar(db, deltas)
+
+    def _delta(self, deltas: Dict[Clave, Counter], pago: Pago) -> Counter:
+        clave = (pago.id_afiliado, pago.monto.moneda.value, pago.fecha_creacion.date())
+        return deltas.setdefault(clave, Counter())
+
+    def _sumar_estado(self, delta: Counter, estado: EstadoPago, monto: float, signo: int):
+        if estado in COLUMNAS_POR_ESTADO:
+            cantidad, importe = COLUMNAS_POR_ESTADO[estado]
+            delta[cantidad] += signo
+            delta[importe] += signo * monto
+
+    def _incrementar(self, db: Session, deltas: Dict[Clave, Counter]):
+        # Un único upsert de varias filas; el orden fijo de las claves evita interbloqueos
+        # entre transacciones que tocan los mismos días
+        filas = [
+            {
+                "id_afiliado": id_afiliado, "moneda": moneda, "dia": dia,
+                **{columna: delta[columna] for columna in COLUMNAS_AGREGADAS}
+            }
+            for (id_afiliado, moneda, dia), delta in sorted(deltas.items())
+            if any(delta.values())
+        ]
+        if not filas:
+            return
+        sentencia = insert(PagoAgregadoDiarioModel).values(filas)
+        db.execute(sentencia.on_conflict_do_update(
+            index_elements=["id_afiliado", "moneda", "dia"],
+            set_={
+                columna: getattr(PagoAgregadoDiarioModel, columna) + getattr(sentencia.excluded, columna)
+                for columna in COLUMNAS_AGREGADAS
+            }
+        ))
+
+    def obtener_resumen(self, id_afiliado: str = None, moneda: str = None, fecha_desde: date = None,
+                        fecha_hasta: date = None, agrupar_por: str = "dia") -> Dict[str, Any]:
+        """
+        Totales por `agrupar_por` (dia, afiliado o moneda) y por moneda, para los pagos creados
+        entre `fecha_desde` y `fecha_hasta` (ambas inclusive)
+        """
+        db = SessionLocal()
+        try:
+            if not self._inicializado(db):
+                # Sin recuento inicial (p.ej. tabla creada por create_all) los totales solo
+                # cubrirían los pagos posteriores a su introducción
+                self._recalcular(db)
+                db.commit()
+            filas = self._leer(db, id_afiliado, moneda, fecha_desde, fecha_hasta, AGRUPACIONES[agrupar_por])
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        totales_por_moneda: Dict[str, Dict[str, Any]] = {}
+        for fila in filas:
+            totales = totales_por_moneda.setdefault(fila["moneda"], Counter())
+            totales.update({columna: fila[columna] for columna in COLUMNAS_AGREGADAS + ("pendientes",)})
+        return {
+            "agrupar_por": agrupar_por,
+            "filas": filas,
+            "totales_por_moneda": {moneda: dict(totales) for moneda, totales in totales_por_moneda.items()}
+        }
+
+    def recalcular(self):
+        """
+        Recuenta la tabla de pagos y reemplaza los totales. Frena las altas y transiciones de
+        pagos hasta el commit: es una tarea de operación, no se expone en la API
+        """
+        db = SessionLocal()
+        try:
+            self._recalcular(db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _inicializado(self, db: Session) -> bool:
+        marcador = (AFILIADO_MARCADOR, AFILIADO_MARCADOR, DIA_MARCADOR)
+        return db.get(PagoAgregadoDiarioModel, marcador) is not None
+
+    def _recalcular(self, db: Session):
+        # El bloqueo espera a las transacciones con incrementos en curso y frena las nuevas hasta
+        # el commit; el recuento posterior ve exactamente los pagos ya contabilizados
+        db.execute(text("LOCK TABLE pagos_agregados_diarios IN SHARE ROW EXCLUSIVE MODE"))
+        db.query(PagoAgregadoDiarioModel).delete(synchronize_session=False)
+        db.execute(text("""
+            INSERT INTO pagos_agregados_diarios (id_afiliado, moneda, dia, cantidad, monto_total,
+                exitosos, monto_exitoso, fallidos, monto_fallido, reversados, monto_reversado)
+            SELECT id_afiliado, moneda, fecha_creacion::date, count(*), sum(monto),
+                count(*) FILTER (WHERE estado = 'EXITOSO'), coalesce(sum(monto) FILTER (WHERE estado = 'EXITOSO'), 0),
+                count(*) FILTER (WHERE estado = 'FALLIDO'), coalesce(sum(monto) FILTER (WHERE estado = 'FALLIDO'), 0),
+                count(*) FILTER (WHERE estado = 'REVERSADO'), coalesce(sum(monto) FILTER (WHERE estado = 'REVERSADO'), 0)
+            FROM pagos
+            GROUP BY id_afiliado, moneda, fecha_creacion::date
+            UNION ALL
+            SELECT :marcador, :marcador, :dia_marcador, 0, 0, 0, 0, 0, 0, 0, 0
+        """), {"marcador": AFILIADO_MARCADOR, "dia_marcador": DIA_MARCADOR})
+        logger.info("Totales diarios de pagos recalculados")
+
+    def _leer(self, db: Session, id_afiliado: Optional[str], moneda: Optional[str], fecha_desde: Optional[date],
+              fecha_hasta: Optional[date], agrupacion: Tuple[str, ...]) -> List[Dict[str, Any]]:
+        claves = [getattr(PagoAgregadoDiarioModel, columna) for columna in agrupacion]
+        consulta = db.query(
+            *claves,
+            *[func.sum(getattr(PagoAgregadoDiarioModel, columna)).label(columna) for columna in COLUMNAS_AGREGADAS]
+        ).filter(PagoAgregadoDiarioModel.id_afiliado != AFILIADO_MARCADOR)
+        if id_afiliado:
+            consulta = consulta.filter(PagoAgregadoDiarioModel.id_afiliado == id_afiliado)
+        if moneda:
+            consulta = consulta.filter(PagoAgregadoDiarioModel.moneda == moneda)
+        if fecha_desde:
+            consulta = consulta.filter(PagoAgregadoDiarioModel.dia >= fecha_desde)
+        if fecha_hasta:
+            consulta = consulta.filter(PagoAgregadoDiarioModel.dia <= fecha_hasta)
+
+        filas = []
+        for fila in consulta.group_by(*claves).order_by(*claves).all():
+            fila = fila._asdict()
+            for columna in COLUMNAS_AGREGADAS:
+                fila[columna] = fila[columna] if columna.startswith("monto") else int(fila[columna])
+            fila["pendientes"] = fila["cantidad"] - fila["exitosos"] - fila["fallidos"] - fila["reversados"]
+            filas.append(fila)
+        return filas
+
+
+AGREGADOS_PAGOS = AgregadosPagos()
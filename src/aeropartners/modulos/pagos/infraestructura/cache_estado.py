@@ -0,0 +1,107 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ..dominio.enums import EstadoPago
+
+# Estados que solo cambian por un evento publicado (p.ej. la reversión de un pago exitoso)
+ESTADOS_FINALES = {EstadoPago.EXITOSO.value, EstadoPago.FALLIDO.value, EstadoPago.REVERSADO.value}
+EVENTOS_CAMBIO_ESTADO = {"PagoExitoso", "PagoFallido", "PagoRevertido"}
+
+
+class CacheEstadoPagos:
+    """
+    Cache de lectura del estado de los pagos por id (GET /pagos/{id_pago})
+
+    - LRU acotada a `capacidad` entradas
+    - Los estados finales no vencen mientras el oyente de eventos está conectado: los
+      eventos PagoExitoso, PagoFallido y PagoRevertido invalidan la entrada del pago
+    - Los estados en curso (PENDIENTE, PROCESANDO), y todos sin oyente conectado, vencen
+      a los `ttl_segundos`
+    - Una lectura de la base iniciada antes de una invalidación no vuelve a guardar el
+      valor anterior (ver `marca`)
+    """
+
+    def __init__(self, capacidad: int = None, ttl_segundos: float = None,
+                 reloj: Callable[[], float] = time.monotonic):
+        self.capacidad = capacidad or int(os.getenv("PAGOS_STATUS_CACHE_SIZE", "100000"))
+        self.ttl_segundos = ttl_segundos if ttl_segundos is not None else float(
+            os.getenv("PAGOS_STATUS_CACHE_TTL_SECONDS", "2")
+        )
+        self.sincronizada = False
+        self._reloj = reloj
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[str, Tuple[Dict[str, Any], Optional[float]]]" = OrderedDict()
+        self._invalidaciones: "OrderedDict[str, int]" = OrderedDict()
+        self._secuencia = 0
+        self._limpiada_en = 0
+        self._aciertos = 0
+        self._fallos = 0
+
+    def marca(self) -> int:
+        """Se toma antes de leer de la base y se pasa a `guardar`"""
+        with self._lock:
+            return self._secuencia
+
+    def obtener(self, id_pago: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entrada = self._entradas.get(id_pago)
+            if entrada is not None:
+                resultado, expira = entrada
+                if expira is None or expira > self._reloj():
+                    self._entradas.move_to_end(id_pago)
+                    self._aciertos += 1
+                    return resultado
+                del self._entradas[id_pago]
+            self._fallos += 1
+            return None
+
+    def guardar(self, id_pago: str, resultado: Dict[str, Any], marca: int):
+        with self._lock:
+            if self._limpiada_en > marca or self._invalidaciones.get(id_pago, 0) > marca:
+                return
+            indefinido = self.sincronizada and resultado.get("estado") in ESTADOS_FINALES
+            self._entradas[id_pago] = (resultado, None if indefinido else self._reloj() + self.ttl_segundos)
+            self._entradas.move_to_end(id_pago)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, id_pago: str):
+        with self._lock:
+            self._secuencia += 1
+            self._entradas.pop(id_pago, None)
+            self._invalidaciones[id_pago] = self._secuencia
+            self._invalidaciones.move_to_end(id_pago)
+            while len(self._invalidaciones) > self.capacidad:
+                self._invalidaciones.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._secuencia += 1
+            self._limpiada_en = self._secuencia
+            self._entradas.clear()
+            self._invalidaciones.clear()
+
+    def aplicar_evento(self, tipo_evento: str, datos: Dict[str, Any]):
+        """Manejador del oyente de eventos de pagos"""
+        if tipo_evento in EVENTOS_CAMBIO_ESTADO and datos.get("id_pago"):
+            self.invalidar(str(datos["id_pago"]))
+
+    def al_cambiar_conexion(self, conectado: bool):
+        # Los eventos publicados sin oyente conectado se pierden: se descarta todo lo guardado
+        self.sincronizada = conectado
+        self.limpiar()
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            consultas = self._aciertos + self._fallos
+            return {
+                "sincronizada": self.sincronizada,
+                "entradas": len(self._entradas),
+                "capacidad": self.capacidad,
+                "aciertos": self._aciertos,
+                "fallos": self._fallos,
+                "tasa_aciertos": round(self._aciertos / consultas, 4) if consultas else 0.0
+            }
@@ -0,0 +1,69 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class EjecutorOrdenadoPorClave:
+    """
+    Ejecuta tareas en un pool de hilos preservando el orden entre tareas de la misma clave
+    (p.ej. los pagos de un mismo afiliado), mientras que claves distintas avanzan en paralelo.
+
+    La cantidad de tareas aceptadas y no terminadas está acotada por `max_en_vuelo`:
+    `enviar` bloquea al llamador cuando se alcanza el límite, lo que frena la recepción
+    de mensajes en lugar de acumularlos en memoria.
+    """
+
+    def __init__(self, max_workers: int, max_en_vuelo: int = None, prefijo_hilos: str = "ejecutor"):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=prefijo_hilos)
+        self._cupos = threading.BoundedSemaphore(max_en_vuelo or max_workers * 2)
+        self._colas: Dict[str, Deque[Tuple[Callable, tuple]]] = {}
+        self._lock = threading.Lock()
+        self._en_vuelo = 0
+
+    @property
+    def en_vuelo(self) -> int:
+        with self._lock:
+            return self._en_vuelo
+
+    def enviar(self, clave: str, funcion: Callable, *args, timeout: float = None) -> bool:
+        """Encola la tarea; retorna False si no hubo cupo dentro del timeout"""
+        if not self._cupos.acquire(timeout=timeout):
+            return False
+
+        with self._lock:
+            self._en_vuelo += 1
+            cola = self._colas.get(clave)
+            if cola is not None:
+                # Ya hay un hilo drenando esta clave: se ejecutará después de las anteriores
+                cola.append((funcion, args))
+                return True
+            self._colas[clave] = deque([(funcion, args)])
+
+        self._pool.submit(self._drenar, clave)
+        return True
+
+    def _drenar(self, clave: str):
+        while True:
+            with self._lock:
+                cola = self._colas[clave]
+                if not cola:
+                    del self._colas[clave]
+                    return
+                funcion, args = cola.popleft()
+
+            try:
+                funcion(*args)
+            except Exception as e:
+                logger.error(f"Error ejecutando tarea de la clave {clave}: {e}")
+            finally:
+                with self._lock:
+                    self._en_vuelo -= 1
+                self._cupos.release()
+
+    def cerrar(self, esperar: bool = True):
+        """Deja de aceptar tareas; con esperar=True termina las que ya fueron aceptadas"""
+        self._pool.shutdown(wait=esperar)
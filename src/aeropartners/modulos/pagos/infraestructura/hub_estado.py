@@ -0,0 +1,126 @@
+import os
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, Optional, Set
+
+from .cache_estado import EVENTOS_CAMBIO_ESTADO
+
+# Además de los estados finales se avisa el reencolado (PROCESANDO -> PENDIENTE). La toma
+# PENDIENTE -> PROCESANDO no publica evento: quien espera la detecta releyendo el estado
+EVENTOS_AVISADOS = EVENTOS_CAMBIO_ESTADO | {"PagoPendiente"}
+
+logger = logging.getLogger(__name__)
+
+
+class HubSaturadoExcepcion(Exception):
+    """Se alcanzó el máximo de peticiones esperando cambios de estado en esta réplica"""
+
+
+class SuscripcionEstadoPago:
+    """Espera de una petición (long-poll o SSE) por los cambios de estado de un pago"""
+
+    def __init__(self, hub: "HubEstadoPagos", id_pago: str, loop: asyncio.AbstractEventLoop):
+        self.id_pago = id_pago
+        self._hub = hub
+        self._loop = loop
+        # Basta un aviso pendiente: quien espera vuelve a leer el estado completo
+        self._avisos: asyncio.Queue = asyncio.Queue(maxsize=1)
+
+    async def esperar(self, timeout: float) -> Optional[str]:
+        """Retorna el tipo del evento recibido o None si venció el plazo"""
+        try:
+            return await asyncio.wait_for(self._avisos.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def _avisar(self, tipo_evento: str):
+        try:
+            self._avisos.put_nowait(tipo_evento)
+        except asyncio.QueueFull:
+            pass
+
+    def notificar(self, tipo_evento: str) -> bool:
+        """Seguro de llamar desde cualquier hilo; el aviso se entrega en el loop de la petición"""
+        try:
+            self._loop.call_soon_threadsafe(self._avisar, tipo_evento)
+            return True
+        except RuntimeError:
+            # El loop de la petición ya se cerró
+            return False
+
+    def cerrar(self):
+        self._hub._quitar(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self.cerrar()
+
+
+class HubEstadoPagos:
+    """
+    Reparte dentro del proceso los eventos de pagos a las peticiones que esperan un cambio
+    de estado, sin que cada una consulte la base en un ciclo
+
+    - Se alimenta del oyente de eventos de pagos (hilo propio) y de las transiciones hechas
+      por esta réplica; los avisos se entregan con call_soon_threadsafe
+    - Como máximo `max_suscriptores` esperas simultáneas por réplica: al superarlo
+      `abrir` lanza HubSaturadoExcepcion y la petición responde sin esperar
+    """
+
+    def __init__(self, max_suscriptores: int = None):
+        self.max_suscriptores = max_suscriptores or int(os.getenv("PAGOS_STATUS_MAX_SUBSCRIBERS", "1000"))
+        self.conectado = False
+        self._lock = threading.Lock()
+        self._suscripciones: Dict[str, Set[SuscripcionEstadoPago]] = {}
+        self._total = 0
+        self._rechazadas = 0
+        self._avisos = 0
+
+    def abrir(self, id_pago: str) -> SuscripcionEstadoPago:
+        """Debe llamarse desde el loop de la petición"""
+        suscripcion = SuscripcionEstadoPago(self, id_pago, asyncio.get_running_loop())
+        with self._lock:
+            if self._total >= self.max_suscriptores:
+                self._rechazadas += 1
+                raise HubSaturadoExcepcion(f"Máximo de {self.max_suscriptores} esperas de estado alcanzado")
+            self._suscripciones.setdefault(id_pago, set()).add(suscripcion)
+            self._total += 1
+        return suscripcion
+
+    def _quitar(self, suscripcion: SuscripcionEstadoPago):
+        with self._lock:
+            suscripciones = self._suscripciones.get(suscripcion.id_pago)
+            if not suscripciones or suscripcion not in suscripciones:
+                return
+            suscripciones.discard(suscripcion)
+            self._total -= 1
+            if not suscripciones:
+                del self._suscripciones[suscripcion.id_pago]
+
+    def publicar(self, tipo_evento: str, datos: Dict[str, Any]):
+        """Manejador del oyente de eventos de pagos"""
+        if tipo_evento not in EVENTOS_AVISADOS or not datos.get("id_pago"):
+            return
+        with self._lock:
+            suscripciones = list(self._suscripciones.get(str(datos["id_pago"]), ()))
+        avisadas = sum(1 for suscripcion in suscripciones if suscripcion.notificar(tipo_evento))
+        if avisadas:
+            with self._lock:
+                self._avisos += avisadas
+
+    def al_cambiar_conexion(self, conectado: bool):
+        self.conectado = conectado
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "conectado": self.conectado,
+                "suscripciones": self._total,
+                "pagos_observados": len(self._suscripciones),
+                "max_suscriptores": self.max_suscriptores,
+                "rechazadas": self._rechazadas,
+                "avisos_entregados": self._avisos
+            }
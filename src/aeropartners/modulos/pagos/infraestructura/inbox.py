@@ -0,0 +1,87 @@
+import os
+import time
+import uuid
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ....seedwork.infraestructura.db import SessionLocal
+from .modelos import InboxPagosModel
+
+logger = logging.getLogger(__name__)
+
+SQL_PURGAR_LOTE = text("""
+    DELETE FROM inbox_pagos WHERE id_evento IN (
+        SELECT id_evento FROM inbox_pagos
+        WHERE fecha_procesamiento < :limite
+        LIMIT :tamano_lote
+        FOR UPDATE SKIP LOCKED
+    )
+""")
+
+
+def id_evento_valido(id_evento: Optional[str]) -> Optional[uuid.UUID]:
+    """Los eventos del outbox de pagos se identifican con el UUID de su fila"""
+    try:
+        return uuid.UUID(str(id_evento)) if id_evento else None
+    except ValueError:
+        return None
+
+
+class InboxPagos:
+    """
+    Inbox del consumidor de pagos
+
+    El id del evento se registra con la sesión del repositorio, en la misma transacción
+    que actualiza el pago: si la inserción no agrega la fila, el evento ya fue aplicado
+    y la transacción se descarta. La retención elimina en lotes las entradas más antiguas
+    que la ventana máxima de reentrega.
+    """
+
+    def __init__(self, horas_retencion: float = None, tamano_lote: int = None, intervalo_segundos: float = None):
+        self.horas_retencion = horas_retencion or float(os.getenv("PAGOS_INBOX_RETENTION_HOURS", "72"))
+        self.tamano_lote = tamano_lote or int(os.getenv("PAGOS_INBOX_RETENTION_BATCH_SIZE", "1000"))
+        self.intervalo_segundos = intervalo_segundos or float(os.getenv("PAGOS_INBOX_RETENTION_INTERVAL_SECONDS", "600"))
+        self._ultima_purga = None
+
+    def registrar(self, db: Session, id_evento: uuid.UUID, tipo_evento: str) -> bool:
+        """Retorna False si el evento ya estaba registrado (duplicado)"""
+        sentencia = insert(InboxPagosModel).values(
+            id_evento=id_evento, tipo_evento=tipo_evento, fecha_procesamiento=datetime.now()
+        ).on_conflict_do_nothing(index_elements=["id_evento"]).returning(InboxPagosModel.id_evento)
+        return db.execute(sentencia).first() is not None
+
+    def debe_purgar(self) -> bool:
+        """True una vez por intervalo de retención"""
+        if self._ultima_purga is not None and time.monotonic() - self._ultima_purga < self.intervalo_segundos:
+            return False
+        self._ultima_purga = time.monotonic()
+        return True
+
+    def purgar(self) -> int:
+        """Elimina en lotes las entradas anteriores a la ventana de retención"""
+        limite = datetime.now() - timedelta(hours=self.horas_retencion)
+        total = 0
+        while True:
+            db = SessionLocal()
+            try:
+                eliminadas = db.execute(SQL_PURGAR_LOTE, {"limite": limite, "tamano_lote": self.tamano_lote}).rowcount
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+            total += eliminadas
+            if eliminadas < self.tamano_lote:
+                break
+        if total:
+            logger.info(f"Retención del inbox de pagos: {total} entradas eliminadas")
+        return total
+
+
+INBOX_PAGOS = InboxPagos()
@@ -23,6 +23,7 @@ class MapeadorPago:
         pago.fecha_actualizacion = modelo.fecha_actualizacion
         pago.fecha_procesamiento = modelo.fecha_procesamiento
         pago.mensaje_error = modelo.mensaje_error
+        pago.version = modelo.version
         return pago
     
     def dto_a_entidad(self, entidad: Pago) -> PagoModel:
@@ -36,5 +37,6 @@ class MapeadorPago:
             fecha_creacion=entidad.fecha_creacion,
             fecha_actualizacion=entidad.fecha_actualizacion,
             fecha_procesamiento=entidad.fecha_procesamiento,
-            mensaje_error=entidad.mensaje_error
+            mensaje_error=entidad.mensaje_error,
+            version=entidad.version
         )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, DateTime, Boolean, Text
+from sqlalchemy import Column, String, Float, DateTime, Date, Boolean, Text, Integer, BigInteger, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from ....seedwork.infraestructura.db import Base
 import uuid
@@ -6,6 +6,13 @@ from datetime import datetime
 
 class PagoModel(Base):
     __tablename__ = "pagos"
+    __table_args__ = (
+        # Paginación por keyset en el orden (fecha_creacion, id), global y por afiliado
+        Index("ix_pagos_fecha_creacion_id", "fecha_creacion", "id"),
+        Index("ix_pagos_afiliado_fecha_creacion_id", "id_afiliado", "fecha_creacion", "id"),
+        # La reconciliación busca pagos en PROCESANDO sin cambios recientes
+        Index("ix_pagos_estado_fecha_actualizacion", "estado", "fecha_actualizacion"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     id_afiliado = Column(String(255), nullable=False)
@@ -17,9 +24,38 @@ class PagoModel(Base):
     fecha_actualizacion = Column(DateTime, nullable=False, default=datetime.now)
     fecha_procesamiento = Column(DateTime, nullable=True)
     mensaje_error = Column(Text, nullable=True)
+    # Se incrementa en cada transición; las actualizaciones condicionales lo verifican
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+class PagoAgregadoDiarioModel(Base):
+    """
+    Totales de pagos por afiliado, moneda y día de creación, mantenidos de forma incremental
+    Los contadores por estado reflejan el estado actual de los pagos de cada día
+    """
+    __tablename__ = "pagos_agregados_diarios"
+    __table_args__ = (
+        Index("ix_pagos_agregados_diarios_dia", "dia"),
+    )
+
+    id_afiliado = Column(String(255), primary_key=True)
+    moneda = Column(String(3), primary_key=True)
+    dia = Column(Date, primary_key=True)
+    cantidad = Column(BigInteger, nullable=False, default=0)
+    monto_total = Column(Float, nullable=False, default=0)
+    exitosos = Column(BigInteger, nullable=False, default=0)
+    monto_exitoso = Column(Float, nullable=False, default=0)
+    fallidos = Column(BigInteger, nullable=False, default=0)
+    monto_fallido = Column(Float, nullable=False, default=0)
+    reversados = Column(BigInteger, nullable=False, default=0)
+    monto_reversado = Column(Float, nullable=False, default=0)
 
 class OutboxModel(Base):
     __tablename__ = "outbox"
+    __table_args__ = (
+        # Parciales: el relay solo recorre pendientes y la retención solo procesados antiguos
+        Index("ix_outbox_pendientes", "fecha_creacion", postgresql_where=text("procesado = false")),
+        Index("ix_outbox_procesados", "fecha_procesamiento", postgresql_where=text("procesado = true")),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     tipo_evento = Column(String(100), nullable=False)
@@ -27,3 +63,23 @@ class OutboxModel(Base):
     procesado = Column(Boolean, nullable=False, default=False)
     fecha_creacion = Column(DateTime, nullable=False, default=datetime.now)
     fecha_procesamiento = Column(DateTime, nullable=True)
+
+class OutboxArchivoModel(Base):
+    """Eventos del outbox ya publicados, movidos por la retención cuando se habilita el archivo"""
+    __tablename__ = "outbox_archivo"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    tipo_evento = Column(String(100), nullable=False)
+    datos_evento = Column(Text, nullable=False)
+    procesado = Column(Boolean, nullable=False, default=True)
+    fecha_creacion = Column(DateTime, nullable=False)
+    fecha_procesamiento = Column(DateTime, nullable=True)
+    fecha_archivado = Column(DateTime, nullable=False, default=datetime.now)
+
+class InboxPagosModel(Base):
+    """Eventos ya aplicados por el consumidor de pagos (idempotencia ante reentregas)"""
+    __tablename__ = "inbox_pagos"
+
+    id_evento = Column(UUID(as_uuid=True), primary_key=True)
+    tipo_evento = Column(String(100), nullable=False)
+    fecha_procesamiento = Column(DateTime, nullable=False, default=datetime.now, index=True)
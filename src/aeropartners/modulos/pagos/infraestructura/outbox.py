@@ -1,53 +1,95 @@
 import json
 import os
 import logging
-from typing import List
+from typing import List, Tuple
+import threading
 from datetime import datetime
 from ....seedwork.infraestructura.db import SessionLocal
 from ....seedwork.infraestructura.pulsar_producer import PulsarEventProducer
+from ....seedwork.infraestructura.contadores import ContadoresOutbox
 from .modelos import OutboxModel
 
 logger = logging.getLogger(__name__)
 
+CONTADORES_OUTBOX_PAGOS = ContadoresOutbox("pagos", "outbox", "tipo_evento", "procesado")
+
 class OutboxProcessor:
     """Procesador de eventos del outbox (versión simple sin Pulsar)"""
-    
+
+    def __init__(self, tamano_lote: int = None):
+        self.tamano_lote = tamano_lote or int(os.getenv("OUTBOX_BATCH_SIZE", "500"))
+
     def procesar_eventos_pendientes(self) -> int:
         """
-        Procesa todos los eventos pendientes en el outbox
+        Procesa los eventos pendientes del outbox en lotes de tamaño fijo
         Retorna el número de eventos procesados
         """
-        db = SessionLocal()
         eventos_procesados = 0
-        
+
+        while True:
+            reclamados, publicados = self._procesar_lote()
+            eventos_procesados += publicados
+            # Lote incompleto: no quedan pendientes libres. Sin publicados: evitar reintentar en bucle
+            if reclamados < self.tamano_lote or publicados == 0:
+                break
+
+        return eventos_procesados
+
+    def _procesar_lote(self) -> Tuple[int, int]:
+        """
+        Reclama un lote con FOR UPDATE SKIP LOCKED, lo publica y marca como procesados
+        los eventos confirmados en la misma transacción. Varias réplicas del relay pueden
+        ejecutarse en paralelo: cada una reclama filas distintas.
+        Retorna (eventos reclamados, eventos publicados)
+        """
+        db = SessionLocal()
+
         try:
-            # Obtener eventos no procesados
-            eventos_pendientes = db.query(OutboxModel).filter(
+            eventos = db.query(OutboxModel).filter(
                 OutboxModel.procesado == False
-            ).all()
-            
-            for evento in eventos_pendientes:
-                try:
-                    self._procesar_evento(evento)
-                    
-                    # Marcar como procesado
-                    evento.procesado = True
-                    evento.fecha_procesamiento = datetime.now()
-                    eventos_procesados += 1
-                    
-                except Exception as e:
-                    logger.error(f"Error procesando evento {evento.id}: {str(e)}")
-            
+            ).order_by(
+                OutboxModel.fecha_creacion
+            ).limit(self.tamano_lote).with_for_update(skip_locked=True).all()
+
+            if not eventos:
+                db.commit()
+                return 0, 0
+
+            ids_publicados = self._publicar_lote(eventos)
+
+            if ids_publicados:
+                db.query(OutboxModel).filter(
+                    OutboxModel.id.in_(ids_publicados)
+                ).update({
+                    OutboxModel.procesado: True,
+                    OutboxModel.fecha_procesamiento: datetime.now()
+                }, synchronize_session=False)
+                publicados = set(ids_publicados)
+                CONTADORES_OUTBOX_PAGOS.registrar_procesados(
+                    db, [evento.tipo_evento for evento in eventos if evento.id in publicados]
+                )
+
             db.commit()
-            
+            return len(eventos), len(ids_publicados)
+
         except Exception as e:
             db.rollback()
             logger.error(f"Error en el procesamiento del outbox: {str(e)}")
+            return 0, 0
         finally:
             db.close()
-        
-        return eventos_procesados
-    
+
+    def _publicar_lote(self, eventos: List[OutboxModel]) -> List:
+        """Publica un lote de eventos y retorna los ids confirmados"""
+        ids_publicados = []
+        for evento in eventos:
+            try:
+                self._procesar_evento(evento)
+                ids_publicados.append(evento.id)
+            except Exception as e:
+                logger.error(f"Error procesando evento {evento.id}: {str(e)}")
+        return ids_publicados
+
     def _procesar_evento(self, evento: OutboxModel):
         """
         Procesa un evento individual
@@ -62,51 +104,84 @@ class OutboxProcessor:
         
     
     def obtener_estadisticas(self) -> dict:
-        """Obtiene estadísticas del outbox"""
-        db = SessionLocal()
-        try:
-            total_eventos = db.query(OutboxModel).count()
-            eventos_pendientes = db.query(OutboxModel).filter(
-                OutboxModel.procesado == False
-            ).count()
-            eventos_procesados = total_eventos - eventos_pendientes
-            
-            return {
-                "total_eventos": total_eventos,
-                "eventos_procesados": eventos_procesados,
-                "eventos_pendientes": eventos_pendientes
-            }
-        finally:
-            db.close()
+        """
+        Obtiene estadísticas del outbox desde los contadores incrementales
+        El recuento completo es una tarea de operación (ver recuento.py)
+        """
+        return CONTADORES_OUTBOX_PAGOS.obtener_estadisticas()
 
 
 class PulsarOutboxProcessor(OutboxProcessor):
     """Procesador de eventos del outbox con integración a Apache Pulsar"""
-    
-    def __init__(self, pulsar_url: str = None, topic: str = "pagos-events"):
-        super().__init__()
+
+    def __init__(self, pulsar_url: str = None, topic: str = "pagos-events", tamano_lote: int = None,
+                 timeout_confirmacion_segundos: float = 30.0):
+        super().__init__(tamano_lote)
         self.pulsar_producer = PulsarEventProducer(pulsar_url, topic)
-    
+        self.timeout_confirmacion_segundos = timeout_confirmacion_segundos
+
+    def _publicar_lote(self, eventos: List[OutboxModel]) -> List:
+        """
+        Publica el lote de forma asíncrona y espera las confirmaciones del broker
+        Solo los eventos confirmados se marcan como procesados (at-least-once)
+        """
+        ids_por_evento = {str(evento.id): evento.id for evento in eventos}
+        confirmados = []
+        pendientes = [len(eventos)]
+        lock = threading.Lock()
+        terminado = threading.Event()
+
+        def al_confirmar(exitoso: bool, event_id: str):
+            with lock:
+                if exitoso:
+                    confirmados.append(ids_por_evento[event_id])
+                else:
+                    logger.error(f"Pulsar rechazó el evento {event_id}")
+                pendientes[0] -= 1
+                if pendientes[0] == 0:
+                    terminado.set()
+
+        for evento in eventos:
+            try:
+                self.pulsar_producer.publish_event_async(
+                    event_type=evento.tipo_evento,
+                    event_data=json.loads(evento.datos_evento),
+                    event_id=str(evento.id),
+                    callback=al_confirmar
+                )
+            except Exception as e:
+                logger.error(f"Error publicando evento a Pulsar {evento.id}: {str(e)}")
+                al_confirmar(False, str(evento.id))
+
+        self.pulsar_producer.flush()
+        if not terminado.wait(self.timeout_confirmacion_segundos):
+            logger.warning(f"Timeout esperando confirmaciones de Pulsar: {pendientes[0]} eventos sin confirmar")
+
+        with lock:
+            ids_confirmados = list(confirmados)
+        logger.info(f"Lote publicado a Pulsar: {len(ids_confirmados)}/{len(eventos)} eventos confirmados")
+        return ids_confirmados
+
     def _procesar_evento(self, evento: OutboxModel):
         """
         Procesa un evento individual y lo publica a Pulsar
         """
         try:
             datos = json.loads(evento.datos_evento)
-            
+
             # Publicar evento a Pulsar
             self.pulsar_producer.publish_event(
                 event_type=evento.tipo_evento,
                 event_data=datos,
                 event_id=str(evento.id)
             )
-            
+
             logger.info(f"Evento publicado a Pulsar: {evento.tipo_evento} - {evento.id}")
-            
+
         except Exception as e:
             logger.error(f"Error publicando evento a Pulsar {evento.id}: {str(e)}")
             raise
-    
+
     def close(self):
         """Cierra la conexión con Pulsar"""
         if self.pulsar_producer:
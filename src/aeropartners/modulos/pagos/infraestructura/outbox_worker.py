@@ -0,0 +1,173 @@
+import os
+import select
+import signal
+import logging
+import time
+from typing import Optional
+
+import psycopg2
+import psycopg2.extensions
+
+from ....seedwork.infraestructura.db import DATABASE_URL
+from .outbox import OutboxProcessor, PulsarOutboxProcessor
+from .retencion import RetencionOutbox
+
+logger = logging.getLogger(__name__)
+
+CANAL_OUTBOX_PAGOS = "outbox_pagos"
+
+# Trigger a nivel de sentencia: un INSERT de varias filas genera una sola notificación,
+# y PostgreSQL además colapsa notificaciones idénticas dentro de la misma transacción
+DDL_NOTIFICACION_OUTBOX = f"""
+CREATE OR REPLACE FUNCTION notificar_outbox_pagos() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{CANAL_OUTBOX_PAGOS}', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS outbox_pagos_notificar ON outbox;
+CREATE TRIGGER outbox_pagos_notificar
+    AFTER INSERT ON outbox
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_outbox_pagos();
+"""
+
+
+class OutboxRelayWorker:
+    """
+    Worker de larga duración que drena el outbox de pagos cuando PostgreSQL notifica
+    inserciones (LISTEN/NOTIFY), con un sondeo lento de respaldo por si se pierde
+    una notificación (p.ej. durante una reconexión). Entre lotes ejecuta periódicamente
+    la retención de eventos ya publicados.
+    """
+
+    def __init__(self, procesador: OutboxProcessor = None, database_url: str = None,
+                 canal: str = CANAL_OUTBOX_PAGOS, intervalo_respaldo_segundos: float = None,
+                 instalar_trigger: bool = True, retencion: RetencionOutbox = None):
+        self.procesador = procesador
+        self.retencion = retencion
+        self.database_url = database_url or DATABASE_URL
+        self.canal = canal
+        self.intervalo_respaldo_segundos = intervalo_respaldo_segundos or float(
+            os.getenv("OUTBOX_FALLBACK_POLL_SECONDS", "30")
+        )
+        self.instalar_trigger = instalar_trigger
+        self.running = False
+        self._conexion = None
+        # Self-pipe: permite que una señal despierte el select() de inmediato
+        self._lectura_despertar, self._escritura_despertar = os.pipe()
+
+        signal.signal(signal.SIGINT, self._signal_handler)
+        signal.signal(signal.SIGTERM, self._signal_handler)
+
+    def _signal_handler(self, signum, frame):
+        """Maneja señales de terminación"""
+        logger.info(f"Recibida señal {signum}, iniciando shutdown...")
+        self.stop()
+
+    def _conectar(self):
+        """Abre la conexión dedicada a LISTEN (en autocommit, fuera del pool)"""
+        self._conexion = psycopg2.connect(self.database_url)
+        self._conexion.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with self._conexion.cursor() as cursor:
+            if self.instalar_trigger:
+                cursor.execute(DDL_NOTIFICACION_OUTBOX)
+            cursor.execute(f"LISTEN {self.canal};")
+        logger.info(f"Escuchando notificaciones del canal {self.canal}")
+
+    def _desconectar(self):
+        if self._conexion is not None:
+            try:
+                self._conexion.close()
+            except Exception:
+                pass
+            self._conexion = None
+
+    def _esperar_notificacion(self) -> Optional[str]:
+        """
+        Bloquea hasta recibir una notificación, una señal de parada o el vencimiento
+        del sondeo de respaldo. Retorna el motivo del despertar o None si hay que parar.
+        """
+        listos, _, _ = select.select(
+            [self._conexion, self._lectura_despertar], [], [], self.intervalo_respaldo_segundos
+        )
+        if not self.running or self._lectura_despertar in listos:
+            return None
+        if not listos:
+            return "respaldo"
+
+        self._conexion.poll()
+        cantidad = len(self._conexion.notifies)
+        self._conexion.notifies.clear()
+        return f"{cantidad} notificaciones" if cantidad else "respaldo"
+
+    def _drenar(self, motivo: str):
+        inicio = time.perf_counter()
+        procesados = self.procesador.procesar_eventos_pendientes()
+        if procesados:
+            logger.info(f"Procesados {procesados} eventos del outbox ({motivo}) en "
+                        f"{(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    def start(self):
+        """Inicia el worker: drena el backlog existente y luego reacciona a notificaciones"""
+        if self.procesador is None:
+            self.procesador = PulsarOutboxProcessor()
+        if self.retencion is None and os.getenv("OUTBOX_RETENTION_ENABLED", "true").lower() == "true":
+            self.retencion = RetencionOutbox()
+
+        self.running = True
+        espera_reconexion = 1.0
+
+        while self.running:
+            try:
+                self._conectar()
+                espera_reconexion = 1.0
+                # Lo insertado mientras no escuchábamos no generó notificación para nosotros
+                self._drenar("arranque")
+
+                while self.running:
+                    motivo = self._esperar_notificacion()
+                    if motivo is None:
+                        break
+                    self._drenar(motivo)
+                    if self.retencion:
+                        self.retencion.ejecutar_si_corresponde()
+
+            except psycopg2.Error as e:
+                if not self.running:
+                    break
+                logger.error(f"Conexión LISTEN perdida: {e}; reintentando en {espera_reconexion:.0f}s")
+                self._desconectar()
+                time.sleep(espera_reconexion)
+                espera_reconexion = min(espera_reconexion * 2, 30.0)
+
+        self._cerrar()
+
+    def stop(self):
+        """Solicita la parada; el lote en curso termina antes de salir"""
+        self.running = False
+        try:
+            os.write(self._escritura_despertar, b"x")
+        except OSError:
+            pass
+
+    def _cerrar(self):
+        self._desconectar()
+        if hasattr(self.procesador, "close"):
+            self.procesador.close()
+        logger.info("Worker de outbox detenido correctamente")
+
+
+def main():
+    """Función principal para ejecutar el worker del outbox"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    worker = OutboxRelayWorker()
+    worker.start()
+
+
+if __name__ == "__main__":
+    main()
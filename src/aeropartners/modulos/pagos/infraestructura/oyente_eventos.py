@@ -0,0 +1,124 @@
+import os
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class OyenteEventosPagos:
+    """
+    Sigue el topic de eventos de pagos desde cada réplica de la API
+
+    - Usa un Reader de Pulsar posicionado en el último mensaje: no hay suscripción
+      durable, cada réplica recibe todos los eventos publicados desde que se conecta
+    - Los manejadores reciben (tipo_evento, datos) y corren en el hilo del lector,
+      por lo que deben ser rápidos y no bloquear
+    - Ante un error de conexión se notifica la desconexión (los eventos perdidos no se
+      recuperan) y se reintenta tras `espera_reconexion_segundos`
+    """
+
+    def __init__(self, pulsar_url: str = None, topic: str = "pagos-events",
+                 timeout_lectura_ms: int = 1000, espera_reconexion_segundos: float = 5.0):
+        self.pulsar_url = pulsar_url or os.getenv("PULSAR_URL", "pulsar://localhost:6650")
+        self.topic = topic
+        self.timeout_lectura_ms = timeout_lectura_ms
+        self.espera_reconexion_segundos = espera_reconexion_segundos
+        self.conectado = False
+        self._manejadores: List[Callable[[str, Dict[str, Any]], None]] = []
+        self._observadores_conexion: List[Callable[[bool], None]] = []
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._eventos_recibidos = 0
+        self._errores_manejadores = 0
+        self._reconexiones = 0
+
+    def suscribir(self, manejador: Callable[[str, Dict[str, Any]], None]):
+        self._manejadores.append(manejador)
+
+    def al_cambiar_conexion(self, observador: Callable[[bool], None]):
+        self._observadores_conexion.append(observador)
+
+    def iniciar(self) -> None:
+        """Lanza el lector en segundo plano (idempotente)"""
+        with self._lock:
+            if self._hilo is not None:
+                return
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._ejecutar, name="oyente-eventos-pagos", daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        self._detener.set()
+        with self._lock:
+            hilo, self._hilo = self._hilo, None
+        if hilo is not None:
+            hilo.join(timeout=self.timeout_lectura_ms / 1000 + 1)
+
+    def _ejecutar(self) -> None:
+        import pulsar
+
+        while not self._detener.is_set():
+            cliente = None
+            try:
+                cliente = pulsar.Client(self.pulsar_url)
+                reader = cliente.create_reader(self.topic, pulsar.MessageId.latest)
+                self._cambiar_conexion(True)
+                logger.info(f"Oyente de eventos de pagos conectado a {self.topic}")
+
+                while not self._detener.is_set():
+                    try:
+                        mensaje = reader.read_next(timeout_millis=self.timeout_lectura_ms)
+                    except pulsar.Timeout:
+                        continue
+                    self._despachar(mensaje.data(), mensaje.properties())
+            except Exception as e:
+                if not self._detener.is_set():
+                    logger.warning(f"Oyente de eventos de pagos desconectado: {e}; "
+                                   f"reintento en {self.espera_reconexion_segundos}s")
+                    with self._lock:
+                        self._reconexiones += 1
+            finally:
+                self._cambiar_conexion(False)
+                if cliente:
+                    try:
+                        cliente.close()
+                    except Exception:
+                        pass
+            self._detener.wait(self.espera_reconexion_segundos)
+
+    def _despachar(self, datos: bytes, propiedades: Optional[Dict[str, str]] = None) -> None:
+        try:
+            mensaje = json.loads(datos.decode("utf-8"))
+        except (ValueError, UnicodeDecodeError):
+            return
+        tipo_evento = (propiedades or {}).get("event_type") or mensaje.get("event_type")
+        datos_evento = mensaje.get("data") or {}
+        with self._lock:
+            self._eventos_recibidos += 1
+
+        for manejador in self._manejadores:
+            try:
+                manejador(tipo_evento, datos_evento)
+            except Exception as e:
+                with self._lock:
+                    self._errores_manejadores += 1
+                logger.error(f"Error aplicando {tipo_evento} en el oyente de pagos: {e}")
+
+    def _cambiar_conexion(self, conectado: bool) -> None:
+        if self.conectado == conectado:
+            return
+        self.conectado = conectado
+        for observador in self._observadores_conexion:
+            observador(conectado)
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "conectado": self.conectado,
+                "eventos_recibidos": self._eventos_recibidos,
+                "errores_manejadores": self._errores_manejadores,
+                "reconexiones": self._reconexiones
+            }
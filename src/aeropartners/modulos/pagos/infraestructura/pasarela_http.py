@@ -0,0 +1,187 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import Optional, Dict, Any
+
+import httpx
+
+from ..dominio.servicios import PasarelaDePagos, PasarelaDePagosAsync, ResultadoPago
+from ....seedwork.infraestructura.circuit_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+# Respuestas que indican degradación de la pasarela y justifican reintentar
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+# Estados de un cobro consultado y si el cobro fue exitoso
+ESTADOS_COBRO = {"exitoso": True, "rechazado": False}
+
+
+class PasarelaNoDisponibleExcepcion(Exception):
+    """La pasarela no respondió con éxito dentro del plazo o tras agotar los reintentos"""
+
+
+class PasarelaHTTPAsync(PasarelaDePagosAsync):
+    """
+    Adaptador HTTP asíncrono para pasarelas de pago
+
+    - Cliente httpx con pool de conexiones reutilizadas entre llamadas
+    - Plazo total por operación (incluye reintentos) además del timeout por intento
+    - Reintentos con backoff exponencial y jitter completo; los cobros son seguros de
+      reintentar porque se envían con Idempotency-Key = referencia del pago
+    - Circuit breaker: con la pasarela degradada las llamadas fallan de inmediato
+      en lugar de ocupar workers esperando timeouts
+    """
+
+    soporta_consulta = True
+
+    def __init__(self, base_url: str = None, api_key: str = None, nombre: str = "http",
+                 plazo_segundos: float = None, timeout_intento_segundos: float = None,
+                 max_reintentos: int = 3, backoff_base_segundos: float = 0.2, backoff_max_segundos: float = 2.0,
+                 max_conexiones: int = 100, circuit_breaker: CircuitBreaker = None,
+                 transport: httpx.AsyncBaseTransport = None):
+        self.base_url = base_url or os.getenv("PAYMENT_GATEWAY_URL", "http://localhost:9100")
+        self.api_key = api_key or os.getenv("PAYMENT_GATEWAY_API_KEY", "sk_test_mock_key")
+        self.nombre = nombre
+        self.plazo_segundos = plazo_segundos or float(os.getenv("PAYMENT_GATEWAY_DEADLINE_SECONDS", "15"))
+        self.timeout_intento_segundos = timeout_intento_segundos or float(os.getenv("PAYMENT_GATEWAY_TIMEOUT_SECONDS", "10"))
+        self.max_reintentos = max_reintentos
+        self.backoff_base_segundos = backoff_base_segundos
+        self.backoff_max_segundos = backoff_max_segundos
+        self.max_conexiones = max_conexiones
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(
+            f"pasarela-{nombre}",
+            umbral_fallos=int(os.getenv("PAYMENT_GATEWAY_BREAKER_FAILURES", "5")),
+            tiempo_apertura_segundos=float(os.getenv("PAYMENT_GATEWAY_BREAKER_OPEN_SECONDS", "30"))
+        )
+        self._transport = transport
+        self._cliente: Optional[httpx.AsyncClient] = None
+
+    def _obtener_cliente(self) -> httpx.AsyncClient:
+        if self._cliente is None:
+            self._cliente = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=httpx.Timeout(self.timeout_intento_segundos, connect=min(2.0, self.timeout_intento_segundos)),
+                limits=httpx.Limits(max_connections=self.max_conexiones,
+                                    max_keepalive_connections=self.max_conexiones),
+                transport=self._transport
+            )
+        return self._cliente
+
+    async def procesar_pago(self, referencia: str, monto: float, moneda: str, id_afiliado: str) -> ResultadoPago:
+        respuesta = await self._solicitar(
+            "POST", "/v1/charges",
+            json={"referencia": referencia, "monto": monto, "moneda": moneda, "id_afiliado": id_afiliado},
+            headers={"Idempotency-Key": referencia}
+        )
+        return self._a_resultado(respuesta)
+
+    async def consultar_pago(self, referencia: str) -> Optional[ResultadoPago]:
+        respuesta = await self._solicitar("GET", f"/v1/charges/{referencia}")
+        if respuesta.status_code == 404:
+            return None
+        # Una consulta que no se pudo leer (401, 409, estado desconocido...) no dice nada del
+        # cobro: se trata como pasarela no disponible y el pago se reconcilia en otro ciclo
+        if respuesta.status_code not in (200, 402) or self._datos(respuesta).get("estado") not in ESTADOS_COBRO:
+            raise PasarelaNoDisponibleExcepcion(
+                f"Pasarela {self.nombre}: consulta del cobro {referencia} sin resultado "
+                f"(HTTP {respuesta.status_code})"
+            )
+        return self._a_resultado(respuesta)
+
+    async def cerrar(self):
+        if self._cliente is not None:
+            await self._cliente.aclose()
+            self._cliente = None
+
+    def _datos(self, respuesta: httpx.Response) -> Dict[str, Any]:
+        try:
+            datos = respuesta.json() if respuesta.content else {}
+        except ValueError:
+            return {}
+        return datos if isinstance(datos, dict) else {}
+
+    def _a_resultado(self, respuesta: httpx.Response) -> ResultadoPago:
+        datos = self._datos(respuesta)
+        if respuesta.is_success and datos.get("estado") == "exitoso":
+            return ResultadoPago(exitoso=True, referencia_transaccion=datos.get("id"))
+        # 402 (rechazo del emisor) u otros errores de negocio: el pago falla sin reintentos
+        return ResultadoPago(
+            exitoso=False,
+            mensaje_error=datos.get("error") or f"Pasarela respondió {respuesta.status_code}",
+            referencia_transaccion=datos.get("id")
+        )
+
+    async def _solicitar(self, metodo: str, ruta: str, **kwargs) -> httpx.Response:
+        limite = time.monotonic() + self.plazo_segundos
+        ultimo_error = None
+
+        for intento in range(self.max_reintentos + 1):
+            self.circuit_breaker.permitir()
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+
+            try:
+                respuesta = await self._obtener_cliente().request(
+                    metodo, ruta, timeout=min(restante, self.timeout_intento_segundos), **kwargs
+                )
+            except httpx.TransportError as e:
+                self.circuit_breaker.registrar_fallo()
+                ultimo_error = f"{type(e).__name__}: {e}"
+            else:
+                if respuesta.status_code not in ESTADOS_REINTENTABLES:
+                    self.circuit_breaker.registrar_exito()
+                    return respuesta
+                self.circuit_breaker.registrar_fallo()
+                ultimo_error = f"HTTP {respuesta.status_code}"
+
+            if intento == self.max_reintentos:
+                break
+            espera = random.uniform(0, min(self.backoff_max_segundos, self.backoff_base_segundos * 2 ** intento))
+            if time.monotonic() + espera >= limite:
+                break
+            logger.warning(f"Pasarela {self.nombre}: {ultimo_error}; reintento {intento + 1} en {espera:.2f}s")
+            await asyncio.sleep(espera)
+
+        raise PasarelaNoDisponibleExcepcion(
+            f"Pasarela {self.nombre} no disponible: {ultimo_error or 'plazo agotado'}"
+        )
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        return {"pasarela": self.nombre, "circuit_breaker": self.circuit_breaker.obtener_metricas()}
+
+
+class PasarelaSincronaDesdeAsync(PasarelaDePagos):
+    """
+    Expone una pasarela asíncrona a código síncrono (p.ej. los workers del consumidor)
+    Todas las llamadas comparten un único event loop en segundo plano y, con él,
+    el pool de conexiones del adaptador
+    """
+
+    def __init__(self, pasarela: PasarelaDePagosAsync):
+        self.pasarela = pasarela
+        self.nombre = getattr(pasarela, "nombre", type(pasarela).__name__.lower())
+        self.soporta_consulta = pasarela.soporta_consulta
+        self._loop = asyncio.new_event_loop()
+        self._hilo = threading.Thread(target=self._loop.run_forever, name=f"pasarela-{self.nombre}", daemon=True)
+        self._hilo.start()
+
+    def procesar_pago(self, referencia: str, monto: float, moneda: str, id_afiliado: str) -> ResultadoPago:
+        futuro = asyncio.run_coroutine_threadsafe(
+            self.pasarela.procesar_pago(referencia, monto, moneda, id_afiliado), self._loop
+        )
+        return futuro.result()
+
+    def consultar_pago(self, referencia: str) -> Optional[ResultadoPago]:
+        return asyncio.run_coroutine_threadsafe(self.pasarela.consultar_pago(referencia), self._loop).result()
+
+    def cerrar(self):
+        asyncio.run_coroutine_threadsafe(self.pasarela.cerrar(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._hilo.join()
+
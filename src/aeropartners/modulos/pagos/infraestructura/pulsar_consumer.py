@@ -3,23 +3,36 @@ import json
 import logging
 import signal
 import uuid
-from datetime import datetime
-from typing import Dict, Any, Callable
+from typing import Dict, Any, Callable, Optional
 import pulsar
 from pulsar import Client, Message
 
-from .adaptadores import RepositorioPagosSQLAlchemy, StripeAdapter
-from ..dominio.entidades import Pago
+from .adaptadores import (
+    RepositorioPagosSQLAlchemy, StripeAdapter, PasarelaConcurrenciaLimitada, limites_concurrencia_pasarelas
+)
+from .concurrencia import EjecutorOrdenadoPorClave
+from .inbox import INBOX_PAGOS, id_evento_valido
+from .pasarela_http import PasarelaHTTPAsync, PasarelaSincronaDesdeAsync, PasarelaNoDisponibleExcepcion
+from .reconciliacion import ReconciliadorPagos
+from ....seedwork.infraestructura.circuit_breaker import CircuitoAbiertoExcepcion
+from ....seedwork.infraestructura.uow import UnidadDeTrabajoSQLAlchemy
 from ..dominio.enums import EstadoPago
-from ..dominio.eventos import PagoExitoso, PagoFallido
 
 logger = logging.getLogger(__name__)
 
+# Eventos cuyo efecto se registra en el inbox junto con la actualización del pago
+EVENTOS_CON_INBOX = {"PagoPendiente"}
+
+# Clave del ejecutor bajo la que corre la retención del inbox (nunca coincide con un afiliado)
+CLAVE_RETENCION_INBOX = "__retencion_inbox__"
+CLAVE_RECONCILIACION = "__reconciliacion_pagos__"
+
 class PulsarEventConsumer:
     """Consumidor de eventos de Apache Pulsar"""
     
     def __init__(self, pulsar_url: str = None, topic: str = "pagos-events", 
-                 subscription_name: str = "aeropartners-consumer"):
+                 subscription_name: str = "aeropartners-consumer",
+                 max_workers: int = None, max_en_vuelo: int = None):
         self.pulsar_url = pulsar_url or os.getenv("PULSAR_URL", "pulsar://localhost:6650")
         self.topic = topic
         self.subscription_name = subscription_name
@@ -27,24 +40,56 @@ class PulsarEventConsumer:
         self.consumer = None
         self.running = False
         
+        # Procesamiento concurrente: los pagos de un mismo afiliado se procesan en orden
+        self.max_workers = max_workers or int(os.getenv("PAGOS_CONSUMER_WORKERS", "16"))
+        self.max_en_vuelo = max_en_vuelo or int(os.getenv("PAGOS_CONSUMER_MAX_IN_FLIGHT", str(self.max_workers * 2)))
+        self.ejecutor = None
+        self._reconciliador = None
+        
         # Manejadores de eventos
         self.event_handlers: Dict[str, Callable] = {
             "PagoPendiente": self._handle_pago_pendiente,
             "PagoExitoso": self._handle_pago_exitoso,
-            "PagoFallido": self._handle_pago_fallido
+            "PagoFallido": self._handle_pago_fallido,
+            "PagoRevertido": self._handle_pago_revertido
         }
         
         # Infraestructura para procesar pagos
-        self._repositorio = RepositorioPagosSQLAlchemy()
-        self._pasarela = StripeAdapter()
+        self._fabrica_repositorio = RepositorioPagosSQLAlchemy
+        self._inbox = INBOX_PAGOS
+        self._pasarela = self._limitar_concurrencia(self._crear_pasarela())
         
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
     
+    def _crear_pasarela(self):
+        """PAYMENT_GATEWAY=http usa la pasarela HTTP (pool, plazos, reintentos y circuit breaker)"""
+        if os.getenv("PAYMENT_GATEWAY", "stripe").lower() == "http":
+            return PasarelaSincronaDesdeAsync(PasarelaHTTPAsync())
+        return StripeAdapter()
+    
+    def _limitar_concurrencia(self, pasarela):
+        """Aplica el límite de llamadas simultáneas configurado para la pasarela, si existe"""
+        limite = limites_concurrencia_pasarelas().get(pasarela.nombre)
+        return PasarelaConcurrenciaLimitada(pasarela, limite) if limite else pasarela
+    
+    def _crear_reconciliador(self) -> Optional[ReconciliadorPagos]:
+        """
+        La reconciliación requiere una pasarela que permita consultar los cobros: sin consulta
+        un pago ya cobrado sería indistinguible de uno sin cobrar y se volvería a cobrar
+        """
+        if os.getenv("PAGOS_RECONCILIATION_ENABLED", "true").lower() != "true":
+            return None
+        if not self._pasarela.soporta_consulta:
+            logger.warning(f"Reconciliación de pagos desactivada: la pasarela {self._pasarela.nombre} "
+                           f"no permite consultar cobros")
+            return None
+        return ReconciliadorPagos(self._pasarela, self._fabrica_repositorio)
+    
     def _signal_handler(self, signum, frame):
-        """Maneja señales de terminación"""
+        """Maneja señales de terminación: el bucle de recepción termina y se drenan los mensajes en curso"""
         logger.info(f"Recibida señal {signum}, iniciando shutdown...")
-        self.stop_consuming()
+        self.running = False
     
     def _connect(self):
         """Establece conexión con Pulsar"""
@@ -57,8 +102,15 @@ class PulsarEventConsumer:
             self.consumer = self.client.subscribe(
                 self.topic,
                 subscription_name=self.subscription_name,
-                consumer_type=pulsar.ConsumerType.Shared,
-                initial_position=pulsar.InitialPosition.Latest
+                consumer_type=getattr(pulsar.ConsumerType, os.getenv("PAGOS_SUBSCRIPTION_TYPE", "Shared")),
+                initial_position=pulsar.InitialPosition.Latest,
+                receiver_queue_size=self.max_en_vuelo,
+                negative_ack_redelivery_delay_ms=int(os.getenv("PAGOS_NACK_REDELIVERY_DELAY_MS", "5000")),
+                # Las reentregas por ack timeout son inocuas gracias al inbox (mínimo de Pulsar: 10000 ms)
+                unacked_messages_timeout_ms=int(os.getenv("PAGOS_ACK_TIMEOUT_MS", "0")) or None,
+                dead_letter_policy=pulsar.ConsumerDeadLetterPolicy(
+                    max_redeliver_count=int(os.getenv("PAGOS_MAX_REDELIVERIES", "5"))
+                )
             )
             logger.info(f"Conectado a Pulsar en {self.pulsar_url}, topic: {self.topic}")
         except Exception as e:
@@ -70,16 +122,23 @@ class PulsarEventConsumer:
         """Inicia el consumo de eventos"""
         try:
             self._connect()
+            self.ejecutor = EjecutorOrdenadoPorClave(
+                self.max_workers, self.max_en_vuelo, prefijo_hilos="pagos-consumer"
+            )
+            self._reconciliador = self._crear_reconciliador()
             self.running = True
-            logger.info("Iniciando consumo de eventos de Pulsar")
+            logger.info(f"Iniciando consumo de eventos de Pulsar ({self.max_workers} workers, "
+                        f"{self.max_en_vuelo} mensajes en vuelo)")
             
             while self.running:
                 try:
-                    msg = self.consumer.receive(timeout_millis=10000) 
+                    self._programar_retencion_inbox()
+                    self._programar_reconciliacion()
+                    msg = self.consumer.receive(timeout_millis=1000)
                     
                     if msg:
-                        self._process_message(msg)
-                        self.consumer.acknowledge(msg)
+                        # Bloquea si se alcanzó el máximo de mensajes en vuelo
+                        self.ejecutor.enviar(self._clave_orden(msg), self._procesar_y_confirmar, msg)
                         
                 except Exception as e:
                     if self.running:
@@ -95,10 +154,15 @@ class PulsarEventConsumer:
             self.stop_consuming()
     
     def stop_consuming(self):
-        """Detiene el consumo de eventos"""
+        """Detiene el consumo de eventos, esperando a que terminen los mensajes en curso"""
         self.running = False
         
         try:
+            if self.ejecutor:
+                self.ejecutor.cerrar(esperar=True)
+                self.ejecutor = None
+            if hasattr(self._pasarela, "cerrar"):
+                self._pasarela.cerrar()
             if self.consumer:
                 self.consumer.close()
             if self.client:
@@ -107,6 +171,35 @@ class PulsarEventConsumer:
         except Exception as e:
             logger.error(f"Error cerrando consumidor: {e}")
     
+    def _programar_retencion_inbox(self):
+        """La retención del inbox corre en un worker para no frenar la recepción"""
+        if self._inbox.debe_purgar():
+            self.ejecutor.enviar(CLAVE_RETENCION_INBOX, self._inbox.purgar, timeout=0)
+    
+    def _programar_reconciliacion(self):
+        """Los pagos atascados en PROCESANDO se reconcilian periódicamente en un worker"""
+        if self._reconciliador and self._reconciliador.debe_ejecutar():
+            self.ejecutor.enviar(CLAVE_RECONCILIACION, self._reconciliador.ejecutar, timeout=0)
+    
+    def _clave_orden(self, message: Message) -> str:
+        """Clave que define el orden de procesamiento: el afiliado del pago"""
+        try:
+            datos = json.loads(message.data().decode('utf-8')).get("data", {})
+            if datos.get("id_afiliado"):
+                return str(datos["id_afiliado"])
+        except Exception:
+            pass
+        return message.partition_key() or str(message.message_id())
+    
+    def _procesar_y_confirmar(self, message: Message):
+        """Procesa el mensaje en un worker y lo confirma (ack) o rechaza (nack) individualmente"""
+        try:
+            self._process_message(message)
+            self.consumer.acknowledge(message)
+        except Exception as e:
+            logger.error(f"Mensaje {message.message_id()} rechazado, se reintentará: {e}")
+            self.consumer.negative_acknowledge(message)
+    
     def _process_message(self, message: Message):
         """Procesa un mensaje recibido de Pulsar"""
         try:
@@ -118,7 +211,9 @@ class PulsarEventConsumer:
             
             logger.info(f"Evento recibido: {event_type} - {event_id}")
             
-            if event_type in self.event_handlers:
+            if event_type in EVENTOS_CON_INBOX:
+                self.event_handlers[event_type](event_data, id_evento=id_evento_valido(event_id))
+            elif event_type in self.event_handlers:
                 self.event_handlers[event_type](event_data)
             else:
                 logger.warning(f"Tipo de evento no manejado: {event_type}")
@@ -127,62 +222,74 @@ class PulsarEventConsumer:
             logger.error(f"Error procesando mensaje: {e}")
             raise
     
-    def _handle_pago_pendiente(self, event_data: Dict[str, Any]):
-        """Procesa un evento de PagoPendiente: ejecuta la pasarela y actualiza el agregado"""
+    def _handle_pago_pendiente(self, event_data: Dict[str, Any], id_evento: uuid.UUID = None):
+        """
+        Procesa un evento de PagoPendiente: ejecuta la pasarela y actualiza el agregado
+        El evento queda registrado en el inbox en la misma transacción que la actualización
+        """
         try:
-            id_pago = event_data.get("id_pago")
-            referencia = event_data.get("referencia_pago")
-            monto = float(event_data.get("monto"))
-            moneda = event_data.get("moneda")
-            id_afiliado = event_data.get("id_afiliado")
+            with UnidadDeTrabajoSQLAlchemy() as uow:
+                self._procesar_pago_pendiente(uow, event_data, id_evento)
 
-            logger.info(f"Procesando pago pendiente {id_pago} con referencia {referencia}")
+        except (CircuitoAbiertoExcepcion, PasarelaNoDisponibleExcepcion) as e:
+            # Pasarela degradada: el pago no se cobró, el mensaje se rechaza para reintentarlo más tarde
+            logger.warning(f"Pasarela no disponible para el pago {event_data.get('id_pago')}: {e}")
+            raise
+        except Exception as e:
+            # P.ej. un error de base de datos: el mensaje se rechaza (nack) y se reentrega hasta el
+            # límite de la DLQ; un pago que quedó en PROCESANDO lo resuelve la reconciliación
+            logger.error(f"Error procesando PagoPendiente: {e}")
+            raise
 
-            pago = self._repositorio.obtener_por_id(uuid.UUID(id_pago))
-            if not pago:
-                logger.error(f"Pago {id_pago} no encontrado para procesamiento")
-                return
+    def _procesar_pago_pendiente(self, uow: UnidadDeTrabajoSQLAlchemy, event_data: Dict[str, Any],
+                                 id_evento: uuid.UUID = None):
+        """
+        Cada transición es un único UPDATE condicional: el reclamo PENDIENTE -> PROCESANDO
+        (que también lee el pago) y el resultado PROCESANDO -> EXITOSO/FALLIDO
+        """
+        repositorio = self._fabrica_repositorio(uow)
+        id_pago = event_data.get("id_pago")
+        referencia = event_data.get("referencia_pago")
 
-            pago.estado = EstadoPago.PROCESANDO
-            pago.fecha_procesamiento = datetime.now()
+        logger.info(f"Procesando pago pendiente {id_pago} con referencia {referencia}")
 
+        pago = repositorio.reclamar_para_procesar(uuid.UUID(id_pago))
+        if pago is None:
+            # Inexistente, o reclamado/resuelto por otro consumidor o una reentrega anterior
+            uow.rollback()
+            logger.info(f"Pago {id_pago} no está pendiente, no se cobra")
+            return
+        # El reclamo se confirma antes del cobro; la conexión vuelve al pool mientras se espera a la pasarela
+        uow.commit()
+
+        try:
             resultado = self._pasarela.procesar_pago(
-                referencia=referencia,
-                monto=monto,
-                moneda=moneda,
-                id_afiliado=id_afiliado
+                referencia=pago.referencia_pago,
+                monto=pago.monto.monto,
+                moneda=pago.monto.moneda.value,
+                id_afiliado=pago.id_afiliado
             )
+        except (CircuitoAbiertoExcepcion, PasarelaNoDisponibleExcepcion):
+            # No hubo cobro: se libera el reclamo para que la reentrega pueda procesarlo
+            pago.estado = EstadoPago.PENDIENTE
+            pago.fecha_procesamiento = None
+            if repositorio.transicionar(pago, desde=EstadoPago.PROCESANDO):
+                uow.commit()
+            raise
 
+        pago.registrar_resultado(resultado)
+        if resultado.exitoso:
+            logger.info(f"Pago {id_pago} procesado exitosamente")
+        else:
+            logger.warning(f"Pago {id_pago} falló: {resultado.mensaje_error}")
 
-            if resultado.exitoso:
-                pago.estado = EstadoPago.EXITOSO
-                pago.agregar_evento(PagoExitoso(
-                    id_pago=str(pago.id),
-                    id_afiliado=pago.id_afiliado,
-                    monto=monto,
-                    moneda=moneda,
-                    referencia_pago=referencia
-                ))
-                logger.info(f"Pago {id_pago} procesado exitosamente")
-            else:
-                pago.estado = EstadoPago.FALLIDO
-                pago.mensaje_error = resultado.mensaje_error
-                pago.agregar_evento(PagoFallido(
-                    id_pago=str(pago.id),
-                    id_afiliado=pago.id_afiliado,
-                    monto=monto,
-                    moneda=moneda,
-                    referencia_pago=referencia,
-                    mensaje_error=resultado.mensaje_error
-                ))
-                logger.warning(f"Pago {id_pago} falló: {resultado.mensaje_error}")
-
-            # Persistir cambios y eventos en outbox
-            self._repositorio.actualizar(pago)
-            logger.info(f"Pago {id_pago} actualizado a estado {pago.estado.value}")
-
-        except Exception as e:
-            logger.error(f"Error procesando PagoPendiente: {e}")
+        # Estado, eventos del outbox e inbox en una sola transacción
+        if not repositorio.transicionar(pago, desde=EstadoPago.PROCESANDO,
+                                        id_evento=id_evento, tipo_evento="PagoPendiente"):
+            logger.warning(f"Pago {id_pago} modificado durante el cobro, se descarta el resultado")
+            return
+        uow.commit()
+        logger.info(f"Pago {id_pago} actualizado a estado {pago.estado.value}")
 
     def _handle_pago_exitoso(self, event_data: Dict[str, Any]):
         """Maneja eventos de pago exitoso"""
@@ -199,7 +306,13 @@ class PulsarEventConsumer:
         logger.warning(f"   Afiliado: {event_data.get('id_afiliado')}")
         logger.warning(f"   Monto: {event_data.get('monto')} {event_data.get('moneda')}")
         logger.warning(f"   Error: {event_data.get('mensaje_error')}")
-            
+
+    def _handle_pago_revertido(self, event_data: Dict[str, Any]):
+        """Maneja eventos de pago revertido"""
+        logger.info("↩️ Pago revertido procesado:")
+        logger.info(f"   ID Pago: {event_data.get('id_pago')}")
+        logger.info(f"   Motivo: {event_data.get('motivo')}")
+
     def add_event_handler(self, event_type: str, handler: Callable):
         """Agrega un manejador personalizado para un tipo de evento"""
         self.event_handlers[event_type] = handler
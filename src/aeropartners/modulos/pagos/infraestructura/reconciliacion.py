@@ -0,0 +1,125 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from ..dominio.entidades import Pago
+from ..dominio.enums import EstadoPago
+from ..dominio.servicios import PasarelaDePagos, ResultadoPago
+from ....seedwork.infraestructura.circuit_breaker import CircuitoAbiertoExcepcion
+from ....seedwork.infraestructura.uow import UnidadDeTrabajoSQLAlchemy
+from .adaptadores import RepositorioPagosSQLAlchemy
+from .pasarela_http import PasarelaNoDisponibleExcepcion
+
+logger = logging.getLogger(__name__)
+
+EXITOSO = "exitoso"
+FALLIDO = "fallido"
+REENCOLADO = "reencolado"
+SIN_RESPUESTA = "sin_respuesta"
+CONFLICTO = "conflicto"
+ERROR = "error"
+
+
+class ReconciliadorPagos:
+    """
+    Resuelve los pagos que quedaron en PROCESANDO, p.ej. porque el consumidor se detuvo
+    entre el cobro y la transición final (la reentrega del mensaje ya no puede reclamarlos)
+
+    - Los pagos se toman en lotes pequeños, cada uno en una transacción corta
+      (FOR UPDATE SKIP LOCKED), de modo que varias réplicas reparten el backlog
+    - La pasarela se consulta fuera de toda transacción, con `concurrencia` consultas a la vez
+    - Cada pago se resuelve con una transición condicional PROCESANDO -> X en su propia
+      transacción, con el evento que corresponde:
+        * cobro registrado: EXITOSO/FALLIDO con PagoExitoso/PagoFallido
+        * sin registro del cobro: PENDIENTE con un nuevo PagoPendiente; el consumidor lo
+          vuelve a cobrar con la misma Idempotency-Key (la referencia del pago)
+        * pasarela no disponible: queda para el siguiente ciclo
+    - `antiguedad_minutos` debe superar el plazo máximo de un cobro para no competir con
+      un consumidor que todavía espera a la pasarela
+    """
+
+    def __init__(self, pasarela: PasarelaDePagos, fabrica_repositorio: Callable = RepositorioPagosSQLAlchemy,
+                 antiguedad_minutos: float = None, tamano_lote: int = None, concurrencia: int = None,
+                 intervalo_segundos: float = None, max_lotes_por_ciclo: int = None):
+        if not pasarela.soporta_consulta:
+            raise ValueError("La reconciliación requiere una pasarela que permita consultar cobros")
+        self.pasarela = pasarela
+        self._fabrica_repositorio = fabrica_repositorio
+        self.antiguedad_minutos = antiguedad_minutos or float(os.getenv("PAGOS_RECONCILIATION_AGE_MINUTES", "10"))
+        self.tamano_lote = tamano_lote or int(os.getenv("PAGOS_RECONCILIATION_BATCH_SIZE", "50"))
+        self.concurrencia = concurrencia or int(os.getenv("PAGOS_RECONCILIATION_CONCURRENCY", "8"))
+        self.intervalo_segundos = intervalo_segundos or float(os.getenv("PAGOS_RECONCILIATION_INTERVAL_SECONDS", "60"))
+        self.max_lotes_por_ciclo = max_lotes_por_ciclo or int(os.getenv("PAGOS_RECONCILIATION_MAX_BATCHES", "20"))
+        self._ultima_ejecucion = None
+        self._lock = threading.Lock()
+        self._totales: Dict[str, int] = {EXITOSO: 0, FALLIDO: 0, REENCOLADO: 0, SIN_RESPUESTA: 0,
+                                         CONFLICTO: 0, ERROR: 0}
+
+    def debe_ejecutar(self) -> bool:
+        """True una vez por intervalo de reconciliación"""
+        if self._ultima_ejecucion is not None and time.monotonic() - self._ultima_ejecucion < self.intervalo_segundos:
+            return False
+        self._ultima_ejecucion = time.monotonic()
+        return True
+
+    def ejecutar(self) -> Dict[str, int]:
+        """Recorre el backlog de pagos atascados por lotes; retorna cuántos terminaron en cada resultado"""
+        resumen = {resultado: 0 for resultado in self._totales}
+        with ThreadPoolExecutor(self.concurrencia, thread_name_prefix="reconciliacion-pagos") as pool:
+            for _ in range(self.max_lotes_por_ciclo):
+                pagos = self._reclamar_lote()
+                for resultado in pool.map(self._reconciliar, pagos):
+                    resumen[resultado] += 1
+                if len(pagos) < self.tamano_lote:
+                    break
+
+        with self._lock:
+            for resultado, cantidad in resumen.items():
+                self._totales[resultado] += cantidad
+        if any(resumen.values()):
+            logger.info(f"Reconciliación de pagos atascados: {resumen}")
+        return resumen
+
+    def _reclamar_lote(self):
+        antes_de = datetime.now() - timedelta(minutes=self.antiguedad_minutos)
+        with UnidadDeTrabajoSQLAlchemy() as uow:
+            pagos = self._fabrica_repositorio(uow).reclamar_atascados(antes_de, self.tamano_lote)
+            uow.commit()
+        return pagos
+
+    def _reconciliar(self, pago: Pago) -> str:
+        try:
+            resultado = self.pasarela.consultar_pago(pago.referencia_pago)
+            return self._aplicar(pago, resultado)
+        except (CircuitoAbiertoExcepcion, PasarelaNoDisponibleExcepcion) as e:
+            logger.warning(f"Pasarela no disponible para reconciliar el pago {pago.id}: {e}")
+            return SIN_RESPUESTA
+        except Exception as e:
+            # Un pago con error no frena el resto del lote; se reintenta al volver a envejecer
+            logger.error(f"Error reconciliando el pago {pago.id}: {e}")
+            return ERROR
+
+    def _aplicar(self, pago: Pago, resultado: Optional[ResultadoPago]) -> str:
+        if resultado is None:
+            pago.reencolar()
+            desenlace = REENCOLADO
+        else:
+            pago.registrar_resultado(resultado)
+            desenlace = EXITOSO if resultado.exitoso else FALLIDO
+
+        with UnidadDeTrabajoSQLAlchemy() as uow:
+            if not self._fabrica_repositorio(uow).transicionar(pago, desde=EstadoPago.PROCESANDO):
+                # El consumidor original terminó, u otra réplica lo resolvió
+                return CONFLICTO
+            uow.commit()
+
+        logger.info(f"Pago atascado {pago.id} reconciliado: {desenlace}")
+        return desenlace
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"antiguedad_minutos": self.antiguedad_minutos, **self._totales}
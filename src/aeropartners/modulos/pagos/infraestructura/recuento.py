@@ -0,0 +1,39 @@
+import logging
+import argparse
+
+from .agregados import AGREGADOS_PAGOS
+from .outbox import CONTADORES_OUTBOX_PAGOS
+
+logger = logging.getLogger(__name__)
+
+# Modelos de lectura de pagos que se pueden reconstruir desde sus tablas de origen
+MODELOS = {
+    "agregados": AGREGADOS_PAGOS.recalcular,
+    "outbox": CONTADORES_OUTBOX_PAGOS.recalcular,
+}
+
+
+def main(argumentos=None):
+    """
+    Recuenta los totales diarios y/o los contadores del outbox de pagos (tarea de operación)
+    Cada recuento bloquea su tabla y frena las escrituras de pagos hasta terminar: ejecutar
+    en una ventana de baja carga
+    """
+    parser = argparse.ArgumentParser(description="Recuento de los modelos de lectura de pagos")
+    parser.add_argument("modelos", nargs="*", help=f"{', '.join(sorted(MODELOS))}; por defecto, todos")
+    opciones = parser.parse_args(argumentos)
+    desconocidos = set(opciones.modelos) - set(MODELOS)
+    if desconocidos:
+        parser.error(f"Modelos desconocidos: {', '.join(sorted(desconocidos))}")
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    for nombre in opciones.modelos or sorted(MODELOS):
+        MODELOS[nombre]()
+        logger.info(f"Recuento de {nombre} de pagos completado")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import os
+import time
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from ....seedwork.infraestructura.db import SessionLocal
+from .outbox import CONTADORES_OUTBOX_PAGOS
+
+logger = logging.getLogger(__name__)
+
+# Cada lote es una transacción corta: bloquea solo las filas del lote y nunca a las pendientes.
+# Ambas sentencias retornan la cantidad eliminada por tipo para descontarla de los contadores
+SQL_ELIMINAR_LOTE = text("""
+    WITH lote AS (
+        SELECT id FROM outbox
+        WHERE procesado = true AND fecha_procesamiento < :limite
+        ORDER BY fecha_procesamiento
+        LIMIT :tamano_lote
+        FOR UPDATE SKIP LOCKED
+    ), eliminados AS (
+        DELETE FROM outbox o USING lote WHERE o.id = lote.id
+        RETURNING o.tipo_evento
+    )
+    SELECT tipo_evento, count(*) FROM eliminados GROUP BY tipo_evento
+""")
+
+SQL_ARCHIVAR_LOTE = text("""
+    WITH lote AS (
+        SELECT id FROM outbox
+        WHERE procesado = true AND fecha_procesamiento < :limite
+        ORDER BY fecha_procesamiento
+        LIMIT :tamano_lote
+        FOR UPDATE SKIP LOCKED
+    ), eliminados AS (
+        DELETE FROM outbox o USING lote WHERE o.id = lote.id
+        RETURNING o.id, o.tipo_evento, o.datos_evento, o.procesado, o.fecha_creacion, o.fecha_procesamiento
+    ), archivados AS (
+        INSERT INTO outbox_archivo (id, tipo_evento, datos_evento, procesado, fecha_creacion, fecha_procesamiento, fecha_archivado)
+        SELECT id, tipo_evento, datos_evento, procesado, fecha_creacion, fecha_procesamiento, now() FROM eliminados
+        ON CONFLICT (id) DO NOTHING
+    )
+    SELECT tipo_evento, count(*) FROM eliminados GROUP BY tipo_evento
+""")
+
+SQL_ES_PARTICIONADA = text("""
+    SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('outbox'))
+""")
+
+# Definida en scripts/sql/outbox_particionado.sql
+SQL_MANTENER_PARTICIONES = text("SELECT outbox_mantener_particiones(:dias_retencion)")
+
+
+class RetencionOutbox:
+    """
+    Retención del outbox de pagos: elimina (o archiva en outbox_archivo) los eventos
+    publicados hace más de `dias_retencion` días, en lotes pequeños para no mantener
+    bloqueos largos. Si la tabla está particionada por fecha, descarta particiones completas.
+    """
+
+    def __init__(self, dias_retencion: int = None, tamano_lote: int = None, archivar: bool = None,
+                 intervalo_segundos: float = None, pausa_entre_lotes_segundos: float = 0.05):
+        self.dias_retencion = dias_retencion or int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
+        self.tamano_lote = tamano_lote or int(os.getenv("OUTBOX_RETENTION_BATCH_SIZE", "1000"))
+        self.archivar = archivar if archivar is not None else os.getenv("OUTBOX_ARCHIVE", "false").lower() == "true"
+        self.intervalo_segundos = intervalo_segundos or float(os.getenv("OUTBOX_RETENTION_INTERVAL_SECONDS", "3600"))
+        self.pausa_entre_lotes_segundos = pausa_entre_lotes_segundos
+        self._ultima_ejecucion = None
+
+    def ejecutar_si_corresponde(self) -> int:
+        """Ejecuta la retención si venció el intervalo desde la última ejecución"""
+        if self._ultima_ejecucion is not None and time.monotonic() - self._ultima_ejecucion < self.intervalo_segundos:
+            return 0
+        self._ultima_ejecucion = time.monotonic()
+        try:
+            return self.ejecutar()
+        except Exception as e:
+            logger.error(f"Error en la retención del outbox: {e}")
+            return 0
+
+    def ejecutar(self) -> int:
+        """Retorna el número de eventos eliminados o archivados (o particiones descartadas)"""
+        if self._es_particionada():
+            return self._mantener_particiones()
+
+        limite = datetime.now() - timedelta(days=self.dias_retencion)
+        sentencia = SQL_ARCHIVAR_LOTE if self.archivar else SQL_ELIMINAR_LOTE
+        total = 0
+
+        while True:
+            afectados = self._ejecutar_lote(sentencia, limite)
+            total += afectados
+            if afectados < self.tamano_lote:
+                break
+            time.sleep(self.pausa_entre_lotes_segundos)
+
+        if total:
+            accion = "archivados" if self.archivar else "eliminados"
+            logger.info(f"Retención del outbox: {total} eventos {accion} (anteriores a {limite.isoformat()})")
+        return total
+
+    def _ejecutar_lote(self, sentencia, limite: datetime) -> int:
+        db = SessionLocal()
+        try:
+            eliminados_por_tipo = dict(
+                db.execute(sentencia, {"limite": limite, "tamano_lote": self.tamano_lote}).all()
+            )
+            CONTADORES_OUTBOX_PAGOS.registrar_eliminados_procesados(db, eliminados_por_tipo)
+            db.commit()
+            return sum(eliminados_por_tipo.values())
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _es_particionada(self) -> bool:
+        db = SessionLocal()
+        try:
+            return bool(db.execute(SQL_ES_PARTICIONADA).scalar())
+        finally:
+            db.close()
+
+    def _mantener_particiones(self) -> int:
+        db = SessionLocal()
+        try:
+            descartadas = db.execute(SQL_MANTENER_PARTICIONES, {"dias_retencion": self.dias_retencion}).scalar()
+            db.commit()
+            if descartadas:
+                logger.info(f"Retención del outbox: {descartadas} particiones descartadas")
+            # DROP TABLE y la limpieza de outbox_default no pasan por los contadores
+            CONTADORES_OUTBOX_PAGOS.recalcular()
+            return descartadas or 0
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+def main():
+    """Ejecuta una pasada de retención (para cron o jobs programados)"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    RetencionOutbox().ejecutar()
+
+
+if __name__ == "__main__":
+    main()
@@ -51,7 +51,7 @@ class GeneradorReporteService:
             datos=datos,
             metadatos={
                 'filtros_aplicados': filtros.to_dict(),
-                'total_registros': len(datos.get('pagos', [])),
+                'total_registros': datos.get('total_pagos', len(datos.get('pagos', []))),
                 'fecha_generacion': datetime.utcnow().isoformat()
             },
             version_servicio_datos="unknown"  # Se actualizará desde la configuración
@@ -99,7 +99,7 @@ class GeneradorReporteService:
         # Combinar datos para reporte completo
         # El servicio de datos v1 devuelve estructura diferente:
         # - Campañas: {"campanas": [...], "total_campanas": 2}
-        # - Pagos: {"total_eventos": 15, "eventos_procesados": 12, ...}
+        # - Pagos: {"total_pagos": 15, "monto_total": 1500.0, "pagos_exitosos": 12, "resumen_diario": [...]}
         datos_completos = {
             'campanas': datos_campanas.get('campanas', []),
             'pagos': [],  # El servicio v1 no devuelve array de pagos
@@ -111,10 +111,10 @@ class GeneradorReporteService:
             },
             'resumen': {
                 'total_campanas': len(datos_campanas.get('campanas', [])),
-                'total_pagos': 0,  # No hay array de pagos en v1
-                'monto_total_pagos': 0,  # No hay datos de monto en v1
+                'total_pagos': datos_pagos.get('total_pagos', 0),
+                'monto_total_pagos': datos_pagos.get('monto_total', 0),
                 'campanas_activas': len([c for c in datos_campanas.get('campanas', []) if c.get('estado') == 'activa']),
-                'pagos_exitosos': datos_pagos.get('eventos_procesados', 0)
+                'pagos_exitosos': datos_pagos.get('pagos_exitosos', 0)
             }
         }
         
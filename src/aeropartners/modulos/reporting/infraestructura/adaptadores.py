@@ -54,6 +54,58 @@ class ServicioDatosAdapter(ServicioDatosPort):
             logger.error(f"Error en petición a {url}: {str(e)}")
             raise
     
+    async def _resumen_pagos(self, filtros: FiltrosReporte, agrupar_por: str = "dia") -> Dict[str, Any]:
+        """
+        Totales de pagos desde el modelo de lectura diario del servicio de pagos:
+        unas pocas filas por día en lugar de descargar cada pago
+        """
+        params = {'agrupar_por': agrupar_por}
+        if filtros.afiliado_id:
+            params['id_afiliado'] = filtros.afiliado_id
+        if filtros.moneda:
+            params['moneda'] = filtros.moneda
+        if filtros.periodo:
+            # El resumen es diario: ambos extremos del periodo se incluyen completos
+            params['fecha_desde'] = filtros.periodo.fecha_inicio.isoformat()[:10]
+            params['fecha_hasta'] = filtros.periodo.fecha_fin.isoformat()[:10]
+        return await self._make_request("/pagos/resumen", params)
+
+    @staticmethod
+    def _totales_pagos(resumen: Dict[str, Any], estado_pago: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Suma los totales de todas las monedas; con `estado_pago` cuenta solo los pagos en ese
+        estado (PENDIENTE y PROCESANDO se reportan juntos como pendientes)
+        """
+        columnas = {'EXITOSO': ('exitosos', 'monto_exitoso'), 'FALLIDO': ('fallidos', 'monto_fallido'),
+                    'REVERSADO': ('reversados', 'monto_reversado')}
+        totales = {'cantidad': 0, 'monto': 0, 'exitosos': 0, 'monto_exitoso': 0, 'fallidos': 0, 'reversados': 0}
+        estado = (estado_pago or '').upper()
+        for por_moneda in resumen.get('totales_por_moneda', {}).values():
+            cantidad, monto = por_moneda.get('cantidad', 0), por_moneda.get('monto_total', 0)
+            if estado in columnas:
+                cantidad, monto = (por_moneda.get(columna, 0) for columna in columnas[estado])
+            elif estado:
+                cantidad = por_moneda.get('pendientes', 0)
+                monto -= sum(por_moneda.get(importe, 0) for _, importe in columnas.values())
+            totales['cantidad'] += cantidad
+            totales['monto'] += monto
+            if estado in ('', 'EXITOSO'):
+                totales['exitosos'] += por_moneda.get('exitosos', 0)
+                totales['monto_exitoso'] += por_moneda.get('monto_exitoso', 0)
+            if estado in ('', 'FALLIDO'):
+                totales['fallidos'] += por_moneda.get('fallidos', 0)
+            if estado in ('', 'REVERSADO'):
+                totales['reversados'] += por_moneda.get('reversados', 0)
+        return totales
+
+    async def _totales_pagos_o_vacio(self, filtros: FiltrosReporte) -> Dict[str, Any]:
+        """Las métricas generales se entregan aunque el servicio de pagos no responda"""
+        try:
+            return self._totales_pagos(await self._resumen_pagos(filtros, agrupar_por="moneda"))
+        except Exception as e:
+            logger.warning(f"Resumen de pagos no disponible: {str(e)}")
+            return self._totales_pagos({})
+    
     async def obtener_datos_pagos(self, filtros: FiltrosReporte) -> Dict[str, Any]:
         """Obtiene datos de pagos desde el servicio externo"""
         # Usar el endpoint de estadísticas de outbox de pagos
@@ -106,41 +158,34 @@ class ServicioDatosV1Adapter(ServicioDatosAdapter):
         super().__init__(base_url, "v1", timeout)
     
     async def obtener_datos_pagos(self, filtros: FiltrosReporte) -> Dict[str, Any]:
-        """Obtiene datos reales de pagos del servicio de pagos"""
+        """Obtiene los totales diarios de pagos del servicio de pagos"""
         try:
-            # Usar el servicio real de pagos
-            url = f"{self.base_url}/pagos/"
-            
-            # Construir parámetros de consulta
-            params = {}
-            if filtros.afiliado_id:
-                params['id_afiliado'] = filtros.afiliado_id
-            if filtros.estado_pago:
-                params['estado'] = filtros.estado_pago
-            
-            session = await self._get_session()
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    # Transformar a formato de reporte
-                    pagos = data if isinstance(data, list) else [data]
-                    return {
-                        "version": "v1",
-                        "pagos": pagos,
-                        "total_pagos": len(pagos),
-                        "monto_total": sum(p.get('monto', 0) for p in pagos),
-                        "filtros_aplicados": filtros.to_dict()
-                    }
-                else:
-                    raise Exception(f"Error del servicio de pagos: {response.status}")
+            resumen = await self._resumen_pagos(filtros)
+            totales = self._totales_pagos(resumen, filtros.estado_pago)
+            # Transformar a formato de reporte; el detalle por pago está en GET /pagos/exportar
+            return {
+                "version": "v1",
+                "resumen_diario": resumen.get('filas', []),
+                "totales_por_moneda": resumen.get('totales_por_moneda', {}),
+                "total_pagos": totales['cantidad'],
+                "monto_total": totales['monto'],
+                "pagos_exitosos": totales['exitosos'],
+                "pagos_fallidos": totales['fallidos'],
+                "pagos_reversados": totales['reversados'],
+                "filtros_aplicados": filtros.to_dict()
+            }
         except Exception as e:
             logger.error(f"Error obteniendo datos de pagos: {str(e)}")
             # Fallback a datos mock si falla
             return {
                 "version": "v1",
-                "pagos": [],
+                "resumen_diario": [],
+                "totales_por_moneda": {},
                 "total_pagos": 0,
                 "monto_total": 0,
+                "pagos_exitosos": 0,
+                "pagos_fallidos": 0,
+                "pagos_reversados": 0,
                 "filtros_aplicados": filtros.to_dict(),
                 "error": str(e)
             }
@@ -196,21 +241,21 @@ class ServicioDatosV1Adapter(ServicioDatosAdapter):
                 if response.status == 200:
                     campanas_stats = await response.json()
                     
-                    # Obtener estadísticas de pagos (outbox)
-                    pagos_url = f"{self.base_url}/pagos/outbox/estadisticas"
-                    async with session.get(pagos_url) as pagos_response:
-                        pagos_stats = await pagos_response.json() if pagos_response.status == 200 else {}
-                        
-                        return {
-                            "version": "v1",
-                            "metricas": {
-                                "total_campanas": campanas_stats.get('total_campanas', 0),
-                                "total_pagos": pagos_stats.get('total_eventos', 0),
-                                "campanas_activas": campanas_stats.get('distribucion_por_estado', {}).get('activa', 0),
-                                "afiliados_activos": 1 if filtros.afiliado_id else 0
-                            },
-                            "filtros_aplicados": filtros.to_dict()
-                        }
+                    # Totales de pagos desde el resumen diario
+                    pagos_stats = await self._totales_pagos_o_vacio(filtros)
+                    
+                    return {
+                        "version": "v1",
+                        "metricas": {
+                            "total_campanas": campanas_stats.get('total_campanas', 0),
+                            "total_pagos": pagos_stats['cantidad'],
+                            "monto_total_pagos": pagos_stats['monto'],
+                            "pagos_exitosos": pagos_stats['exitosos'],
+                            "campanas_activas": campanas_stats.get('distribucion_por_estado', {}).get('activa', 0),
+                            "afiliados_activos": 1 if filtros.afiliado_id else 0
+                        },
+                        "filtros_aplicados": filtros.to_dict()
+                    }
                 else:
                     raise Exception(f"Error obteniendo métricas: {response.status}")
         except Exception as e:
@@ -221,6 +266,8 @@ class ServicioDatosV1Adapter(ServicioDatosAdapter):
                 "metricas": {
                     "total_campanas": 0,
                     "total_pagos": 0,
+                    "monto_total_pagos": 0,
+                    "pagos_exitosos": 0,
                     "campanas_activas": 0,
                     "afiliados_activos": 0
                 },
@@ -236,62 +283,50 @@ class ServicioDatosV2Adapter(ServicioDatosAdapter):
         super().__init__(base_url, "v2", timeout)
     
     async def obtener_datos_pagos(self, filtros: FiltrosReporte) -> Dict[str, Any]:
-        """Obtiene datos reales de pagos con formato mejorado v2"""
+        """Obtiene los totales diarios de pagos con formato mejorado v2"""
         try:
-            # Usar el servicio real de pagos
-            url = f"{self.base_url}/pagos/"
+            resumen = await self._resumen_pagos(filtros)
+            totales = self._totales_pagos(resumen, filtros.estado_pago)
             
-            params = {}
-            if filtros.afiliado_id:
-                params['id_afiliado'] = filtros.afiliado_id
-            if filtros.estado_pago:
-                params['estado'] = filtros.estado_pago
+            # Transformar a formato v2 mejorado
+            daily = []
+            for fila in resumen.get('filas', []):
+                daily.append({
+                    "date": fila.get('dia', ''),
+                    "affiliate_id": fila.get('id_afiliado', ''),
+                    "currency": fila.get('moneda', 'USD'),
+                    "payments": fila.get('cantidad', 0),
+                    "amount": fila.get('monto_total', 0),
+                    "successful": fila.get('exitosos', 0),
+                    "failed": fila.get('fallidos', 0),
+                    "reversed": fila.get('reversados', 0),
+                    "pending": fila.get('pendientes', 0)
+                })
             
-            session = await self._get_session()
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    pagos = data if isinstance(data, list) else [data]
-                    
-                    # Transformar a formato v2 mejorado
-                    payments = []
-                    for pago in pagos:
-                        payments.append({
-                            "payment_id": pago.get('id', ''),
-                            "amount": pago.get('monto', 0),
-                            "currency": pago.get('moneda', 'USD'),
-                            "created_at": pago.get('fecha_creacion', ''),
-                            "status": pago.get('estado', ''),
-                            "affiliate_id": pago.get('id_afiliado', ''),
-                            "commission_rate": 0.15  # Valor por defecto
-                        })
-                    
-                    total_amount = sum(p.get('monto', 0) for p in pagos)
-                    success_count = len([p for p in pagos if p.get('estado') == 'exitoso'])
-                    
-                    return {
-                        "version": "v2",
-                        "data": {
-                            "payments": payments,
-                            "summary": {
-                                "total_payments": len(pagos),
-                                "total_amount": total_amount,
-                                "average_amount": total_amount / len(pagos) if pagos else 0,
-                                "success_rate": success_count / len(pagos) if pagos else 0
-                            }
-                        },
-                        "metadata": {
-                            "filters_applied": filtros.to_dict(),
-                            "generated_at": datetime.utcnow().isoformat()
-                        }
+            total_payments = totales['cantidad']
+            total_amount = totales['monto']
+            
+            return {
+                "version": "v2",
+                "data": {
+                    "daily": daily,
+                    "summary": {
+                        "total_payments": total_payments,
+                        "total_amount": total_amount,
+                        "average_amount": total_amount / total_payments if total_payments else 0,
+                        "success_rate": totales['exitosos'] / total_payments if total_payments else 0
                     }
-                else:
-                    raise Exception(f"Error del servicio de pagos: {response.status}")
+                },
+                "metadata": {
+                    "filters_applied": filtros.to_dict(),
+                    "generated_at": datetime.utcnow().isoformat()
+                }
+            }
         except Exception as e:
             logger.error(f"Error obteniendo datos de pagos v2: {str(e)}")
             return {
                 "version": "v2",
-                "data": {"payments": [], "summary": {"total_payments": 0, "total_amount": 0, "average_amount": 0, "success_rate": 0}},
+                "data": {"daily": [], "summary": {"total_payments": 0, "total_amount": 0, "average_amount": 0, "success_rate": 0}},
                 "metadata": {"filters_applied": filtros.to_dict(), "generated_at": datetime.utcnow().isoformat(), "error": str(e)}
             }
     
@@ -369,32 +404,30 @@ class ServicioDatosV2Adapter(ServicioDatosAdapter):
                 if response.status == 200:
                     campanas_stats = await response.json()
                     
-                    # Obtener estadísticas de pagos (outbox)
-                    pagos_url = f"{self.base_url}/pagos/outbox/estadisticas"
-                    async with session.get(pagos_url) as pagos_response:
-                        pagos_stats = await pagos_response.json() if pagos_response.status == 200 else {}
-                        
-                        return {
-                            "version": "v2",
-                            "data": {
-                                "metrics": {
-                                    "total_revenue": 0,  # No disponible en los servicios actuales
-                                    "total_payments": pagos_stats.get('total_eventos', 0),
-                                    "active_campaigns": campanas_stats.get('distribucion_por_estado', {}).get('activa', 0),
-                                    "active_affiliates": 1 if filtros.afiliado_id else 0,
-                                    "conversion_rate": 0.12,  # Valor por defecto
-                                    "average_order_value": 0  # No disponible
-                                },
-                                "trends": {
-                                    "revenue_growth": 0.15,  # Valor por defecto
-                                    "payment_growth": 0.08   # Valor por defecto
-                                }
+                    # Totales de pagos desde el resumen diario
+                    pagos_stats = await self._totales_pagos_o_vacio(filtros)
+                    
+                    return {
+                        "version": "v2",
+                        "data": {
+                            "metrics": {
+                                "total_revenue": pagos_stats['monto_exitoso'],
+                                "total_payments": pagos_stats['cantidad'],
+                                "active_campaigns": campanas_stats.get('distribucion_por_estado', {}).get('activa', 0),
+                                "active_affiliates": 1 if filtros.afiliado_id else 0,
+                                "conversion_rate": 0.12,  # Valor por defecto
+                                "average_order_value": pagos_stats['monto_exitoso'] / pagos_stats['exitosos'] if pagos_stats['exitosos'] else 0
                             },
-                            "metadata": {
-                                "filters_applied": filtros.to_dict(),
-                                "generated_at": datetime.utcnow().isoformat()
+                            "trends": {
+                                "revenue_growth": 0.15,  # Valor por defecto
+                                "payment_growth": 0.08   # Valor por defecto
                             }
+                        },
+                        "metadata": {
+                            "filters_applied": filtros.to_dict(),
+                            "generated_at": datetime.utcnow().isoformat()
                         }
+                    }
                 else:
                     raise Exception(f"Error obteniendo métricas: {response.status}")
         except Exception as e:
@@ -0,0 +1,101 @@
+import time
+import logging
+import threading
+from enum import Enum
+from typing import Callable, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+class EstadoCircuito(Enum):
+    CERRADO = "CERRADO"
+    ABIERTO = "ABIERTO"
+    SEMI_ABIERTO = "SEMI_ABIERTO"
+
+
+class CircuitoAbiertoExcepcion(Exception):
+    def __init__(self, nombre: str, reintentar_en_segundos: float):
+        self.nombre = nombre
+        self.reintentar_en_segundos = reintentar_en_segundos
+        super().__init__(f"Circuito {nombre} abierto; reintentar en {reintentar_en_segundos:.1f}s")
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por fallos consecutivos
+
+    - CERRADO: las llamadas pasan; `umbral_fallos` fallos seguidos abren el circuito
+    - ABIERTO: las llamadas fallan de inmediato durante `tiempo_apertura_segundos`
+    - SEMI_ABIERTO: se permiten hasta `llamadas_prueba` llamadas simultáneas; un éxito
+      cierra el circuito y un fallo lo vuelve a abrir
+    """
+
+    def __init__(self, nombre: str, umbral_fallos: int = 5, tiempo_apertura_segundos: float = 30.0,
+                 llamadas_prueba: int = 1, reloj: Callable[[], float] = time.monotonic):
+        self.nombre = nombre
+        self.umbral_fallos = umbral_fallos
+        self.tiempo_apertura_segundos = tiempo_apertura_segundos
+        self.llamadas_prueba = llamadas_prueba
+        self._reloj = reloj
+        self._lock = threading.Lock()
+        self._estado = EstadoCircuito.CERRADO
+        self._fallos_consecutivos = 0
+        self._abierto_desde = 0.0
+        self._pruebas_en_curso = 0
+        self._rechazadas = 0
+        self._aperturas = 0
+
+    @property
+    def estado(self) -> EstadoCircuito:
+        with self._lock:
+            return self._estado_actual()
+
+    def _estado_actual(self) -> EstadoCircuito:
+        if (self._estado == EstadoCircuito.ABIERTO
+                and self._reloj() - self._abierto_desde >= self.tiempo_apertura_segundos):
+            self._estado = EstadoCircuito.SEMI_ABIERTO
+            self._pruebas_en_curso = 0
+        return self._estado
+
+    def permitir(self):
+        """Lanza CircuitoAbiertoExcepcion si la llamada no debe intentarse"""
+        with self._lock:
+            estado = self._estado_actual()
+            if estado == EstadoCircuito.CERRADO:
+                return
+            if estado == EstadoCircuito.SEMI_ABIERTO and self._pruebas_en_curso < self.llamadas_prueba:
+                self._pruebas_en_curso += 1
+                return
+            self._rechazadas += 1
+            restante = max(0.0, self.tiempo_apertura_segundos - (self._reloj() - self._abierto_desde))
+        raise CircuitoAbiertoExcepcion(self.nombre, restante)
+
+    def registrar_exito(self):
+        with self._lock:
+            if self._estado != EstadoCircuito.CERRADO:
+                logger.info(f"Circuito {self.nombre} cerrado")
+            self._estado = EstadoCircuito.CERRADO
+            self._fallos_consecutivos = 0
+            self._pruebas_en_curso = 0
+
+    def registrar_fallo(self):
+        with self._lock:
+            self._fallos_consecutivos += 1
+            estado = self._estado_actual()
+            if estado == EstadoCircuito.SEMI_ABIERTO or self._fallos_consecutivos >= self.umbral_fallos:
+                if estado != EstadoCircuito.ABIERTO:
+                    self._aperturas += 1
+                    logger.warning(f"Circuito {self.nombre} abierto tras {self._fallos_consecutivos} fallos")
+                self._estado = EstadoCircuito.ABIERTO
+                self._abierto_desde = self._reloj()
+                self._pruebas_en_curso = 0
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "nombre": self.nombre,
+                "estado": self._estado_actual().value,
+                "fallos_consecutivos": self._fallos_consecutivos,
+                "llamadas_rechazadas": self._rechazadas,
+                "aperturas": self._aperturas
+            }
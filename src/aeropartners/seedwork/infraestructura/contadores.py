@@ -0,0 +1,145 @@
+import random
+import logging
+from collections import Counter
+from typing import Dict, Iterable, Any
+
+from sqlalchemy import Column, String, Integer, BigInteger, func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from .db import Base, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Fila marcadora que indica que los contadores del outbox ya se inicializaron con un recuento
+TIPO_MARCADOR = ""
+
+
+class ContadorOutboxModel(Base):
+    """
+    Contadores de eventos por outbox y tipo de evento, repartidos en shards para que
+    escrituras concurrentes no compitan por la misma fila
+    """
+    __tablename__ = "outbox_contadores"
+
+    outbox = Column(String(50), primary_key=True)
+    tipo_evento = Column(String(100), primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    total = Column(BigInteger, nullable=False, default=0)
+    procesados = Column(BigInteger, nullable=False, default=0)
+
+
+class ContadoresOutbox:
+    """
+    Estadísticas de un outbox mantenidas de forma incremental
+
+    Los registros se hacen con la sesión del llamador, en la misma transacción que inserta,
+    marca o elimina las filas del outbox, de modo que los contadores nunca divergen de la tabla.
+    La lectura suma a lo sumo `shards` filas por tipo de evento: costo constante.
+    """
+
+    def __init__(self, outbox: str, tabla: str, columna_tipo: str, columna_procesado: str, shards: int = 16):
+        self.outbox = outbox
+        self.tabla = tabla
+        self.columna_tipo = columna_tipo
+        self.columna_procesado = columna_procesado
+        self.shards = shards
+
+    def registrar_creados(self, db: Session, tipos_evento: Iterable[str]):
+        self._incrementar(db, Counter(tipos_evento), total=1, procesados=0)
+
+    def registrar_procesados(self, db: Session, tipos_evento: Iterable[str]):
+        self._incrementar(db, Counter(tipos_evento), total=0, procesados=1)
+
+    def registrar_eliminados_procesados(self, db: Session, cantidades_por_tipo: Dict[str, int]):
+        """Descuenta eventos ya procesados eliminados por la retención"""
+        self._incrementar(db, Counter(cantidades_por_tipo), total=-1, procesados=-1)
+
+    def _incrementar(self, db: Session, cantidades: Counter, total: int, procesados: int):
+        for tipo_evento, cantidad in cantidades.items():
+            if not cantidad:
+                continue
+            sentencia = insert(ContadorOutboxModel).values(
+                outbox=self.outbox,
+                tipo_evento=tipo_evento,
+                shard=random.randrange(self.shards),
+                total=total * cantidad,
+                procesados=procesados * cantidad
+            )
+            db.execute(sentencia.on_conflict_do_update(
+                index_elements=["outbox", "tipo_evento", "shard"],
+                set_={
+                    "total": ContadorOutboxModel.total + sentencia.excluded.total,
+                    "procesados": ContadorOutboxModel.procesados + sentencia.excluded.procesados
+                }
+            ))
+
+    def obtener_estadisticas(self) -> Dict[str, Any]:
+        """
+        Retorna totales y distribución por tipo. Solo la primera lectura, sin fila marcadora,
+        recuenta la tabla del outbox; el recuento a demanda es `recalcular`.
+        """
+        db = SessionLocal()
+        try:
+            filas = self._leer(db)
+            if not any(fila.tipo_evento == TIPO_MARCADOR for fila in filas):
+                # Sin recuento inicial los contadores solo cubrirían los eventos posteriores a su introducción
+                self._recalcular(db)
+                db.commit()
+                filas = self._leer(db)
+            filas = [fila for fila in filas if fila.tipo_evento != TIPO_MARCADOR]
+
+            total = sum(fila.total for fila in filas)
+            procesados = sum(fila.procesados for fila in filas)
+            return {
+                "total_eventos": total,
+                "eventos_procesados": procesados,
+                "eventos_pendientes": total - procesados,
+                "distribucion_por_tipo": {fila.tipo_evento: fila.total for fila in filas if fila.total}
+            }
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def recalcular(self):
+        """
+        Recuenta la tabla del outbox y reemplaza los contadores. Frena las escrituras del outbox
+        hasta el commit: es una tarea de operación, no se expone en la API
+        """
+        db = SessionLocal()
+        try:
+            self._recalcular(db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _leer(self, db: Session):
+        return db.query(
+            ContadorOutboxModel.tipo_evento,
+            func.sum(ContadorOutboxModel.total).label("total"),
+            func.sum(ContadorOutboxModel.procesados).label("procesados")
+        ).filter(
+            ContadorOutboxModel.outbox == self.outbox
+        ).group_by(ContadorOutboxModel.tipo_evento).all()
+
+    def _recalcular(self, db: Session):
+        # El bloqueo espera a las transacciones con incrementos en curso y frena las nuevas hasta
+        # el commit; el recuento posterior ve exactamente las filas ya contabilizadas
+        db.execute(text("LOCK TABLE outbox_contadores IN SHARE ROW EXCLUSIVE MODE"))
+        db.query(ContadorOutboxModel).filter(
+            ContadorOutboxModel.outbox == self.outbox
+        ).delete(synchronize_session=False)
+        db.execute(text(f"""
+            INSERT INTO outbox_contadores (outbox, tipo_evento, shard, total, procesados)
+            SELECT :outbox, {self.columna_tipo}, 0, count(*), count(*) FILTER (WHERE {self.columna_procesado})
+            FROM {self.tabla}
+            GROUP BY {self.columna_tipo}
+            UNION ALL
+            SELECT :outbox, :marcador, 0, 0, 0
+        """), {"outbox": self.outbox, "marcador": TIPO_MARCADOR})
+        logger.info(f"Contadores del outbox {self.outbox} recalculados")
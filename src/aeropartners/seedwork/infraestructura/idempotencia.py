@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import Column, String, Integer, DateTime, Text, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from .db import Base, SessionLocal
+from .uow import UnidadDeTrabajoSQLAlchemy
+
+logger = logging.getLogger(__name__)
+
+LONGITUD_MAXIMA_CLAVE = 255
+
+SQL_BLOQUEAR_CLAVE = text("SELECT pg_advisory_xact_lock(hashtext(:ambito), hashtext(:clave))")
+
+SQL_PURGAR_LOTE = text("""
+    DELETE FROM claves_idempotencia WHERE (ambito, clave) IN (
+        SELECT ambito, clave FROM claves_idempotencia
+        WHERE ambito = :ambito AND fecha_creacion < :limite
+        LIMIT :tamano_lote
+        FOR UPDATE SKIP LOCKED
+    )
+""")
+
+
+class ClaveIdempotenciaModel(Base):
+    """Respuestas guardadas por Idempotency-Key, para repetirlas ante reintentos del cliente"""
+    __tablename__ = "claves_idempotencia"
+
+    ambito = Column(String(50), primary_key=True)
+    clave = Column(String(LONGITUD_MAXIMA_CLAVE), primary_key=True)
+    huella = Column(String(64), nullable=False)
+    estado_http = Column(Integer, nullable=False)
+    respuesta = Column(Text, nullable=False)
+    fecha_creacion = Column(DateTime, nullable=False, default=datetime.now, index=True)
+
+
+class ClaveIdempotenciaInvalidaExcepcion(Exception):
+    """La clave está vacía o excede la longitud permitida"""
+
+
+class ClaveIdempotenciaReutilizadaExcepcion(Exception):
+    """La clave ya se usó con una solicitud distinta"""
+
+
+@dataclass
+class RespuestaIdempotente:
+    estado_http: int
+    cuerpo: Dict[str, Any]
+    repetida: bool = False
+
+
+class RegistroIdempotencia:
+    """
+    Registro de claves de idempotencia para un ámbito (p.ej. la creación de pagos)
+
+    - Un reintento dentro de la ventana de retención se resuelve con una lectura por clave primaria
+    - Los duplicados concurrentes se serializan con un advisory lock de transacción sobre la clave:
+      solo el primero ejecuta la operación, el resto espera y repite su respuesta
+    - Solo se guardan respuestas deterministas (< 500); tras un error interno el cliente puede reintentar
+    """
+
+    def __init__(self, ambito: str, horas_retencion: float = None, intervalo_purga_segundos: float = None,
+                 tamano_lote: int = 1000):
+        self.ambito = ambito
+        self.horas_retencion = horas_retencion or float(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+        self.intervalo_purga_segundos = intervalo_purga_segundos or float(
+            os.getenv("IDEMPOTENCY_KEY_PURGE_INTERVAL_SECONDS", "600")
+        )
+        self.tamano_lote = tamano_lote
+        self._ultima_purga = None
+
+    @staticmethod
+    def huella(datos: Dict[str, Any]) -> str:
+        return hashlib.sha256(json.dumps(datos, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def ejecutar(self, clave: str, huella: str, operacion: Callable[[], Tuple[int, Dict[str, Any]]],
+                 uow: UnidadDeTrabajoSQLAlchemy = None) -> RespuestaIdempotente:
+        """
+        Ejecuta `operacion` (que retorna estado HTTP y cuerpo) una sola vez por clave,
+        o repite la respuesta guardada. Con la unidad de trabajo de la petición, lo que
+        escriba la operación y la respuesta guardada se confirman en la misma transacción.
+        """
+        if not clave or len(clave) > LONGITUD_MAXIMA_CLAVE:
+            raise ClaveIdempotenciaInvalidaExcepcion(
+                f"Idempotency-Key debe tener entre 1 y {LONGITUD_MAXIMA_CLAVE} caracteres"
+            )
+
+        propia = uow is None
+        uow = uow or UnidadDeTrabajoSQLAlchemy(SessionLocal)
+        try:
+            guardada = self._buscar(uow.sesion, clave, huella)
+            if guardada:
+                return guardada
+            uow.rollback()
+
+            uow.sesion.execute(SQL_BLOQUEAR_CLAVE, {"ambito": self.ambito, "clave": clave})
+            # Un duplicado concurrente pudo completar la operación mientras se esperaba el lock
+            guardada = self._buscar(uow.sesion, clave, huella)
+            if guardada:
+                return guardada
+
+            estado_http, cuerpo = operacion()
+            if estado_http < 500:
+                self._guardar(uow.sesion, clave, huella, estado_http, cuerpo)
+                uow.commit()
+            else:
+                uow.rollback()
+            return RespuestaIdempotente(estado_http, cuerpo)
+        except Exception:
+            uow.rollback()
+            raise
+        finally:
+            if propia:
+                uow.cerrar()
+
+    def _buscar(self, db: Session, clave: str, huella: str) -> Optional[RespuestaIdempotente]:
+        modelo = db.query(ClaveIdempotenciaModel).filter(
+            ClaveIdempotenciaModel.ambito == self.ambito,
+            ClaveIdempotenciaModel.clave == clave,
+            ClaveIdempotenciaModel.fecha_creacion >= datetime.now() - timedelta(hours=self.horas_retencion)
+        ).first()
+        if modelo is None:
+            return None
+        if modelo.huella != huella:
+            raise ClaveIdempotenciaReutilizadaExcepcion(
+                f"Idempotency-Key {clave} ya fue usada con una solicitud distinta"
+            )
+        return RespuestaIdempotente(modelo.estado_http, json.loads(modelo.respuesta), repetida=True)
+
+    def _guardar(self, db: Session, clave: str, huella: str, estado_http: int, cuerpo: Dict[str, Any]):
+        valores = {
+            "ambito": self.ambito, "clave": clave, "huella": huella, "estado_http": estado_http,
+            "respuesta": json.dumps(cuerpo, default=str), "fecha_creacion": datetime.now()
+        }
+        sentencia = insert(ClaveIdempotenciaModel).values(**valores)
+        # Reemplaza una entrada vencida que la purga aún no eliminó
+        db.execute(sentencia.on_conflict_do_update(
+            index_elements=["ambito", "clave"],
+            set_={campo: sentencia.excluded[campo] for campo in ("huella", "estado_http", "respuesta", "fecha_creacion")}
+        ))
+
+    def debe_purgar(self) -> bool:
+        """True una vez por intervalo de purga"""
+        if self._ultima_purga is not None and time.monotonic() - self._ultima_purga < self.intervalo_purga_segundos:
+            return False
+        self._ultima_purga = time.monotonic()
+        return True
+
+    def purgar(self) -> int:
+        """Elimina en lotes las claves vencidas del ámbito"""
+        limite = datetime.now() - timedelta(hours=self.horas_retencion)
+        total = 0
+        while True:
+            db = SessionLocal()
+            try:
+                eliminadas = db.execute(SQL_PURGAR_LOTE, {
+                    "ambito": self.ambito, "limite": limite, "tamano_lote": self.tamano_lote
+                }).rowcount
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+            total += eliminadas
+            if eliminadas < self.tamano_lote:
+                break
+        if total:
+            logger.info(f"Purga de claves de idempotencia: {total} eliminadas")
+        return total
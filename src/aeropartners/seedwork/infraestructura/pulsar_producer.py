@@ -1,8 +1,8 @@
 import os
 import json
 import logging
-from typing import Dict, Any
-from pulsar import Client
+from typing import Dict, Any, Callable, Optional
+from pulsar import Client, Result
 
 logger = logging.getLogger(__name__)
 
@@ -42,33 +42,65 @@ class PulsarEventProducer:
             event_id: ID único del evento (opcional)
         """
         try:
-            # Crear mensaje con metadatos
-            message = {
-                "event_type": event_type,
-                "event_id": event_id,
-                "timestamp": event_data.get("fecha_evento"),
-                "data": event_data
-            }
-            
-            # Serializar mensaje
-            message_json = json.dumps(message, default=str)
-            
             # Publicar mensaje
             self.producer.send(
-                message_json.encode('utf-8'),
-                properties={
-                    "event_type": event_type,
-                    "event_id": event_id or "",
-                    "source": "aeropartners-pagos"
-                }
+                self._serializar(event_type, event_data, event_id),
+                properties=self._propiedades(event_type, event_id),
+                partition_key=self._clave_particion(event_data)
             )
-            
+
             logger.info(f"Evento publicado: {event_type} - {event_id}")
-            
+
         except Exception as e:
             logger.error(f"Error publicando evento {event_type}: {e}")
             raise
-    
+
+    def publish_event_async(self, event_type: str, event_data: Dict[str, Any], event_id: str = None,
+                            callback: Callable[[bool, str], None] = None):
+        """
+        Publica un evento sin esperar la confirmación del broker
+
+        El callback recibe (exitoso, event_id) cuando el broker confirma o rechaza el mensaje.
+        Llamar a flush() para forzar el envío de los mensajes acumulados en el batch.
+        """
+        def _al_confirmar(resultado, _message_id):
+            if callback:
+                callback(resultado == Result.Ok, event_id)
+
+        self.producer.send_async(
+            self._serializar(event_type, event_data, event_id),
+            _al_confirmar,
+            properties=self._propiedades(event_type, event_id),
+            partition_key=self._clave_particion(event_data)
+        )
+
+    def flush(self):
+        """Envía los mensajes pendientes del batch del productor"""
+        if self.producer:
+            self.producer.flush()
+
+    def _serializar(self, event_type: str, event_data: Dict[str, Any], event_id: str = None) -> bytes:
+        # Crear mensaje con metadatos
+        message = {
+            "event_type": event_type,
+            "event_id": event_id,
+            "timestamp": event_data.get("fecha_evento"),
+            "data": event_data
+        }
+        return json.dumps(message, default=str).encode('utf-8')
+
+    def _clave_particion(self, event_data: Dict[str, Any]) -> Optional[str]:
+        # Con suscripciones Key_Shared los eventos de un mismo afiliado llegan a un único consumidor
+        id_afiliado = event_data.get("id_afiliado")
+        return str(id_afiliado) if id_afiliado else None
+
+    def _propiedades(self, event_type: str, event_id: str = None) -> Dict[str, str]:
+        return {
+            "event_type": event_type,
+            "event_id": event_id or "",
+            "source": "aeropartners-pagos"
+        }
+
     def close(self):
         """Cierra la conexión con Pulsar"""
         try:
@@ -0,0 +1,50 @@
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from .db import SessionLocal
+
+
+class UnidadDeTrabajoSQLAlchemy:
+    """
+    Unidad de trabajo con alcance de comando (petición HTTP o mensaje consumido)
+
+    Todos los repositorios construidos con la misma unidad comparten una sesión y una
+    transacción: solo hacen flush, y `commit()` confirma de una vez el agregado y sus
+    eventos del outbox. La sesión se abre al primer uso y se cierra al salir del contexto,
+    con rollback si hubo una excepción.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self._session_factory = session_factory
+        self._sesion: Optional[Session] = None
+
+    @property
+    def sesion(self) -> Session:
+        if self._sesion is None:
+            self._sesion = self._session_factory()
+        return self._sesion
+
+    def commit(self):
+        if self._sesion is not None:
+            self._sesion.commit()
+
+    def rollback(self):
+        """Descarta la transacción en curso; la conexión vuelve al pool hasta el próximo uso"""
+        if self._sesion is not None:
+            self._sesion.rollback()
+
+    def cerrar(self):
+        if self._sesion is not None:
+            self._sesion.close()
+            self._sesion = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        try:
+            if tipo is not None:
+                self.rollback()
+        finally:
+            self.cerrar()
@@ -61,6 +61,20 @@ class TestEventCollectorHealthEndpoints:
         assert "timestamp" in data
         assert "pulsar" in data["dependencies"]
         assert "redis" in data["dependencies"]
+    
+    def test_readiness_check_durante_precalentamiento(self, client):
+        precalentador = Mock()
+        precalentador.listo = False
+        precalentador.obtener_metricas.return_value = {'estado': 'EN_CURSO', 'progreso': 0.5}
+        
+        with patch('src.aeropartners.modulos.event_collector.factory.get_precalentador',
+                   return_value=precalentador):
+            response = client.get("/event-collector/ready")
+        
+        assert response.status_code == 503
+        data = response.json()
+        assert data["status"] == "warming_up"
+        assert data["precalentamiento"]["progreso"] == 0.5
 
 
 class TestProcesarEventoEndpoint:
@@ -461,6 +475,42 @@ class TestRateLimitEndpoint:
         assert data['ventana_minutos'] == 5
 
 
+class TestAdminEndpoints:
+    
+    def test_resetear_rate_limit(self, client):
+        mock_handler = AsyncMock()
+        mock_handler.handle.return_value = {
+            'id_afiliado': 'AFILIADO_001',
+            'timestamp': datetime.now().isoformat()
+        }
+        
+        with patch('src.aeropartners.modulos.event_collector.factory.get_resetear_rate_limit_handler',
+                   return_value=mock_handler):
+            response = client.post("/event-collector/admin/rate-limit/AFILIADO_001/reset")
+        
+        assert response.status_code == 200
+        assert "AFILIADO_001" in response.json()['mensaje']
+        comando = mock_handler.handle.call_args[0][0]
+        assert comando.id_afiliado == 'AFILIADO_001'
+    
+    def test_limpiar_eventos_deduplicacion(self, client):
+        mock_handler = AsyncMock()
+        mock_handler.handle.return_value = {
+            'eventos_eliminados': 42,
+            'max_antiguedad_horas': 6,
+            'timestamp': datetime.now().isoformat()
+        }
+        
+        with patch('src.aeropartners.modulos.event_collector.factory.get_limpiar_eventos_handler',
+                   return_value=mock_handler):
+            response = client.post("/event-collector/admin/dedup/cleanup", params={'max_antiguedad_horas': 6})
+        
+        assert response.status_code == 200
+        assert response.json()['eventos_eliminados'] == 42
+        comando = mock_handler.handle.call_args[0][0]
+        assert comando.max_antiguedad_horas == 6
+
+
 class TestEventCollectorIntegracion:
     
     def test_flujo_completo_evento_exitoso(self, client, mock_handlers):
@@ -0,0 +1,251 @@
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.aeropartners.api import pagos as api_pagos
+from src.aeropartners.modulos.pagos.dominio.entidades import Pago
+from src.aeropartners.modulos.pagos.dominio.enums import EstadoPago
+from src.aeropartners.modulos.pagos.dominio.objetos_valor import Dinero, Moneda
+
+
+@pytest.fixture
+def repositorio():
+    return Mock()
+
+
+@pytest.fixture
+def uow():
+    return Mock()
+
+
+@pytest.fixture
+def client(repositorio, uow):
+    app = FastAPI()
+    app.include_router(api_pagos.router)
+    app.dependency_overrides[api_pagos.get_unidad_de_trabajo] = lambda: uow
+    app.dependency_overrides[api_pagos.get_repositorio_pagos] = lambda: repositorio
+    app.dependency_overrides[api_pagos.get_repositorio_exportacion] = lambda: repositorio
+    return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def cache_vacia():
+    api_pagos.cache_estado_pagos.limpiar()
+
+
+def _pago(referencia, moneda="USD", monto=100.0):
+    return {"id_afiliado": "af_1", "monto": monto, "moneda": moneda, "referencia_pago": referencia}
+
+
+def _filas(cantidad, inicio=datetime(2024, 12, 1)):
+    return [
+        {"id": uuid.uuid4(), "id_afiliado": "af_1", "monto": 10.0, "moneda": "USD", "estado": "EXITOSO",
+         "referencia_pago": f"ref-{i}", "fecha_creacion": inicio + timedelta(minutes=i), "fecha_procesamiento": None}
+        for i in range(cantidad)
+    ]
+
+
+class TestProcesarPagosLote:
+
+    def test_resultados_por_item(self, client, repositorio, uow):
+        repositorio.agregar_lote.side_effect = lambda pagos: {p.referencia_pago for p in pagos} - {"ref-existente"}
+
+        respuesta = client.post("/pagos/lote", json={"pagos": [
+            _pago("ref-1"),
+            _pago("ref-2", moneda="XXX"),
+            _pago("ref-1"),
+            _pago("ref-existente"),
+            _pago("ref-3", monto=-5)
+        ]})
+
+        assert respuesta.status_code == 200
+        cuerpo = respuesta.json()
+        assert (cuerpo["total"], cuerpo["creados"], cuerpo["rechazados"]) == (5, 1, 4)
+        estados = [(r["referencia_pago"], r["estado"]) for r in cuerpo["resultados"]]
+        assert estados == [("ref-1", "PENDIENTE"), ("ref-2", "RECHAZADO"), ("ref-1", "RECHAZADO"),
+                           ("ref-existente", "RECHAZADO"), ("ref-3", "RECHAZADO")]
+        assert cuerpo["resultados"][0]["id_pago"]
+        assert "Moneda no válida" in cuerpo["resultados"][1]["error"]
+        repositorio.agregar_lote.assert_called_once()
+        uow.commit.assert_called_once()
+
+    def test_una_transaccion_por_bloque(self, client, repositorio, uow, monkeypatch):
+        monkeypatch.setattr(api_pagos, "TAMANO_BLOQUE_LOTE", 2)
+        repositorio.agregar_lote.side_effect = lambda pagos: {p.referencia_pago for p in pagos}
+
+        cuerpo = client.post("/pagos/lote", json={"pagos": [_pago(f"ref-{i}") for i in range(5)]}).json()
+
+        assert cuerpo["creados"] == 5
+        assert [r["indice"] for r in cuerpo["resultados"]] == list(range(5))
+        assert repositorio.agregar_lote.call_count == 3
+        assert uow.commit.call_count == 3
+
+    def test_error_de_persistencia_rechaza_solo_su_bloque(self, client, repositorio, uow, monkeypatch):
+        monkeypatch.setattr(api_pagos, "TAMANO_BLOQUE_LOTE", 2)
+        repositorio.agregar_lote.side_effect = [RuntimeError("conexión perdida"), {"ref-2", "ref-3"}]
+
+        cuerpo = client.post("/pagos/lote", json={"pagos": [_pago(f"ref-{i}") for i in range(4)]}).json()
+
+        assert [r["estado"] for r in cuerpo["resultados"]] == ["RECHAZADO", "RECHAZADO", "PENDIENTE", "PENDIENTE"]
+        uow.rollback.assert_called_once()
+
+    def test_lote_demasiado_grande(self, client, monkeypatch):
+        monkeypatch.setattr(api_pagos, "MAX_ITEMS_LOTE", 1)
+
+        respuesta = client.post("/pagos/lote", json={"pagos": [_pago("ref-1"), _pago("ref-2")]})
+
+        assert respuesta.status_code == 413
+
+
+class TestListarPagos:
+
+    def test_pagina_con_cursor_siguiente(self, client, repositorio):
+        filas = _filas(3)
+        repositorio.listar.return_value = filas
+
+        cuerpo = client.get("/pagos/", params={"limite": 2, "estado": "exitoso", "id_afiliado": "af_1"}).json()
+
+        assert [p["referencia_pago"] for p in cuerpo["pagos"]] == ["ref-0", "ref-1"]
+        assert cuerpo["siguiente_cursor"]
+        args, kwargs = repositorio.listar.call_args
+        assert args == (3,)
+        assert kwargs["estado"].value == "EXITOSO" and kwargs["id_afiliado"] == "af_1"
+
+        client.get("/pagos/", params={"limite": 2, "cursor": cuerpo["siguiente_cursor"]})
+
+        assert repositorio.listar.call_args.kwargs["despues_de"] == (filas[1]["fecha_creacion"], filas[1]["id"])
+
+    def test_ultima_pagina_sin_cursor(self, client, repositorio):
+        repositorio.listar.return_value = _filas(1)
+
+        assert client.get("/pagos/").json()["siguiente_cursor"] is None
+
+    def test_filtros_invalidos(self, client):
+        assert client.get("/pagos/", params={"estado": "desconocido"}).status_code == 400
+        assert client.get("/pagos/", params={"cursor": "no-es-un-cursor"}).status_code == 400
+        assert client.get("/pagos/", params={"limite": 0}).status_code == 422
+
+    def test_exportar_recorre_todas_las_paginas(self, client, repositorio, monkeypatch):
+        monkeypatch.setattr(api_pagos, "TAMANO_PAGINA_EXPORTACION", 2)
+        filas = _filas(3)
+        repositorio.listar.side_effect = [filas, filas[2:]]
+
+        respuesta = client.get("/pagos/exportar", params={"moneda": "usd"})
+
+        assert respuesta.headers["content-type"].startswith("application/x-ndjson")
+        lineas = [json.loads(linea) for linea in respuesta.text.splitlines()]
+        assert [p["referencia_pago"] for p in lineas] == ["ref-0", "ref-1", "ref-2"]
+        assert repositorio.listar.call_count == 2
+        assert repositorio.listar.call_args.kwargs["moneda"] == "USD"
+
+
+class TestResumenPagos:
+
+    def test_resumen_desde_los_agregados(self, client):
+        totales = {"cantidad": 3, "monto_total": 30.0, "exitosos": 2, "monto_exitoso": 20.0, "fallidos": 1,
+                   "monto_fallido": 10.0, "reversados": 0, "monto_reversado": 0.0, "pendientes": 0}
+        agregados = Mock()
+        agregados.obtener_resumen.return_value = {
+            "agrupar_por": "dia",
+            "filas": [{"id_afiliado": "af_1", "moneda": "USD", "dia": datetime(2024, 12, 1).date(), **totales}],
+            "totales_por_moneda": {"USD": totales}
+        }
+        client.app.dependency_overrides[api_pagos.get_agregados_pagos] = lambda: agregados
+
+        cuerpo = client.get("/pagos/resumen", params={"moneda": "usd", "fecha_desde": "2024-12-01"}).json()
+
+        assert cuerpo["filas"][0]["dia"] == "2024-12-01"
+        assert cuerpo["totales_por_moneda"]["USD"]["exitosos"] == 2
+        kwargs = agregados.obtener_resumen.call_args.kwargs
+        assert kwargs["moneda"] == "USD" and kwargs["fecha_desde"] == datetime(2024, 12, 1).date()
+
+    def test_el_resumen_no_permite_forzar_el_recuento(self, client):
+        agregados = Mock()
+        agregados.obtener_resumen.return_value = {"agrupar_por": "dia", "filas": [], "totales_por_moneda": {}}
+        client.app.dependency_overrides[api_pagos.get_agregados_pagos] = lambda: agregados
+
+        assert client.get("/pagos/resumen", params={"exacto": "true"}).status_code == 200
+        assert "exacto" not in agregados.obtener_resumen.call_args.kwargs
+
+    def test_agrupacion_invalida(self, client):
+        assert client.get("/pagos/resumen", params={"agrupar_por": "hora"}).status_code == 400
+
+
+def _entidad(estado):
+    pago = Pago(id_afiliado="af_1", monto=Dinero(100.0, Moneda.USD), referencia_pago="ref-1")
+    pago.estado = estado
+    return pago
+
+
+class TestEsperaEstadoPago:
+
+    def test_long_poll_responde_al_llegar_el_evento(self, client, repositorio, uow, monkeypatch):
+        monkeypatch.setattr(api_pagos.hub_estado_pagos, "conectado", True)
+        pendiente = _entidad(EstadoPago.PENDIENTE)
+        exitoso = _entidad(EstadoPago.EXITOSO)
+        exitoso.id = pendiente.id
+        repositorio.obtener_por_id.side_effect = [pendiente, exitoso]
+        evento = json.dumps({"event_type": "PagoExitoso", "data": {"id_pago": str(pendiente.id)}}).encode("utf-8")
+
+        def publicar():
+            # Igual que el oyente: espera a que la petición esté suscrita y despacha el evento
+            while not api_pagos.hub_estado_pagos.obtener_metricas()["suscripciones"]:
+                time.sleep(0.01)
+            api_pagos.oyente_eventos_pagos._despachar(evento, {"event_type": "PagoExitoso"})
+
+        threading.Thread(target=publicar).start()
+        inicio = time.monotonic()
+        respuesta = client.get(f"/pagos/{pendiente.id}", params={"wait": 30})
+
+        assert respuesta.json()["estado"] == "EXITOSO"
+        assert time.monotonic() - inicio < 5
+        assert repositorio.obtener_por_id.call_count == 2
+        assert uow.rollback.call_count == 2
+
+    def test_long_poll_relee_la_toma_sin_evento(self, client, repositorio, monkeypatch):
+        monkeypatch.setattr(api_pagos.hub_estado_pagos, "conectado", True)
+        monkeypatch.setattr(api_pagos, "INTERVALO_RELECTURA_EN_CURSO_SEGUNDOS", 0.05)
+        monkeypatch.setattr(api_pagos.cache_estado_pagos, "ttl_segundos", 0)
+        pendiente = _entidad(EstadoPago.PENDIENTE)
+        procesando = _entidad(EstadoPago.PROCESANDO)
+        procesando.id = pendiente.id
+        repositorio.obtener_por_id.side_effect = [pendiente, pendiente, procesando]
+        inicio = time.monotonic()
+
+        respuesta = client.get(f"/pagos/{pendiente.id}", params={"wait": 30})
+
+        assert respuesta.json()["estado"] == "PROCESANDO"
+        assert time.monotonic() - inicio < 5
+
+    def test_estado_final_responde_sin_esperar(self, client, repositorio):
+        pago = _entidad(EstadoPago.FALLIDO)
+        repositorio.obtener_por_id.return_value = pago
+
+        respuesta = client.get(f"/pagos/{pago.id}", params={"wait": 30})
+
+        assert respuesta.json()["estado"] == "FALLIDO"
+        assert api_pagos.hub_estado_pagos.obtener_metricas()["suscripciones"] == 0
+
+    def test_sse_envia_el_estado_final_y_cierra(self, client, repositorio):
+        pago = _entidad(EstadoPago.EXITOSO)
+        repositorio.obtener_por_id.return_value = pago
+
+        respuesta = client.get(f"/pagos/{pago.id}/eventos")
+
+        assert respuesta.headers["content-type"].startswith("text/event-stream")
+        assert respuesta.text.startswith("event: estado\ndata: ")
+        assert json.loads(respuesta.text.split("data: ")[1])["estado"] == "EXITOSO"
+
+    def test_sse_sin_cupo(self, client, monkeypatch):
+        monkeypatch.setattr(api_pagos.hub_estado_pagos, "max_suscriptores", 0)
+
+        respuesta = client.get(f"/pagos/{uuid.uuid4()}/eventos")
+
+        assert respuesta.status_code == 503
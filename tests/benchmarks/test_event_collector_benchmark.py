@@ -0,0 +1,63 @@
+import copy
+
+from benchmarks.event_collector.ejecucion import (
+    ConfiguracionBenchmark, ejecutar_benchmark, comparar_con_linea_base, crear_handler
+)
+from benchmarks.event_collector.generador import MezclaEventos, GeneradorEventos
+
+
+class TestGeneradorEventos:
+
+    def test_reproducible_por_semilla(self):
+        mezcla = MezclaEventos(semilla=7)
+        eventos_a = GeneradorEventos(mezcla).generar(200)
+        eventos_b = GeneradorEventos(mezcla).generar(200)
+
+        assert [e['cuerpo']['id_afiliado'] for e in eventos_a] == [e['cuerpo']['id_afiliado'] for e in eventos_b]
+
+    def test_respeta_ratio_de_duplicados(self):
+        eventos = GeneradorEventos(MezclaEventos(ratio_duplicados=0.5)).generar(1000)
+        duplicados = sum(1 for e in eventos if e['duplicado'])
+
+        assert 400 < duplicados < 600
+
+
+class TestBenchmarkIngesta:
+
+    def test_ejecucion_handler_y_api(self):
+        for modo in ("handler", "api"):
+            resultado = ejecutar_benchmark(ConfiguracionBenchmark(
+                modo=modo, eventos=100, calentamiento=10, muestra_memoria=20, concurrencia=4,
+                mezcla=MezclaEventos(ratio_duplicados=0.1)
+            ))
+
+            resultados = resultado['resultados']
+            assert resultados['eventos'] == 100
+            assert resultados['eventos_por_segundo'] > 0
+            assert resultados['latencia_ms']['p50'] <= resultados['latencia_ms']['p99']
+            assert resultados['resultados_por_estado'].get('PUBLICADO', 0) > 0
+            assert resultados['bytes_por_mensaje'] > 0
+            assert resultados['memoria']['bytes_transitorios_por_evento'] > 0
+
+    def test_handler_usa_el_publicador_real_con_cliente_simulado(self):
+        handler, cliente_pulsar = crear_handler(ConfiguracionBenchmark())
+
+        assert type(handler.servicio_publicacion).__name__ == "PulsarEventPublisher"
+        assert handler.servicio_publicacion.client is cliente_pulsar
+
+    def test_detecta_regresiones(self):
+        linea_base = {
+            'configuracion': {},
+            'resultados': {
+                'eventos_por_segundo': 1000.0,
+                'latencia_ms': {'p50': 1.0, 'p95': 2.0, 'p99': 3.0},
+                'memoria': {'bytes_transitorios_por_evento': 1000.0, 'bytes_retenidos_por_evento': 100.0}
+            }
+        }
+        actual = copy.deepcopy(linea_base)
+        actual['resultados']['eventos_por_segundo'] = 700.0
+        actual['resultados']['latencia_ms']['p99'] = 3.2
+
+        regresiones = comparar_con_linea_base(actual, linea_base, tolerancia=0.15)
+
+        assert [r['metrica'] for r in regresiones] == ['eventos_por_segundo']
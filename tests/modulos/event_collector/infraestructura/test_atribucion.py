@@ -0,0 +1,111 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import Mock, AsyncMock
+
+from src.aeropartners.modulos.event_collector.infraestructura.atribucion import IndiceAtribucionClicks
+from src.aeropartners.modulos.event_collector.infraestructura.serializacion import CodificadorTrackingAvro
+from src.aeropartners.modulos.event_collector.aplicacion.handlers import ProcesarEventoTrackingHandler
+from src.aeropartners.modulos.event_collector.aplicacion.comandos import ProcesarEventoTrackingCommand
+
+
+class TestIndiceAtribucionClicks:
+
+    def test_atribuye_por_sesion_y_por_dispositivo(self):
+        indice = IndiceAtribucionClicks(ventana_minutos=60)
+        ahora = datetime.now()
+        indice.registrar_click("afiliado_1", "click_1", ahora - timedelta(minutes=5), session_id="s1")
+        indice.registrar_click("afiliado_1", "click_2", ahora - timedelta(minutes=2), identificador_dispositivo="d1")
+
+        por_sesion = indice.buscar_click("afiliado_1", ahora, session_id="s1", identificador_dispositivo="d1")
+        por_dispositivo = indice.buscar_click("afiliado_1", ahora, session_id="otra", identificador_dispositivo="d1")
+
+        assert por_sesion.id_evento_click == "click_1"
+        assert por_sesion.criterio == "session"
+        assert por_sesion.segundos_desde_click == 300
+        assert por_dispositivo.id_evento_click == "click_2"
+        assert por_dispositivo.criterio == "dispositivo"
+
+    def test_no_cruza_afiliados_ni_ventana(self):
+        indice = IndiceAtribucionClicks(ventana_minutos=10)
+        ahora = datetime.now()
+        indice.registrar_click("afiliado_1", "click_1", ahora - timedelta(minutes=30), session_id="s1")
+        indice.registrar_click("afiliado_2", "click_2", ahora, session_id="s2")
+
+        assert indice.buscar_click("afiliado_1", ahora, session_id="s1") is None
+        assert indice.buscar_click("afiliado_1", ahora, session_id="s2") is None
+        assert indice.obtener_metricas()['entradas_expiradas'] == 1
+
+    def test_capacidad_acotada(self):
+        indice = IndiceAtribucionClicks(ventana_minutos=60, max_entradas=3)
+        ahora = datetime.now()
+        for i in range(5):
+            indice.registrar_click("afiliado_1", f"click_{i}", ahora, session_id=f"s{i}")
+
+        metricas = indice.obtener_metricas()
+        assert metricas['entradas'] == 3
+        assert metricas['entradas_desalojadas'] == 2
+        assert indice.buscar_click("afiliado_1", ahora, session_id="s0") is None
+        assert indice.buscar_click("afiliado_1", ahora, session_id="s4").id_evento_click == "click_4"
+
+
+class TestAtribucionEnHandler:
+
+    @pytest.fixture
+    def handler(self):
+        servicio_publicacion = Mock()
+        servicio_publicacion.publicar_evento = AsyncMock(return_value="1:0:0")
+        servicio_publicacion.generar_partition_key.return_value = "afiliado_test_1"
+        servicio_publicacion.obtener_topic_destino.return_value = "tracking.commands.RegisterEvent.v1"
+        servicio_validacion = Mock()
+        servicio_validacion.validar_evento_completo = AsyncMock(return_value={'no_duplicado': True})
+
+        return ProcesarEventoTrackingHandler(
+            servicio_publicacion=servicio_publicacion,
+            servicio_validacion=servicio_validacion,
+            repo_eventos=AsyncMock(),
+            repo_rate_limiting=AsyncMock(),
+            servicio_atribucion=IndiceAtribucionClicks()
+        )
+
+    def _comando(self, tipo_evento, timestamp, **kwargs):
+        return ProcesarEventoTrackingCommand(
+            tipo_evento=tipo_evento,
+            id_afiliado="afiliado_test_1",
+            timestamp=timestamp,
+            ip_origen="10.0.0.1",
+            user_agent="Mozilla/5.0",
+            session_id="sesion_1",
+            **kwargs
+        )
+
+    def test_conversion_publicada_con_click_atribuido(self, handler):
+        ahora = datetime.now()
+        click = asyncio.run(handler.handle(self._comando("CLICK", ahora - timedelta(seconds=90))))
+        conversion = asyncio.run(handler.handle(
+            self._comando("CONVERSION", ahora, valor_conversion=25.0, moneda="USD")
+        ))
+
+        assert click['exito'] and conversion['exito']
+        metadatos = handler.servicio_publicacion.publicar_evento.call_args.kwargs['metadatos']
+        atribucion = metadatos['metadatos_sistema']['atribucion']
+        assert atribucion['id_evento_click'] == click['id_evento']
+        assert atribucion['segundos_desde_click'] == 90
+        assert atribucion['criterio'] == "session"
+
+    def test_atribucion_viaja_en_avro(self, handler):
+        ahora = datetime.now()
+        asyncio.run(handler.handle(self._comando("CLICK", ahora - timedelta(seconds=10))))
+        asyncio.run(handler.handle(self._comando("CONVERSION", ahora, valor_conversion=25.0, moneda="USD")))
+        metadatos = handler.servicio_publicacion.publicar_evento.call_args.kwargs['metadatos']
+        mensaje = {
+            "event_type": "CONVERSION",
+            "timestamp": ahora.isoformat(),
+            "data": metadatos,
+            "partition_key": "afiliado_test_1"
+        }
+
+        codificador = CodificadorTrackingAvro()
+        decodificado = codificador.decodificar(codificador.codificar(mensaje))
+
+        assert decodificado['data']['metadatos_sistema']['atribucion'] == metadatos['metadatos_sistema']['atribucion']
@@ -0,0 +1,131 @@
+import pytest
+from datetime import datetime
+from unittest.mock import Mock
+
+from src.aeropartners.modulos.event_collector.infraestructura.enriquecimiento import ParserUserAgentCacheado
+from src.aeropartners.modulos.event_collector.aplicacion.handlers import ProcesarEventoTrackingHandler
+from src.aeropartners.modulos.event_collector.aplicacion.comandos import ProcesarEventoTrackingCommand
+from src.aeropartners.modulos.event_collector.dominio.enums import TipoDispositivo
+
+
+UA_CHROME_WINDOWS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+UA_SAFARI_IPHONE = (
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) AppleWebKit/605.1.15 "
+    "(KHTML, like Gecko) Version/17.1 Mobile/15E148 Safari/604.1"
+)
+UA_SAFARI_IPAD = (
+    "Mozilla/5.0 (iPad; CPU OS 16_6 like Mac OS X) AppleWebKit/605.1.15 "
+    "(KHTML, like Gecko) Version/16.6 Mobile/15E148 Safari/604.1"
+)
+UA_ANDROID_TABLET = (
+    "Mozilla/5.0 (Linux; Android 13; SM-X700) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
+)
+UA_EDGE_MAC = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edg/120.0.2210.61"
+)
+
+
+class TestParserUserAgentCacheado:
+
+    @pytest.fixture
+    def parser(self):
+        return ParserUserAgentCacheado(tamano_cache=100)
+
+    def test_desktop_windows_chrome(self, parser):
+        datos = parser.enriquecer(UA_CHROME_WINDOWS)
+
+        assert datos.tipo == TipoDispositivo.DESKTOP
+        assert datos.so == "Windows 10"
+        assert datos.navegador == "Chrome 120"
+
+    def test_mobile_iphone_safari(self, parser):
+        datos = parser.enriquecer(UA_SAFARI_IPHONE)
+
+        assert datos.tipo == TipoDispositivo.MOBILE
+        assert datos.so == "iOS 17.1"
+        assert datos.navegador == "Safari 17"
+
+    def test_tablets(self, parser):
+        ipad = parser.enriquecer(UA_SAFARI_IPAD)
+        android = parser.enriquecer(UA_ANDROID_TABLET)
+
+        assert ipad.tipo == TipoDispositivo.TABLET
+        assert ipad.so == "iPadOS 16.6"
+        assert android.tipo == TipoDispositivo.TABLET
+        assert android.so == "Android 13"
+
+    def test_derivados_de_chrome_tienen_prioridad(self, parser):
+        datos = parser.enriquecer(UA_EDGE_MAC)
+
+        assert datos.so == "macOS 10.15.7"
+        assert datos.navegador == "Edge 120"
+
+    def test_user_agent_desconocido(self, parser):
+        datos = parser.enriquecer("curl/8.4.0")
+
+        assert datos.tipo == TipoDispositivo.OTHER
+        assert datos.so is None
+        assert datos.navegador is None
+
+    def test_metricas_de_cache(self, parser):
+        for _ in range(9):
+            parser.enriquecer(UA_CHROME_WINDOWS)
+        parser.enriquecer(UA_SAFARI_IPHONE)
+
+        metricas = parser.obtener_metricas()
+
+        assert metricas['cache_hits'] == 8
+        assert metricas['cache_misses'] == 2
+        assert metricas['hit_ratio'] == 0.8
+        assert metricas['entradas_cache'] == 2
+        assert metricas['tiempo_parseo_total_ms'] >= 0
+
+
+class TestEnriquecimientoEnHandler:
+
+    @pytest.fixture
+    def handler(self):
+        return ProcesarEventoTrackingHandler(
+            servicio_publicacion=Mock(),
+            servicio_validacion=Mock(),
+            repo_eventos=Mock(),
+            repo_rate_limiting=Mock(),
+            servicio_enriquecimiento=ParserUserAgentCacheado()
+        )
+
+    def test_completa_datos_faltantes(self, handler):
+        comando = ProcesarEventoTrackingCommand(
+            tipo_evento="CLICK",
+            id_afiliado="afiliado_test_1",
+            timestamp=datetime.now(),
+            ip_origen="10.0.0.1",
+            user_agent=UA_SAFARI_IPHONE
+        )
+
+        evento = handler._crear_evento_tracking(comando)
+
+        assert evento.dispositivo.tipo == TipoDispositivo.MOBILE
+        assert evento.dispositivo.so == "iOS 17.1"
+        assert evento.dispositivo.navegador == "Safari 17"
+
+    def test_respeta_datos_enviados_por_cliente(self, handler):
+        comando = ProcesarEventoTrackingCommand(
+            tipo_evento="CLICK",
+            id_afiliado="afiliado_test_1",
+            timestamp=datetime.now(),
+            ip_origen="10.0.0.1",
+            user_agent=UA_SAFARI_IPHONE,
+            tipo_dispositivo="TABLET",
+            sistema_operativo="iOS 17.1.2"
+        )
+
+        evento = handler._crear_evento_tracking(comando)
+
+        assert evento.dispositivo.tipo == TipoDispositivo.TABLET
+        assert evento.dispositivo.so == "iOS 17.1.2"
+        assert evento.dispositivo.navegador == "Safari 17"
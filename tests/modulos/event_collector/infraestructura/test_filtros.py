@@ -0,0 +1,137 @@
+import os
+import asyncio
+import pytest
+from datetime import datetime
+from unittest.mock import Mock, AsyncMock
+
+from src.aeropartners.modulos.event_collector.infraestructura.filtros import (
+    ArbolPrefijosIP, AutomataAhoCorasick, FiltroTraficoListasBloqueo
+)
+from src.aeropartners.modulos.event_collector.aplicacion.handlers import ProcesarEventoTrackingHandler
+from src.aeropartners.modulos.event_collector.aplicacion.comandos import ProcesarEventoTrackingCommand
+
+
+class TestArbolPrefijosIP:
+
+    def test_rangos_ipv4(self):
+        arbol = ArbolPrefijosIP(["10.0.0.0/8", "192.168.1.0/24", "203.0.113.7"])
+
+        assert arbol.contiene("10.20.30.40")
+        assert arbol.contiene("192.168.1.255")
+        assert arbol.contiene("203.0.113.7")
+        assert not arbol.contiene("192.168.2.1")
+        assert not arbol.contiene("203.0.113.8")
+
+    def test_rangos_ipv6_y_mapeadas(self):
+        arbol = ArbolPrefijosIP(["2001:db8::/32", "198.51.100.0/24"])
+
+        assert arbol.contiene("2001:db8:1234::1")
+        assert not arbol.contiene("2001:db9::1")
+        assert arbol.contiene("::ffff:198.51.100.10")
+
+    def test_ip_invalida_no_coincide(self):
+        arbol = ArbolPrefijosIP(["0.0.0.0/0"])
+
+        assert arbol.contiene("8.8.8.8")
+        assert not arbol.contiene("testclient")
+
+
+class TestAutomataAhoCorasick:
+
+    def test_busca_multiples_firmas(self):
+        automata = AutomataAhoCorasick(["Googlebot", "python-requests", "HeadlessChrome", "bot"])
+
+        assert automata.buscar("Mozilla/5.0 (compatible; Googlebot/2.1)") == "googlebot"
+        assert automata.buscar("python-requests/2.31.0") == "python-requests"
+        assert automata.buscar("Mozilla/5.0 HeadlessChrome/120.0") == "headlesschrome"
+        assert automata.buscar("Mozilla/5.0 (Windows NT 10.0) Chrome/120.0") is None
+
+    def test_patrones_solapados(self):
+        automata = AutomataAhoCorasick(["abcd", "bc"])
+
+        assert automata.buscar("xabce") == "bc"
+
+    def test_sin_patrones(self):
+        assert AutomataAhoCorasick().buscar("cualquier texto") is None
+
+
+class TestFiltroTraficoListasBloqueo:
+
+    @pytest.fixture
+    def listas(self, tmp_path):
+        ruta_ips = tmp_path / "ips.txt"
+        ruta_uas = tmp_path / "user_agents.txt"
+        ruta_ips.write_text("# data centers\n10.0.0.0/8\n\nrango-invalido\n")
+        ruta_uas.write_text("bot\ncurl/\n")
+        return ruta_ips, ruta_uas
+
+    def test_filtra_y_cuenta_por_razon(self, listas):
+        ruta_ips, ruta_uas = listas
+        filtro = FiltroTraficoListasBloqueo(str(ruta_ips), str(ruta_uas))
+
+        assert filtro.evaluar("10.1.1.1", "Mozilla/5.0") == FiltroTraficoListasBloqueo.RAZON_IP
+        assert filtro.evaluar("8.8.8.8", "curl/8.4.0") == FiltroTraficoListasBloqueo.RAZON_USER_AGENT
+        assert filtro.evaluar("8.8.8.8", "Mozilla/5.0") is None
+
+        metricas = filtro.obtener_metricas()
+        assert metricas['eventos_evaluados'] == 3
+        assert metricas['eventos_filtrados'] == 2
+        assert metricas['filtrados_por_razon'] == {'ip_bloqueada': 1, 'user_agent_bot': 1}
+        assert metricas['rangos_ip_cargados'] == 1
+
+    def test_recarga_en_caliente(self, listas):
+        ruta_ips, ruta_uas = listas
+        filtro = FiltroTraficoListasBloqueo(str(ruta_ips), str(ruta_uas), intervalo_recarga_segundos=0)
+
+        assert filtro.evaluar("172.16.0.1", "Mozilla/5.0") is None
+
+        ruta_ips.write_text("172.16.0.0/12\n")
+        stat = os.stat(ruta_ips)
+        os.utime(ruta_ips, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        assert filtro.evaluar("172.16.0.1", "Mozilla/5.0") == FiltroTraficoListasBloqueo.RAZON_IP
+        assert filtro.evaluar("10.1.1.1", "Mozilla/5.0") is None
+
+    def test_archivo_inexistente(self, tmp_path):
+        filtro = FiltroTraficoListasBloqueo(str(tmp_path / "no_existe.txt"))
+
+        assert filtro.evaluar("10.1.1.1", "bot") is None
+
+
+class TestFiltradoEnHandler:
+
+    def test_evento_filtrado_no_llega_a_repositorios_ni_productor(self, tmp_path):
+        ruta_uas = tmp_path / "user_agents.txt"
+        ruta_uas.write_text("bot\n")
+
+        servicio_publicacion = Mock()
+        servicio_validacion = Mock()
+        servicio_validacion.validar_evento_completo = AsyncMock()
+        repo_eventos = Mock()
+        repo_rate_limiting = Mock()
+
+        handler = ProcesarEventoTrackingHandler(
+            servicio_publicacion=servicio_publicacion,
+            servicio_validacion=servicio_validacion,
+            repo_eventos=repo_eventos,
+            repo_rate_limiting=repo_rate_limiting,
+            servicio_filtrado=FiltroTraficoListasBloqueo(ruta_user_agents=str(ruta_uas))
+        )
+
+        comando = ProcesarEventoTrackingCommand(
+            tipo_evento="CLICK",
+            id_afiliado="afiliado_test_1",
+            timestamp=datetime.now(),
+            ip_origen="8.8.8.8",
+            user_agent="Mozilla/5.0 (compatible; Googlebot/2.1)"
+        )
+
+        resultado = asyncio.run(handler.handle(comando))
+
+        assert resultado['exito'] is False
+        assert resultado['filtrado'] is True
+        assert resultado['estado'] == 'DESCARTADO'
+        servicio_validacion.validar_evento_completo.assert_not_called()
+        assert not repo_eventos.method_calls
+        assert not repo_rate_limiting.method_calls
+        assert not servicio_publicacion.method_calls
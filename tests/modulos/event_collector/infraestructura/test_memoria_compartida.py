@@ -0,0 +1,108 @@
+import asyncio
+import time
+import multiprocessing
+import pytest
+from datetime import datetime, timedelta
+
+from src.aeropartners.modulos.event_collector.infraestructura import memoria_compartida
+from src.aeropartners.modulos.event_collector.infraestructura.memoria_compartida import (
+    SharedMemoryRepositorioEventos, SharedMemoryRepositorioRateLimiting
+)
+
+
+def _incrementar_en_proceso(directorio, veces):
+    repo = SharedMemoryRepositorioRateLimiting(total_slots=64, directorio=directorio)
+    for _ in range(veces):
+        asyncio.run(repo.incrementar_contador("afiliado_test_1", 1))
+
+
+class TestSharedMemoryRepositorioEventos:
+
+    def test_deduplicacion_entre_instancias(self, tmp_path):
+        repo_a = SharedMemoryRepositorioEventos(total_slots=64, directorio=str(tmp_path))
+        repo_b = SharedMemoryRepositorioEventos(total_slots=64, directorio=str(tmp_path))
+
+        asyncio.run(repo_a.guardar_evento_temporal("hash_1", datetime.now()))
+
+        assert asyncio.run(repo_b.existe_evento("hash_1")) is True
+        assert asyncio.run(repo_b.existe_evento("hash_2")) is False
+
+    def test_limpieza_de_eventos_antiguos(self, tmp_path):
+        repo = SharedMemoryRepositorioEventos(total_slots=64, directorio=str(tmp_path))
+        asyncio.run(repo.guardar_evento_temporal("hash_1", datetime.now()))
+        time.sleep(0.01)
+
+        assert asyncio.run(repo.limpiar_eventos_antiguos(max_antiguedad_horas=0)) == 1
+        assert asyncio.run(repo.existe_evento("hash_1")) is False
+
+    def test_bucket_lleno_desaloja_el_mas_antiguo(self, tmp_path):
+        repo = SharedMemoryRepositorioEventos(total_slots=4, slots_por_bucket=4, directorio=str(tmp_path))
+
+        for i in range(5):
+            asyncio.run(repo.guardar_evento_temporal(f"hash_{i}", datetime.now()))
+
+        assert asyncio.run(repo.existe_evento("hash_0")) is False
+        assert asyncio.run(repo.existe_evento("hash_4")) is True
+        assert repo.obtener_metricas()['desalojos_proceso'] == 1
+
+    def test_lote_conserva_solo_el_ttl_restante(self, tmp_path, monkeypatch):
+        repo = SharedMemoryRepositorioEventos(ttl_horas=1, total_slots=64, directorio=str(tmp_path))
+        ahora = datetime.now()
+
+        guardados = asyncio.run(repo.guardar_eventos_temporales_lote([
+            ("hash_reciente", ahora - timedelta(minutes=10)),
+            ("hash_vencido", ahora - timedelta(hours=2))
+        ]))
+
+        assert guardados == 1
+        assert asyncio.run(repo.existe_evento("hash_reciente")) is True
+        assert asyncio.run(repo.existe_evento("hash_vencido")) is False
+
+        reloj = time.time() + 55 * 60
+        monkeypatch.setattr(memoria_compartida.time, "time", lambda: reloj)
+        assert asyncio.run(repo.existe_evento("hash_reciente")) is False
+
+
+class TestSharedMemoryRepositorioRateLimiting:
+
+    def test_contador_compartido_entre_instancias(self, tmp_path):
+        repo_a = SharedMemoryRepositorioRateLimiting(total_slots=64, directorio=str(tmp_path))
+        repo_b = SharedMemoryRepositorioRateLimiting(total_slots=64, directorio=str(tmp_path))
+
+        assert asyncio.run(repo_a.incrementar_contador("afiliado_test_1", 1)) == 1
+        assert asyncio.run(repo_b.incrementar_contador("afiliado_test_1", 1)) == 2
+        assert asyncio.run(repo_a.incrementar_contador("afiliado_test_1", 60)) == 1
+
+        assert asyncio.run(repo_b.obtener_contador_actual("afiliado_test_1", 1)) == 2
+        assert asyncio.run(repo_b.obtener_contador_actual("afiliado_test_2", 1)) == 0
+
+    def test_resetear_contador(self, tmp_path):
+        repo = SharedMemoryRepositorioRateLimiting(total_slots=64, directorio=str(tmp_path))
+        asyncio.run(repo.incrementar_contador("afiliado_test_1", 1))
+        asyncio.run(repo.incrementar_contador("afiliado_test_1", 60))
+        asyncio.run(repo.incrementar_contador("afiliado_test_2", 1))
+
+        asyncio.run(repo.resetear_contador("afiliado_test_1"))
+
+        assert asyncio.run(repo.obtener_contador_actual("afiliado_test_1", 1)) == 0
+        assert asyncio.run(repo.obtener_contador_actual("afiliado_test_1", 60)) == 0
+        assert asyncio.run(repo.obtener_contador_actual("afiliado_test_2", 1)) == 1
+
+    def test_incrementos_concurrentes_entre_procesos(self, tmp_path):
+        minuto_inicio = int(time.time() // 60)
+        contexto = multiprocessing.get_context("fork")
+        procesos = [
+            contexto.Process(target=_incrementar_en_proceso, args=(str(tmp_path), 50))
+            for _ in range(4)
+        ]
+        for proceso in procesos:
+            proceso.start()
+        for proceso in procesos:
+            proceso.join(timeout=30)
+
+        repo = SharedMemoryRepositorioRateLimiting(total_slots=64, directorio=str(tmp_path))
+        contador = asyncio.run(repo.obtener_contador_actual("afiliado_test_1", 1))
+
+        if int(time.time() // 60) != minuto_inicio:
+            pytest.skip("La ventana de un minuto cambió durante la prueba")
+        assert contador == 200
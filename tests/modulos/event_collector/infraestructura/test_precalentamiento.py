@@ -0,0 +1,99 @@
+import json
+import time
+import asyncio
+from unittest.mock import Mock, patch
+
+from src.aeropartners.modulos.event_collector.infraestructura.precalentamiento import PrecalentadorDeduplicacion
+from src.aeropartners.modulos.event_collector.infraestructura.repositorios import InMemoryRepositorioEventos
+
+
+def _mensaje(hash_evento, publicado_ms):
+    mensaje = Mock()
+    mensaje.publish_timestamp.return_value = publicado_ms
+    mensaje.properties.return_value = {"schema_version": "v1"}
+    if hash_evento is None:
+        mensaje.data.return_value = b"no-json"
+    else:
+        mensaje.data.return_value = json.dumps({
+            "schema_version": "v1",
+            "data": {"metadatos_sistema": {"hash_evento": hash_evento}}
+        }).encode("utf-8")
+    return mensaje
+
+
+def _reader(mensajes):
+    pendientes = list(mensajes)
+    reader = Mock()
+    reader.has_message_available.side_effect = lambda: bool(pendientes)
+    reader.read_next.side_effect = lambda timeout_millis=None: pendientes.pop(0)
+    return reader
+
+
+class TestPrecalentadorDeduplicacion:
+
+    def test_carga_hashes_de_la_ventana(self):
+        ahora_ms = int(time.time() * 1000)
+        reader_clicks = _reader([
+            _mensaje("hash_1", ahora_ms - 60_000),
+            _mensaje(None, ahora_ms - 50_000),
+            _mensaje("hash_2", ahora_ms - 40_000),
+            _mensaje("hash_futuro", ahora_ms + 60_000)
+        ])
+        reader_conversiones = _reader([_mensaje("hash_3", ahora_ms - 30_000)])
+
+        cliente = Mock()
+        cliente.create_reader.side_effect = [reader_clicks, reader_conversiones]
+        repo = InMemoryRepositorioEventos()
+
+        precalentador = PrecalentadorDeduplicacion(
+            repo_eventos=repo,
+            pulsar_url="pulsar://localhost:6650",
+            ventana_minutos=10,
+            topics=["tracking.commands.RegisterClick.v1", "tracking.commands.RegisterConversion.v1"],
+            tamano_lote=1
+        )
+
+        with patch("pulsar.Client", return_value=cliente):
+            precalentador.ejecutar()
+
+        assert precalentador.listo
+        assert precalentador.estado == PrecalentadorDeduplicacion.COMPLETADO
+        assert asyncio.run(repo.existe_evento("hash_1"))
+        assert asyncio.run(repo.existe_evento("hash_3"))
+        assert not asyncio.run(repo.existe_evento("hash_futuro"))
+
+        segundos_seek = reader_clicks.seek.call_args[0][0] / 1000
+        assert abs(segundos_seek - (time.time() - 600)) < 5
+
+        metricas = precalentador.obtener_metricas()
+        assert metricas['hashes_cargados'] == 3
+        assert metricas['mensajes_invalidos'] == 1
+        assert metricas['progreso'] == 1.0
+        reader_clicks.close.assert_called_once()
+
+    def test_fallo_degrada_a_listo(self):
+        precalentador = PrecalentadorDeduplicacion(
+            repo_eventos=InMemoryRepositorioEventos(),
+            pulsar_url="pulsar://localhost:6650",
+            ventana_minutos=5
+        )
+        assert not precalentador.listo
+
+        with patch("pulsar.Client", side_effect=Exception("broker caído")):
+            precalentador.ejecutar()
+
+        assert precalentador.listo
+        assert precalentador.estado == PrecalentadorDeduplicacion.FALLIDO
+        assert precalentador.obtener_metricas()['error'] == "broker caído"
+
+    def test_ventana_cero_deshabilita(self):
+        precalentador = PrecalentadorDeduplicacion(
+            repo_eventos=None,
+            pulsar_url="pulsar://localhost:6650",
+            ventana_minutos=0
+        )
+
+        precalentador.iniciar()
+
+        assert precalentador.listo
+        assert precalentador.estado == PrecalentadorDeduplicacion.DESHABILITADO
@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from unittest.mock import Mock
+
+from src.aeropartners.modulos.event_collector.infraestructura.repositorios import (
+    RedisRepositorioEventos, RedisRepositorioRateLimiting
+)
+
+
+@pytest.fixture
+def redis_client():
+    cliente = Mock()
+    cliente.keys.side_effect = AssertionError("KEYS bloquea Redis y no debe usarse")
+    return cliente
+
+
+class TestRedisRepositorioEventos:
+
+    def test_limpieza_dentro_del_ttl_no_recorre_keyspace(self, redis_client):
+        repo = RedisRepositorioEventos(redis_client, ttl_horas=24)
+
+        eliminados = asyncio.run(repo.limpiar_eventos_antiguos(max_antiguedad_horas=24))
+
+        assert eliminados == 0
+        redis_client.scan_iter.assert_not_called()
+
+    def test_limpieza_incremental_por_lotes(self, redis_client):
+        repo = RedisRepositorioEventos(redis_client, ttl_horas=24, tamano_lote_scan=2)
+        keys = [f"event_collector:eventos:h{i}" for i in range(3)]
+        redis_client.scan_iter.return_value = iter(keys)
+
+        # TTL restante: h0 reciente, h1 con 23 h de antigüedad, h2 con 20 h de antigüedad
+        pipe = Mock()
+        pipe.execute.side_effect = [[23 * 3600, 1 * 3600], [4 * 3600]]
+        redis_client.pipeline.return_value = pipe
+
+        eliminados = asyncio.run(repo.limpiar_eventos_antiguos(max_antiguedad_horas=12))
+
+        assert eliminados == 2
+        redis_client.scan_iter.assert_called_once_with(match="event_collector:eventos:*", count=2)
+        assert redis_client.unlink.call_args_list[0].args == ("event_collector:eventos:h1",)
+        assert redis_client.unlink.call_args_list[1].args == ("event_collector:eventos:h2",)
+
+
+class TestRedisRepositorioRateLimiting:
+
+    def test_incremento_registra_ventana_en_indice(self, redis_client):
+        repo = RedisRepositorioRateLimiting(redis_client)
+        pipe = Mock()
+        pipe.execute.return_value = [7, True, 0, True]
+        redis_client.pipeline.return_value = pipe
+
+        contador = asyncio.run(repo.incrementar_contador("afiliado_1", ventana_minutos=5))
+
+        assert contador == 7
+        pipe.sadd.assert_called_once_with("event_collector:rate_limit:afiliado_1:ventanas", 5)
+
+    def test_reseteo_sin_recorrer_keyspace(self, redis_client):
+        repo = RedisRepositorioRateLimiting(redis_client)
+        redis_client.smembers.return_value = {"1"}
+
+        asyncio.run(repo.resetear_contador("afiliado_1"))
+
+        ventana_actual = repo._ventana_actual(1)
+        redis_client.unlink.assert_called_once_with(
+            "event_collector:rate_limit:afiliado_1:ventanas",
+            f"event_collector:rate_limit:afiliado_1:1m:{ventana_actual}",
+            f"event_collector:rate_limit:afiliado_1:1m:{ventana_actual - 1}"
+        )
+        redis_client.scan_iter.assert_not_called()
@@ -0,0 +1,111 @@
+import json
+import asyncio
+import pytest
+from datetime import datetime
+from unittest.mock import Mock
+
+from src.aeropartners.modulos.event_collector.infraestructura.serializacion import (
+    CodificadorTrackingJSON, CodificadorTrackingAvro, crear_codificador, decodificar_mensaje
+)
+from src.aeropartners.modulos.event_collector.infraestructura.adaptadores import PulsarEventPublisher
+from src.aeropartners.modulos.event_collector.aplicacion.handlers import ProcesarEventoTrackingHandler
+from src.aeropartners.modulos.event_collector.aplicacion.comandos import ProcesarEventoTrackingCommand
+
+
+@pytest.fixture
+def evento_tracking():
+    handler = ProcesarEventoTrackingHandler(
+        servicio_publicacion=Mock(),
+        servicio_validacion=Mock(),
+        repo_eventos=Mock(),
+        repo_rate_limiting=Mock()
+    )
+    comando = ProcesarEventoTrackingCommand(
+        tipo_evento="CONVERSION",
+        id_afiliado="afiliado_test_1",
+        timestamp=datetime(2024, 5, 10, 14, 30, 15, 123000),
+        id_campana="7f9c2b1e-4d3a-4c5b-9e8f-1a2b3c4d5e6f",
+        url="https://tienda.example/checkout",
+        parametros_tracking={"utm_source": "google", "pos": 3},
+        datos_custom={"orden": "A-1"},
+        valor_conversion=149.9,
+        moneda="USD",
+        ip_origen="10.0.0.1",
+        user_agent="Mozilla/5.0",
+        session_id="sesion_1"
+    )
+    return handler._crear_evento_tracking(comando)
+
+
+@pytest.fixture
+def mensaje(evento_tracking):
+    return {
+        "schema_version": "v2",
+        "event_type": "CONVERSION",
+        "timestamp": datetime(2024, 5, 10, 14, 30, 16, 456000).isoformat(),
+        "data": evento_tracking.obtener_datos_para_publicacion(),
+        "partition_key": "afiliado_test_1#7f9c2b1e-4d3a-4c5b-9e8f-1a2b3c4d5e6f"
+    }
+
+
+class TestCodificadorTrackingAvro:
+
+    def test_ida_y_vuelta_conserva_el_sobre(self, mensaje):
+        codificador = CodificadorTrackingAvro()
+
+        decodificado = codificador.decodificar(codificador.codificar(mensaje))
+
+        assert decodificado == mensaje
+
+    def test_mas_compacto_que_json(self, mensaje):
+        avro = CodificadorTrackingAvro().codificar(mensaje)
+        json_v1 = CodificadorTrackingJSON().codificar(mensaje)
+
+        assert len(avro) < len(json_v1) / 2
+
+
+class TestNegociacionPorSchemaVersion:
+
+    def test_decodifica_segun_propiedad(self, mensaje):
+        avro = CodificadorTrackingAvro().codificar(mensaje)
+        json_v1 = json.dumps(mensaje).encode("utf-8")
+
+        assert decodificar_mensaje(avro, {"schema_version": "v2"})["data"] == mensaje["data"]
+        assert decodificar_mensaje(json_v1, {"schema_version": "v1"}) == mensaje
+        assert decodificar_mensaje(json_v1) == mensaje
+
+    def test_version_desconocida(self):
+        with pytest.raises(ValueError):
+            decodificar_mensaje(b"{}", {"schema_version": "v9"})
+
+    def test_formato_configurable(self):
+        assert crear_codificador("json").SCHEMA_VERSION == "v1"
+        assert crear_codificador("AVRO").SCHEMA_VERSION == "v2"
+        with pytest.raises(ValueError):
+            crear_codificador("xml")
+
+
+class TestPublicacionBinaria:
+
+    def test_publica_con_schema_version_y_content_type(self, evento_tracking):
+        publisher = PulsarEventPublisher.__new__(PulsarEventPublisher)
+        publisher.codificador = crear_codificador("avro")
+        publisher.producers = {}
+        publisher.client = Mock()
+        producer = publisher.client.create_producer.return_value
+        producer.send.return_value.message_id.return_value = "1:2:3"
+
+        mensaje_id = asyncio.run(publisher.publicar_evento(
+            tipo_evento=evento_tracking.tipo_evento,
+            contexto=evento_tracking.contexto,
+            payload=evento_tracking.payload,
+            metadatos=evento_tracking.obtener_datos_para_publicacion()
+        ))
+
+        assert mensaje_id == "1:2:3"
+        datos, = producer.send.call_args[0]
+        propiedades = producer.send.call_args[1]["properties"]
+        assert propiedades["schema_version"] == "v2"
+        assert propiedades["content_type"] == "avro/binary"
+        decodificado = decodificar_mensaje(datos, propiedades)
+        assert decodificado["data"]["metadatos_sistema"]["hash_evento"] == evento_tracking.hash_evento
@@ -0,0 +1,128 @@
+from datetime import date, datetime
+from unittest.mock import Mock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from src.aeropartners.modulos.pagos.dominio.entidades import Pago
+from src.aeropartners.modulos.pagos.dominio.enums import EstadoPago
+from src.aeropartners.modulos.pagos.dominio.objetos_valor import Dinero, Moneda
+from src.aeropartners.modulos.pagos.infraestructura.adaptadores import RepositorioPagosSQLAlchemy
+from src.aeropartners.modulos.pagos.infraestructura.agregados import AgregadosPagos
+from src.aeropartners.seedwork.infraestructura.uow import UnidadDeTrabajoSQLAlchemy
+
+
+def _pago(referencia, monto=10.0, id_afiliado="af_1", fecha_creacion=datetime(2024, 12, 1, 10)):
+    pago = Pago(id_afiliado=id_afiliado, monto=Dinero(monto, Moneda.USD), referencia_pago=referencia)
+    pago.fecha_creacion = fecha_creacion
+    return pago
+
+
+def _filas(sesion):
+    sentencia = sesion.execute.call_args.args[0]
+    filas = [{columna.name: valor for columna, valor in fila.items()} for fila in sentencia._multi_values[0]]
+    return sorted(filas, key=lambda fila: (fila["id_afiliado"], fila["dia"]))
+
+
+class TestAgregadosPagos:
+
+    def test_creados_se_agrupan_por_afiliado_moneda_y_dia(self):
+        sesion = Mock()
+        pagos = [_pago("ref-1"), _pago("ref-2", monto=5.0), _pago("ref-3", id_afiliado="af_2")]
+
+        AgregadosPagos().registrar_creados(sesion, pagos)
+
+        filas = _filas(sesion)
+        assert [(f["id_afiliado"], f["moneda"], f["dia"]) for f in filas] == [
+            ("af_1", "USD", date(2024, 12, 1)), ("af_2", "USD", date(2024, 12, 1))
+        ]
+        assert filas[0]["cantidad"] == 2 and filas[0]["monto_total"] == 15.0
+        assert filas[0]["exitosos"] == 0
+
+    def test_transicion_mueve_el_pago_entre_estados(self):
+        sesion = Mock()
+        pago = _pago("ref-1")
+        pago.estado = EstadoPago.REVERSADO
+
+        AgregadosPagos().registrar_transicion(sesion, pago, desde=EstadoPago.EXITOSO)
+
+        fila, = _filas(sesion)
+        assert (fila["cantidad"], fila["exitosos"], fila["monto_exitoso"]) == (0, -1, -10.0)
+        assert (fila["reversados"], fila["monto_reversado"]) == (1, 10.0)
+
+    def test_transicion_entre_estados_en_curso_no_escribe(self):
+        sesion = Mock()
+        pago = _pago("ref-1")
+        pago.estado = EstadoPago.PROCESANDO
+
+        AgregadosPagos().registrar_transicion(sesion, pago, desde=EstadoPago.PENDIENTE)
+
+        sesion.execute.assert_not_called()
+
+    def test_upsert_suma_a_los_totales_existentes(self):
+        sesion = Mock()
+
+        AgregadosPagos().registrar_creados(sesion, [_pago("ref-1")])
+
+        sql = str(sesion.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (id_afiliado, moneda, dia) DO UPDATE" in sql
+        assert "cantidad = (pagos_agregados_diarios.cantidad + excluded.cantidad)" in sql
+
+
+@patch("src.aeropartners.modulos.pagos.infraestructura.agregados.SessionLocal")
+class TestResumenAgregados:
+
+    def _agregados(self, inicializado):
+        agregados = AgregadosPagos()
+        agregados._inicializado = Mock(return_value=inicializado)
+        agregados._recalcular = Mock()
+        agregados._leer = Mock(return_value=[])
+        return agregados
+
+    def test_lee_los_totales_sin_recontar(self, _session):
+        agregados = self._agregados(inicializado=True)
+
+        assert agregados.obtener_resumen()["filas"] == []
+
+        agregados._recalcular.assert_not_called()
+
+    def test_recuenta_si_no_fueron_inicializados(self, session):
+        agregados = self._agregados(inicializado=False)
+
+        agregados.obtener_resumen()
+
+        agregados._recalcular.assert_called_once()
+        session.return_value.commit.assert_called_once()
+
+    def test_recuento_bloquea_los_totales_e_inserta_el_marcador(self, _session):
+        db = Mock()
+
+        AgregadosPagos()._recalcular(db)
+
+        sentencias = [str(llamada.args[0]) for llamada in db.execute.call_args_list]
+        assert "LOCK TABLE pagos_agregados_diarios IN SHARE ROW EXCLUSIVE MODE" in sentencias[0]
+        assert "UNION ALL" in sentencias[1]
+        assert db.execute.call_args.args[1] == {"marcador": "", "dia_marcador": date(1970, 1, 1)}
+
+
+class TestRepositorioActualizaAgregados:
+
+    def test_lote_solo_suma_los_pagos_insertados(self):
+        sesion = Mock()
+        sesion.execute.return_value.scalars.return_value = iter(["ref-1"])
+        uow = UnidadDeTrabajoSQLAlchemy(Mock(return_value=sesion))
+
+        RepositorioPagosSQLAlchemy(uow).agregar_lote([_pago("ref-1"), _pago("ref-2")])
+
+        fila, = _filas(sesion)
+        assert fila["cantidad"] == 1
+
+    def test_transicion_rechazada_no_toca_los_agregados(self):
+        sesion = Mock()
+        sesion.execute.return_value.scalar.return_value = None
+        uow = UnidadDeTrabajoSQLAlchemy(Mock(return_value=sesion))
+        pago = _pago("ref-1")
+        pago.estado = EstadoPago.EXITOSO
+
+        assert not RepositorioPagosSQLAlchemy(uow).transicionar(pago, desde=EstadoPago.PROCESANDO)
+
+        assert sesion.execute.call_count == 1
@@ -0,0 +1,136 @@
+import json
+import uuid
+from unittest.mock import Mock
+
+from src.aeropartners.modulos.pagos.aplicacion.handlers import ObtenerEstadoPagoHandler
+from src.aeropartners.modulos.pagos.aplicacion.queries import ObtenerEstadoPagoQuery
+from src.aeropartners.modulos.pagos.dominio.entidades import Pago
+from src.aeropartners.modulos.pagos.dominio.enums import EstadoPago
+from src.aeropartners.modulos.pagos.dominio.objetos_valor import Dinero, Moneda
+from src.aeropartners.modulos.pagos.infraestructura.cache_estado import CacheEstadoPagos
+from src.aeropartners.modulos.pagos.infraestructura.oyente_eventos import OyenteEventosPagos
+
+
+class Reloj:
+
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self):
+        return self.ahora
+
+
+def _cache(capacidad=10):
+    reloj = Reloj()
+    cache = CacheEstadoPagos(capacidad=capacidad, ttl_segundos=2, reloj=reloj)
+    cache.al_cambiar_conexion(True)
+    return cache, reloj
+
+
+class TestCacheEstadoPagos:
+
+    def test_estados_en_curso_vencen_por_ttl(self):
+        cache, reloj = _cache()
+        cache.guardar("p1", {"estado": "PENDIENTE"}, cache.marca())
+
+        assert cache.obtener("p1") == {"estado": "PENDIENTE"}
+        reloj.ahora = 3
+        assert cache.obtener("p1") is None
+
+    def test_estados_finales_no_vencen_mientras_hay_oyente(self):
+        cache, reloj = _cache()
+        cache.guardar("p1", {"estado": "EXITOSO"}, cache.marca())
+        reloj.ahora = 3600
+
+        assert cache.obtener("p1") == {"estado": "EXITOSO"}
+
+    def test_sin_oyente_todos_los_estados_vencen(self):
+        cache, reloj = _cache()
+        cache.al_cambiar_conexion(False)
+        cache.guardar("p1", {"estado": "EXITOSO"}, cache.marca())
+        reloj.ahora = 3
+
+        assert cache.obtener("p1") is None
+
+    def test_evento_invalida_la_entrada(self):
+        cache, _ = _cache()
+        cache.guardar("p1", {"estado": "EXITOSO"}, cache.marca())
+
+        cache.aplicar_evento("PagoRevertido", {"id_pago": "p1"})
+
+        assert cache.obtener("p1") is None
+
+    def test_lectura_anterior_a_la_invalidacion_no_se_guarda(self):
+        cache, _ = _cache()
+        marca = cache.marca()
+        cache.aplicar_evento("PagoRevertido", {"id_pago": "p1"})
+
+        cache.guardar("p1", {"estado": "EXITOSO"}, marca)
+
+        assert cache.obtener("p1") is None
+
+    def test_descarta_la_entrada_menos_usada(self):
+        cache, _ = _cache(capacidad=2)
+        for id_pago in ("p1", "p2"):
+            cache.guardar(id_pago, {"estado": "EXITOSO"}, cache.marca())
+        cache.obtener("p1")
+        cache.guardar("p3", {"estado": "EXITOSO"}, cache.marca())
+
+        assert cache.obtener("p2") is None
+        assert cache.obtener("p1") is not None
+
+
+class TestObtenerEstadoPagoConCache:
+
+    def test_segunda_consulta_no_lee_el_repositorio(self):
+        cache, _ = _cache()
+        pago = Pago(id_afiliado="af_1", monto=Dinero(100.0, Moneda.USD), referencia_pago="ref-1")
+        pago.estado = EstadoPago.EXITOSO
+        repositorio = Mock()
+        repositorio.obtener_por_id.return_value = pago
+        handler = ObtenerEstadoPagoHandler(repositorio, cache)
+        query = ObtenerEstadoPagoQuery(id_pago=pago.id)
+
+        primera = handler.handle(query).resultado
+        segunda = handler.handle(query).resultado
+
+        assert primera == segunda and segunda["estado"] == "EXITOSO"
+        repositorio.obtener_por_id.assert_called_once()
+
+    def test_pago_inexistente_no_se_guarda(self):
+        cache, _ = _cache()
+        repositorio = Mock()
+        repositorio.obtener_por_id.return_value = None
+        handler = ObtenerEstadoPagoHandler(repositorio, cache)
+
+        for _ in range(2):
+            assert handler.handle(ObtenerEstadoPagoQuery(id_pago=uuid.uuid4())).resultado is None
+        assert repositorio.obtener_por_id.call_count == 2
+
+
+class TestOyenteEventosPagos:
+
+    def test_despacha_tipo_y_datos_a_los_manejadores(self):
+        oyente = OyenteEventosPagos(pulsar_url="pulsar://localhost:6650")
+        manejador = Mock()
+        fallido = Mock(side_effect=RuntimeError("boom"))
+        oyente.suscribir(fallido)
+        oyente.suscribir(manejador)
+        mensaje = json.dumps({"event_type": "PagoExitoso", "data": {"id_pago": "p1"}}).encode("utf-8")
+
+        oyente._despachar(mensaje, {"event_type": "PagoExitoso"})
+        oyente._despachar(b"no-json")
+
+        manejador.assert_called_once_with("PagoExitoso", {"id_pago": "p1"})
+        assert oyente.obtener_metricas()["errores_manejadores"] == 1
+
+    def test_notifica_cambios_de_conexion_una_vez(self):
+        oyente = OyenteEventosPagos(pulsar_url="pulsar://localhost:6650")
+        observador = Mock()
+        oyente.al_cambiar_conexion(observador)
+
+        oyente._cambiar_conexion(True)
+        oyente._cambiar_conexion(True)
+        oyente._cambiar_conexion(False)
+
+        assert [c.args for c in observador.call_args_list] == [(True,), (False,)]
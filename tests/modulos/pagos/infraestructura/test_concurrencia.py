@@ -0,0 +1,154 @@
+import signal
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from src.aeropartners.modulos.pagos.dominio.servicios import PasarelaDePagos, ResultadoPago
+from src.aeropartners.modulos.pagos.infraestructura.adaptadores import (
+    PasarelaConcurrenciaLimitada, StripeAdapter, limites_concurrencia_pasarelas
+)
+from src.aeropartners.modulos.pagos.infraestructura.concurrencia import EjecutorOrdenadoPorClave
+from src.aeropartners.modulos.pagos.infraestructura.pulsar_consumer import PulsarEventConsumer
+
+
+class _PasarelaLenta(PasarelaDePagos):
+    nombre = "lenta"
+    soporta_consulta = True
+
+    def __init__(self):
+        self.simultaneas = 0
+        self.maximo_simultaneas = 0
+        self._lock = threading.Lock()
+
+    def procesar_pago(self, referencia, monto, moneda, id_afiliado):
+        with self._lock:
+            self.simultaneas += 1
+            self.maximo_simultaneas = max(self.maximo_simultaneas, self.simultaneas)
+        time.sleep(0.02)
+        with self._lock:
+            self.simultaneas -= 1
+        return ResultadoPago(exitoso=True)
+
+    def consultar_pago(self, referencia):
+        return None
+
+
+class TestEjecutorOrdenadoPorClave:
+
+    def test_preserva_orden_por_clave_y_paraleliza_entre_claves(self):
+        ejecutor = EjecutorOrdenadoPorClave(max_workers=8, max_en_vuelo=100)
+        procesados = {"a": [], "b": [], "c": []}
+
+        def tarea(clave, secuencia):
+            time.sleep(0.01)
+            procesados[clave].append(secuencia)
+
+        inicio = time.perf_counter()
+        for secuencia in range(10):
+            for clave in procesados:
+                ejecutor.enviar(clave, tarea, clave, secuencia)
+        ejecutor.cerrar(esperar=True)
+        duracion = time.perf_counter() - inicio
+
+        assert all(secuencias == list(range(10)) for secuencias in procesados.values())
+        # En serie tomaría 30 * 10 ms; en paralelo por clave ~10 * 10 ms
+        assert duracion < 0.25
+
+    def test_acota_tareas_en_vuelo(self):
+        ejecutor = EjecutorOrdenadoPorClave(max_workers=1, max_en_vuelo=2)
+        liberar = threading.Event()
+
+        assert ejecutor.enviar("a", liberar.wait)
+        assert ejecutor.enviar("b", lambda: None)
+        assert not ejecutor.enviar("c", lambda: None, timeout=0.05)
+
+        liberar.set()
+        ejecutor.cerrar(esperar=True)
+        assert ejecutor.en_vuelo == 0
+
+    def test_error_en_tarea_no_detiene_la_clave(self):
+        ejecutor = EjecutorOrdenadoPorClave(max_workers=2)
+        resultados = []
+
+        ejecutor.enviar("a", Mock(side_effect=RuntimeError("falla")))
+        ejecutor.enviar("a", resultados.append, "siguiente")
+        ejecutor.cerrar(esperar=True)
+
+        assert resultados == ["siguiente"]
+
+
+class TestPasarelaConcurrenciaLimitada:
+
+    def test_limita_llamadas_simultaneas(self):
+        pasarela = _PasarelaLenta()
+        limitada = PasarelaConcurrenciaLimitada(pasarela, limite=2)
+        hilos = [
+            threading.Thread(target=limitada.procesar_pago, args=(f"ref_{i}", 10.0, "USD", "afiliado"))
+            for i in range(8)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        assert pasarela.maximo_simultaneas == 2
+
+    def test_lee_limites_desde_el_entorno(self, monkeypatch):
+        monkeypatch.setenv("PAYMENT_GATEWAY_CONCURRENCY", "stripe=16, PayPal=4")
+
+        assert limites_concurrencia_pasarelas() == {"stripe": 16, "paypal": 4}
+
+
+class TestPulsarEventConsumerConfirmaciones:
+
+    def _consumer(self):
+        handlers = signal.getsignal(signal.SIGINT), signal.getsignal(signal.SIGTERM)
+        try:
+            consumer = PulsarEventConsumer(max_workers=2)
+        finally:
+            signal.signal(signal.SIGINT, handlers[0])
+            signal.signal(signal.SIGTERM, handlers[1])
+        consumer.consumer = Mock()
+        return consumer
+
+    def _mensaje(self, cuerpo: bytes):
+        mensaje = Mock()
+        mensaje.data.return_value = cuerpo
+        mensaje.partition_key.return_value = ""
+        return mensaje
+
+    def test_ack_individual_si_el_mensaje_se_procesa(self):
+        consumer = self._consumer()
+        mensaje = self._mensaje(b'{"event_type": "PagoExitoso", "data": {"id_afiliado": "af_1"}}')
+
+        consumer._procesar_y_confirmar(mensaje)
+
+        consumer.consumer.acknowledge.assert_called_once_with(mensaje)
+        consumer.consumer.negative_acknowledge.assert_not_called()
+
+    def test_nack_si_el_mensaje_falla(self):
+        consumer = self._consumer()
+        mensaje = self._mensaje(b"no-json")
+
+        consumer._procesar_y_confirmar(mensaje)
+
+        consumer.consumer.negative_acknowledge.assert_called_once_with(mensaje)
+        consumer.consumer.acknowledge.assert_not_called()
+
+    def test_sin_consulta_en_la_pasarela_no_reconcilia(self):
+        consumer = self._consumer()
+        consumer._pasarela = StripeAdapter()
+
+        assert consumer._crear_reconciliador() is None
+
+    def test_reconcilia_si_la_pasarela_permite_consultar(self, monkeypatch):
+        monkeypatch.delenv("PAGOS_RECONCILIATION_ENABLED", raising=False)
+        consumer = self._consumer()
+        consumer._pasarela = PasarelaConcurrenciaLimitada(_PasarelaLenta(), limite=2)
+
+        assert consumer._crear_reconciliador() is not None
+
+    def test_clave_de_orden_es_el_afiliado(self):
+        consumer = self._consumer()
+
+        assert consumer._clave_orden(self._mensaje(b'{"data": {"id_afiliado": "af_9"}}')) == "af_9"
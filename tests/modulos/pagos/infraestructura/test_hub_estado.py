@@ -0,0 +1,53 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.aeropartners.modulos.pagos.infraestructura.hub_estado import HubEstadoPagos, HubSaturadoExcepcion
+
+
+class TestHubEstadoPagos:
+
+    def test_aviso_desde_otro_hilo_despierta_la_espera(self):
+        hub = HubEstadoPagos(max_suscriptores=10)
+
+        async def escenario():
+            with hub.abrir("p1") as suscripcion:
+                threading.Timer(0.05, hub.publicar, args=("PagoExitoso", {"id_pago": "p1"})).start()
+                return await suscripcion.esperar(2)
+
+        assert asyncio.run(escenario()) == "PagoExitoso"
+        assert hub.obtener_metricas()["suscripciones"] == 0
+
+    def test_ignora_otros_pagos_y_eventos(self):
+        hub = HubEstadoPagos(max_suscriptores=10)
+
+        async def escenario():
+            with hub.abrir("p1") as suscripcion:
+                hub.publicar("PagoExitoso", {"id_pago": "p2"})
+                hub.publicar("PagoProcesado", {"id_pago": "p1"})
+                return await suscripcion.esperar(0.05)
+
+        assert asyncio.run(escenario()) is None
+
+    def test_reencolado_despierta_la_espera(self):
+        hub = HubEstadoPagos(max_suscriptores=10)
+
+        async def escenario():
+            with hub.abrir("p1") as suscripcion:
+                hub.publicar("PagoPendiente", {"id_pago": "p1"})
+                return await suscripcion.esperar(1)
+
+        assert asyncio.run(escenario()) == "PagoPendiente"
+
+    def test_limite_de_suscriptores(self):
+        hub = HubEstadoPagos(max_suscriptores=1)
+
+        async def escenario():
+            with hub.abrir("p1"):
+                with pytest.raises(HubSaturadoExcepcion):
+                    hub.abrir("p2")
+            hub.abrir("p2").cerrar()
+
+        asyncio.run(escenario())
+        assert hub.obtener_metricas()["rechazadas"] == 1
@@ -0,0 +1,160 @@
+import json
+import signal
+import uuid
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.aeropartners.modulos.pagos.dominio.entidades import Pago
+from src.aeropartners.modulos.pagos.dominio.enums import EstadoPago
+from src.aeropartners.modulos.pagos.dominio.objetos_valor import Dinero, Moneda
+from src.aeropartners.modulos.pagos.dominio.servicios import ResultadoPago
+from src.aeropartners.modulos.pagos.infraestructura.adaptadores import RepositorioPagosSQLAlchemy
+from src.aeropartners.modulos.pagos.infraestructura.inbox import InboxPagos, id_evento_valido
+from src.aeropartners.modulos.pagos.infraestructura.pasarela_http import PasarelaNoDisponibleExcepcion
+from src.aeropartners.modulos.pagos.infraestructura.pulsar_consumer import PulsarEventConsumer
+
+
+def _pago(estado=EstadoPago.PENDIENTE):
+    pago = Pago(id_afiliado="af_1", monto=Dinero(100.0, Moneda.USD), referencia_pago="ref-1")
+    pago.estado = estado
+    return pago
+
+
+class TestInboxPagos:
+
+    def test_registrar_detecta_duplicados_por_la_fila_retornada(self):
+        inbox = InboxPagos()
+        db = Mock()
+        db.execute.return_value.first.side_effect = [(uuid.uuid4(),), None]
+
+        assert inbox.registrar(db, uuid.uuid4(), "PagoPendiente")
+        assert not inbox.registrar(db, uuid.uuid4(), "PagoPendiente")
+
+    def test_debe_purgar_una_vez_por_intervalo(self):
+        inbox = InboxPagos(intervalo_segundos=3600)
+
+        assert inbox.debe_purgar()
+        assert not inbox.debe_purgar()
+
+    def test_id_evento_valido(self):
+        id_evento = uuid.uuid4()
+
+        assert id_evento_valido(str(id_evento)) == id_evento
+        assert id_evento_valido("no-uuid") is None
+        assert id_evento_valido(None) is None
+
+
+class TestRepositorioTransicionConInbox:
+
+    @patch("src.aeropartners.modulos.pagos.infraestructura.adaptadores.INBOX_PAGOS")
+    @patch("src.aeropartners.modulos.pagos.infraestructura.adaptadores.SessionLocal")
+    def test_evento_duplicado_descarta_la_transaccion(self, session_local, inbox):
+        db = session_local.return_value
+        inbox.registrar.return_value = False
+
+        aplicado = RepositorioPagosSQLAlchemy().transicionar(
+            _pago(), desde=EstadoPago.PROCESANDO, id_evento=uuid.uuid4(), tipo_evento="PagoPendiente"
+        )
+
+        assert not aplicado
+        db.begin_nested.return_value.rollback.assert_called_once()
+        db.rollback.assert_not_called()
+        db.execute.assert_not_called()
+        db.add.assert_not_called()
+
+    @patch("src.aeropartners.modulos.pagos.infraestructura.adaptadores.SessionLocal")
+    def test_version_o_estado_distintos_no_escriben(self, session_local):
+        db = session_local.return_value
+        db.execute.return_value.scalar.return_value = None
+
+        aplicado = RepositorioPagosSQLAlchemy().transicionar(_pago(), desde=EstadoPago.PROCESANDO)
+
+        assert not aplicado
+        db.begin_nested.return_value.rollback.assert_called_once()
+        db.rollback.assert_not_called()
+        db.add.assert_not_called()
+
+    @patch("src.aeropartners.modulos.pagos.infraestructura.adaptadores.SessionLocal")
+    def test_transicion_aplicada_actualiza_la_version(self, session_local):
+        db = session_local.return_value
+        db.execute.return_value.scalar.return_value = 3
+        pago = _pago(EstadoPago.EXITOSO)
+
+        assert RepositorioPagosSQLAlchemy().transicionar(pago, desde=EstadoPago.PROCESANDO)
+        assert pago.version == 3
+        db.begin_nested.return_value.commit.assert_called_once()
+        db.commit.assert_called_once()
+
+
+@patch("src.aeropartners.modulos.pagos.infraestructura.pulsar_consumer.UnidadDeTrabajoSQLAlchemy")
+class TestPulsarEventConsumerTransiciones:
+
+    def _consumer(self):
+        handlers = signal.getsignal(signal.SIGINT), signal.getsignal(signal.SIGTERM)
+        try:
+            consumer = PulsarEventConsumer(max_workers=2)
+        finally:
+            signal.signal(signal.SIGINT, handlers[0])
+            signal.signal(signal.SIGTERM, handlers[1])
+        consumer._repositorio = Mock()
+        consumer._fabrica_repositorio = Mock(return_value=consumer._repositorio)
+        consumer._pasarela = Mock()
+        consumer._pasarela.procesar_pago.return_value = ResultadoPago(exitoso=True)
+        return consumer
+
+    def _mensaje(self, id_evento, pago):
+        mensaje = Mock()
+        mensaje.data.return_value = json.dumps({
+            "event_type": "PagoPendiente",
+            "event_id": str(id_evento),
+            "data": {"id_pago": str(pago.id), "referencia_pago": "ref-1", "monto": 100.0,
+                     "moneda": "USD", "id_afiliado": "af_1"}
+        }).encode("utf-8")
+        return mensaje
+
+    def test_pago_no_reclamado_no_se_cobra(self, uow):
+        consumer = self._consumer()
+        consumer._repositorio.reclamar_para_procesar.return_value = None
+
+        consumer._process_message(self._mensaje(uuid.uuid4(), _pago()))
+
+        consumer._pasarela.procesar_pago.assert_not_called()
+        consumer._repositorio.transicionar.assert_not_called()
+
+    def test_registra_el_evento_en_la_transicion_final(self, uow):
+        consumer = self._consumer()
+        pago = _pago(EstadoPago.PROCESANDO)
+        consumer._repositorio.reclamar_para_procesar.return_value = pago
+        id_evento = uuid.uuid4()
+
+        consumer._process_message(self._mensaje(id_evento, pago))
+
+        consumer._pasarela.procesar_pago.assert_called_once()
+        consumer._repositorio.transicionar.assert_called_once_with(
+            pago, desde=EstadoPago.PROCESANDO, id_evento=id_evento, tipo_evento="PagoPendiente"
+        )
+        # Reclamo y resultado: dos transacciones cortas
+        assert uow.return_value.__enter__.return_value.commit.call_count == 2
+        assert pago.estado == EstadoPago.EXITOSO
+
+    def test_pasarela_no_disponible_libera_el_reclamo(self, uow):
+        consumer = self._consumer()
+        pago = _pago(EstadoPago.PROCESANDO)
+        consumer._repositorio.reclamar_para_procesar.return_value = pago
+        consumer._pasarela.procesar_pago.side_effect = PasarelaNoDisponibleExcepcion("caída")
+
+        with pytest.raises(PasarelaNoDisponibleExcepcion):
+            consumer._process_message(self._mensaje(uuid.uuid4(), pago))
+
+        consumer._repositorio.transicionar.assert_called_once_with(pago, desde=EstadoPago.PROCESANDO)
+        assert pago.estado == EstadoPago.PENDIENTE
+
+    def test_error_de_base_de_datos_rechaza_el_mensaje(self, uow):
+        consumer = self._consumer()
+        consumer._repositorio.reclamar_para_procesar.side_effect = RuntimeError("conexión perdida")
+
+        with pytest.raises(RuntimeError):
+            consumer._process_message(self._mensaje(uuid.uuid4(), _pago()))
+
+        consumer._pasarela.procesar_pago.assert_not_called()
@@ -0,0 +1,65 @@
+import json
+import uuid
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from src.aeropartners.modulos.pagos.infraestructura.outbox import OutboxProcessor, PulsarOutboxProcessor
+
+
+def _evento_outbox():
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        tipo_evento="PagoPendiente",
+        datos_evento=json.dumps({"id_pago": str(uuid.uuid4())})
+    )
+
+
+def _procesador_con_broker(rechazados=()):
+    def publicar_async(event_type, event_data, event_id, callback):
+        callback(event_id not in rechazados, event_id)
+
+    with patch('src.aeropartners.modulos.pagos.infraestructura.outbox.PulsarEventProducer') as productor:
+        productor.return_value.publish_event_async.side_effect = publicar_async
+        procesador = PulsarOutboxProcessor(tamano_lote=10, timeout_confirmacion_segundos=1)
+    return procesador
+
+
+class TestPulsarOutboxProcessor:
+
+    def test_solo_retorna_eventos_confirmados_por_el_broker(self):
+        eventos = [_evento_outbox() for _ in range(3)]
+        procesador = _procesador_con_broker(rechazados={str(eventos[1].id)})
+
+        confirmados = procesador._publicar_lote(eventos)
+
+        assert confirmados == [eventos[0].id, eventos[2].id]
+        procesador.pulsar_producer.flush.assert_called_once()
+
+    def test_error_al_encolar_no_bloquea_el_lote(self):
+        eventos = [_evento_outbox() for _ in range(2)]
+        procesador = _procesador_con_broker()
+
+        def publicar_async(event_type, event_data, event_id, callback):
+            if event_id == str(eventos[0].id):
+                raise RuntimeError("cola llena")
+            callback(True, event_id)
+        procesador.pulsar_producer.publish_event_async.side_effect = publicar_async
+
+        assert procesador._publicar_lote(eventos) == [eventos[1].id]
+
+
+class TestOutboxProcessorLotes:
+
+    def test_procesa_lotes_hasta_vaciar_pendientes(self):
+        procesador = OutboxProcessor(tamano_lote=2)
+        procesador._procesar_lote = Mock(side_effect=[(2, 2), (2, 2), (1, 1)])
+
+        assert procesador.procesar_eventos_pendientes() == 5
+        assert procesador._procesar_lote.call_count == 3
+
+    def test_se_detiene_si_ningun_evento_del_lote_se_publica(self):
+        procesador = OutboxProcessor(tamano_lote=2)
+        procesador._procesar_lote = Mock(side_effect=[(2, 0), (2, 2)])
+
+        assert procesador.procesar_eventos_pendientes() == 0
+        assert procesador._procesar_lote.call_count == 1
@@ -0,0 +1,55 @@
+import signal
+import socket
+from unittest.mock import Mock
+
+import pytest
+
+from src.aeropartners.modulos.pagos.infraestructura.outbox_worker import OutboxRelayWorker
+
+
+class _ConexionFalsa:
+    """Conexión con fileno real para que select() funcione como con psycopg2"""
+
+    def __init__(self):
+        self.lado_servidor, self.lado_cliente = socket.socketpair()
+        self.notifies = []
+
+    def fileno(self):
+        return self.lado_cliente.fileno()
+
+    def notificar(self, cantidad=1):
+        self.lado_servidor.send(b"n")
+        self._pendientes = cantidad
+
+    def poll(self):
+        self.lado_cliente.recv(16)
+        self.notifies.extend(Mock() for _ in range(self._pendientes))
+
+
+@pytest.fixture
+def worker():
+    handlers = signal.getsignal(signal.SIGINT), signal.getsignal(signal.SIGTERM)
+    worker = OutboxRelayWorker(procesador=Mock(), intervalo_respaldo_segundos=0.05)
+    worker._conexion = _ConexionFalsa()
+    worker.running = True
+    yield worker
+    signal.signal(signal.SIGINT, handlers[0])
+    signal.signal(signal.SIGTERM, handlers[1])
+
+
+class TestOutboxRelayWorker:
+
+    def test_despierta_con_notificaciones(self, worker):
+        worker._conexion.notificar(cantidad=3)
+
+        assert worker._esperar_notificacion() == "3 notificaciones"
+        assert worker._conexion.notifies == []
+
+    def test_sondeo_de_respaldo_al_vencer_la_espera(self, worker):
+        assert worker._esperar_notificacion() == "respaldo"
+
+    def test_stop_despierta_la_espera(self, worker):
+        worker.intervalo_respaldo_segundos = 30
+        worker.stop()
+
+        assert worker._esperar_notificacion() is None
@@ -0,0 +1,111 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.aeropartners.modulos.pagos.infraestructura.pasarela_http import (
+    PasarelaHTTPAsync, PasarelaNoDisponibleExcepcion, PasarelaSincronaDesdeAsync
+)
+from src.aeropartners.seedwork.infraestructura.circuit_breaker import CircuitBreaker, CircuitoAbiertoExcepcion
+
+
+def _pasarela(respuestas, solicitudes, **kwargs):
+    def responder(solicitud):
+        solicitudes.append(solicitud)
+        return respuestas.pop(0)
+
+    kwargs.setdefault("backoff_base_segundos", 0.001)
+    return PasarelaHTTPAsync(base_url="http://pasarela", api_key="sk", plazo_segundos=5,
+                             timeout_intento_segundos=1, transport=httpx.MockTransport(responder), **kwargs)
+
+
+def _procesar(pasarela):
+    return asyncio.run(pasarela.procesar_pago("ref-1", 100.0, "USD", "afiliado-1"))
+
+
+class TestPasarelaHTTPAsync:
+
+    def test_consultar_cobro_registrado_y_desconocido(self):
+        solicitudes = []
+        pasarela = _pasarela([
+            httpx.Response(200, json={"id": "ch_1", "estado": "exitoso"}),
+            httpx.Response(404, json={"error": "Cobro no encontrado"})
+        ], solicitudes)
+
+        assert asyncio.run(pasarela.consultar_pago("ref-1")).exitoso
+        assert asyncio.run(pasarela.consultar_pago("ref-2")) is None
+        assert [(s.method, s.url.path) for s in solicitudes] == [("GET", "/v1/charges/ref-1"),
+                                                                ("GET", "/v1/charges/ref-2")]
+
+    def test_consulta_sin_resultado_no_da_el_cobro_por_fallido(self):
+        solicitudes = []
+        pasarela = _pasarela([
+            httpx.Response(401, json={"error": "API key inválida"}),
+            httpx.Response(200, json={"id": "ch_1", "estado": "en_revision"}),
+            httpx.Response(402, json={"id": "ch_2", "estado": "rechazado", "error": "Tarjeta rechazada"})
+        ], solicitudes)
+
+        with pytest.raises(PasarelaNoDisponibleExcepcion):
+            asyncio.run(pasarela.consultar_pago("ref-1"))
+        with pytest.raises(PasarelaNoDisponibleExcepcion):
+            asyncio.run(pasarela.consultar_pago("ref-1"))
+        assert not asyncio.run(pasarela.consultar_pago("ref-2")).exitoso
+
+    def test_reintenta_errores_transitorios_con_la_misma_clave_de_idempotencia(self):
+        solicitudes = []
+        pasarela = _pasarela([
+            httpx.Response(503),
+            httpx.Response(200, json={"id": "ch_1", "estado": "exitoso"})
+        ], solicitudes)
+
+        resultado = _procesar(pasarela)
+
+        assert resultado.exitoso
+        assert resultado.referencia_transaccion == "ch_1"
+        assert [s.headers["Idempotency-Key"] for s in solicitudes] == ["ref-1", "ref-1"]
+
+    def test_rechazo_del_emisor_no_se_reintenta(self):
+        solicitudes = []
+        pasarela = _pasarela([
+            httpx.Response(402, json={"id": "ch_2", "estado": "rechazado", "error": "Tarjeta rechazada"})
+        ], solicitudes)
+
+        resultado = _procesar(pasarela)
+
+        assert not resultado.exitoso
+        assert resultado.mensaje_error == "Tarjeta rechazada"
+        assert len(solicitudes) == 1
+
+    def test_agotar_reintentos_lanza_no_disponible(self):
+        solicitudes = []
+        pasarela = _pasarela([httpx.Response(503)] * 3, solicitudes, max_reintentos=2)
+
+        with pytest.raises(PasarelaNoDisponibleExcepcion):
+            _procesar(pasarela)
+        assert len(solicitudes) == 3
+
+    def test_circuito_abierto_falla_sin_llamar_a_la_pasarela(self):
+        solicitudes = []
+        breaker = CircuitBreaker("prueba", umbral_fallos=2, tiempo_apertura_segundos=60)
+        pasarela = _pasarela([httpx.Response(503)] * 2, solicitudes, circuit_breaker=breaker)
+
+        with pytest.raises(CircuitoAbiertoExcepcion):
+            _procesar(pasarela)
+        with pytest.raises(CircuitoAbiertoExcepcion):
+            _procesar(pasarela)
+        assert len(solicitudes) == 2
+
+
+class TestPasarelaSincronaDesdeAsync:
+
+    def test_ejecuta_en_el_loop_compartido(self):
+        solicitudes = []
+        pasarela = PasarelaSincronaDesdeAsync(_pasarela([
+            httpx.Response(200, json={"id": "ch_1", "estado": "exitoso"}),
+            httpx.Response(200, json={"id": "ch_2", "estado": "exitoso"})
+        ], solicitudes))
+        try:
+            assert pasarela.procesar_pago("ref-1", 10.0, "USD", "a").exitoso
+            assert pasarela.procesar_pago("ref-2", 10.0, "USD", "a").referencia_transaccion == "ch_2"
+        finally:
+            pasarela.cerrar()
@@ -0,0 +1,80 @@
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.aeropartners.modulos.pagos.dominio.entidades import Pago
+from src.aeropartners.modulos.pagos.dominio.enums import EstadoPago
+from src.aeropartners.modulos.pagos.dominio.eventos import PagoExitoso, PagoPendiente
+from src.aeropartners.modulos.pagos.dominio.objetos_valor import Dinero, Moneda
+from src.aeropartners.modulos.pagos.dominio.servicios import ResultadoPago
+from src.aeropartners.modulos.pagos.infraestructura.adaptadores import StripeAdapter
+from src.aeropartners.modulos.pagos.infraestructura.pasarela_http import PasarelaNoDisponibleExcepcion
+from src.aeropartners.modulos.pagos.infraestructura.reconciliacion import ReconciliadorPagos
+
+
+def _atascado(referencia="ref-1"):
+    pago = Pago(id_afiliado="af_1", monto=Dinero(100.0, Moneda.USD), referencia_pago=referencia)
+    pago.estado = EstadoPago.PROCESANDO
+    return pago
+
+
+@patch("src.aeropartners.modulos.pagos.infraestructura.reconciliacion.UnidadDeTrabajoSQLAlchemy")
+class TestReconciliadorPagos:
+
+    def _reconciliador(self, lotes, tamano_lote=2):
+        repositorio = Mock()
+        repositorio.reclamar_atascados.side_effect = lotes
+        repositorio.transicionar.return_value = True
+        pasarela = Mock()
+        reconciliador = ReconciliadorPagos(pasarela, fabrica_repositorio=Mock(return_value=repositorio),
+                                           tamano_lote=tamano_lote, concurrencia=2)
+        return reconciliador, repositorio, pasarela
+
+    def test_cobro_registrado_emite_el_evento_final(self, uow):
+        pago = _atascado()
+        reconciliador, repositorio, pasarela = self._reconciliador([[pago]])
+        pasarela.consultar_pago.return_value = ResultadoPago(exitoso=True, referencia_transaccion="ch_1")
+
+        resumen = reconciliador.ejecutar()
+
+        assert resumen["exitoso"] == 1
+        repositorio.transicionar.assert_called_once_with(pago, desde=EstadoPago.PROCESANDO)
+        assert pago.estado == EstadoPago.EXITOSO
+        assert [type(e) for e in pago.eventos] == [PagoExitoso]
+
+    def test_cobro_desconocido_se_reencola(self, uow):
+        pago = _atascado()
+        reconciliador, _, pasarela = self._reconciliador([[pago]])
+        pasarela.consultar_pago.return_value = None
+
+        assert reconciliador.ejecutar()["reencolado"] == 1
+        assert pago.estado == EstadoPago.PENDIENTE
+        assert [type(e) for e in pago.eventos] == [PagoPendiente]
+
+    def test_pasarela_no_disponible_no_cambia_el_pago(self, uow):
+        reconciliador, repositorio, pasarela = self._reconciliador([[_atascado()]])
+        pasarela.consultar_pago.side_effect = PasarelaNoDisponibleExcepcion("caída")
+
+        assert reconciliador.ejecutar()["sin_respuesta"] == 1
+        repositorio.transicionar.assert_not_called()
+
+    def test_transicion_perdida_cuenta_como_conflicto(self, uow):
+        reconciliador, repositorio, pasarela = self._reconciliador([[_atascado()]])
+        pasarela.consultar_pago.return_value = ResultadoPago(exitoso=False, mensaje_error="Tarjeta rechazada")
+        repositorio.transicionar.return_value = False
+
+        assert reconciliador.ejecutar()["conflicto"] == 1
+        uow.return_value.__enter__.return_value.commit.assert_called_once()
+
+    def test_recorre_el_backlog_en_lotes(self, uow):
+        lotes = [[_atascado("a"), _atascado("b")], [_atascado("c")]]
+        reconciliador, repositorio, pasarela = self._reconciliador(lotes)
+        pasarela.consultar_pago.return_value = ResultadoPago(exitoso=True)
+
+        assert reconciliador.ejecutar()["exitoso"] == 3
+        assert repositorio.reclamar_atascados.call_count == 2
+        assert repositorio.reclamar_atascados.call_args.args[1] == 2
+
+    def test_rechaza_pasarelas_sin_consulta(self, uow):
+        with pytest.raises(ValueError):
+            ReconciliadorPagos(StripeAdapter())
@@ -0,0 +1,23 @@
+from unittest.mock import Mock
+
+from src.aeropartners.modulos.pagos.infraestructura import recuento
+
+
+class TestRecuento:
+
+    def test_recuenta_solo_los_modelos_pedidos(self, monkeypatch):
+        modelos = {"agregados": Mock(), "outbox": Mock()}
+        monkeypatch.setattr(recuento, "MODELOS", modelos)
+
+        recuento.main(["agregados"])
+
+        modelos["agregados"].assert_called_once()
+        modelos["outbox"].assert_not_called()
+
+    def test_sin_argumentos_recuenta_todos(self, monkeypatch):
+        modelos = {"agregados": Mock(), "outbox": Mock()}
+        monkeypatch.setattr(recuento, "MODELOS", modelos)
+
+        recuento.main([])
+
+        assert all(modelo.call_count == 1 for modelo in modelos.values())
@@ -0,0 +1,38 @@
+from unittest.mock import Mock
+
+from src.aeropartners.modulos.pagos.dominio.entidades import Pago
+from src.aeropartners.modulos.pagos.dominio.eventos import PagoPendiente
+from src.aeropartners.modulos.pagos.dominio.objetos_valor import Dinero, Moneda
+from src.aeropartners.modulos.pagos.infraestructura.adaptadores import RepositorioPagosSQLAlchemy
+from src.aeropartners.seedwork.infraestructura.uow import UnidadDeTrabajoSQLAlchemy
+
+
+def _pago(referencia):
+    pago = Pago(id_afiliado="af_1", monto=Dinero(10.0, Moneda.USD), referencia_pago=referencia)
+    pago.agregar_evento(PagoPendiente(
+        id_pago=str(pago.id), id_afiliado="af_1", monto=10.0, moneda="USD", referencia_pago=referencia
+    ))
+    return pago
+
+
+class TestAgregarLote:
+
+    def test_inserciones_de_varias_filas_y_outbox_solo_de_los_insertados(self):
+        sesion = Mock()
+        sesion.execute.return_value.scalars.return_value = iter(["ref-1", "ref-3"])
+        uow = UnidadDeTrabajoSQLAlchemy(Mock(return_value=sesion))
+
+        insertadas = RepositorioPagosSQLAlchemy(uow).agregar_lote([_pago("ref-1"), _pago("ref-2"), _pago("ref-3")])
+
+        assert insertadas == {"ref-1", "ref-3"}
+        sentencia_pagos, sentencia_outbox = [llamada.args[0] for llamada in sesion.execute.call_args_list[:2]]
+        assert sentencia_pagos.table.name == "pagos"
+        assert sentencia_outbox.table.name == "outbox"
+        assert len(sentencia_outbox._multi_values[0]) == 2
+        sesion.commit.assert_not_called()
+
+    def test_lote_vacio_no_consulta(self):
+        fabrica = Mock()
+
+        assert RepositorioPagosSQLAlchemy(UnidadDeTrabajoSQLAlchemy(fabrica)).agregar_lote([]) == set()
+        fabrica.assert_not_called()
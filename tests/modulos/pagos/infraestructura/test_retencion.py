@@ -0,0 +1,64 @@
+from unittest.mock import Mock
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from src.aeropartners.modulos.pagos.infraestructura.modelos import OutboxModel
+from src.aeropartners.modulos.pagos.infraestructura.retencion import (
+    RetencionOutbox, SQL_ARCHIVAR_LOTE, SQL_ELIMINAR_LOTE
+)
+
+
+def _retencion(**kwargs):
+    retencion = RetencionOutbox(dias_retencion=7, tamano_lote=100, intervalo_segundos=3600,
+                                pausa_entre_lotes_segundos=0, **kwargs)
+    retencion._es_particionada = Mock(return_value=False)
+    return retencion
+
+
+class TestRetencionOutbox:
+
+    def test_elimina_en_lotes_hasta_agotar(self):
+        retencion = _retencion(archivar=False)
+        retencion._ejecutar_lote = Mock(side_effect=[100, 100, 30])
+
+        assert retencion.ejecutar() == 230
+        assert retencion._ejecutar_lote.call_count == 3
+        assert retencion._ejecutar_lote.call_args[0][0] is SQL_ELIMINAR_LOTE
+
+    def test_archiva_cuando_esta_habilitado(self):
+        retencion = _retencion(archivar=True)
+        retencion._ejecutar_lote = Mock(return_value=0)
+
+        retencion.ejecutar()
+
+        assert retencion._ejecutar_lote.call_args[0][0] is SQL_ARCHIVAR_LOTE
+
+    def test_descarta_particiones_si_la_tabla_esta_particionada(self):
+        retencion = _retencion()
+        retencion._es_particionada.return_value = True
+        retencion._mantener_particiones = Mock(return_value=3)
+        retencion._ejecutar_lote = Mock()
+
+        assert retencion.ejecutar() == 3
+        retencion._ejecutar_lote.assert_not_called()
+
+    def test_respeta_el_intervalo_entre_ejecuciones(self):
+        retencion = _retencion()
+        retencion._ejecutar_lote = Mock(return_value=5)
+
+        assert retencion.ejecutar_si_corresponde() == 5
+        assert retencion.ejecutar_si_corresponde() == 0
+        assert retencion._ejecutar_lote.call_count == 1
+
+
+class TestIndicesOutbox:
+
+    def test_indices_parciales(self):
+        ddl = {
+            indice.name: str(CreateIndex(indice).compile(dialect=postgresql.dialect()))
+            for indice in OutboxModel.__table__.indexes
+        }
+
+        assert "WHERE procesado = false" in ddl["ix_outbox_pendientes"]
+        assert "WHERE procesado = true" in ddl["ix_outbox_procesados"]
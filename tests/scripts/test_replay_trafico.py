@@ -0,0 +1,94 @@
+import sys
+import json
+import time
+import uuid
+import asyncio
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+RUTA_SCRIPT = Path(__file__).resolve().parents[2] / "scripts" / "replay_trafico.py"
+especificacion = importlib.util.spec_from_file_location("replay_trafico", RUTA_SCRIPT)
+replay_trafico = importlib.util.module_from_spec(especificacion)
+sys.modules["replay_trafico"] = replay_trafico
+especificacion.loader.exec_module(replay_trafico)
+
+
+class TestNormalizarRuta:
+
+    def test_uuids_y_numeros_se_agrupan(self):
+        assert replay_trafico.normalizar_ruta(f"/pagos/{uuid.uuid4()}") == "/pagos/{id}"
+        assert replay_trafico.normalizar_ruta("/reporting/report/123?x=1") == "/reporting/report/{id}"
+
+    def test_segmentos_con_digitos_no_son_identificadores(self):
+        assert replay_trafico.normalizar_ruta("/v2/oauth2/token") == "/v2/oauth2/token"
+        assert replay_trafico.normalizar_ruta("/event-collector/rate-limit/af_1") == "/event-collector/rate-limit/af_1"
+
+
+class TestLeerCaptura:
+
+    def test_ignora_lineas_invalidas_y_filtra_por_prefijo(self, tmp_path):
+        captura = tmp_path / "captura.jsonl"
+        captura.write_text("\n".join([
+            json.dumps({"ts": "2024-05-10T14:30:15", "method": "POST", "path": "/event-collector/events"}),
+            "",
+            "no-es-json",
+            json.dumps({"ts": 1715351416.5, "method": "GET"}),
+            json.dumps({"ts": 1715351417.0, "method": "GET", "path": "/pagos/1"}),
+            json.dumps({"ts": 1715351418.0, "method": "GET", "path": "/event-collector/health"})
+        ]), encoding="utf-8")
+
+        peticiones = list(replay_trafico.leer_captura(str(captura), prefijo="/event-collector"))
+
+        assert [p["path"] for _, p in peticiones] == ["/event-collector/events", "/event-collector/health"]
+        assert peticiones[1][0] == 1715351418.0
+
+
+class TestRitmo:
+
+    def _reproductor(self, modo, factor=1.0):
+        reproductor = replay_trafico.Reproductor("http://localhost", modo=modo, factor=factor)
+        reproductor._inicio_reloj = time.monotonic()
+        return reproductor
+
+    def test_escalado_comprime_los_intervalos(self):
+        reproductor = self._reproductor("escalado", factor=4)
+
+        async def escenario():
+            await reproductor._esperar_turno(100.0)
+            inicio = time.monotonic()
+            await reproductor._esperar_turno(100.4)
+            return time.monotonic() - inicio
+
+        assert asyncio.run(escenario()) == pytest.approx(0.1, abs=0.05)
+
+    def test_maximo_no_espera(self):
+        reproductor = self._reproductor("maximo")
+
+        inicio = time.monotonic()
+        asyncio.run(reproductor._esperar_turno(1000.0))
+
+        assert time.monotonic() - inicio < 0.05
+
+    def test_registra_el_retraso_cuando_va_atrasado(self):
+        reproductor = self._reproductor("original")
+        reproductor._inicio_captura = 100.0
+        reproductor._inicio_reloj = time.monotonic() - 1
+
+        asyncio.run(reproductor._esperar_turno(100.5))
+
+        assert reproductor.retraso_despacho.total == 1
+        assert reproductor.retraso_despacho.maximo >= 450
+
+
+class TestHistogramaLatencias:
+
+    def test_percentiles_con_error_acotado(self):
+        histograma = replay_trafico.HistogramaLatencias()
+        for latencia in range(1, 101):
+            histograma.registrar(float(latencia))
+
+        assert histograma.percentil(50) == pytest.approx(50, rel=0.03)
+        assert histograma.percentil(99) == pytest.approx(99, rel=0.03)
+        assert histograma.resumen()["peticiones"] == 100
@@ -0,0 +1,70 @@
+import pytest
+
+from src.aeropartners.seedwork.infraestructura.circuit_breaker import (
+    CircuitBreaker, CircuitoAbiertoExcepcion, EstadoCircuito
+)
+
+
+class _Reloj:
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self):
+        return self.ahora
+
+
+class TestCircuitBreaker:
+
+    def _breaker(self, reloj, **kwargs):
+        return CircuitBreaker("prueba", umbral_fallos=3, tiempo_apertura_segundos=10, reloj=reloj, **kwargs)
+
+    def test_abre_tras_fallos_consecutivos(self):
+        breaker = self._breaker(_Reloj())
+        for _ in range(3):
+            breaker.permitir()
+            breaker.registrar_fallo()
+
+        assert breaker.estado == EstadoCircuito.ABIERTO
+        with pytest.raises(CircuitoAbiertoExcepcion):
+            breaker.permitir()
+        assert breaker.obtener_metricas()["llamadas_rechazadas"] == 1
+
+    def test_exito_reinicia_los_fallos(self):
+        breaker = self._breaker(_Reloj())
+        breaker.registrar_fallo()
+        breaker.registrar_fallo()
+        breaker.registrar_exito()
+        breaker.registrar_fallo()
+
+        assert breaker.estado == EstadoCircuito.CERRADO
+
+    def test_semi_abierto_permite_una_prueba_y_cierra_con_exito(self):
+        reloj = _Reloj()
+        breaker = self._breaker(reloj)
+        for _ in range(3):
+            breaker.registrar_fallo()
+
+        reloj.ahora = 10
+        assert breaker.estado == EstadoCircuito.SEMI_ABIERTO
+        breaker.permitir()
+        with pytest.raises(CircuitoAbiertoExcepcion):
+            breaker.permitir()
+
+        breaker.registrar_exito()
+        assert breaker.estado == EstadoCircuito.CERRADO
+
+    def test_fallo_en_semi_abierto_reabre(self):
+        reloj = _Reloj()
+        breaker = self._breaker(reloj)
+        for _ in range(3):
+            breaker.registrar_fallo()
+
+        reloj.ahora = 10
+        breaker.permitir()
+        breaker.registrar_fallo()
+
+        assert breaker.estado == EstadoCircuito.ABIERTO
+        reloj.ahora = 15
+        with pytest.raises(CircuitoAbiertoExcepcion) as error:
+            breaker.permitir()
+        assert error.value.reintentar_en_segundos == pytest.approx(5)
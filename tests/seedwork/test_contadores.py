@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from src.aeropartners.seedwork.infraestructura.contadores import ContadoresOutbox, TIPO_MARCADOR
+
+
+def _fila(tipo_evento, total, procesados):
+    return SimpleNamespace(tipo_evento=tipo_evento, total=total, procesados=procesados)
+
+
+class TestContadoresOutbox:
+
+    def test_registra_un_upsert_por_tipo_en_la_sesion_del_llamador(self):
+        contadores = ContadoresOutbox("pagos", "outbox", "tipo_evento", "procesado")
+        db = Mock()
+
+        contadores.registrar_creados(db, ["PagoPendiente", "PagoPendiente", "PagoExitoso"])
+
+        sentencias = [str(llamada.args[0].compile(dialect=postgresql.dialect())) for llamada in db.execute.call_args_list]
+        parametros = [llamada.args[0].compile(dialect=postgresql.dialect()).params for llamada in db.execute.call_args_list]
+        assert len(sentencias) == 2
+        assert "ON CONFLICT (outbox, tipo_evento, shard) DO UPDATE" in sentencias[0]
+        assert {p['tipo_evento']: p['total'] for p in parametros} == {"PagoPendiente": 2, "PagoExitoso": 1}
+
+    def test_eliminados_descuentan_total_y_procesados(self):
+        contadores = ContadoresOutbox("pagos", "outbox", "tipo_evento", "procesado")
+        db = Mock()
+
+        contadores.registrar_eliminados_procesados(db, {"PagoExitoso": 5, "PagoFallido": 0})
+
+        parametros = db.execute.call_args.args[0].compile(dialect=postgresql.dialect()).params
+        assert db.execute.call_count == 1
+        assert (parametros['total'], parametros['procesados']) == (-5, -5)
+
+    @patch('src.aeropartners.seedwork.infraestructura.contadores.SessionLocal')
+    def test_estadisticas_desde_contadores(self, _session):
+        contadores = ContadoresOutbox("pagos", "outbox", "tipo_evento", "procesado")
+        contadores._leer = Mock(return_value=[
+            _fila(TIPO_MARCADOR, 0, 0), _fila("PagoPendiente", 10, 7), _fila("PagoExitoso", 4, 4)
+        ])
+        contadores._recalcular = Mock()
+
+        estadisticas = contadores.obtener_estadisticas()
+
+        contadores._recalcular.assert_not_called()
+        assert estadisticas == {
+            "total_eventos": 14,
+            "eventos_procesados": 11,
+            "eventos_pendientes": 3,
+            "distribucion_por_tipo": {"PagoPendiente": 10, "PagoExitoso": 4}
+        }
+
+    @patch('src.aeropartners.seedwork.infraestructura.contadores.SessionLocal')
+    def test_recuenta_si_no_fueron_inicializados(self, _session):
+        contadores = ContadoresOutbox("pagos", "outbox", "tipo_evento", "procesado")
+        contadores._leer = Mock(side_effect=[[_fila("PagoPendiente", 1, 0)], [_fila(TIPO_MARCADOR, 0, 0)]])
+        contadores._recalcular = Mock()
+
+        assert contadores.obtener_estadisticas()["total_eventos"] == 0
+        contadores._recalcular.assert_called_once()
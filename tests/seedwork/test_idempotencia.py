@@ -0,0 +1,83 @@
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.aeropartners.seedwork.infraestructura.idempotencia import (
+    RegistroIdempotencia, ClaveIdempotenciaInvalidaExcepcion, ClaveIdempotenciaReutilizadaExcepcion,
+    SQL_BLOQUEAR_CLAVE
+)
+
+
+def _guardada(huella, estado_http=200, cuerpo=None):
+    modelo = Mock()
+    modelo.huella = huella
+    modelo.estado_http = estado_http
+    modelo.respuesta = json.dumps(cuerpo or {"id_pago": "p1"})
+    return modelo
+
+
+@patch("src.aeropartners.seedwork.infraestructura.idempotencia.SessionLocal")
+class TestRegistroIdempotencia:
+
+    def _consulta(self, session_local, *resultados):
+        db = session_local.return_value
+        db.query.return_value.filter.return_value.first.side_effect = list(resultados)
+        return db
+
+    def test_reintento_repite_la_respuesta_sin_ejecutar(self, session_local):
+        registro = RegistroIdempotencia("pagos")
+        huella = RegistroIdempotencia.huella({"monto": 10})
+        db = self._consulta(session_local, _guardada(huella))
+        operacion = Mock()
+
+        respuesta = registro.ejecutar("clave-1", huella, operacion)
+
+        assert respuesta.repetida
+        assert respuesta.cuerpo == {"id_pago": "p1"}
+        operacion.assert_not_called()
+        db.execute.assert_not_called()
+
+    def test_primera_ejecucion_bloquea_la_clave_y_guarda_la_respuesta(self, session_local):
+        registro = RegistroIdempotencia("pagos")
+        db = self._consulta(session_local, None, None)
+        operacion = Mock(return_value=(200, {"id_pago": "p1"}))
+
+        respuesta = registro.ejecutar("clave-1", "h", operacion)
+
+        assert not respuesta.repetida
+        assert respuesta.estado_http == 200
+        operacion.assert_called_once()
+        assert db.execute.call_args_list[0].args[0] is SQL_BLOQUEAR_CLAVE
+        assert db.execute.call_count == 2
+        db.commit.assert_called_once()
+
+    def test_duplicado_concurrente_repite_la_respuesta_tras_el_lock(self, session_local):
+        registro = RegistroIdempotencia("pagos")
+        self._consulta(session_local, None, _guardada("h"))
+        operacion = Mock()
+
+        respuesta = registro.ejecutar("clave-1", "h", operacion)
+
+        assert respuesta.repetida
+        operacion.assert_not_called()
+
+    def test_errores_internos_no_se_guardan(self, session_local):
+        registro = RegistroIdempotencia("pagos")
+        db = self._consulta(session_local, None, None)
+
+        respuesta = registro.ejecutar("clave-1", "h", Mock(return_value=(500, {"detail": "error"})))
+
+        assert respuesta.estado_http == 500
+        assert db.execute.call_count == 1
+
+    def test_clave_reutilizada_con_otro_cuerpo(self, session_local):
+        registro = RegistroIdempotencia("pagos")
+        self._consulta(session_local, _guardada("otra"))
+
+        with pytest.raises(ClaveIdempotenciaReutilizadaExcepcion):
+            registro.ejecutar("clave-1", "h", Mock())
+
+    def test_clave_invalida(self, session_local):
+        with pytest.raises(ClaveIdempotenciaInvalidaExcepcion):
+            RegistroIdempotencia("pagos").ejecutar("x" * 256, "h", Mock())
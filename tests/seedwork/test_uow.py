@@ -0,0 +1,59 @@
+from unittest.mock import Mock
+
+import pytest
+
+from src.aeropartners.modulos.pagos.dominio.entidades import Pago
+from src.aeropartners.modulos.pagos.dominio.eventos import PagoPendiente
+from src.aeropartners.modulos.pagos.dominio.objetos_valor import Dinero, Moneda
+from src.aeropartners.modulos.pagos.infraestructura.adaptadores import RepositorioPagosSQLAlchemy
+from src.aeropartners.modulos.pagos.infraestructura.modelos import OutboxModel, PagoModel
+from src.aeropartners.seedwork.infraestructura.uow import UnidadDeTrabajoSQLAlchemy
+
+
+def _pago_con_evento():
+    pago = Pago(id_afiliado="af_1", monto=Dinero(100.0, Moneda.USD), referencia_pago="ref-1")
+    pago.agregar_evento(PagoPendiente(
+        id_pago=str(pago.id), id_afiliado="af_1", monto=100.0, moneda="USD", referencia_pago="ref-1"
+    ))
+    return pago
+
+
+class TestUnidadDeTrabajoSQLAlchemy:
+
+    def test_repositorios_comparten_sesion_y_no_confirman(self):
+        sesion = Mock()
+        sesion.query.return_value.filter.return_value.first.return_value = None
+        fabrica = Mock(return_value=sesion)
+
+        with UnidadDeTrabajoSQLAlchemy(fabrica) as uow:
+            RepositorioPagosSQLAlchemy(uow).agregar(_pago_con_evento())
+            RepositorioPagosSQLAlchemy(uow).obtener_por_referencia("ref-1")
+            sesion.commit.assert_not_called()
+            uow.commit()
+
+        fabrica.assert_called_once()
+        sesion.flush.assert_called_once()
+        sesion.commit.assert_called_once()
+        sesion.close.assert_called_once()
+        agregados = [llamada.args[0] for llamada in sesion.add.call_args_list]
+        assert [type(modelo) for modelo in agregados] == [PagoModel, OutboxModel]
+
+    def test_excepcion_descarta_la_transaccion(self):
+        sesion = Mock()
+
+        with pytest.raises(RuntimeError):
+            with UnidadDeTrabajoSQLAlchemy(Mock(return_value=sesion)) as uow:
+                uow.sesion.add(object())
+                raise RuntimeError("falla")
+
+        sesion.rollback.assert_called_once()
+        sesion.commit.assert_not_called()
+        sesion.close.assert_called_once()
+
+    def test_sin_uso_no_abre_sesion(self):
+        fabrica = Mock()
+
+        with UnidadDeTrabajoSQLAlchemy(fabrica) as uow:
+            uow.commit()
+
+        fabrica.assert_not_called()